@@ -13,7 +13,7 @@ from backend.storage import init_db, PaperRepository
 from backend.cli import run_push_task, test_sources
 
 # Import routes
-from backend.api.routes import papers, config, logs, auth, admin_users
+from backend.api.routes import papers, config, logs, auth, admin_users, metrics, sources
 
 logger = get_logger(__name__)
 
@@ -38,6 +38,8 @@ app.include_router(config.router, prefix="/api")
 app.include_router(logs.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
 app.include_router(admin_users.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
+app.include_router(sources.router, prefix="/api")
 
 
 @app.on_event("startup")
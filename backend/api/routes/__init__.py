@@ -1,5 +1,5 @@
 """API routes"""
-from . import papers, config, logs, auth, admin_users
+from . import papers, config, logs, auth, admin_users, metrics, sources
 
-__all__ = ['papers', 'config', 'logs', 'auth', 'admin_users']
+__all__ = ['papers', 'config', 'logs', 'auth', 'admin_users', 'metrics', 'sources']
 
@@ -0,0 +1,68 @@
+"""
+Runtime metrics routes
+"""
+from fastapi import APIRouter, HTTPException, Depends
+import logging
+from backend.core.security import get_current_user
+from backend.utils.cache import get_tiered_cache
+from backend.utils.http import get_http_client
+from backend.utils.rate_limit import get_adaptive_limiter
+from backend.utils.retry import get_retry_budget, get_retry_metrics
+from backend.storage.quota import get_quota_ledger
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/cache")
+async def get_cache_metrics(user: dict = Depends(get_current_user)):
+    """Get hit/miss/eviction counters of the shared two-tier cache"""
+    try:
+        return {"status": "success", "data": get_tiered_cache().stats()}
+    except Exception as e:
+        logger.error(f"Failed to get cache metrics: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/http")
+async def get_http_metrics(user: dict = Depends(get_current_user)):
+    """Get per-host metrics of the shared HTTP transport (reuse ratio, bytes, latency histogram)"""
+    try:
+        return {"status": "success", "data": get_http_client().metrics()}
+    except Exception as e:
+        logger.error(f"Failed to get HTTP metrics: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/rate-limits")
+async def get_rate_limit_metrics(user: dict = Depends(get_current_user)):
+    """Get limits learned by the adaptive rate limiter per host/credential"""
+    try:
+        return {"status": "success", "data": get_adaptive_limiter().snapshot()}
+    except Exception as e:
+        logger.error(f"Failed to get rate limit metrics: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/quota")
+async def get_quota_usage(window_minutes: int = 60, user: dict = Depends(get_current_user)):
+    """Get current consumption of the cross-process quota ledger (shared by server, scheduler and CLI)"""
+    try:
+        return {"status": "success", "data": get_quota_ledger().usage(window_minutes)}
+    except Exception as e:
+        logger.error(f"Failed to get quota usage: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/retries")
+async def get_retry_stats(user: dict = Depends(get_current_user)):
+    """Get retry counters per source / API and the current run's retry budget"""
+    try:
+        return {
+            "status": "success",
+            "data": {"budget": get_retry_budget().snapshot(), "keys": get_retry_metrics().snapshot()}
+        }
+    except Exception as e:
+        logger.error(f"Failed to get retry metrics: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,38 @@
+"""
+Data source health routes
+"""
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+import logging
+from backend.core.security import get_current_user, require_admin
+from backend.storage.source_health import get_source_health
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/sources", tags=["sources"])
+
+
+@router.get("/health")
+async def get_sources_health(user: dict = Depends(get_current_user)):
+    """Get per-source health: circuit state, success rate, latency and last error"""
+    try:
+        return {"status": "success", "data": get_source_health().snapshot()}
+    except Exception as e:
+        logger.error(f"Failed to get source health: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/health/reset")
+async def reset_sources_health(source: Optional[str] = None, user: dict = Depends(require_admin)):
+    """
+    Close the circuit of one source (or all sources); statistics are kept
+
+    Args:
+        source: Source name (e.g. SemanticScholar); all sources if omitted
+    """
+    try:
+        get_source_health().reset(source)
+        return {"status": "success", "message": f"Circuit reset for {source or 'all sources'}"}
+    except Exception as e:
+        logger.error(f"Failed to reset source health: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
@@ -11,25 +11,32 @@ os.environ.pop('HTTPS_PROXY', None)
 os.environ.pop('ALL_PROXY', None)
 
 import argparse
+import asyncio
 import concurrent.futures
 import datetime
 import logging
-from typing import List
+from typing import List, Optional, Set
 from backend.core.config import Config
 from backend.core.logging import setup_logging, get_logger
-from backend.storage import init_db, PaperRepository
+from backend.storage import init_db, PaperRepository, export_parquet
+from backend.storage.quota import get_quota_ledger
 from backend.sources import (
     BioRxivSource, PubMedSource, RSSSource, EuropePMCSource,
     ScienceNewsSource, GitHubSource, SemanticScholarSource
 )
 from backend.core.ranking import rank_and_select, get_item_id
+from backend.core.deadline import RunDeadline, StageBudget
+from backend.models import SourceResult
 from backend.llm import generate_daily_report, generate_final_summary
 from backend.push import PushPlusSender, EmailSender, WeComSender
+from backend.utils.async_http import AsyncHTTPClient, HAS_HTTPX
+from backend.utils.retry import get_retry_budget
 
 logger = get_logger(__name__)
 
 
-def fetch_papers(sources: List, sent_ids: Set[str], exclude_keywords: List[str]) -> List:
+def fetch_papers(sources: List, sent_ids: Set[str], exclude_keywords: List[str],
+                 refresh: bool = False, budget: Optional[StageBudget] = None) -> List:
     """
     第一步：并发抓取论文数据
     
@@ -37,40 +44,139 @@ def fetch_papers(sources: List, sent_ids: Set[str], exclude_keywords: List[str])
         sources: 数据源列表
         sent_ids: 已处理论文ID集合
         exclude_keywords: 排除关键词列表
+        refresh: 忽略数据源结果缓存，强制重新抓取
+        budget: 抓取阶段时间预算（数据源在截止时截断分页；超过宽限期仍未返回的数据源被放弃）
         
     Returns:
         source_results: 各数据源的抓取结果
     """
     logger.info("\n开始并发抓取数据...")
+    if budget is not None:
+        for source in sources:
+            source.deadline = budget.deadline
+    
+    if Config.ENABLE_ASYNC_FETCH and HAS_HTTPX and not _loop_running():
+        source_results = asyncio.run(fetch_papers_async(sources, sent_ids, exclude_keywords, refresh, budget))
+    else:
+        source_results = _fetch_papers_threaded(sources, sent_ids, exclude_keywords, refresh, budget)
+    
+    if budget is not None:
+        truncated = [f"{s.name}（{s.truncated}）" for s in sources if s.truncated]
+        abandoned = [r.source_name for r in source_results if getattr(r, 'error', None) == FETCH_BUDGET_ERROR]
+        if truncated or abandoned:
+            details = truncated + [f"{name}（未完成，已放弃）" for name in abandoned]
+            budget.exhaust("; ".join(details))
+    
+    return source_results
+
+
+# 超出抓取阶段预算被放弃的数据源的错误信息
+FETCH_BUDGET_ERROR = "超出抓取时间预算，已放弃"
+
+
+def _fetch_timeout(budget: Optional[StageBudget]) -> Optional[float]:
+    """等待数据源返回的最长时间：阶段剩余预算 + 宽限期（留给正在进行的请求收尾）"""
+    if budget is None:
+        return None
+    return budget.remaining() + Config.FETCH_BUDGET_GRACE_SECONDS
+
+
+def _fetch_papers_threaded(sources: List, sent_ids: Set[str], exclude_keywords: List[str],
+                           refresh: bool, budget: Optional[StageBudget]) -> List:
+    """线程池并发抓取"""
     source_results = []
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=len(sources)) as executor:
-        future_to_source = {
-            executor.submit(source.fetch, sent_ids, exclude_keywords): source
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(sources))
+    future_to_source = {
+        executor.submit(source.fetch_cached, sent_ids, exclude_keywords, refresh): source
+        for source in sources
+    }
+    done, not_done = concurrent.futures.wait(future_to_source, timeout=_fetch_timeout(budget))
+    # 未完成的线程无法强制结束，不再等待（数据源会在截止时刻后自行截断）
+    executor.shutdown(wait=not not_done, cancel_futures=True)
+    
+    for future, source in future_to_source.items():
+        if future in not_done:
+            logger.error(f"{source.name} {FETCH_BUDGET_ERROR}")
+            source_results.append(SourceResult(
+                source_name=source.name, papers=[], error=FETCH_BUDGET_ERROR,
+                is_degraded=True, degraded_reason=FETCH_BUDGET_ERROR
+            ))
+            continue
+        try:
+            result = future.result()
+            source_results.append(result)
+            logger.info(f"{source.name}: 获取到 {len(result.papers)} 条结果")
+        except Exception as e:
+            logger.error(f"{source.name} 搜索失败: {e}")
+            source_results.append(
+                type('SourceResult', (), {'source_name': source.name, 'papers': [], 'error': str(e)})()
+            )
+    
+    return source_results
+
+
+def _loop_running() -> bool:
+    """当前线程是否已有运行中的事件循环（此时不能再调用 asyncio.run）"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+async def fetch_papers_async(sources: List, sent_ids: Set[str], exclude_keywords: List[str],
+                             refresh: bool = False, budget: Optional[StageBudget] = None) -> List:
+    """
+    异步并发抓取：有原生异步实现的数据源（GitHub REST 检索）共享一个 AsyncHTTPClient（HTTP/2、单主机并发上限）
+    
+    参数与返回值同 fetch_papers；其余数据源在线程中执行同步 fetch（分页仍由各数据源的线程池并发请求）。
+    超出抓取阶段预算（含宽限期）的数据源任务被取消。
+    """
+    source_results = []
+    
+    async with AsyncHTTPClient(per_host_limit=Config.ASYNC_PER_HOST_LIMIT, http2=Config.ENABLE_HTTP2) as client:
+        tasks = [
+            asyncio.ensure_future(source.afetch_cached(sent_ids, exclude_keywords, refresh, client=client))
             for source in sources
-        }
-        
-        for future in concurrent.futures.as_completed(future_to_source):
-            source = future_to_source[future]
-            try:
-                result = future.result()
-                source_results.append(result)
-                logger.info(f"{source.name}: 获取到 {len(result.papers)} 条结果")
-            except Exception as e:
-                logger.error(f"{source.name} 搜索失败: {e}")
-                source_results.append(
-                    type('SourceResult', (), {'source_name': source.name, 'papers': [], 'error': str(e)})()
-                )
+        ]
+        _, pending = await asyncio.wait(tasks, timeout=_fetch_timeout(budget))
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    for source, task in zip(sources, tasks):
+        if task in pending:
+            logger.error(f"{source.name} {FETCH_BUDGET_ERROR}")
+            source_results.append(SourceResult(
+                source_name=source.name, papers=[], error=FETCH_BUDGET_ERROR,
+                is_degraded=True, degraded_reason=FETCH_BUDGET_ERROR
+            ))
+            continue
+        result = task.exception() or task.result()
+        if isinstance(result, Exception):
+            logger.error(f"{source.name} 搜索失败: {result}")
+            source_results.append(
+                type('SourceResult', (), {'source_name': source.name, 'papers': [], 'error': str(result)})()
+            )
+        else:
+            source_results.append(result)
+            logger.info(f"{source.name}: 获取到 {len(result.papers)} 条结果")
     
     return source_results
 
 
-def score_and_filter(source_results: List) -> List:
+def score_and_filter(source_results: List, budget: Optional[StageBudget] = None,
+                     archive=None, run_id: str = None) -> List:
     """
     第二步：评分和快速AI筛选
     
     Args:
         source_results: 各数据源的抓取结果
+        budget: 快速筛选阶段时间预算（用尽后剩余论文不做 AI 判断，直接保留）
+        archive: 原始响应归档（提供时同时归档本次使用的引用数，供 replay 回放）
+        run_id: 运行ID
         
     Returns:
         filtered_papers: 筛选后的评分论文列表
@@ -84,6 +190,12 @@ def score_and_filter(source_results: List) -> List:
         if result.success():
             all_papers.extend(result.papers)
     
+    # 补全引用数（评分按引用数加分，大部分数据源不提供引用数）
+    if Config.ENABLE_CITATION_ENRICHMENT and all_papers:
+        from backend.sources.citations import enrich_citations
+        enrich_citations(all_papers, deadline=budget.deadline if budget is not None else None,
+                         archive=archive, run_id=run_id)
+    
     # 对当天所有论文进行评分
     logger.info(f"\n对当天所有论文进行评分（共{len(all_papers)}篇）...")
     from backend.core.scoring import score_paper
@@ -113,12 +225,20 @@ def score_and_filter(source_results: List) -> List:
     filtered_papers = []
     filtered_count = 0
     checked_count = 0
+    unchecked_count = 0
     
     for scored_paper in all_scored_papers:
         if scored_paper.score >= RELEVANCE_CHECK_THRESHOLD:
+            if budget is not None and budget.expired():
+                # 时间预算用尽：不再调用 AI，按判断失败的保守策略保留
+                unchecked_count += 1
+                filtered_papers.append(scored_paper)
+                continue
             checked_count += 1
             # 对高分论文进行快速AI判断
-            is_relevant = quick_relevance_check(scored_paper.paper)
+            is_relevant = quick_relevance_check(
+                scored_paper.paper, deadline=budget.deadline if budget is not None else None
+            )
             
             if is_relevant is False:
                 # 不相关，直接过滤
@@ -141,16 +261,19 @@ def score_and_filter(source_results: List) -> List:
     
     if checked_count > 0:
         logger.info(f"✅ [快速筛选] 完成：检查了 {checked_count} 篇高分论文，过滤了 {filtered_count} 篇不相关论文，保留了 {len(filtered_papers)} 篇论文")
+    if unchecked_count > 0:
+        budget.exhaust(f"{unchecked_count} 篇高分论文未做 AI 判断（直接保留）")
     
     return filtered_papers
 
 
-def generate_reports(scored_papers: List) -> tuple:
+def generate_reports(scored_papers: List, budget: Optional[StageBudget] = None) -> tuple:
     """
     第三步：逐篇生成AI报告
     
     Args:
         scored_papers: 评分后的论文列表
+        budget: 报告生成阶段时间预算（用尽后剩余论文不再生成报告，下次运行重新处理）
         
     Returns:
         (all_paper_reports, processed_papers): 所有报告和成功处理的论文
@@ -161,6 +284,10 @@ def generate_reports(scored_papers: List) -> tuple:
     processed_papers = []  # 记录成功处理的论文
     
     for paper_idx, scored_paper in enumerate(scored_papers, 1):
+        if budget is not None and budget.expired():
+            budget.exhaust(f"剩余 {len(scored_papers) - paper_idx + 1} 篇论文未生成报告（未标记为已推送，下次运行重新处理）")
+            break
+        
         logger.info(f"\n{'='*80}")
         logger.info(f"处理论文 {paper_idx}/{len(scored_papers)}")
         logger.info(f"标题: {scored_paper.paper.title[:80]}...")
@@ -170,7 +297,9 @@ def generate_reports(scored_papers: List) -> tuple:
         try:
             # 生成单篇论文报告
             from backend.llm.generator import generate_single_paper_report
-            paper_report = generate_single_paper_report(scored_paper, paper_idx)
+            paper_report = generate_single_paper_report(
+                scored_paper, paper_idx, deadline=budget.deadline if budget is not None else None
+            )
             
             # 检查是否是降级报告
             is_fallback = paper_report and paper_report.startswith("## ⚠️ 报告生成说明")
@@ -305,10 +434,23 @@ def save_and_push(daily_report: str, papers_count: int, source_results: List,
     return push_success
 
 
-def run_push_task(window_days: int = None, top_k: int = None):
-    """执行推送任务（主流程编排）"""
+def run_push_task(window_days: int = None, top_k: int = None, refresh: bool = False,
+                  deadline: str = None):
+    """
+    执行推送任务（主流程编排）
+    
+    Args:
+        window_days: 抓取窗口天数
+        top_k: 选择Top K篇
+        refresh: 忽略数据源结果缓存，强制重新抓取
+        deadline: 目标完成时间（HH:MM，默认 Config.RUN_DEADLINE；未设置时按 RUN_TIME_BUDGET_MINUTES）
+    """
     window_days = window_days or Config.DEFAULT_WINDOW_DAYS
     top_k = top_k or Config.TOP_K
+    # 运行时间预算：按阶段切分剩余时间，超时的工作被截断（未指定完成时间且 RUN_TIME_BUDGET_MINUTES=0 时不限制）
+    plan = RunDeadline.from_config(deadline)
+    # 本次运行的重试预算（所有数据源和 DeepSeek 调用共享，避免重试在各阶段叠加放大延迟）
+    get_retry_budget().reset(Config.RETRY_BUDGET_PER_RUN or None)
     
     # 初始化数据库
     init_db()
@@ -326,6 +468,9 @@ def run_push_task(window_days: int = None, top_k: int = None):
     logger.info(f"抓取窗口：{window_days}天（EuropePMC {Config.EUROPEPMC_WINDOW_DAYS}天）")
     logger.info("=" * 80)
     logger.info(f"运行ID: {run_id}")
+    if plan is not None:
+        logger.info(f"目标完成时间: {plan.deadline_at.strftime('%Y-%m-%d %H:%M')}（时间预算 {plan.total_seconds / 60:.0f} 分钟）")
+        repo.update_run(run_id, deadline_at=plan.deadline_at.isoformat(timespec='seconds'))
     
     try:
         # 获取已处理的论文ID
@@ -342,15 +487,29 @@ def run_push_task(window_days: int = None, top_k: int = None):
             GitHubSource(window_days),
         ]
         
+        # 归档原始响应，供 replay 命令零网络重跑
+        archive = None
+        if Config.ENABLE_PAYLOAD_ARCHIVE:
+            from backend.storage.archive import get_payload_archive
+            archive = get_payload_archive()
+            for source in sources:
+                source.attach_archive(archive, run_id)
+            logger.info(f"原始响应归档已启用: {archive.archive_dir}")
+        
         # 第一步：抓取论文
-        source_results = fetch_papers(sources, sent_ids, Config.EXCLUDE_KEYWORDS)
+        source_results = fetch_papers(
+            sources, sent_ids, Config.EXCLUDE_KEYWORDS, refresh,
+            budget=plan.stage('fetch') if plan else None
+        )
         
         # 第二步：评分和筛选
-        filtered_papers = score_and_filter(source_results)
+        filtered_papers = score_and_filter(
+            source_results, budget=plan.stage('quick_check') if plan else None, archive=archive, run_id=run_id
+        )
         
         if not filtered_papers:
             logger.info("当天没有新论文需要推送")
-            repo.update_run(run_id, status='completed')
+            repo.update_run(run_id, status='completed', budget_exhausted=plan.summary() if plan else None)
             return
         
         # 保存所有论文的评分
@@ -367,7 +526,9 @@ def run_push_task(window_days: int = None, top_k: int = None):
         )
         
         # 第三步：生成报告
-        all_paper_reports, processed_papers = generate_reports(filtered_papers)
+        all_paper_reports, processed_papers = generate_reports(
+            filtered_papers, budget=plan.stage('report') if plan else None
+        )
         
         # 第四步：组装最终报告
         daily_report, relevant_count, irrelevant_count = build_daily_report(all_paper_reports)
@@ -378,8 +539,11 @@ def run_push_task(window_days: int = None, top_k: int = None):
             relevant_count, irrelevant_count, processed_papers
         )
         
-        # 更新运行记录
-        repo.update_run(run_id, status='completed' if push_success else 'failed')
+        # 更新运行记录（含用尽的时间预算阶段）
+        repo.update_run(
+            run_id, status='completed' if push_success else 'failed',
+            budget_exhausted=plan.summary() if plan else None
+        )
         
         logger.info("\n" + "=" * 80)
         logger.info("执行完成！")
@@ -387,8 +551,13 @@ def run_push_task(window_days: int = None, top_k: int = None):
         
     except Exception as e:
         logger.error(f"执行失败: {e}", exc_info=True)
-        repo.update_run(run_id, status='failed', error=str(e))
+        repo.update_run(run_id, status='failed', error=str(e), budget_exhausted=plan.summary() if plan else None)
         raise
+    finally:
+        budget = get_retry_budget().snapshot()
+        logger.info(f"重试预算: 已用 {budget['spent']} 次"
+                    + (f"/{budget['limit']} 次" if budget['limit'] is not None else "")
+                    + (f"，拒绝 {budget['denied']} 次" if budget['denied'] else ""))
 
 
 def save_report_to_file(content: str, papers_count: int, source_results: List, run_id: str,
@@ -417,7 +586,7 @@ def save_report_to_file(content: str, papers_count: int, source_results: List, r
         logger.error(f"保存文件失败: {e}")
 
 
-def test_sources(source_name: str = None):
+def test_sources(source_name: str = None, refresh: bool = False):
     """
     测试数据源
     
@@ -425,6 +594,7 @@ def test_sources(source_name: str = None):
         source_name: 要测试的数据源名称（可选）。如果为 None，则测试所有数据源。
                     可选值: 'biorxiv', 'pubmed', 'rss', 'europepmc', 'sciencenews', 
                            'github', 'semanticscholar'
+        refresh: 忽略数据源结果缓存，强制重新抓取
     """
     logger.info("=" * 80)
     if source_name:
@@ -475,8 +645,16 @@ def test_sources(source_name: str = None):
         if hasattr(source, 'max_pages'):
             logger.info(f"  最大页数: {source.max_pages}")
         
+        # 测试时查看数据源的完整内容：不读取也不写入增量状态（条件请求校验值、已见条目），
+        # 避免影响正式运行
+        source.read_incremental_state = False
+        source.write_incremental_state = False
+        # 测试用于诊断，不受熔断限制（结果仍计入健康状态）
+        source.respect_circuit = False
+        
         try:
-            result = source.fetch(set(), Config.EXCLUDE_KEYWORDS)  # 传入空集合，不进行去重
+            # 传入空集合，不进行去重；结果写入缓存，随后的 run 可直接复用
+            result = source.fetch_cached(set(), Config.EXCLUDE_KEYWORDS, refresh)
             success = result.success()
             count = len(result.papers)
             results[name] = {"success": success, "count": count, "error": result.error}
@@ -489,6 +667,10 @@ def test_sources(source_name: str = None):
                         logger.info(f"  示例 {i}: {paper.title[:60]}...")
             else:
                 logger.error(f"❌ {name} 测试失败: {result.error}")
+            # RSS 类数据源：各 feed 的状态、耗时和大小（从缓存返回时为空）
+            for stat in getattr(source, 'feed_stats', []):
+                latency = f"{stat['latency']:.2f}秒" if stat['latency'] is not None else "-"
+                logger.info(f"  feed {stat['status']:12s} {latency:>8s} {stat['size'] / 1024:8.1f}KB  {stat['url']}")
         except Exception as e:
             logger.error(f"❌ {name} 测试失败: {e}", exc_info=True)
             results[name] = {"success": False, "count": 0, "error": str(e)}
@@ -503,28 +685,199 @@ def test_sources(source_name: str = None):
             logger.info(f"{'':20s} {'':10s} 错误: {result['error'][:100]}")
 
 
+# 支持归档回放的数据源（按 source.name 索引）
+REPLAYABLE_SOURCES = {
+    'bioRxiv': BioRxivSource,
+    'PubMed': PubMedSource,
+    'RSS_TopJournal': RSSSource,
+    'EuropePMC': EuropePMCSource,
+    'ScienceNews': ScienceNewsSource,
+}
+
+
+def replay_run(run_id: str = None, top_k: int = None):
+    """
+    从归档的原始响应回放一次运行：重跑过滤、评分、排序（零网络）
+    
+    不调用 AI 筛选、不生成报告、不推送，也不写入运行记录，适合调整过滤和评分规则后快速对比结果。
+    
+    Args:
+        run_id: 要回放的运行ID（默认最近一次有归档的运行）
+        top_k: 选择Top K篇（默认 Config.TOP_K）
+    """
+    from backend.storage.archive import get_payload_archive, PayloadNotArchived
+    from backend.sources.citations import ARCHIVE_SOURCE as CITATIONS_ARCHIVE_SOURCE, apply_archived_citations
+    
+    init_db()
+    archive = get_payload_archive()
+    run_id = run_id or archive.latest_run_id()
+    if not run_id:
+        logger.error("没有可回放的归档运行，请先设置 ENABLE_PAYLOAD_ARCHIVE=True 执行 run")
+        return
+    
+    archived_sources = archive.list_run_sources(run_id)
+    if not archived_sources:
+        logger.error(f"运行 {run_id} 没有归档的原始响应")
+        return
+    
+    logger.info("=" * 80)
+    logger.info(f"开始回放运行: {run_id}（零网络）")
+    logger.info("=" * 80)
+    
+    sources = []
+    reference_date = None
+    for entry in archived_sources:
+        if entry['source'] == CITATIONS_ARCHIVE_SOURCE:
+            continue
+        source_cls = REPLAYABLE_SOURCES.get(entry['source'])
+        if source_cls is None:
+            logger.warning(f"数据源 {entry['source']} 不支持回放，已跳过")
+            continue
+        # 窗口结束于参考日期前一天，由归档的窗口反推原运行的参考日期和窗口天数
+        window_start = datetime.date.fromisoformat(entry['window_start'])
+        window_end = datetime.date.fromisoformat(entry['window_end'])
+        window_days = (window_end - window_start).days + 1
+        source_reference_date = window_end + datetime.timedelta(days=1)
+        reference_date = reference_date or source_reference_date
+        
+        source = source_cls(window_days)
+        source.attach_archive(archive, run_id, replay=True, reference_date=source_reference_date)
+        sources.append(source)
+        logger.info(
+            f"  {entry['source']}: 窗口 {entry['window_start']} ~ {entry['window_end']}，"
+            f"{entry['payloads']} 个响应（{entry['raw_size'] / 1024:.0f}KB，压缩后 {entry['stored_size'] / 1024:.0f}KB）"
+        )
+    
+    if not sources:
+        logger.error("没有可回放的数据源")
+        return
+    
+    # 回放不做去重：与 test-sources 一致，处理全部归档的论文
+    source_results = fetch_papers(sources, set(), Config.EXCLUDE_KEYWORDS)
+    
+    # 引用数按原运行归档的结果补全（原运行未归档引用数时评分不含引用数加分）
+    replay_papers = [paper for result in source_results if result.success() for paper in result.papers]
+    try:
+        enriched = apply_archived_citations(replay_papers, archive, run_id)
+        logger.info(f"按原运行归档的引用数补全 {enriched} 篇论文")
+    except PayloadNotArchived:
+        logger.warning(f"运行 {run_id} 没有归档引用数，回放评分不含引用数补全，可能与原运行评分不同")
+    
+    top_papers, _ = rank_and_select(source_results, set(), top_k=top_k or Config.TOP_K, today=reference_date)
+    
+    logger.info("\n" + "=" * 80)
+    logger.info(f"回放结果：Top {len(top_papers)}")
+    logger.info("=" * 80)
+    for idx, scored in enumerate(top_papers, 1):
+        logger.info(f"{idx:2d}. [{scored.score:5.1f}] [{scored.paper.source}] {scored.paper.title[:80]}")
+        for reason in scored.reasons:
+            logger.info(f"      - {reason.description}")
+    
+    original_scores = PaperRepository().get_paper_scores(run_id)
+    if original_scores:
+        logger.info(f"原运行共保存评分 {len(original_scores)} 篇，最高分 {original_scores[0]['score']:.1f}")
+
+
+def export_data(export_format: str = 'parquet', output_dir: str = None):
+    """
+    增量导出分析数据（papers、scores、runs、pushes）
+    
+    Args:
+        export_format: 导出格式（目前支持 parquet）
+        output_dir: 导出目录（默认 Config.EXPORT_DIR）
+    """
+    output_dir = output_dir or Config.EXPORT_DIR
+    init_db()
+    
+    logger.info("=" * 80)
+    logger.info(f"开始增量导出分析数据: 格式={export_format}, 目录={output_dir}")
+    logger.info("=" * 80)
+    
+    stats = export_parquet(output_dir)
+    
+    for table, table_stats in stats.items():
+        logger.info(f"{table:10s} 新增 {table_stats['rows']} 行，写入 {table_stats['files']} 个文件")
+    logger.info("导出完成")
+
+
+def show_quota():
+    """查看跨进程配额账本的当前消耗（所有进程共享）"""
+    init_db()
+    usage = get_quota_ledger().usage()
+    
+    logger.info("=" * 80)
+    logger.info("配额账本当前消耗（最近 60 分钟）")
+    logger.info("=" * 80)
+    if not usage:
+        logger.info("暂无记录")
+        return
+    for item in usage:
+        logger.info(
+            f"{item['api']:10s} {item['credential']:12s} 剩余 {item['tokens']:6.1f}/{item['capacity']:.0f}  "
+            f"近60分钟 {item['recent_granted']:.0f} 次  累计 {item['granted']:.0f} 次  "
+            f"拒绝 {item['denied']} 次  累计等待 {item['wait_seconds']:.1f} 秒"
+        )
+
+
+def show_queries():
+    """显示由 RESEARCH_TOPICS 编译的 PubMed / EuropePMC 检索式，以及抓取前估计的命中数"""
+    logger.info("=" * 80)
+    logger.info("服务端检索式与预计命中数（前一天）")
+    logger.info("=" * 80)
+    for source in (PubMedSource(), EuropePMCSource()):
+        try:
+            query, hits = source.estimate_hits(Config.EXCLUDE_KEYWORDS)
+            _, unfiltered = source.estimate_hits([]) if Config.QUERY_EXCLUDE_PUSHDOWN else (query, hits)
+        except Exception as e:
+            logger.error(f"{source.name} 估计命中数失败: {e}")
+            continue
+        logger.info(f"\n{source.name}: 预计命中 {hits} 篇"
+                    + (f"（不含排除词时 {unfiltered} 篇，服务端排除 {unfiltered - hits} 篇）"
+                       if Config.QUERY_EXCLUDE_PUSHDOWN else ""))
+        logger.info(f"检索式（{len(query)} 字符）: {query}")
+
+
 def main():
     """主入口"""
     parser = argparse.ArgumentParser(description="智能论文推送系统")
-    parser.add_argument('command', choices=['run', 'test-sources'], help='命令')
+    parser.add_argument('command', choices=['run', 'test-sources', 'export', 'replay', 'quota', 'query'], help='命令')
     parser.add_argument('--window-days', type=int, help='抓取窗口天数（默认7天）')
     parser.add_argument('--top-k', type=int, help='选择Top K篇（默认5篇）')
     parser.add_argument('--source', type=str, help='测试单个数据源（仅用于test-sources命令）。可选值: biorxiv, pubmed, rss, europepmc, sciencenews, github, semanticscholar')
+    parser.add_argument('--format', dest='export_format', choices=['parquet'], default='parquet', help='导出格式（仅用于export命令）')
+    parser.add_argument('--output', type=str, help='导出目录（仅用于export命令，默认 data/exports）')
+    parser.add_argument('--run-id', type=str, help='要回放的运行ID（仅用于replay命令，默认最近一次有归档的运行）')
+    parser.add_argument('--deadline', type=str, help='目标完成时间 HH:MM（仅用于run命令，默认 RUN_DEADLINE / RUN_TIME_BUDGET_MINUTES）')
+    parser.add_argument('--refresh', action='store_true', help='忽略数据源结果缓存，强制重新抓取（用于run和test-sources命令）')
     
     args = parser.parse_args()
     
     # 设置日志
     setup_logging()
     
+    # 导出、回放和配额查看只读取本地数据，检索式预览只访问公开检索接口，不需要 API 密钥等配置
+    if args.command == 'export':
+        export_data(args.export_format, args.output)
+        return
+    if args.command == 'replay':
+        replay_run(args.run_id, args.top_k)
+        return
+    if args.command == 'quota':
+        show_quota()
+        return
+    if args.command == 'query':
+        show_queries()
+        return
+    
     # 验证配置（如果配置错误则退出）
     Config.validate_and_exit()
     
     # 代理已在文件开头清除
     
     if args.command == 'run':
-        run_push_task(args.window_days, args.top_k)
+        run_push_task(args.window_days, args.top_k, args.refresh, args.deadline)
     elif args.command == 'test-sources':
-        test_sources(args.source)
+        test_sources(args.source, args.refresh)
 
 
 if __name__ == "__main__":
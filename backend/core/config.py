@@ -49,6 +49,15 @@ class Config:
     
     # PubMed
     PUBMED_EMAIL = os.getenv("PUBMED_EMAIL", "")
+    # NCBI API Key（可选，限额由 3 次/秒提高到 10 次/秒）
+    NCBI_API_KEY = os.getenv("NCBI_API_KEY", "")
+    # PubMed 详细信息获取：每批记录数与并发请求数（请求速率仍受 NCBI 限额约束）
+    PUBMED_EFETCH_BATCH_SIZE = int(os.getenv("PUBMED_EFETCH_BATCH_SIZE", "500"))
+    PUBMED_EFETCH_CONCURRENCY = int(os.getenv("PUBMED_EFETCH_CONCURRENCY", "3"))
+    # PubMed 两阶段抓取：先按 esummary 标题做排除词预筛和去重，只为候选论文下载摘要
+    # （标题命中排除词、但摘要才满足豁免条件的论文会被提前排除）
+    PUBMED_TWO_PHASE = os.getenv("PUBMED_TWO_PHASE", "False") == "True"
+    PUBMED_ESUMMARY_BATCH_SIZE = int(os.getenv("PUBMED_ESUMMARY_BATCH_SIZE", "2000"))
     
     # 研究方向配置（三大方向）
     RESEARCH_TOPICS: Dict[str, List[str]] = {
@@ -120,6 +129,9 @@ class Config:
         'structural biology', 'cell biology', 'molecular biology'  # 新增：结构生物学相关
     ]
     
+    # 把排除词编译为 PubMed / EuropePMC 检索式的 NOT 子句（含结构关键词的论文不在服务端排除）
+    QUERY_EXCLUDE_PUSHDOWN = os.getenv("QUERY_EXCLUDE_PUSHDOWN", "True") == "True"
+    
     # 排除关键词
     EXCLUDE_KEYWORDS = [
         "human", "patient", "clinical", "mouse", "mice", "rat", "rats", 
@@ -181,9 +193,45 @@ class Config:
     # 数据库路径
     DB_PATH = os.getenv("DB_PATH", "data/database/paper_push.db")
     
+    # 分析导出目录（export 命令输出的 Parquet 文件）
+    EXPORT_DIR = os.getenv("EXPORT_DIR", "data/exports")
+    # 开始超过此时长仍为 running 的运行（进程被强制结束）按最终状态导出
+    EXPORT_STALE_RUN_HOURS = float(os.getenv("EXPORT_STALE_RUN_HOURS", "24"))
+    
+    # 原始响应归档（用于 replay 命令零网络重跑过滤/评分/排序）
+    ENABLE_PAYLOAD_ARCHIVE = os.getenv("ENABLE_PAYLOAD_ARCHIVE", "False") == "True"
+    PAYLOAD_ARCHIVE_DIR = os.getenv("PAYLOAD_ARCHIVE_DIR", "data/archive")
+    PAYLOAD_ARCHIVE_LEVEL = int(os.getenv("PAYLOAD_ARCHIVE_LEVEL", "9"))  # zstd 压缩级别
+    
+    # 数据源结果缓存（同一窗口内 test-sources 与 run 共享抓取结果，--refresh 可强制重新抓取）
+    ENABLE_SOURCE_CACHE = os.getenv("ENABLE_SOURCE_CACHE", "True") == "True"
+    
+    # 已见 feed 条目索引（RSS 抓取时跳过之前运行已处理过的条目）
+    ENABLE_FEED_ENTRY_INDEX = os.getenv("ENABLE_FEED_ENTRY_INDEX", "True") == "True"
+    
+    # RSS 类数据源的 feed 列表（逗号分隔，留空使用内置列表）与并发抓取
+    RSS_FEEDS = os.getenv("RSS_FEEDS", "")
+    SCIENCENEWS_FEEDS = os.getenv("SCIENCENEWS_FEEDS", "")
+    FEED_CONCURRENCY = int(os.getenv("FEED_CONCURRENCY", "8"))  # 同时抓取的 feed 数
+    FEED_PER_DOMAIN_LIMIT = int(os.getenv("FEED_PER_DOMAIN_LIMIT", "2"))  # 同一域名同时抓取的 feed 数
+    FEED_TIMEOUT = int(os.getenv("FEED_TIMEOUT", "30"))  # 单个 feed 的请求超时（秒）
+    FEED_SOURCE_TIMEOUT = int(os.getenv("FEED_SOURCE_TIMEOUT", "60"))  # 单个数据源全部 feed 的整体时限（秒，0 表示不限制）
+    # 轻量 RSS/Atom 解析（只提取用到的字段），非格式良好的 XML 或未知格式时退回 feedparser
+    FAST_FEED_PARSER = os.getenv("FAST_FEED_PARSER", "True") == "True"
+    
+    # 异步抓取（httpx，支持 HTTP/2 多路复用；目前只有 GitHub REST 检索的多个查询走异步客户端，其余数据源在线程中执行同步抓取）
+    ENABLE_ASYNC_FETCH = os.getenv("ENABLE_ASYNC_FETCH", "False") == "True"
+    ASYNC_PER_HOST_LIMIT = int(os.getenv("ASYNC_PER_HOST_LIMIT", "4"))
+    ENABLE_HTTP2 = os.getenv("ENABLE_HTTP2", "True") == "True"
+    
+    # 跨进程配额账本（API 服务、定时任务、命令行共享 DeepSeek / GitHub / NCBI 的限额）
+    ENABLE_QUOTA_LEDGER = os.getenv("ENABLE_QUOTA_LEDGER", "True") == "True"
+    DEEPSEEK_RPM = int(os.getenv("DEEPSEEK_RPM", "60"))  # 每个 DeepSeek 密钥每分钟请求数
+    
     # 抓取窗口配置（天数）
     DEFAULT_WINDOW_DAYS = int(os.getenv("DEFAULT_WINDOW_DAYS", "1"))  # 改为1天，只检索当天
     EUROPEPMC_WINDOW_DAYS = int(os.getenv("EUROPEPMC_WINDOW_DAYS", "1"))  # 1天窗口，只检索前一天
+    EUROPEPMC_PAGE_SIZE = int(os.getenv("EUROPEPMC_PAGE_SIZE", "1000"))  # cursorMark 分页的每页结果数（上限1000）
     
     # 快速AI预筛选配置
     QUICK_FILTER_THRESHOLD = int(os.getenv("QUICK_FILTER_THRESHOLD", "50"))  # 快速筛选阈值（只对≥此分数的论文进行AI判断）
@@ -195,6 +243,12 @@ class Config:
     
     # BioRxiv 优化配置
     BIORXIV_MAX_PAGES = int(os.getenv("BIORXIV_MAX_PAGES", "20"))  # 最大抓取页数（默认20页）
+    BIORXIV_CONCURRENT_PAGES = os.getenv("BIORXIV_CONCURRENT_PAGES", "True") == "True"  # 按首页总数并发抓取其余页
+    BIORXIV_PAGE_CONCURRENCY = int(os.getenv("BIORXIV_PAGE_CONCURRENCY", "4"))  # 并发分页时对 api.biorxiv.org 的并发上限
+    # bioRxiv 本地按日镜像：只同步未镜像的日期及最近 N 天（补上延迟加入的记录），其余日期从本地读取
+    ENABLE_BIORXIV_MIRROR = os.getenv("ENABLE_BIORXIV_MIRROR", "True") == "True"
+    BIORXIV_MIRROR_TRAILING_DAYS = int(os.getenv("BIORXIV_MIRROR_TRAILING_DAYS", "2"))
+    BIORXIV_MIRROR_RETENTION_DAYS = int(os.getenv("BIORXIV_MIRROR_RETENTION_DAYS", "120"))  # 0 表示不清理
     ENABLE_EXEMPTION = os.getenv("ENABLE_EXEMPTION", "True") == "True"  # 启用豁免机制
     ENABLE_DIAGNOSTIC = os.getenv("ENABLE_DIAGNOSTIC", "True") == "True"  # 启用诊断日志
     
@@ -253,9 +307,16 @@ class Config:
     # ========== 优化系统配置 ==========
     # GitHub API配置（使用Token避免限流）
     GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "")
+    # GraphQL 模式：多个检索词合并为一个请求（别名 search 字段），仓库元数据按 node id 缓存；需要 GITHUB_TOKEN
+    GITHUB_USE_GRAPHQL = os.getenv("GITHUB_USE_GRAPHQL", "True") == "True"
+    GITHUB_GRAPHQL_BATCH_SIZE = int(os.getenv("GITHUB_GRAPHQL_BATCH_SIZE", "15"))
 
     # Semantic Scholar API配置
     SEMANTIC_SCHOLAR_API_KEY = os.getenv("SEMANTIC_SCHOLAR_API_KEY", "")
+    # 引用数补全：评分前用 Semantic Scholar /paper/batch 为所有候选论文按 DOI 批量补全引用数
+    ENABLE_CITATION_ENRICHMENT = os.getenv("ENABLE_CITATION_ENRICHMENT", "True") == "True"
+    CITATION_BATCH_SIZE = int(os.getenv("CITATION_BATCH_SIZE", "500"))  # 接口上限 500
+    CITATION_CACHE_TTL_HOURS = float(os.getenv("CITATION_CACHE_TTL_HOURS", "24"))
     
     # 豁免权重计分配置
     EXEMPTION_SCORE_THRESHOLD = int(os.getenv("EXEMPTION_SCORE_THRESHOLD", "10"))
@@ -275,6 +336,8 @@ class Config:
     API_MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "3"))  # 每个密钥最多重试3次
     API_RETRY_BASE_DELAY = int(os.getenv("API_RETRY_BASE_DELAY", "10"))  # 基础延迟10秒
     API_RETRY_MAX_DELAY = int(os.getenv("API_RETRY_MAX_DELAY", "60"))  # 最大延迟60秒
+    # 每次运行的重试预算（数据源请求和 DeepSeek 调用共享，0 表示不限制）
+    RETRY_BUDGET_PER_RUN = int(os.getenv("RETRY_BUDGET_PER_RUN", "60"))
     
     # 标题指纹去重配置
     ENABLE_TITLE_FINGERPRINT_DEDUP = os.getenv("ENABLE_TITLE_FINGERPRINT_DEDUP", "True") == "True"
@@ -282,6 +345,23 @@ class Config:
     # 性能监控配置
     ENABLE_LATENCY_TRACKING = os.getenv("ENABLE_LATENCY_TRACKING", "True") == "True"
     
+    # 运行时间预算：目标完成时间（HH:MM，空则不使用）或总时间预算（分钟，0 表示不限制），
+    # 剩余时间按权重分配给抓取、快速筛选、报告生成三个阶段，超时的工作被截断
+    RUN_DEADLINE = os.getenv("RUN_DEADLINE", "")
+    RUN_TIME_BUDGET_MINUTES = float(os.getenv("RUN_TIME_BUDGET_MINUTES", "0"))
+    RUN_MIN_BUDGET_MINUTES = float(os.getenv("RUN_MIN_BUDGET_MINUTES", "15"))  # 目标完成时间过近时改用总时间预算
+    BUDGET_SHARE_FETCH = float(os.getenv("BUDGET_SHARE_FETCH", "0.4"))
+    BUDGET_SHARE_QUICK_CHECK = float(os.getenv("BUDGET_SHARE_QUICK_CHECK", "0.15"))
+    BUDGET_SHARE_REPORT = float(os.getenv("BUDGET_SHARE_REPORT", "0.45"))
+    FETCH_BUDGET_GRACE_SECONDS = int(os.getenv("FETCH_BUDGET_GRACE_SECONDS", "30"))  # 抓取截止后等待进行中请求的宽限期
+    
+    # 数据源熔断：连续失败达到阈值后在冷却期内跳过该数据源，冷却期结束后探测一次（失败则冷却期加倍）
+    ENABLE_CIRCUIT_BREAKER = os.getenv("ENABLE_CIRCUIT_BREAKER", "True") == "True"
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+    CIRCUIT_COOLDOWN_HOURS = float(os.getenv("CIRCUIT_COOLDOWN_HOURS", "12"))
+    CIRCUIT_MAX_COOLDOWN_HOURS = float(os.getenv("CIRCUIT_MAX_COOLDOWN_HOURS", "168"))
+    CIRCUIT_PROBE_TIMEOUT = int(os.getenv("CIRCUIT_PROBE_TIMEOUT", "1800"))  # 探测占用的最长时间（秒）
+    
     @classmethod
     def validate(cls) -> List[str]:
         """验证配置，返回错误列表"""
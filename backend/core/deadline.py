@@ -0,0 +1,128 @@
+"""
+运行截止时间预算：把一次运行的剩余时间按比例分配给抓取、快速筛选、报告生成三个阶段
+
+- 每个阶段开始时，从剩余总时间中按该阶段及其后各阶段的权重切出本阶段的预算，
+  前面阶段节省下来的时间自动留给后面的阶段
+- 各阶段在预算用尽时截断剩余工作（未完成的数据源标记为降级、剩余论文跳过 AI 判断、
+  剩余论文不再生成报告），并记录用尽的阶段，写入 runs 表的 budget_exhausted 字段
+- 重试等待（DeepSeek 指数退避、数据源重试）应通过 allows_wait() 判断是否还来得及
+"""
+import datetime
+import logging
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 阶段及默认权重（按顺序执行）
+STAGES = ('fetch', 'quick_check', 'report')
+DEFAULT_SHARES = {'fetch': 0.4, 'quick_check': 0.15, 'report': 0.45}
+
+STAGE_NAMES = {'fetch': '抓取', 'quick_check': '快速筛选', 'report': '报告生成'}
+
+
+class StageBudget:
+    """一个阶段的时间预算（基于 time.monotonic）"""
+
+    def __init__(self, name: str, seconds: float, plan: Optional['RunDeadline'] = None):
+        self.name = name
+        self.seconds = max(seconds, 0.0)
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + self.seconds
+        self.plan = plan
+
+    def remaining(self) -> float:
+        """剩余秒数（不小于 0）"""
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    def allows_wait(self, seconds: float) -> bool:
+        """等待 seconds 秒后是否仍在预算内（用于决定是否还值得重试）"""
+        return time.monotonic() + seconds < self.deadline
+
+    def exhaust(self, detail: str):
+        """记录本阶段预算用尽及被截断的工作"""
+        logger.warning(f"[时间预算] {STAGE_NAMES.get(self.name, self.name)}阶段预算（{self.seconds:.0f}秒）用尽: {detail}")
+        if self.plan is not None:
+            self.plan.exhausted.setdefault(self.name, detail)
+
+
+class RunDeadline:
+    """一次运行的截止时间及阶段预算规划"""
+
+    def __init__(self, total_seconds: float, shares: Optional[Dict[str, float]] = None,
+                 deadline_at: Optional[datetime.datetime] = None):
+        """
+        Args:
+            total_seconds: 从现在起的总时间预算（秒）
+            shares: 各阶段权重（默认 DEFAULT_SHARES）
+            deadline_at: 目标完成时间（仅用于日志和记录）
+        """
+        self.total_seconds = total_seconds
+        self.shares = dict(shares or DEFAULT_SHARES)
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + total_seconds
+        self.deadline_at = deadline_at or (datetime.datetime.now() + datetime.timedelta(seconds=total_seconds))
+        # 用尽预算的阶段 -> 截断说明
+        self.exhausted: Dict[str, str] = {}
+
+    @classmethod
+    def from_config(cls, deadline: Optional[str] = None, budget_minutes: Optional[float] = None,
+                    now: Optional[datetime.datetime] = None) -> Optional['RunDeadline']:
+        """
+        按目标完成时间（HH:MM）或时间预算（分钟）创建
+
+        目标完成时间早于当前时间时视为次日的该时刻（如 23:30 启动、目标 06:00）；
+        距今不足预算下限时退回到时间预算；两者都未设置（时间预算为 0）时返回 None，表示不限制。
+        """
+        from backend.core.config import Config
+        now = now or datetime.datetime.now()
+        deadline = deadline if deadline is not None else Config.RUN_DEADLINE
+        budget_minutes = budget_minutes if budget_minutes is not None else Config.RUN_TIME_BUDGET_MINUTES
+        shares = {
+            'fetch': Config.BUDGET_SHARE_FETCH,
+            'quick_check': Config.BUDGET_SHARE_QUICK_CHECK,
+            'report': Config.BUDGET_SHARE_REPORT,
+        }
+
+        if deadline:
+            try:
+                hour, minute = (int(part) for part in deadline.split(':'))
+                target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                if target < now:
+                    target += datetime.timedelta(days=1)
+                seconds = (target - now).total_seconds()
+                if seconds >= Config.RUN_MIN_BUDGET_MINUTES * 60:
+                    return cls(seconds, shares, deadline_at=target)
+                logger.warning(f"[时间预算] 目标完成时间 {deadline} 过近，改用 {budget_minutes} 分钟预算")
+            except ValueError:
+                logger.warning(f"[时间预算] 无法解析目标完成时间 {deadline!r}（应为 HH:MM），改用 {budget_minutes} 分钟预算")
+        if budget_minutes <= 0:
+            return None
+        return cls(budget_minutes * 60, shares)
+
+    def remaining(self) -> float:
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def stage(self, name: str) -> StageBudget:
+        """
+        开始一个阶段：按本阶段权重占本阶段及其后各阶段权重之和的比例，切分剩余时间
+        """
+        following = STAGES[STAGES.index(name):]
+        total_share = sum(self.shares.get(s, 0.0) for s in following) or 1.0
+        seconds = self.remaining() * self.shares.get(name, 0.0) / total_share
+        budget = StageBudget(name, seconds, plan=self)
+        logger.info(f"[时间预算] {STAGE_NAMES.get(name, name)}阶段预算 {seconds:.0f} 秒（总剩余 {self.remaining():.0f} 秒）")
+        return budget
+
+    def exhausted_stages(self) -> List[str]:
+        """用尽预算的阶段名（按阶段顺序）"""
+        return [s for s in STAGES if s in self.exhausted]
+
+    def summary(self) -> Optional[str]:
+        """写入 runs.budget_exhausted 的摘要（未用尽时为 None）"""
+        if not self.exhausted:
+            return None
+        return "; ".join(f"{s}: {self.exhausted[s]}" for s in self.exhausted_stages())
@@ -108,7 +108,43 @@ def should_exclude_paper(paper: Paper, exclude_keywords: List[str]) -> bool:
     return False  # 无排除词
 
 
-def is_recent_date(date_str: str, days: int = 7, is_top_tier: bool = False) -> bool:
+def parse_paper_date(date_str: str):
+    """
+    解析论文日期（支持 RSS 的 RFC 822 格式和 YYYY-MM-DD / YYYY/MM/DD）
+    
+    Returns:
+        datetime.date，无法解析时返回 None
+    """
+    import datetime
+    from email.utils import parsedate_to_datetime
+    
+    if not date_str or date_str == '日期未知':
+        return None
+    
+    paper_date = None
+    
+    # 优先处理 RSS 格式日期（RFC 822）
+    if 'GMT' in date_str or 'UTC' in date_str or (',' in date_str and len(date_str) > 10):
+        try:
+            paper_date = parsedate_to_datetime(date_str).date()
+        except (ValueError, TypeError) as e:
+            logger.debug(f"RSS 日期解析失败: {date_str} - {e}")
+    
+    # 如果 RSS 格式解析失败，尝试标准格式
+    if paper_date is None:
+        date_part = date_str[:10] if len(date_str) >= 10 else date_str
+        try:
+            if '-' in date_part:
+                paper_date = datetime.datetime.strptime(date_part, '%Y-%m-%d').date()
+            elif '/' in date_part:
+                paper_date = datetime.datetime.strptime(date_part, '%Y/%m/%d').date()
+        except (ValueError, TypeError) as e:
+            logger.debug(f"标准日期解析失败: {date_part} - {e}")
+    
+    return paper_date
+
+
+def is_recent_date(date_str: str, days: int = 7, is_top_tier: bool = False, today=None) -> bool:
     """
     检查日期是否在最近 N 天内（增强版：支持时区容错和顶刊容错）
     
@@ -116,6 +152,7 @@ def is_recent_date(date_str: str, days: int = 7, is_top_tier: bool = False) -> b
         date_str: 日期字符串
         days: 时间窗口（天）
         is_top_tier: 是否为顶刊论文（如果是，启用日期容错机制）
+        today: 参考日期（默认当天，回放历史运行时传入原运行日期）
     
     Returns:
         bool: 日期是否有效
@@ -133,27 +170,8 @@ def is_recent_date(date_str: str, days: int = 7, is_top_tier: bool = False) -> b
     
     try:
         import datetime
-        from email.utils import parsedate_to_datetime
         
-        paper_date = None
-        
-        # 优先处理 RSS 格式日期（RFC 822）
-        if 'GMT' in date_str or 'UTC' in date_str or (',' in date_str and len(date_str) > 10):
-            try:
-                paper_date = parsedate_to_datetime(date_str).date()
-            except (ValueError, TypeError) as e:
-                logger.debug(f"RSS 日期解析失败: {date_str} - {e}")
-        
-        # 如果 RSS 格式解析失败，尝试标准格式
-        if paper_date is None:
-            date_part = date_str[:10] if len(date_str) >= 10 else date_str
-            try:
-                if '-' in date_part:
-                    paper_date = datetime.datetime.strptime(date_part, '%Y-%m-%d').date()
-                elif '/' in date_part:
-                    paper_date = datetime.datetime.strptime(date_part, '%Y/%m/%d').date()
-            except (ValueError, TypeError) as e:
-                logger.debug(f"标准日期解析失败: {date_part} - {e}")
+        paper_date = parse_paper_date(date_str)
         
         # 如果解析失败，检查是否为顶刊并启用容错
         if paper_date is None:
@@ -166,7 +184,7 @@ def is_recent_date(date_str: str, days: int = 7, is_top_tier: bool = False) -> b
                     return True
             return False
         
-        today = datetime.date.today()
+        today = today or datetime.date.today()
         days_diff = (today - paper_date).days
         
         # 只允许前一天的日期（days_diff == 1 表示昨天）
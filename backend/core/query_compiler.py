@@ -0,0 +1,143 @@
+"""
+检索式编译：把 RESEARCH_TOPICS 和排除词编译为各 API 的服务端检索式
+
+- 主题词：按研究方向分组，限定在标题/摘要字段（PubMed [tiab]，Europe PMC TITLE_ABS）
+- 排除词：编译为 NOT 子句，服务端直接丢弃命中排除词的记录，不再下载后由本地过滤丢弃
+- 结构生物学豁免：本地过滤对包含结构关键词的论文可豁免排除词，因此 NOT 子句只排除
+  "命中排除词且不含结构关键词"的记录（A NOT (B NOT C)）。本地按子串匹配结构关键词
+  （"crystal structure" 也命中 "crystal structures"、"nlr" 也命中 "NLRP3"），服务端的豁免词
+  因此使用截词（PubMed "crystal structure*"[tiab]，Europe PMC crystal AND structure*），
+  覆盖从词首开始的全部子串匹配；从词中间开始的子串（如 "nanocrystal structure"）服务端无法表达。
+  PubMed 截词要求至少 4 个字符：3 个字符的豁免词（如 "nlr"）展开为原词加上
+  "原词 + 一个字母或数字" 的截词（"nlr"[tiab] OR "nlra*"[tiab] OR ...），与 "nlr*" 等价；
+  更短的豁免词无法表达，此时不下推 PubMed 的排除词（记录警告）。
+  本地过滤照常执行，豁免分数的判定不变
+"""
+import logging
+import re
+import string
+from typing import Callable, Dict, Iterable, List, Optional
+from backend.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+# PubMed 截词（*）前至少需要的字符数
+PUBMED_MIN_TRUNCATION = 4
+# 短一个字符的词截词时，在词后补上的字符
+PUBMED_EXPANSION_CHARS = string.ascii_lowercase + string.digits
+
+# PubMed 的 MeSH 主题词（受控词表，与自由词互补，RESEARCH_TOPICS 中没有对应写法）
+PUBMED_MESH_TERMS: Dict[str, List[str]] = {
+    "Nitrogen_Fixation": ["Nitrogen Fixation", "Nitrogenase"],
+    "Signal_Transduction": ["Signal Transduction", "Receptors, Cell Surface"],
+    "Enzyme_Mechanism": ["Enzymes/chemistry", "Catalytic Domain"],
+}
+
+
+def unique_terms(terms: Iterable[str]) -> List[str]:
+    """去掉空白、引号和大小写重复的检索词（保持原顺序）"""
+    seen = set()
+    result = []
+    for term in terms:
+        term = ' '.join(term.replace('"', ' ').split())
+        if term and term.lower() not in seen:
+            seen.add(term.lower())
+            result.append(term)
+    return result
+
+
+def _any_of(clauses: List[str]) -> str:
+    return f"({' OR '.join(clauses)})"
+
+
+def _pubmed_terms(terms: List[str]) -> str:
+    """PubMed：每个词限定在标题/摘要"""
+    return _any_of([f'"{term}"[tiab]' for term in terms])
+
+
+def _pubmed_prefixes(terms: List[str]) -> Optional[str]:
+    """PubMed 截词形式的豁免词（有词比截词下限短 2 个字符以上时返回 None）"""
+    clauses = []
+    for term in terms:
+        if len(term) >= PUBMED_MIN_TRUNCATION:
+            clauses.append(f'"{term}*"[tiab]')
+        elif len(term) == PUBMED_MIN_TRUNCATION - 1:
+            # "nlr*" 不可用：原词本身 + 每个可能的下一个字符的截词
+            clauses.append(f'"{term}"[tiab]')
+            clauses.extend(f'"{term}{char}*"[tiab]' for char in PUBMED_EXPANSION_CHARS)
+        else:
+            return None
+    return _any_of(clauses)
+
+
+def _europepmc_terms(terms: List[str]) -> str:
+    """Europe PMC：同一字段的词写成分组形式 TITLE_ABS:("a" OR "b")，控制 GET 请求的 URL 长度"""
+    return "TITLE_ABS:" + _any_of([f'"{term}"' for term in terms])
+
+
+def _europepmc_prefixes(terms: List[str]) -> Optional[str]:
+    """Europe PMC 截词形式的豁免词（短语内不支持通配符，拆成各词 AND，最后一个词截词）"""
+    clauses = []
+    for term in terms:
+        words = re.findall(r'[0-9a-z]+', term.lower())
+        if not words:
+            return None
+        clauses.append(' AND '.join(words[:-1] + [words[-1] + '*']))
+    return "TITLE_ABS:" + _any_of([f"({clause})" if ' ' in clause else clause for clause in clauses])
+
+
+def _exclusion(exclude_keywords: List[str], structure_keywords: Optional[List[str]],
+               group: Callable[[List[str]], str],
+               prefixes: Callable[[List[str]], Optional[str]]) -> str:
+    """
+    排除子句：命中排除词且不含结构关键词（截词匹配）
+
+    未启用、没有排除词或豁免词无法在服务端表达时返回空字符串
+    """
+    excluded = unique_terms(exclude_keywords)
+    if not Config.QUERY_EXCLUDE_PUSHDOWN or not excluded:
+        return ""
+    exempt = unique_terms(Config.STRUCTURE_KEYWORDS if structure_keywords is None else structure_keywords)
+    clause = group(excluded)
+    if exempt:
+        exempt_clause = prefixes(exempt)
+        if exempt_clause is None:
+            logger.warning("结构关键词中有过短的词，无法以截词形式在服务端表达，本次检索不下推排除词")
+            return ""
+        clause = f"({clause} NOT {exempt_clause})"
+    return f" NOT {clause}"
+
+
+def compile_pubmed_query(start_date: str, end_date: str, exclude_keywords: List[str],
+                         topics: Optional[Dict[str, List[str]]] = None,
+                         structure_keywords: Optional[List[str]] = None) -> str:
+    """
+    编译 PubMed（Entrez esearch）检索式
+
+    Args:
+        start_date / end_date: 出版日期范围（YYYY/MM/DD）
+        exclude_keywords: 排除词（QUERY_EXCLUDE_PUSHDOWN=False 时不编译 NOT 子句）
+        topics: 研究方向 -> 关键词（默认 Config.RESEARCH_TOPICS）
+        structure_keywords: 豁免排除词的结构关键词（默认 Config.STRUCTURE_KEYWORDS）
+    """
+    topics = Config.RESEARCH_TOPICS if topics is None else topics
+    groups = []
+    for name, keywords in topics.items():
+        clauses = [f'"{mesh}"[Mesh]' for mesh in PUBMED_MESH_TERMS.get(name, [])]
+        clauses += [f'"{term}"[tiab]' for term in unique_terms(keywords)]
+        if clauses:
+            groups.append(_any_of(clauses))
+    query = f'({" OR ".join(groups)}) AND ("{start_date}"[Date - Publication] : "{end_date}"[Date - Publication])'
+    return query + _exclusion(exclude_keywords, structure_keywords, _pubmed_terms, _pubmed_prefixes)
+
+
+def compile_europepmc_query(start_date: str, end_date: str, exclude_keywords: List[str],
+                            topics: Optional[Dict[str, List[str]]] = None,
+                            structure_keywords: Optional[List[str]] = None) -> str:
+    """
+    编译 Europe PMC 检索式（参数同 compile_pubmed_query，日期为 YYYY-MM-DD）
+    """
+    topics = Config.RESEARCH_TOPICS if topics is None else topics
+    groups = [_europepmc_terms(unique_terms(keywords)) for keywords in topics.values() if unique_terms(keywords)]
+    query = f'FIRST_PDATE:[{start_date} TO {end_date}] AND ({" OR ".join(groups)})'
+    return query + _exclusion(exclude_keywords, structure_keywords, _europepmc_terms, _europepmc_prefixes)
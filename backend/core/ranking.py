@@ -63,7 +63,8 @@ def rank_and_select(
     sent_ids: Set[str],
     top_k: int = None,
     min_candidates: int = None,
-    enable_priority: bool = True
+    enable_priority: bool = True,
+    today=None
 ) -> Tuple[List[ScoredPaper], List[str]]:
     """
     合并、去重、评分、选择TopK（支持P0/P1/P2分层）
@@ -74,6 +75,7 @@ def rank_and_select(
         top_k: 选择Top K篇（默认从Config读取）
         min_candidates: 最小候选数（用于判断是否需要回退）
         enable_priority: 是否启用优先级分层
+        today: 评分新鲜度的参考日期（默认当天）
     
     Returns:
         (top_papers, new_sent_ids): TopK论文列表和新增的sent_ids
@@ -103,7 +105,7 @@ def rank_and_select(
     # 评分
     scored_papers = []
     for paper in unseen_papers:
-        scored = score_paper(paper)
+        scored = score_paper(paper, today=today)
         scored_papers.append(scored)
     
     # 按评分降序排序
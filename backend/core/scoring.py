@@ -7,11 +7,13 @@ from backend.models import Paper, ScoreReason, ScoredPaper
 from backend.core.config import Config
 
 
-def score_paper(paper: Paper) -> ScoredPaper:
+def score_paper(paper: Paper, today: datetime.date = None) -> ScoredPaper:
     """
     智能权重算法：针对固氮、信号、酶结构进行评分
     增强版：增加期刊影响因子、提高结构关键词权重、协同增益机制
     返回可解释的评分结果
+    
+    today: 新鲜度计算的参考日期（默认当天，回放历史运行时传入原运行日期）
     """
     score = 0.0
     reasons: List[ScoreReason] = []
@@ -218,7 +220,7 @@ def score_paper(paper: Paper) -> ScoredPaper:
                     logger.debug(f"日期解析失败（格式: YYYY/MM/DD）: {paper.date[:10]} - {e}")
             
             if paper_date:
-                today = datetime.date.today()
+                today = today or datetime.date.today()
                 days_diff = (today - paper_date).days
                 # 增强时间因素：当天论文最高优先级
                 if days_diff == 0:  # 当天
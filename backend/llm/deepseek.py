@@ -0,0 +1,61 @@
+"""
+DeepSeek 调用：统一的重试、配额和超时处理
+
+每次尝试都新建客户端实例（避免连接复用问题）并从跨进程配额账本取令牌；
+失败按 backend.utils.retry 的策略分类重试（连接错误、超时、429、5xx 抖动退避，
+遵守 Retry-After），认证失败等不可重试的错误直接抛出，由调用方切换到下一个密钥。
+"""
+import logging
+import time
+from typing import Any, Optional
+from openai import OpenAI
+from backend.core.config import Config
+from backend.storage.quota import get_quota_ledger
+from backend.utils.retry import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+
+def deepseek_retry_policy(max_attempts: Optional[int] = None, base_delay: Optional[float] = None) -> RetryPolicy:
+    """按配置构建 DeepSeek 重试策略（每个密钥的尝试次数、基础/最大延迟）"""
+    return RetryPolicy(
+        max_attempts=max_attempts or Config.API_MAX_RETRIES,
+        base_delay=base_delay if base_delay is not None else Config.API_RETRY_BASE_DELAY,
+        max_delay=Config.API_RETRY_MAX_DELAY
+    )
+
+
+def chat_completion(api_key: str, messages: list, timeout: float = None, deadline: Optional[float] = None,
+                    policy: Optional[RetryPolicy] = None, **kwargs) -> Any:
+    """
+    使用指定密钥调用 chat.completions.create，按重试策略重试
+
+    Args:
+        api_key: DeepSeek API 密钥
+        messages: 对话消息
+        timeout: 单次请求超时（秒，默认 API_TIMEOUT）
+        deadline: 截止时刻（time.monotonic），请求超时不超过剩余时间，重试等待不越过截止时刻
+        policy: 重试策略（默认 deepseek_retry_policy()）
+        **kwargs: 传给 create 的其他参数（temperature、max_tokens 等）
+
+    Raises:
+        最后一次尝试的异常（不可重试、重试次数/预算用尽或超出截止时间）
+    """
+    timeout = timeout or Config.API_TIMEOUT
+    policy = policy or deepseek_retry_policy()
+
+    def attempt():
+        request_timeout = timeout
+        if deadline is not None:
+            request_timeout = max(min(timeout, deadline - time.monotonic()), 10)
+        client = OpenAI(
+            api_key=api_key,
+            base_url=Config.DEEPSEEK_BASE_URL,
+            timeout=request_timeout,
+            max_retries=0  # 禁用SDK内置重试，由重试策略控制
+        )
+        # 与其他进程共享该密钥的请求额度
+        get_quota_ledger().acquire('deepseek', api_key)
+        return client.chat.completions.create(model="deepseek-chat", messages=messages, **kwargs)
+
+    return policy.call(attempt, key='deepseek', deadline=deadline)
@@ -3,10 +3,10 @@ AI 报告生成（支持Token预算分配和动态截断）
 """
 import time
 import logging
-from typing import List, Tuple
-from openai import OpenAI
+from typing import List, Optional, Tuple
 from backend.models import ScoredPaper, SourceResult
 from backend.core.config import Config
+from backend.llm.deepseek import chat_completion
 from backend.core.ranking import get_priority_level
 
 logger = logging.getLogger(__name__)
@@ -232,13 +232,14 @@ def prepare_papers_for_llm(scored_papers: List[ScoredPaper], max_tokens: int = N
     return papers_text, len(papers_to_process), total_tokens
 
 
-def generate_single_paper_report(scored_paper: ScoredPaper, paper_num: int) -> str:
+def generate_single_paper_report(scored_paper: ScoredPaper, paper_num: int, deadline: Optional[float] = None) -> str:
     """
     生成单篇论文的重要研究成果总结
     
     Args:
         scored_paper: 带评分的论文
         paper_num: 论文编号
+        deadline: 截止时刻（time.monotonic），重试等待会超过截止时刻时停止重试并返回降级报告
         
     Returns:
         生成的论文报告文本
@@ -296,72 +297,61 @@ def generate_single_paper_report(scored_paper: ScoredPaper, paper_num: int) -> s
     all_api_keys = Config.get_all_api_keys()
     logger.info(f"[论文 {paper_num}] 开始生成报告，可用 API 密钥数量: {len(all_api_keys)}")
     
-    # 遍历所有 API 密钥，如果当前密钥失败，自动切换到下一个
+    # 遍历所有 API 密钥，如果当前密钥失败（认证失败或重试用尽），自动切换到下一个
     last_error = None
     for key_index, api_key in enumerate(all_api_keys):
         key_name = "主密钥" if key_index == 0 else f"备用密钥{key_index}"
         masked_key = f"{api_key[:8]}...{api_key[-4:]}" if len(api_key) > 12 else "***"
         logger.info(f"[论文 {paper_num}] 尝试使用 {key_name}: {masked_key}")
         
-        # 每个密钥的重试机制（指数退避策略）
-        max_retries_per_key = Config.API_MAX_RETRIES
-        for attempt in range(max_retries_per_key):
-            try:
-                logger.info(f"[论文 {paper_num}] 正在调用AI生成报告（{key_name}, 第 {attempt + 1}/{max_retries_per_key} 次尝试）...")
-                
-                # 每次重试都创建新的客户端实例，避免连接复用问题
-                client = OpenAI(
-                    api_key=api_key,
-                    base_url=Config.DEEPSEEK_BASE_URL,
-                    timeout=Config.API_TIMEOUT,
-                    max_retries=0  # 禁用SDK内置重试，手动控制
-                )
-                
-                response = client.chat.completions.create(
-                    model="deepseek-chat",
-                    messages=[
-                        {"role": "system", "content": "你是一位生物化学与分子生物学领域的专家，擅长简洁地总结学术论文的重要研究成果。"},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.5,
-                    max_tokens=1000  # 单篇总结，减少tokens
-                )
-                
-                paper_report = response.choices[0].message.content
-                logger.info(f"✅ [论文 {paper_num}] AI报告生成成功！(使用 {key_name}, 耗时约 {attempt + 1} 次尝试)")
-                return paper_report
-                
-            except KeyboardInterrupt:
-                logger.warning("用户手动中断了程序")
-                raise
-            except Exception as e:
-                last_error = e
-                error_type = type(e).__name__
-                error_msg = str(e)
-                logger.error(f"[论文 {paper_num}] 调用大语言模型时出错（{key_name}, 第 {attempt + 1} 次尝试）: {error_type}: {error_msg[:200]}")
-                
-                # 如果是认证错误（401），直接切换到下一个密钥
-                if "401" in error_msg or "Unauthorized" in error_msg or "invalid" in error_msg.lower():
-                    logger.warning(f"[论文 {paper_num}] {key_name} 认证失败，切换到下一个密钥")
-                    break
-                
-                # 如果是连接错误，使用指数退避策略重试
-                if attempt < max_retries_per_key - 1:
-                    # 指数退避：10秒、20秒、40秒，但不超过最大延迟
-                    wait_time = min(Config.API_RETRY_BASE_DELAY * (2 ** attempt), Config.API_RETRY_MAX_DELAY)
-                    logger.info(f"[论文 {paper_num}] 等待 {wait_time} 秒后重试（指数退避策略）...")
-                    time.sleep(wait_time)
-                else:
-                    logger.warning(f"[论文 {paper_num}] {key_name} 所有重试均失败，尝试下一个密钥")
-                    if key_index < len(all_api_keys) - 1:
-                        time.sleep(5)  # 切换密钥前等待更长时间
-                    break
+        if deadline is not None and time.monotonic() >= deadline:
+            logger.warning(f"[论文 {paper_num}] 已超出时间预算，返回降级报告")
+            return _generate_fallback_report([scored_paper], last_error or TimeoutError("超出报告生成时间预算"))
+        try:
+            # 每个密钥按重试策略重试（抖动退避、遵守 Retry-After），请求超时和重试等待不超过时间预算
+            response = chat_completion(
+                api_key,
+                [
+                    {"role": "system", "content": "你是一位生物化学与分子生物学领域的专家，擅长简洁地总结学术论文的重要研究成果。"},
+                    {"role": "user", "content": prompt}
+                ],
+                deadline=deadline,
+                temperature=0.5,
+                max_tokens=1000  # 单篇总结，减少tokens
+            )
+            paper_report = response.choices[0].message.content
+            logger.info(f"✅ [论文 {paper_num}] AI报告生成成功！(使用 {key_name})")
+            return paper_report
+        except KeyboardInterrupt:
+            logger.warning("用户手动中断了程序")
+            raise
+        except Exception as e:
+            last_error = e
+            logger.error(f"[论文 {paper_num}] 调用大语言模型失败（{key_name}）: {type(e).__name__}: {str(e)[:200]}")
+            if key_index < len(all_api_keys) - 1:
+                logger.warning(f"[论文 {paper_num}] {key_name} 调用失败，尝试下一个密钥")
     
     # 所有密钥都失败，返回降级报告
     logger.error(f"[论文 {paper_num}] 所有 API 密钥（共 {len(all_api_keys)} 个）均失败，返回降级报告")
     return _generate_fallback_report([scored_paper], last_error)
 
 
+def _data_integrity_note(source_results: Optional[List[SourceResult]]) -> str:
+    """数据完整性提示：列出未能完整获取的数据源（全部正常时为空字符串）"""
+    degraded_sources = [sr for sr in (source_results or []) if sr.is_degraded or sr.error]
+    if not degraded_sources:
+        return ""
+    note = "\n\n## ⚠️ 数据完整性说明\n\n"
+    note += "本次报告生成过程中,以下数据源未能完整获取:\n"
+    for sr in degraded_sources:
+        if sr.error:
+            note += f"- {sr.source_name}: 抽取失败 ({sr.error})\n"
+        elif sr.degraded_reason:
+            note += f"- {sr.source_name}: {sr.degraded_reason}\n"
+    note += "\n建议关注后续更新,或手动访问对应数据源确认。\n"
+    return note
+
+
 def generate_final_summary(all_paper_reports: List[str], total_papers: int, source_results: List[SourceResult] = None) -> str:
     """
     生成最终总结报告（保留所有论文重要研究成果 + 总体总结）
@@ -452,70 +442,30 @@ def generate_final_summary(all_paper_reports: List[str], total_papers: int, sour
         masked_key = f"{api_key[:8]}...{api_key[-4:]}" if len(api_key) > 12 else "***"
         logger.info(f"尝试使用 {key_name}: {masked_key}")
         
-        max_retries_per_key = Config.API_MAX_RETRIES
-        for attempt in range(max_retries_per_key):
-            try:
-                logger.info(f"正在调用AI生成最终总结报告（{key_name}, 第 {attempt + 1}/{max_retries_per_key} 次尝试）...")
-                
-                # 每次重试都创建新的客户端实例，避免连接复用问题
-                client = OpenAI(
-                    api_key=api_key,
-                    base_url=Config.DEEPSEEK_BASE_URL,
-                    timeout=Config.API_TIMEOUT,
-                    max_retries=0  # 禁用SDK内置重试，手动控制
-                )
-                
-                response = client.chat.completions.create(
-                    model="deepseek-chat",
-                    messages=[
-                        {"role": "system", "content": "你是一位生物化学与分子生物学领域的专家，擅长综合分析多篇论文，提炼研究趋势和重要发现。"},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.5,
-                    max_tokens=4000
-                )
-                
-                final_report = response.choices[0].message.content
-                logger.info(f"✅ 最终总结报告生成成功！(使用 {key_name})")
-                
-                # 添加数据完整性提示
-                if source_results:
-                    degraded_sources = [sr for sr in source_results if sr.is_degraded or sr.error]
-                    if degraded_sources:
-                        final_report += "\n\n## ⚠️ 数据完整性说明\n\n"
-                        final_report += "本次报告生成过程中,以下数据源未能完整获取:\n"
-                        for sr in degraded_sources:
-                            if sr.error:
-                                final_report += f"- {sr.source_name}: 抽取失败 ({sr.error})\n"
-                            elif sr.degraded_reason:
-                                final_report += f"- {sr.source_name}: {sr.degraded_reason}\n"
-                        final_report += "\n建议关注后续更新,或手动访问对应数据源确认。\n"
-                
-                return final_report
-                
-            except KeyboardInterrupt:
-                logger.warning("用户手动中断了程序")
-                raise
-            except Exception as e:
-                last_error = e
-                error_type = type(e).__name__
-                error_msg = str(e)
-                logger.error(f"调用大语言模型时出错（{key_name}, 第 {attempt + 1} 次尝试）: {error_type}: {error_msg[:200]}")
-                
-                if "401" in error_msg or "Unauthorized" in error_msg or "invalid" in error_msg.lower():
-                    logger.warning(f"{key_name} 认证失败，切换到下一个密钥")
-                    break
-                
-                if attempt < max_retries_per_key - 1:
-                    # 指数退避策略
-                    wait_time = min(Config.API_RETRY_BASE_DELAY * (2 ** attempt), Config.API_RETRY_MAX_DELAY)
-                    logger.info(f"等待 {wait_time} 秒后重试（指数退避策略）...")
-                    time.sleep(wait_time)
-                else:
-                    logger.warning(f"{key_name} 所有重试均失败，尝试下一个密钥")
-                    if key_index < len(all_api_keys) - 1:
-                        time.sleep(2)
-                    break
+        try:
+            logger.info(f"正在调用AI生成最终总结报告（{key_name}）...")
+            response = chat_completion(
+                api_key,
+                [
+                    {"role": "system", "content": "你是一位生物化学与分子生物学领域的专家，擅长综合分析多篇论文，提炼研究趋势和重要发现。"},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.5,
+                max_tokens=4000
+            )
+            
+            final_report = response.choices[0].message.content
+            logger.info(f"✅ 最终总结报告生成成功！(使用 {key_name})")
+            return final_report + _data_integrity_note(source_results)
+            
+        except KeyboardInterrupt:
+            logger.warning("用户手动中断了程序")
+            raise
+        except Exception as e:
+            last_error = e
+            logger.error(f"调用大语言模型失败（{key_name}）: {type(e).__name__}: {str(e)[:200]}")
+            if key_index < len(all_api_keys) - 1:
+                logger.warning(f"{key_name} 调用失败，尝试下一个密钥")
     
     # 所有密钥都失败，生成基于关键词的简单统计总结
     logger.error(f"所有 API 密钥（共 {len(all_api_keys)} 个）均失败，生成基于关键词的简单统计总结")
@@ -690,77 +640,36 @@ def generate_daily_report(scored_papers: List[ScoredPaper], source_results: List
         masked_key = f"{api_key[:8]}...{api_key[-4:]}" if len(api_key) > 12 else "***"
         logger.info(f"尝试使用 {key_name}: {masked_key}")
         
-        # 每个密钥的重试机制（使用配置的重试次数）
-        max_retries_per_key = Config.API_MAX_RETRIES
-        for attempt in range(max_retries_per_key):
-            try:
-                logger.info(f"正在调用AI生成报告（{key_name}, 第 {attempt + 1}/{max_retries_per_key} 次尝试）...")
-                logger.info(f"API地址: {Config.DEEPSEEK_BASE_URL}, 超时设置: {Config.API_TIMEOUT}秒")
-                
-                # 每次重试都创建新的客户端实例，避免连接复用问题
-                client = OpenAI(
-                    api_key=api_key,
-                    base_url=Config.DEEPSEEK_BASE_URL,
-                    timeout=Config.API_TIMEOUT,
-                    max_retries=0  # 禁用 SDK 内置重试，手动控制
-                )
-                
-                response = client.chat.completions.create(
-                    model="deepseek-chat",
-                    messages=[
-                        {"role": "system", "content": "你是一位生物化学与分子生物学领域的专家，擅长用通俗易懂的语言解读学术论文。"},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.5,
-                    max_tokens=3000
-                )
-                
-                daily_report = response.choices[0].message.content
-                logger.info(f"✅ AI报告生成成功！(使用 {key_name})")
-                
-                # 添加数据完整性提示
-                if source_results:
-                    degraded_sources = [sr for sr in source_results if sr.is_degraded or sr.error]
-                    if degraded_sources:
-                        daily_report += "\n\n## ⚠️ 数据完整性说明\n\n"
-                        daily_report += "本次报告生成过程中,以下数据源未能完整获取:\n"
-                        for sr in degraded_sources:
-                            if sr.error:
-                                daily_report += f"- {sr.source_name}: 抽取失败 ({sr.error})\n"
-                            elif sr.degraded_reason:
-                                daily_report += f"- {sr.source_name}: {sr.degraded_reason}\n"
-                        daily_report += "\n建议关注后续更新,或手动访问对应数据源确认。\n"
-                
-                return daily_report
-            except KeyboardInterrupt:
-                logger.warning("用户手动中断了程序")
-                raise
-            except Exception as e:
-                last_error = e
-                error_type = type(e).__name__
-                error_msg = str(e)
-                logger.error(f"调用大语言模型时出错（{key_name}, 第 {attempt + 1} 次尝试）: {error_type}: {error_msg[:200]}")
-                
-                # 记录详细错误信息
-                import traceback
-                logger.debug(f"错误堆栈:\n{traceback.format_exc()}")
-                
-                # 如果是认证错误（401），直接切换到下一个密钥
-                if "401" in error_msg or "Unauthorized" in error_msg or "invalid" in error_msg.lower():
-                    logger.warning(f"{key_name} 认证失败，切换到下一个密钥")
-                    break  # 跳出当前密钥的重试循环，尝试下一个密钥
-                
-                # 如果是连接错误，使用指数退避策略重试
-                if attempt < max_retries_per_key - 1:
-                    wait_time = min(Config.API_RETRY_BASE_DELAY * (2 ** attempt), Config.API_RETRY_MAX_DELAY)
-                    logger.info(f"等待 {wait_time} 秒后重试（指数退避策略）...")
-                    time.sleep(wait_time)
-                else:
-                    # 当前密钥的所有重试都失败，尝试下一个密钥
-                    logger.warning(f"{key_name} 所有重试均失败，尝试下一个密钥")
-                    if key_index < len(all_api_keys) - 1:
-                        time.sleep(2)  # 切换密钥前稍作等待
-                    break  # 跳出当前密钥的重试循环
+        try:
+            logger.info(f"正在调用AI生成报告（{key_name}）...")
+            logger.info(f"API地址: {Config.DEEPSEEK_BASE_URL}, 超时设置: {Config.API_TIMEOUT}秒")
+            response = chat_completion(
+                api_key,
+                [
+                    {"role": "system", "content": "你是一位生物化学与分子生物学领域的专家，擅长用通俗易懂的语言解读学术论文。"},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.5,
+                max_tokens=3000
+            )
+            
+            daily_report = response.choices[0].message.content
+            logger.info(f"✅ AI报告生成成功！(使用 {key_name})")
+            return daily_report + _data_integrity_note(source_results)
+        except KeyboardInterrupt:
+            logger.warning("用户手动中断了程序")
+            raise
+        except Exception as e:
+            last_error = e
+            logger.error(f"调用大语言模型失败（{key_name}）: {type(e).__name__}: {str(e)[:200]}")
+            
+            # 记录详细错误信息
+            import traceback
+            logger.debug(f"错误堆栈:\n{traceback.format_exc()}")
+            
+            # 当前密钥认证失败或所有重试都失败，尝试下一个密钥
+            if key_index < len(all_api_keys) - 1:
+                logger.warning(f"{key_name} 调用失败，尝试下一个密钥")
     
     # 所有密钥都失败，返回降级报告
     logger.error(f"所有 API 密钥（共 {len(all_api_keys)} 个）均失败，返回降级报告")
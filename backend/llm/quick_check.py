@@ -4,20 +4,21 @@
 import logging
 import time
 from typing import Optional
-from openai import OpenAI
 from backend.models import Paper
 from backend.core.config import Config
+from backend.llm.deepseek import chat_completion, deepseek_retry_policy
 
 logger = logging.getLogger(__name__)
 
 
-def quick_relevance_check(paper: Paper, max_retries: int = 2) -> Optional[bool]:
+def quick_relevance_check(paper: Paper, max_retries: int = 2, deadline: Optional[float] = None) -> Optional[bool]:
     """
     快速判断论文是否属于三大研究方向
     
     Args:
         paper: 论文对象
-        max_retries: 最大重试次数
+        max_retries: 每个密钥的最大尝试次数
+        deadline: 截止时刻（time.monotonic），重试等待会超过截止时刻时不再重试
         
     Returns:
         True: 属于三大方向
@@ -46,59 +47,45 @@ def quick_relevance_check(paper: Paper, max_retries: int = 2) -> Optional[bool]:
     # 获取所有 API 密钥
     all_api_keys = Config.get_all_api_keys()
     
+    # 快速判断：较短的超时和重试间隔
+    policy = deepseek_retry_policy(max_attempts=max_retries, base_delay=2)
+    
     for key_index, api_key in enumerate(all_api_keys):
         key_name = "主密钥" if key_index == 0 else f"备用密钥{key_index}"
+        try:
+            response = chat_completion(
+                api_key,
+                [
+                    {"role": "system", "content": "你是一位生物化学与分子生物学领域的专家，擅长快速判断论文的研究方向。"},
+                    {"role": "user", "content": prompt}
+                ],
+                timeout=30,  # 快速判断，使用较短的超时时间
+                deadline=deadline,
+                policy=policy,
+                temperature=0.1,  # 低温度，确保判断稳定
+                max_tokens=10  # 只需要回答"是"或"否"
+            )
+        except Exception as e:
+            logger.debug(f"[快速检查] API调用失败（{key_name}）: {type(e).__name__}: {str(e)[:100]}")
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning(f"[快速检查] 超出时间预算，停止重试，默认保留")
+                return None
+            continue  # 尝试下一个密钥
+        
+        result_text = response.choices[0].message.content.strip()
         
-        for attempt in range(max_retries):
-            try:
-                # 创建新的客户端实例
-                client = OpenAI(
-                    api_key=api_key,
-                    base_url=Config.DEEPSEEK_BASE_URL,
-                    timeout=30,  # 快速判断，使用较短的超时时间
-                    max_retries=0
-                )
-                
-                response = client.chat.completions.create(
-                    model="deepseek-chat",
-                    messages=[
-                        {"role": "system", "content": "你是一位生物化学与分子生物学领域的专家，擅长快速判断论文的研究方向。"},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.1,  # 低温度，确保判断稳定
-                    max_tokens=10  # 只需要回答"是"或"否"
-                )
-                
-                result_text = response.choices[0].message.content.strip()
-                
-                # 解析结果
-                if "是" in result_text or "yes" in result_text.lower() or "true" in result_text.lower():
-                    logger.debug(f"[快速检查] 论文 '{paper.title[:50]}...' 判断为：相关")
-                    return True
-                elif "否" in result_text or "no" in result_text.lower() or "false" in result_text.lower():
-                    logger.debug(f"[快速检查] 论文 '{paper.title[:50]}...' 判断为：不相关")
-                    return False
-                else:
-                    # 无法解析，默认返回True（保守策略，避免误过滤）
-                    logger.warning(f"[快速检查] 无法解析AI回答: '{result_text}'，默认判断为相关")
-                    return True
-                    
-            except Exception as e:
-                error_type = type(e).__name__
-                error_msg = str(e)
-                logger.debug(f"[快速检查] API调用失败（{key_name}, 第 {attempt + 1} 次）: {error_type}: {error_msg[:100]}")
-                
-                if attempt < max_retries - 1:
-                    time.sleep(2)  # 短暂等待后重试
-                else:
-                    if key_index < len(all_api_keys) - 1:
-                        time.sleep(1)  # 切换密钥前短暂等待
-                        break  # 尝试下一个密钥
-                    else:
-                        # 所有密钥都失败，返回None
-                        logger.warning(f"[快速检查] 所有API密钥均失败，无法判断论文相关性，默认保留")
-                        return None
+        # 解析结果
+        if "是" in result_text or "yes" in result_text.lower() or "true" in result_text.lower():
+            logger.debug(f"[快速检查] 论文 '{paper.title[:50]}...' 判断为：相关")
+            return True
+        elif "否" in result_text or "no" in result_text.lower() or "false" in result_text.lower():
+            logger.debug(f"[快速检查] 论文 '{paper.title[:50]}...' 判断为：不相关")
+            return False
+        else:
+            # 无法解析，默认返回True（保守策略，避免误过滤）
+            logger.warning(f"[快速检查] 无法解析AI回答: '{result_text}'，默认判断为相关")
+            return True
     
-    # 所有尝试都失败
+    # 所有密钥都失败，返回None
+    logger.warning(f"[快速检查] 所有API密钥均失败，无法判断论文相关性，默认保留")
     return None
-
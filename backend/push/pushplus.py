@@ -1,10 +1,10 @@
 """
 PushPlus 推送
 """
-import requests
 import logging
 from typing import List
 from backend.core.config import Config
+from backend.utils.http import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +29,7 @@ class PushPlusSender:
                     "template": "markdown"
                 }
                 
-                response = requests.post(
+                response = get_http_client().post(
                     self.url,
                     json=data,
                     timeout=20,
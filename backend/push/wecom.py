@@ -1,10 +1,10 @@
 """
 企业微信推送
 """
-import requests
 import json
 import logging
 from backend.core.config import Config
+from backend.utils.http import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +32,7 @@ class WeComSender:
                 }
             }
             
-            response = requests.post(
+            response = get_http_client().post(
                 self.webhook_url,
                 json=data,
                 timeout=10
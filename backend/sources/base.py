@@ -1,18 +1,406 @@
 """
 数据源基类
 """
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import time
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from backend.models import Paper, SourceResult
+from backend.core.config import Config
 from backend.core.deduplication import get_item_id
+from backend.utils.retry import RetryPolicy
+
+logger = logging.getLogger(__name__)
 
 
 class BaseSource(ABC):
     """数据源基类"""
     
+    # 抓取结果缓存时长（秒），按数据源的发布节奏设置；0 表示不缓存
+    cache_ttl: int = 3 * 3600
+    # 影响抓取结果的实例属性（检索词、RSS 列表、页数等），参与结果缓存键的计算
+    query_attrs: Tuple[str, ...] = ()
+    # 单个请求的重试策略：按异常/状态码分类、抖动退避、遵守 Retry-After，计入本次运行的重试预算
+    retry_policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=30.0)
+    
     def __init__(self, name: str, window_days: int = 7):
         self.name = name
         self.window_days = window_days
+        # 参考日期：默认为当天；回放历史运行时设为原运行日期，保证查询窗口和日期过滤一致
+        self.reference_date: Optional[datetime.date] = None
+        # 原始响应归档（未启用时为 None）
+        self.archive = None
+        self.run_id: Optional[str] = None
+        self.replay = False
+        # 增量抓取状态（条件请求校验值、已见条目索引）：是否读取已保存的状态、是否写入新状态
+        self.read_incremental_state = True
+        self.write_incremental_state = True
+        # 熔断：是否遵守熔断判定（test-sources 设为 False 以便诊断）；探测模式下数据源应缩短重试
+        self.respect_circuit = True
+        self.probe_mode = False
+        # 运行截止时间预算：抓取阶段的截止时刻（time.monotonic），超过后数据源应截断剩余分页/请求
+        self.deadline: Optional[float] = None
+        self.truncated: Optional[str] = None
+    
+    def today(self) -> datetime.date:
+        """数据源视角的"今天"（回放时为原运行日期）"""
+        return self.reference_date or datetime.date.today()
+    
+    def window_bounds(self) -> Tuple[str, str]:
+        """
+        抓取窗口的起止日期（YYYY-MM-DD）
+        
+        窗口结束于参考日期前一天，向前覆盖 window_days 天
+        """
+        end_date = self.today() - datetime.timedelta(days=1)
+        start_date = self.today() - datetime.timedelta(days=self.window_days)
+        return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+    
+    def attach_archive(self, archive, run_id: str, replay: bool = False,
+                       reference_date: Optional[datetime.date] = None):
+        """
+        挂载原始响应归档
+        
+        Args:
+            archive: PayloadArchive 实例
+            run_id: 运行ID（归档时为当前运行，回放时为被回放的运行）
+            replay: 是否回放模式（只从归档读取，不访问网络）
+            reference_date: 回放时使用的参考日期
+        """
+        self.archive = archive
+        self.run_id = run_id
+        self.replay = replay
+        if reference_date is not None:
+            self.reference_date = reference_date
+    
+    def _fetch_raw(self, request_key: str, fetch_func: Callable[[], bytes],
+                   content_type: str = 'application/json') -> bytes:
+        """
+        获取原始响应正文（统一的归档/回放入口）
+        
+        - 回放模式：按请求键从归档取回，不访问网络
+        - 归档模式：正常请求后写入归档（归档失败不影响抓取）
+        - 未挂载归档：直接请求
+        
+        网络请求按 retry_policy 重试。
+        
+        Args:
+            request_key: 请求键（URL 或 Entrez 参数串）
+            fetch_func: 实际发起请求并返回正文字节的函数
+            content_type: 内容类型
+        """
+        if self.replay:
+            return self.archive.get(self.run_id, self.name, request_key)
+        
+        body = self._retry_call(fetch_func)
+        if self.archive is not None and self.run_id:
+            try:
+                window_start, window_end = self.window_bounds()
+                self.archive.put(self.run_id, self.name, request_key, body,
+                                 window_start, window_end, content_type)
+            except Exception as e:
+                logger.warning(f"{self.name} 原始响应归档失败: {e}")
+        return body
+    
+    def query_config(self) -> Dict[str, Any]:
+        """
+        影响抓取结果的查询配置（用于结果缓存键）
+        
+        包含 query_attrs 列出的实例属性和全局关键词配置，任一配置变化都会使缓存失效
+        """
+        params = {attr: getattr(self, attr, None) for attr in self.query_attrs}
+        return {
+            'source': type(self).__name__,
+            'params': params,
+            'research_topics': Config.RESEARCH_TOPICS,
+            'target_categories': Config.TARGET_CATEGORIES,
+        }
+    
+    def query_hash(self, exclude_keywords: List[str]) -> str:
+        """查询配置（含排除词）的哈希"""
+        config = dict(self.query_config(), exclude_keywords=sorted(exclude_keywords))
+        return hashlib.sha256(
+            json.dumps(config, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+        ).hexdigest()[:16]
+    
+    def cache_key(self, exclude_keywords: List[str]) -> str:
+        """结果缓存键：数据源 + 窗口起止日期 + 查询配置哈希"""
+        window_start, window_end = self.window_bounds()
+        return f"source_result:{self.name}:{window_start}:{window_end}:{self.query_hash(exclude_keywords)}"
+    
+    def fetch_cached(self, sent_ids: Set[str], exclude_keywords: List[str],
+                     refresh: bool = False, cache=None) -> SourceResult:
+        """
+        带结果缓存的抓取
+        
+        缓存的是未经 sent_ids 去重的完整结果，命中后再按本次的 sent_ids 过滤，
+        因此 test-sources 和 run 在同一窗口内可以共享一次抓取。
+        并发的相同请求（如 API 触发的测试和定时任务）只会访问上游一次。
+        
+        Args:
+            sent_ids: 已推送的ID集合（用于去重）
+            exclude_keywords: 排除关键词列表
+            refresh: 忽略已有缓存，重新抓取并更新缓存
+            cache: 缓存实例（默认为全局两级缓存）
+        """
+        return self._fetch_cached_with(self.fetch, sent_ids, exclude_keywords, refresh, cache)
+    
+    def _fetch_cached_with(self, fetch_func: Callable[[Set[str], List[str]], SourceResult],
+                           sent_ids: Set[str], exclude_keywords: List[str],
+                           refresh: bool = False, cache=None) -> SourceResult:
+        """fetch_cached 的实现，fetch_func 为实际抓取函数（同步 fetch 或桥接到事件循环的 afetch）"""
+        if not self.replay:
+            upstream_func = fetch_func
+            fetch_func = lambda ids, keywords: self._fetch_with_health(upstream_func, ids, keywords)
+        
+        if self.replay or self.cache_ttl <= 0 or not Config.ENABLE_SOURCE_CACHE:
+            return fetch_func(sent_ids, exclude_keywords)
+        
+        if cache is None:
+            from backend.utils.cache import get_tiered_cache
+            cache = get_tiered_cache()
+        
+        key = self.cache_key(exclude_keywords)
+        if refresh:
+            cache.delete(key)
+            # 强制重新抓取时也不读取增量状态，避免 304 或已见条目跳过内容
+            self.read_incremental_state = False
+        
+        fetched = []
+        
+        def compute() -> Dict[str, Any]:
+            fetched.append(True)
+            return {'result': fetch_func(set(), exclude_keywords), 'run_id': self.run_id}
+        
+        try:
+            entry = cache.get_or_compute(
+                key, compute, ttl=self.cache_ttl,
+                # 失败或降级的结果不缓存
+                is_negative=lambda e: not e['result'].success() or e['result'].is_degraded,
+                cache_negative=False
+            )
+        except Exception as e:
+            if fetched:
+                raise
+            logger.warning(f"{self.name} 结果缓存不可用，直接抓取: {e}")
+            return fetch_func(sent_ids, exclude_keywords)
+        
+        result = entry['result']
+        if not fetched:
+            logger.info(f"{self.name} 命中结果缓存（{len(result.papers)} 条，窗口 {' ~ '.join(self.window_bounds())}）")
+            self._link_cached_payloads(entry.get('run_id'))
+        
+        return self._filter_sent(result, sent_ids)
+    
+    def time_left(self) -> Optional[float]:
+        """距抓取阶段截止的剩余秒数（未设置预算时为 None）"""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+    
+    def deadline_exceeded(self) -> bool:
+        """抓取阶段的时间预算是否已用尽"""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+    
+    def request_timeout(self, default: float, minimum: float = 5.0) -> float:
+        """单次请求超时：不超过剩余预算（但不低于 minimum，避免请求必然失败）"""
+        time_left = self.time_left()
+        if time_left is None:
+            return default
+        return max(min(default, time_left), minimum)
+    
+    def truncate(self, detail: str):
+        """记录因时间预算截断的抓取，结果将标记为降级（且不写入结果缓存）"""
+        logger.warning(f"{self.name} 抓取时间预算用尽，{detail}")
+        self.truncated = detail
+    
+    def max_attempts(self, default: int) -> int:
+        """单个请求的最大尝试次数：熔断探测时只尝试一次，避免在失效的数据源上耗费退避时间"""
+        return 1 if self.probe_mode else default
+    
+    def _retry_call(self, func: Callable[[], Any], attempts: Optional[int] = None) -> Any:
+        """
+        按重试策略调用 func（熔断探测时只尝试一次，重试等待不超过抓取截止时间）
+        
+        Args:
+            func: 发起一次请求的无参函数，失败时抛出异常
+            attempts: 最大尝试次数（默认按 retry_policy）
+        """
+        return self.retry_policy.call(
+            func, key=self.name,
+            max_attempts=self.max_attempts(attempts or self.retry_policy.max_attempts),
+            deadline=self.deadline
+        )
+    
+    async def _aretry_call(self, func: Callable[[], Any], attempts: Optional[int] = None) -> Any:
+        """_retry_call 的异步版本（func 为无参协程函数）"""
+        return await self.retry_policy.acall(
+            func, key=self.name,
+            max_attempts=self.max_attempts(attempts or self.retry_policy.max_attempts),
+            deadline=self.deadline
+        )
+    
+    @staticmethod
+    def is_healthy_result(result: SourceResult) -> bool:
+        """抓取结果是否计为成功：有错误、或降级且没有任何结果时计为失败"""
+        return result.success() and not (result.is_degraded and not result.papers)
+    
+    def _fetch_with_health(self, fetch_func: Callable[[Set[str], List[str]], SourceResult],
+                           sent_ids: Set[str], exclude_keywords: List[str]) -> SourceResult:
+        """
+        经熔断判定后抓取，并记录耗时和结果到数据源健康登记表
+        
+        熔断中的数据源直接返回降级的空结果；冷却期结束后的探测以 probe_mode 运行。
+        结果的 latency 为空时补充实测耗时，出错的结果标记为降级。
+        只因本次时间预算用尽而截断的空结果不说明数据源异常，不计入健康登记表。
+        """
+        registry = None
+        if Config.ENABLE_CIRCUIT_BREAKER:
+            from backend.storage.source_health import get_source_health
+            try:
+                registry = get_source_health()
+                decision = registry.before_fetch(self.name) if self.respect_circuit else None
+            except Exception as e:
+                logger.warning(f"{self.name} 健康状态不可用，跳过熔断判定: {e}")
+                registry, decision = None, None
+            
+            if decision is not None and not decision.allowed:
+                logger.warning(f"{self.name} {decision.reason}，本次跳过")
+                return SourceResult(
+                    source_name=self.name, papers=[], is_degraded=True,
+                    degraded_reason=decision.reason, latency=0.0
+                )
+            self.probe_mode = bool(decision and decision.probe)
+        
+        self.truncated = None
+        start = time.time()
+        try:
+            result = fetch_func(sent_ids, exclude_keywords)
+        except Exception as e:
+            if registry is not None:
+                self._record_health(registry, False, time.time() - start, f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self.probe_mode = False
+        
+        latency = time.time() - start
+        if result.latency is None and Config.ENABLE_LATENCY_TRACKING:
+            result.latency = latency
+        if result.error and not result.is_degraded:
+            result.is_degraded = True
+            result.degraded_reason = result.degraded_reason or result.error
+        # 截断前结果本身正常、只是时间预算用尽前没拿到论文：既不算失败也不算成功
+        truncated_only = (bool(self.truncated) and result.success()
+                          and not result.is_degraded and not result.papers)
+        if self.truncated:
+            result.is_degraded = True
+            reason = f"时间预算用尽，{self.truncated}"
+            result.degraded_reason = f"{result.degraded_reason}; {reason}" if result.degraded_reason else reason
+        
+        if registry is not None and not truncated_only:
+            self._record_health(
+                registry, self.is_healthy_result(result), latency, result.error or result.degraded_reason
+            )
+        return result
+    
+    def _record_health(self, registry, success: bool, latency: float, error: Optional[str]):
+        try:
+            registry.record(self.name, success, latency, error)
+        except Exception as e:
+            logger.warning(f"{self.name} 记录健康状态失败: {e}")
+    
+    def _link_cached_payloads(self, origin_run_id: Optional[str]):
+        """缓存命中时，把产生该结果的运行的归档索引关联到当前运行，保证 replay 可用"""
+        if self.archive is None or not self.run_id or origin_run_id == self.run_id:
+            return
+        if not origin_run_id:
+            logger.debug(f"{self.name} 缓存结果没有对应的归档，本次运行无法回放该数据源")
+            return
+        try:
+            self.archive.link_run(self.name, origin_run_id, self.run_id)
+        except Exception as e:
+            logger.warning(f"{self.name} 关联归档失败: {e}")
+    
+    def _filter_sent(self, result: SourceResult, sent_ids: Set[str]) -> SourceResult:
+        """按 sent_ids 去重，返回新的 SourceResult（不修改缓存中的对象）"""
+        papers = result.papers
+        if sent_ids:
+            papers = [p for p in papers if not ((item_id := self.get_item_id(p)) and item_id in sent_ids)]
+            if len(papers) < len(result.papers):
+                logger.info(f"{self.name} 去重过滤 {len(result.papers) - len(papers)} 条已推送论文")
+        return SourceResult(
+            source_name=result.source_name,
+            papers=list(papers),
+            error=result.error,
+            is_degraded=result.is_degraded,
+            degraded_reason=result.degraded_reason,
+            latency=result.latency,
+        )
+    
+    def _conditional_get(self, url: str, keep_body: bool = False, **kwargs):
+        """
+        带 ETag/Last-Modified 校验值的 GET 请求
+        
+        Args:
+            url: 请求地址
+            keep_body: 是否保存正文，304 时返回保存的正文（用于 API 结果复用）；
+                      为 False 时 304 的 body 为 None，调用方应跳过解析
+            **kwargs: 传给 requests 的参数（headers、timeout、proxies 等）
+        
+        Returns:
+            ConditionalResponse
+        """
+        from backend.utils.conditional import conditional_get
+        return conditional_get(
+            url, keep_body=keep_body,
+            send_validators=self.read_incremental_state,
+            save_validators=self.write_incremental_state,
+            **kwargs
+        )
+    
+    @classmethod
+    def has_async_fetch(cls) -> bool:
+        """数据源是否有原生异步实现（覆盖了 afetch）"""
+        return cls.afetch is not BaseSource.afetch
+    
+    async def afetch(self, sent_ids: Set[str], exclude_keywords: List[str], client=None) -> SourceResult:
+        """
+        异步抓取
+        
+        默认在线程中执行同步 fetch。目前只有 GitHub（REST 检索模式）覆盖此方法，
+        用 AsyncHTTPClient 并发发出各检索请求；bioRxiv、PubMed、EuropePMC 的分页
+        在同步 fetch 内由各自的线程池并发请求，不经过异步客户端。
+        
+        Args:
+            sent_ids: 已推送的ID集合（用于去重）
+            exclude_keywords: 排除关键词列表
+            client: AsyncHTTPClient 实例（原生异步实现使用）
+        """
+        return await asyncio.to_thread(self.fetch, sent_ids, exclude_keywords)
+    
+    async def afetch_cached(self, sent_ids: Set[str], exclude_keywords: List[str],
+                            refresh: bool = False, client=None, cache=None) -> SourceResult:
+        """
+        带结果缓存的异步抓取（语义与 fetch_cached 相同）
+        
+        缓存读写和单飞锁在线程中执行；原生异步的抓取仍在当前事件循环上运行，
+        因此与同步调用方（如 API 触发的测试）共享同一把单飞锁。
+        """
+        if not self.has_async_fetch():
+            return await asyncio.to_thread(self.fetch_cached, sent_ids, exclude_keywords, refresh, cache)
+        
+        loop = asyncio.get_running_loop()
+        
+        def fetch_on_loop(ids: Set[str], keywords: List[str]) -> SourceResult:
+            return asyncio.run_coroutine_threadsafe(self.afetch(ids, keywords, client), loop).result()
+        
+        return await asyncio.to_thread(
+            self._fetch_cached_with, fetch_on_loop, sent_ids, exclude_keywords, refresh, cache
+        )
     
     @abstractmethod
     def fetch(self, sent_ids: set, exclude_keywords: list) -> SourceResult:
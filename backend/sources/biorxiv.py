@@ -1,15 +1,19 @@
 """
 bioRxiv 数据源
 """
+import concurrent.futures
 import datetime
-import requests
+import json
 import logging
 import time
-from typing import Set, List
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from backend.models import Paper, SourceResult
 from backend.sources.base import BaseSource
 from backend.core.config import Config
 from backend.core.filtering import should_exclude_paper, is_recent_date
+from backend.storage.biorxiv_mirror import BioRxivMirror
+from backend.utils.http import HTTPClient, get_http_client
+from backend.utils.retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -21,67 +25,265 @@ PAGE_SIZE = 100
 class BioRxivSource(BaseSource):
     """
     bioRxiv 数据源
-    支持动态分页、诊断日志、豁免机制
+    支持动态分页（顺序或并发）、本地按日镜像、诊断日志、豁免机制
     """
     
+    # 按日发布批次
+    cache_ttl = 6 * 3600
+    query_attrs = ('max_pages', 'enable_exemption')
+    # 连接经常被服务端中断，重试间隔较短
+    retry_policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=8.0)
+    
     def __init__(self, window_days: int = None, max_pages: int = None, 
-                 enable_diagnostic: bool = None, enable_exemption: bool = None):
+                 enable_diagnostic: bool = None, enable_exemption: bool = None,
+                 concurrent_pages: bool = None, page_concurrency: int = None, use_mirror: bool = None):
         super().__init__("bioRxiv", window_days or Config.DEFAULT_WINDOW_DAYS)
         # 参数化配置，支持向后兼容
         self.max_pages = max_pages if max_pages is not None else Config.BIORXIV_MAX_PAGES
         self.enable_diagnostic = enable_diagnostic if enable_diagnostic is not None else Config.ENABLE_DIAGNOSTIC
         self.enable_exemption = enable_exemption if enable_exemption is not None else Config.ENABLE_EXEMPTION
+        # 并发分页：按首页报告的总数一次算出全部游标，其余页在并发上限内同时抓取
+        self.concurrent_pages = concurrent_pages if concurrent_pages is not None else Config.BIORXIV_CONCURRENT_PAGES
+        self.page_concurrency = max(page_concurrency or Config.BIORXIV_PAGE_CONCURRENCY, 1)
+        # 本地按日镜像：只同步未镜像的日期和尾随窗口，其余日期从本地读取
+        self.use_mirror = use_mirror if use_mirror is not None else Config.ENABLE_BIORXIV_MIRROR
+        self.request_headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
     
-    def _fetch_page_with_retry(self, session: requests.Session, url: str, max_retries: int = 3) -> dict:
+    def _fetch_page_with_retry(self, session: HTTPClient, url: str) -> dict:
         """
-        带重试机制的页面抓取
+        带重试机制的页面抓取（超时、连接中断、5xx 按 retry_policy 抖动退避重试）
         
         Args:
-            session: requests.Session 对象（复用连接）
+            session: 共享 HTTP 客户端（按主机复用连接）
             url: 请求URL
-            max_retries: 最大重试次数
             
         Returns:
             解析后的JSON数据
         """
-        last_error = None
+        def download() -> bytes:
+            # 增加超时时间到60秒，使用共享连接池复用连接
+            response = session.get(
+                url,
+                headers=self.request_headers,
+                timeout=self.request_timeout(60),  # 从30秒增加到60秒，但不超过剩余时间预算
+                proxies={'http': None, 'https': None}
+            )
+            response.raise_for_status()
+            return response.content
         
-        for attempt in range(max_retries):
+        return json.loads(self._fetch_raw(url, download))
+    
+    @staticmethod
+    def _total_count(json_data: dict) -> Optional[int]:
+        """首页 messages 中报告的记录总数（缺失或无法解析时为 None）"""
+        messages = json_data.get('messages') or []
+        try:
+            return int(messages[0]['total'])
+        except (IndexError, KeyError, TypeError, ValueError):
+            return None
+    
+    def _fetch_pages_sequential(self, session: HTTPClient, base_url: str, start_date_obj: datetime.date,
+                                process: Callable[[list], None], start_page: int = 0) -> Optional[str]:
+        """
+        逐页抓取（游标顺序前进，页间延迟0.5秒），直到没有更多数据、超出日期范围或时间预算用尽
+        
+        Returns:
+            降级原因（首页之后有页面失败时），否则为 None
+        """
+        # 动态分页抓取 - 移除页数限制，确保获取前一天的所有论文
+        page = start_page
+        while True:
+            if page > 0 and self.deadline_exceeded():
+                self.truncate(f"分页在第{page + 1}页截断（已获取 {page} 页）")
+                break
+            # API 格式: details/server/interval/cursor 或 details/server/start_date/end_date/cursor
+            url = f"{base_url}/{page * PAGE_SIZE}"
+            
             try:
-                # 指数退避：第1次立即，第2次等2秒，第3次等4秒
-                if attempt > 0:
-                    wait_time = 2 ** (attempt - 1)
-                    logger.warning(f"bioRxiv 请求失败，{wait_time}秒后重试（第 {attempt + 1}/{max_retries} 次）...")
-                    time.sleep(wait_time)
-                
-                # 增加超时时间到60秒，使用会话复用连接
-                response = session.get(
-                    url,
-                    timeout=60,  # 从30秒增加到60秒
-                    proxies={'http': None, 'https': None}
-                )
-                response.raise_for_status()
-                return response.json()
-                
-            except requests.exceptions.Timeout as e:
-                last_error = e
-                logger.warning(f"bioRxiv 请求超时（第 {attempt + 1}/{max_retries} 次）: {e}")
-            except requests.exceptions.ConnectionError as e:
-                last_error = e
-                error_msg = str(e)
-                if "RemoteDisconnected" in error_msg or "Connection aborted" in error_msg:
-                    logger.warning(f"bioRxiv 连接被中断（第 {attempt + 1}/{max_retries} 次）: {error_msg[:100]}")
-                else:
-                    logger.warning(f"bioRxiv 连接错误（第 {attempt + 1}/{max_retries} 次）: {error_msg[:100]}")
-            except requests.exceptions.HTTPError as e:
-                last_error = e
-                logger.warning(f"bioRxiv HTTP错误（第 {attempt + 1}/{max_retries} 次）: {e}")
+                # 使用带重试机制的抓取
+                data = self._fetch_page_with_retry(session, url).get('collection', [])
             except Exception as e:
-                last_error = e
-                logger.warning(f"bioRxiv 请求异常（第 {attempt + 1}/{max_retries} 次）: {type(e).__name__}: {e}")
+                logger.error(f"bioRxiv 第{page+1}页抓取失败: {e}")
+                # 如果第一页就失败，直接返回错误
+                if page == 0:
+                    raise
+                # 如果不是第一页，保留已获取的数据，但报告本次结果不完整
+                return f"第{page + 1}页抓取失败，已获取 {page - start_page} 页"
+            
+            if not data:
+                logger.debug(f"bioRxiv 第{page+1}页无数据，停止抓取")
+                break
+            
+            # 检查时间边界（早退机制）
+            oldest_date = None
+            for p in data:
+                paper_date_str = p.get('date', '')
+                if paper_date_str:
+                    try:
+                        paper_date = datetime.datetime.strptime(paper_date_str[:10], '%Y-%m-%d').date()
+                        if oldest_date is None or paper_date < oldest_date:
+                            oldest_date = paper_date
+                    except (ValueError, TypeError) as e:
+                        logger.debug(f"bioRxiv 日期解析失败: {paper_date_str} - {e}")
+            
+            # 仍然处理当前页
+            process(data)
+            logger.debug(f"bioRxiv 第{page+1}页抓取完成")
+            
+            # 如果最老的论文超出窗口期，提前终止
+            if oldest_date and oldest_date < start_date_obj:
+                logger.debug(f"bioRxiv 第{page+1}页最老论文日期 {oldest_date} 已超出窗口期 {start_date_obj}，提前终止")
+                break
+            
+            # 如果返回数据少于100条，说明已经是最后一页
+            if len(data) < PAGE_SIZE:
+                logger.debug(f"bioRxiv 第{page+1}页数据不足100条，停止抓取")
+                break
+            
+            # 请求之间添加短暂延迟，避免请求过快导致连接被中断（回放时无需等待）
+            if not self.replay:
+                time.sleep(0.5)  # 延迟0.5秒
+            
+            # 继续下一页
+            page += 1
+        return None
+    
+    def _fetch_pages_concurrent(self, session: HTTPClient, base_url: str, start_date_obj: datetime.date,
+                                process: Callable[[list], None]) -> Optional[str]:
+        """
+        并发抓取：首页返回的 messages 已给出记录总数，据此算出全部游标，
+        其余页在并发上限内同时请求，每页到达即处理
         
-        # 所有重试都失败
-        raise Exception(f"bioRxiv 请求失败（已重试 {max_retries} 次）: {last_error}")
+        Returns:
+            降级原因（有页面失败或时间预算用尽时），全部成功时为 None
+        """
+        first = self._fetch_page_with_retry(session, f"{base_url}/0")
+        data = first.get('collection', [])
+        process(data)
+        
+        total = self._total_count(first)
+        if total is None:
+            # 首页没有报告总数：退回逐页抓取
+            logger.warning("bioRxiv 首页未返回记录总数，改为逐页抓取")
+            if len(data) >= PAGE_SIZE:
+                return self._fetch_pages_sequential(session, base_url, start_date_obj, process, start_page=1)
+            return None
+        
+        cursors = list(range(PAGE_SIZE, total, PAGE_SIZE))
+        if not cursors:
+            return None
+        logger.info(f"bioRxiv 共 {total} 条记录，并发抓取剩余 {len(cursors)} 页（并发上限 {self.page_concurrency}）")
+        
+        failed = []
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.page_concurrency, thread_name_prefix="biorxiv-page"
+        )
+        pending = {
+            executor.submit(self._fetch_page_with_retry, session, f"{base_url}/{cursor}"): cursor
+            for cursor in cursors
+        }
+        try:
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending, timeout=self.time_left(), return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                if not done:
+                    # 抓取阶段时间预算用尽：放弃未完成的页面
+                    self.truncate(f"剩余 {len(pending)}/{len(cursors) + 1} 页未完成")
+                    break
+                for future in done:
+                    cursor = pending.pop(future)
+                    try:
+                        page_data = future.result().get('collection', [])
+                    except Exception as e:
+                        logger.error(f"bioRxiv 第{cursor // PAGE_SIZE + 1}页抓取失败: {e}")
+                        failed.append(cursor // PAGE_SIZE + 1)
+                        continue
+                    process(page_data)
+        finally:
+            # 预算用尽时不等待进行中的请求（请求超时已按剩余预算收紧）
+            executor.shutdown(wait=not pending, cancel_futures=True)
+        
+        if failed:
+            return f"{len(failed)}/{len(cursors) + 1} 页抓取失败（第 {', '.join(map(str, sorted(failed)[:5]))} 页）"
+        return None
+    
+    def _sync_day(self, session: HTTPClient, day: datetime.date) -> Tuple[list, Optional[str]]:
+        """
+        从网络抓取某一天的全部 details 记录
+        
+        Returns:
+            (记录列表, 不完整的原因；完整时为 None)
+        """
+        records = []
+        day_str = day.isoformat()
+        base_url = f"https://api.biorxiv.org/details/biorxiv/{day_str}/{day_str}"
+        truncated_before = self.truncated
+        if self.concurrent_pages:
+            reason = self._fetch_pages_concurrent(session, base_url, day, records.extend)
+        else:
+            reason = self._fetch_pages_sequential(session, base_url, day, records.extend)
+        if reason is None and self.truncated != truncated_before:
+            reason = self.truncated
+        return records, reason
+    
+    def _fetch_from_mirror(self, session: HTTPClient, start_date_obj: datetime.date, end_date_obj: datetime.date,
+                           process: Callable[[list], None]) -> Optional[str]:
+        """
+        经本地按日镜像抓取：先同步窗口内未镜像的日期和尾随窗口内的日期，再逐日读取记录过滤
+        
+        同步不完整的日期（页面失败、时间预算用尽）本次照常使用已抓到的记录，但不写入镜像。
+        回放时不同步，逐日记录从归档中取回。
+        
+        Returns:
+            降级原因（有日期同步失败或不完整时），否则为 None
+        """
+        mirror = BioRxivMirror()
+        fetched: Dict[datetime.date, list] = {}
+        incomplete = []
+        
+        if not self.replay:
+            days = mirror.days_to_sync(start_date_obj, end_date_obj, force=not self.read_incremental_state)
+            window = (end_date_obj - start_date_obj).days + 1
+            logger.info(f"bioRxiv 镜像: 窗口 {window} 天，需同步 {len(days)} 天")
+            for day_idx, day in enumerate(days):
+                if self.deadline_exceeded():
+                    self.truncate(f"跳过剩余 {len(days) - day_idx} 天的镜像同步")
+                    break
+                try:
+                    records, reason = self._sync_day(session, day)
+                except Exception as e:
+                    logger.error(f"bioRxiv {day} 同步失败: {e}")
+                    incomplete.append(day)
+                    continue
+                fetched[day] = records
+                if reason:
+                    logger.warning(f"bioRxiv {day} 同步不完整，不写入镜像: {reason}")
+                    incomplete.append(day)
+                elif self.write_incremental_state:
+                    mirror.store_day(day, records, synced_on=self.today())
+            if self.write_incremental_state:
+                mirror.prune(self.today())
+        
+        day = start_date_obj
+        while day <= end_date_obj:
+            process(self._mirror_day_records(mirror, day, fetched))
+            day += datetime.timedelta(days=1)
+        
+        if incomplete:
+            days_text = ', '.join(d.isoformat() for d in incomplete[:5])
+            return f"{len(incomplete)} 天镜像同步失败或不完整（{days_text}），已使用本地镜像中的旧数据"
+        return None
+    
+    def _mirror_day_records(self, mirror: BioRxivMirror, day: datetime.date, fetched: Dict[datetime.date, list]) -> list:
+        """某一天的记录：本次同步的优先，否则读取镜像（经归档/回放入口，回放时可复现）"""
+        def load() -> bytes:
+            records = fetched[day] if day in fetched else mirror.day_records(day)
+            return json.dumps(records, ensure_ascii=False).encode('utf-8')
+        
+        return json.loads(self._fetch_raw(f"biorxiv-mirror:{day.isoformat()}", load))
     
     def fetch(self, sent_ids: Set[str], exclude_keywords: List[str]) -> SourceResult:
         """
@@ -89,7 +291,7 @@ class BioRxivSource(BaseSource):
         """
         try:
             # 计算日期范围：默认为前一天（符合每日定时任务需求），但也支持通过 window_days 补抓历史数据
-            today = datetime.date.today()
+            today = self.today()
             # 结束日期设为昨天（不包含今天，确保数据完整性）
             end_date_obj = today - datetime.timedelta(days=1)
             end_date = end_date_obj.strftime("%Y-%m-%d")
@@ -102,11 +304,8 @@ class BioRxivSource(BaseSource):
             papers = []
             all_keywords = Config.get_all_keywords()
             
-            # 创建会话，复用连接（提高性能，减少连接开销）
-            session = requests.Session()
-            session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            })
+            # 使用共享 HTTP 客户端，复用连接（提高性能，减少连接开销）
+            session = get_http_client()
             
             # 诊断计数器
             stat = {
@@ -121,50 +320,8 @@ class BioRxivSource(BaseSource):
                 "final": 0
             }
             
-            # 动态分页抓取 - 移除页数限制，确保获取前一天的所有论文
-            page = 0
-            should_break = False
-            while True:  # 无限循环，直到没有更多数据或超出日期范围
-                cursor = page * PAGE_SIZE
-                # API 格式: details/server/interval/cursor 或 details/server/start_date/end_date/cursor
-                url = f"https://api.biorxiv.org/details/biorxiv/{start_date}/{end_date}/{cursor}"
-                
-                try:
-                    # 使用带重试机制的抓取
-                    json_data = self._fetch_page_with_retry(session, url, max_retries=3)
-                    data = json_data.get('collection', [])
-                except Exception as e:
-                    logger.error(f"bioRxiv 第{page+1}页抓取失败: {e}")
-                    # 如果第一页就失败，直接返回错误
-                    if page == 0:
-                        raise
-                    # 如果不是第一页，记录错误但继续处理已获取的数据
-                    break
-                
-                if not data:
-                    logger.debug(f"bioRxiv 第{page+1}页无数据，停止抓取")
-                    break
-                
-                # 检查时间边界（早退机制）
-                oldest_date = None
-                for p in data:
-                    paper_date_str = p.get('date', '')
-                    if paper_date_str:
-                        try:
-                            paper_date = datetime.datetime.strptime(paper_date_str[:10], '%Y-%m-%d').date()
-                            if oldest_date is None or paper_date < oldest_date:
-                                oldest_date = paper_date
-                        except (ValueError, TypeError) as e:
-                            logger.debug(f"bioRxiv 日期解析失败: {paper_date_str} - {e}")
-                
-                # 如果最老的论文超出窗口期，提前终止
-                if oldest_date and oldest_date < start_date_obj:
-                    logger.debug(f"bioRxiv 第{page+1}页最老论文日期 {oldest_date} 已超出窗口期 {start_date_obj}，提前终止")
-                    # 仍然处理当前页，然后结束
-                    should_break = True
-                else:
-                    should_break = False
-                
+            def process(data: list):
+                """过滤一页记录，通过的论文加入 papers"""
                 for p in data:
                     stat["total"] += 1
                     
@@ -190,12 +347,11 @@ class BioRxivSource(BaseSource):
                     stat["cat_or_kw"] += 1
                     
                     # 提取并验证日期
-                    paper_date_str = p.get('date', '') or yesterday
+                    paper_date_str = p.get('date', '') or end_date
                     # 检查日期年份是否异常（如果年份是去年但当前是年初，可能是数据源问题）
                     if paper_date_str:
                         try:
                             paper_date = datetime.datetime.strptime(paper_date_str[:10], '%Y-%m-%d').date()
-                            today = datetime.date.today()
                             # 如果日期是去年但距离今天超过30天，记录警告
                             if paper_date.year < today.year and (today - paper_date).days > 30:
                                 logger.warning(f"[日期异常] bioRxiv论文日期可能异常: 标题='{p.get('title', '')[:50]}...', 日期={paper_date_str}, 当前日期={today}")
@@ -226,7 +382,7 @@ class BioRxivSource(BaseSource):
                             continue
                     
                     # 日期过滤
-                    if not is_recent_date(paper.date, days=self.window_days):
+                    if not is_recent_date(paper.date, days=self.window_days, today=today):
                         stat["date_filtered"] += 1
                         continue
                     
@@ -238,31 +394,18 @@ class BioRxivSource(BaseSource):
                     
                     papers.append(paper)
                     stat["final"] += 1
-                
-                logger.debug(f"bioRxiv 第{page+1}页抓取完成，累计 {len(papers)} 条")
-                
-                # 如果应该提前终止（超出日期范围），结束循环
-                if should_break:
-                    break
-                
-                # 请求之间添加短暂延迟，避免请求过快导致连接被中断
-                time.sleep(0.5)  # 延迟0.5秒
-                
-                # 如果返回数据少于100条，说明已经是最后一页
-                if len(data) < PAGE_SIZE:
-                    logger.debug(f"bioRxiv 第{page+1}页数据不足100条，停止抓取")
-                    break
-                
-                # 继续下一页
-                page += 1
-                
-                # 早退机制
-                if should_break:
-                    break
+            
+            base_url = f"https://api.biorxiv.org/details/biorxiv/{start_date}/{end_date}"
+            degraded_reason = None
+            if self.use_mirror:
+                degraded_reason = self._fetch_from_mirror(session, start_date_obj, end_date_obj, process)
+            elif self.concurrent_pages:
+                degraded_reason = self._fetch_pages_concurrent(session, base_url, start_date_obj, process)
+            else:
+                degraded_reason = self._fetch_pages_sequential(session, base_url, start_date_obj, process)
             
             # 输出诊断日志
             if self.enable_diagnostic:
-                import json
                 logger.info(f"bioRxiv 数据漏斗分析: {json.dumps(stat, ensure_ascii=False)}")
                 logger.info(f"  - 总计: {stat['total']} 条")
                 logger.info(f"  - 分类匹配: {stat['cat_match']} 条 ({stat['cat_match']*100//max(stat['total'],1)}%)")
@@ -275,17 +418,11 @@ class BioRxivSource(BaseSource):
                 logger.info(f"  - 最终入选: {stat['final']} 条")
             
             logger.info(f"bioRxiv 共抓取 {len(papers)} 条论文")
-            return SourceResult(source_name=self.name, papers=papers)
+            return SourceResult(source_name=self.name, papers=papers,
+                                is_degraded=degraded_reason is not None, degraded_reason=degraded_reason)
         except Exception as e:
             logger.error(f"bioRxiv 抓取失败: {e}", exc_info=True)
             return SourceResult(source_name=self.name, papers=[], error=str(e))
-        finally:
-            # 确保会话被关闭
-            if 'session' in locals():
-                try:
-                    session.close()
-                except Exception as e:
-                    logger.debug(f"关闭 session 时出错: {e}")
 
 
 
@@ -0,0 +1,203 @@
+"""
+引用数补全：用 Semantic Scholar /paper/batch 接口为各数据源的候选论文补全引用数
+
+评分按引用数加分（score_paper），但只有 SemanticScholar 数据源的论文自带引用数。
+这里在合并各数据源结果后收集候选论文的 DOI，每 500 个 DOI 一次批量请求
+（只请求 citationCount、influentialCitationCount 两个字段），请求时机由自适应限流器调度。
+结果按 DOI 写入两级缓存，TTL 内的重复候选不再请求；Semantic Scholar 未收录的 DOI
+缓存较短时间。
+
+启用原始响应归档时，本次运行实际使用的引用数（含缓存命中）按运行归档，
+replay 回放时从归档中取回并补全，使回放评分与原运行一致。
+"""
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from backend.core.config import Config
+from backend.models import Paper
+from backend.utils.http import get_http_client
+from backend.utils.rate_limit import get_adaptive_limiter, RateLimited
+from backend.utils.retry import RetryPolicy, check_retryable
+
+logger = logging.getLogger(__name__)
+
+BATCH_URL = "https://api.semanticscholar.org/graph/v1/paper/batch?fields=citationCount,influentialCitationCount"
+# /paper/batch 单次最多 500 个 id
+MAX_BATCH_SIZE = 500
+CACHE_PREFIX = "s2_citations:"
+# 未收录的 DOI（新发表的预印本等）稍后可能被收录，缓存时间较短
+NOT_FOUND_TTL = 6 * 3600
+# 引用数在原始响应归档中的数据源名称和请求键
+ARCHIVE_SOURCE = "Citations"
+ARCHIVE_KEY = BATCH_URL
+
+retry_policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=30.0)
+
+
+def normalize_doi(doi: str) -> str:
+    """统一 DOI 写法（去掉 doi.org 前缀和 doi: 前缀，转小写）"""
+    doi = (doi or '').strip().lower()
+    for prefix in ('https://doi.org/', 'http://doi.org/', 'https://dx.doi.org/', 'http://dx.doi.org/', 'doi:'):
+        if doi.startswith(prefix):
+            doi = doi[len(prefix):]
+    return doi.strip()
+
+
+def _request_batch(dois: List[str], deadline: Optional[float]) -> List[Optional[Dict[str, Any]]]:
+    """
+    请求一批 DOI 的引用数
+
+    Returns:
+        与 dois 顺序一致的结果列表，未收录的 DOI 为 None
+    """
+    credential = Config.SEMANTIC_SCHOLAR_API_KEY or None
+    headers = {'x-api-key': credential} if credential else {}
+    limiter = get_adaptive_limiter()
+
+    def request() -> list:
+        limiter.acquire(BATCH_URL, credential, max_wait=60)
+        response = get_http_client().post(
+            BATCH_URL,
+            json={'ids': [f"DOI:{doi}" for doi in dois]},
+            headers=headers,
+            timeout=30,
+            proxies={'http': None, 'https': None}
+        )
+        limiter.update(BATCH_URL, response, credential)
+        # 429 的等待时间由限流器在下一次 acquire 时决定（已按 Retry-After 降速）
+        check_retryable(response, BATCH_URL, retry_after=0 if response.status_code == 429 else None)
+        response.raise_for_status()
+        return response.json()
+
+    data = retry_policy.call(request, key='SemanticScholarBatch', deadline=deadline)
+    if not isinstance(data, list) or len(data) != len(dois):
+        raise ValueError(f"/paper/batch 返回 {len(data) if isinstance(data, list) else type(data).__name__} 条结果，"
+                         f"请求 {len(dois)} 个 DOI")
+    return data
+
+
+def _group_by_doi(papers: List[Paper]) -> Dict[str, List[Paper]]:
+    """按规范化 DOI 分组有 DOI 且没有引用数的论文"""
+    by_doi: Dict[str, List[Paper]] = {}
+    for paper in papers:
+        doi = normalize_doi(paper.doi)
+        if doi and not paper.citation_count:
+            by_doi.setdefault(doi, []).append(paper)
+    return by_doi
+
+
+def _apply_counts(by_doi: Dict[str, List[Paper]], counts: Dict[str, Dict[str, int]]) -> int:
+    """把引用数写回论文，返回补全的论文数"""
+    enriched = 0
+    for doi, doi_papers in by_doi.items():
+        count = counts.get(doi)
+        if not count or not count.get('citation_count'):
+            continue
+        for paper in doi_papers:
+            paper.citation_count = count['citation_count']
+            paper.influential_count = count['influential_count']
+            enriched += 1
+    return enriched
+
+
+def enrich_citations(papers: List[Paper], deadline: Optional[float] = None, cache=None,
+                     archive=None, run_id: str = None) -> Dict[str, int]:
+    """
+    为有 DOI 且没有引用数的论文补全 citation_count / influential_count（原地修改）
+
+    批量请求失败、限流等待过长或超过截止时间时跳过剩余批次，论文保持原有引用数，不影响后续流程。
+
+    Args:
+        papers: 候选论文
+        deadline: time.monotonic() 截止时刻（用于跳过剩余批次、限制重试等待）
+        cache: 缓存实例（默认为全局两级缓存）
+        archive: 原始响应归档（提供时把本次使用的引用数按 run_id 归档，供 replay 回放）
+        run_id: 运行ID
+
+    Returns:
+        统计：DOI 数、缓存命中数、请求数、补全引用数的论文数
+    """
+    stats = {'dois': 0, 'cached': 0, 'requests': 0, 'enriched': 0}
+    by_doi = _group_by_doi(papers)
+    stats['dois'] = len(by_doi)
+    if not by_doi:
+        return stats
+
+    if cache is None:
+        from backend.utils.cache import get_tiered_cache
+        cache = get_tiered_cache()
+    ttl = int(Config.CITATION_CACHE_TTL_HOURS * 3600)
+
+    try:
+        cached = cache.get_many(CACHE_PREFIX + doi for doi in by_doi)
+    except Exception as e:
+        logger.warning(f"[引用补全] 缓存不可用: {e}")
+        cached = {}
+    counts: Dict[str, Dict[str, int]] = {
+        key[len(CACHE_PREFIX):]: value for key, value in cached.items()
+    }
+    stats['cached'] = len(counts)
+    missing = [doi for doi in by_doi if doi not in counts]
+
+    batch_size = min(max(Config.CITATION_BATCH_SIZE, 1), MAX_BATCH_SIZE)
+    for start in range(0, len(missing), batch_size):
+        if deadline is not None and time.monotonic() >= deadline:
+            logger.warning(f"[引用补全] 时间预算用尽，跳过剩余 {len(missing) - start} 个 DOI")
+            break
+        chunk = missing[start:start + batch_size]
+        try:
+            data = _request_batch(chunk, deadline)
+        except RateLimited as e:
+            logger.warning(f"[引用补全] 限流等待过长({e.wait:.0f}秒)，跳过剩余 {len(missing) - start} 个 DOI")
+            break
+        except Exception as e:
+            logger.warning(f"[引用补全] 批量请求失败（{len(chunk)} 个 DOI）: {e}")
+            continue
+        stats['requests'] += 1
+
+        found, not_found = {}, {}
+        for doi, item in zip(chunk, data):
+            if item is None:
+                counts[doi] = not_found[CACHE_PREFIX + doi] = {'citation_count': 0, 'influential_count': 0}
+                continue
+            counts[doi] = found[CACHE_PREFIX + doi] = {
+                'citation_count': item.get('citationCount') or 0,
+                'influential_count': item.get('influentialCitationCount') or 0,
+            }
+        try:
+            cache.set_many(found, ttl=ttl)
+            if not_found:
+                cache.set_many(not_found, ttl=min(NOT_FOUND_TTL, ttl))
+        except Exception as e:
+            logger.debug(f"[引用补全] 缓存写入失败: {e}")
+
+    stats['enriched'] = _apply_counts(by_doi, counts)
+
+    if archive is not None and run_id:
+        used = {doi: counts[doi] for doi in by_doi if doi in counts}
+        try:
+            archive.put(run_id, ARCHIVE_SOURCE, ARCHIVE_KEY,
+                        json.dumps(used, sort_keys=True).encode('utf-8'), content_type='application/json')
+        except Exception as e:
+            logger.warning(f"[引用补全] 引用数归档失败，回放将不含引用数: {e}")
+
+    logger.info(
+        f"[引用补全] {stats['dois']} 个 DOI：缓存命中 {stats['cached']}，"
+        f"{stats['requests']} 次批量请求，{stats['enriched']} 篇论文补全引用数"
+    )
+    return stats
+
+
+def apply_archived_citations(papers: List[Paper], archive, run_id: str) -> int:
+    """
+    回放时按原运行归档的引用数补全论文（零网络）
+
+    Returns:
+        补全引用数的论文数
+
+    Raises:
+        PayloadNotArchived: 原运行没有归档引用数（未启用补全，或早于引用数归档的运行）
+    """
+    counts = json.loads(archive.get(run_id, ARCHIVE_SOURCE, ARCHIVE_KEY))
+    return _apply_counts(_group_by_doi(papers), counts)
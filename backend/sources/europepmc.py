@@ -1,117 +1,184 @@
 """Europe PMC 数据源"""
+import concurrent.futures
 import datetime
-import requests
+import json
 import logging
-from typing import Set, List
+from typing import Callable, List, Optional, Set, Tuple
+from urllib.parse import quote
 from backend.models import Paper, SourceResult
 from backend.sources.base import BaseSource
 from backend.core.config import Config
 from backend.core.filtering import should_exclude_paper, is_recent_date
+from backend.core.query_compiler import compile_europepmc_query
+from backend.utils.http import get_http_client
 
 logger = logging.getLogger(__name__)
 
+SEARCH_URL = "https://www.ebi.ac.uk/europepmc/webservices/rest/search"
+# 接口允许的最大每页结果数
+MAX_PAGE_SIZE = 1000
+# 过滤和构建论文用到的字段
+RESULT_FIELDS = ('title', 'abstractText', 'doi', 'pmid', 'pmcid', 'firstPublicationDate', 'pubYear')
+
 
 class EuropePMCSource(BaseSource):
     """Europe PMC 数据源（默认1天窗口）"""
     
-    def __init__(self, window_days: int = None):
+    # 每日索引更新
+    cache_ttl = 6 * 3600
+    
+    def __init__(self, window_days: int = None, page_size: int = None):
+        """
+        Args:
+            window_days: 抓取窗口天数
+            page_size: 每页结果数（默认 EUROPEPMC_PAGE_SIZE，接口上限 1000）
+        """
         super().__init__("EuropePMC", window_days or Config.EUROPEPMC_WINDOW_DAYS)
+        self.page_size = min(max(page_size or Config.EUROPEPMC_PAGE_SIZE, 1), MAX_PAGE_SIZE)
     
     def fetch(self, sent_ids: Set[str], exclude_keywords: List[str]) -> SourceResult:
         try:
             # 只检索前一天的论文（不包括今天）
-            yesterday = (datetime.date.today() - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+            yesterday = (self.today() - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
             start_date = yesterday
             
-            # 优化查询：使用更灵活的关键词匹配（去掉部分引号，允许更宽松的匹配）
-            # 固氮相关
-            q_nitro = '(nitrogen fixation OR biological nitrogen fixation OR natural biological nitrogen fixation OR nitrogenase OR rhizobia OR root nodule OR symbiosis OR diazotroph OR nif genes OR nitrogen fixing)'
-            # 信号转导相关
-            q_signal = '(extracellular signal OR signal perception OR signal transduction OR receptor kinase OR receptor-like kinase OR G-protein coupled receptor OR GPCR OR ligand binding OR ligand recognition OR hormone perception OR hormone signaling OR phosphorylation cascade OR signaling pathway OR two-component system OR histidine kinase)'
-            # 酶结构相关（放宽匹配，使用OR连接关键词）
-            q_enzyme = '(enzyme structure OR enzyme mechanism OR catalytic mechanism OR active site OR catalytic site OR allosteric regulation OR allosteric site OR enzyme kinetics OR cryo-EM OR cryo-electron microscopy OR crystal structure OR X-ray crystallography OR substrate specificity OR enzyme catalysis OR catalytic domain OR enzyme structure determination OR protein structure OR molecular structure OR structural biology)'
-            
-            # 构建查询（使用OR连接三个方向，更宽松）
-            query = f'FIRST_PDATE:[{start_date} TO {yesterday}] AND ({q_nitro} OR {q_signal} OR {q_enzyme})'
-            
-            # 先获取总数
-            first_url = f"https://www.ebi.ac.uk/europepmc/webservices/rest/search?query={query}&format=json&pageSize=1"
-            first_response = requests.get(first_url, timeout=30, proxies={'http': None, 'https': None})
-            first_response.raise_for_status()
-            total_hits = first_response.json().get('hitCount', 0)
+            # 检索式由 RESEARCH_TOPICS 和排除词编译（排除词以 NOT 子句在服务端过滤）
+            query = compile_europepmc_query(start_date, yesterday, exclude_keywords)
             
-            logger.info(f"EuropePMC 查询返回: 总命中 {total_hits} 篇")
-            
-            if total_hits == 0:
-                return SourceResult(source_name=self.name, papers=[])
-            
-            # 分页获取所有结果（每页50个）
-            all_data = []
-            page_size = 50
-            page_num = 1
-            
-            # 输出查询信息（INFO级别，方便排查）
             logger.info(f"EuropePMC 查询日期范围: {start_date} 到 {yesterday}")
-            logger.info(f"EuropePMC 查询URL: {first_url[:200]}...")  # 截取前200字符避免过长
-            
-            while len(all_data) < total_hits:
-                url = f"https://www.ebi.ac.uk/europepmc/webservices/rest/search?query={query}&format=json&pageSize={page_size}&page={page_num}"
-                
-                # 明确禁用代理
-                response = requests.get(url, timeout=30, proxies={'http': None, 'https': None})
-                response.raise_for_status()
-                page_data = response.json().get('resultList', {}).get('result', [])
-                if not page_data:
-                    break
-                all_data.extend(page_data)
-                logger.debug(f"EuropePMC 已获取 {len(all_data)}/{total_hits} 篇论文")
-                
-                # 如果返回的数据少于page_size，说明已经是最后一页
-                if len(page_data) < page_size:
-                    break
-                
-                # 继续下一页
-                page_num += 1
-            
-            logger.info(f"EuropePMC 共获取 {len(all_data)} 篇论文")
             
             papers = []
             
-            for r in all_data:
-                title = r.get('title', '无标题')
-                abstract = r.get('abstractText', '')
-                
-                # 信任 API 结果：已在服务端完成精准检索，本地不再二次匹配关键词
-                # 仅执行排除词检查
-                
-                # 增强 ID 生成容错：doi -> pmid -> pmcid 级联回退
-                doi = r.get('doi', '')
-                pmid = r.get('pmid', '')
-                pmcid = r.get('pmcid', '')
-                
-                paper = Paper(
-                    title=title,
-                    abstract=abstract,
-                    date=r.get('firstPublicationDate', '') or f"{r.get('pubYear', datetime.date.today().year)}-01-01",
-                    source='EuropePMC',
-                    doi=doi or pmid or pmcid,  # 级联回退
-                    link=pmcid or pmid or doi  # 优先使用 pmcid 作为链接
-                )
-                
-                if should_exclude_paper(paper, exclude_keywords):
-                    continue
-                if not is_recent_date(paper.date, days=self.window_days):
-                    continue
-                
-                item_id = self.get_item_id(paper)
-                if item_id and item_id not in sent_ids:
-                    papers.append(paper)
+            def process(results: List[dict]):
+                """过滤一页结果（在下一页下载期间执行）"""
+                for r in results:
+                    title = r.get('title', '无标题')
+                    abstract = r.get('abstractText', '')
+                    
+                    # 信任 API 结果：已在服务端完成精准检索，本地不再二次匹配关键词
+                    # 仅执行排除词检查
+                    
+                    # 增强 ID 生成容错：doi -> pmid -> pmcid 级联回退
+                    doi = r.get('doi', '')
+                    pmid = r.get('pmid', '')
+                    pmcid = r.get('pmcid', '')
+                    
+                    paper = Paper(
+                        title=title,
+                        abstract=abstract,
+                        date=r.get('firstPublicationDate', '') or f"{r.get('pubYear', self.today().year)}-01-01",
+                        source='EuropePMC',
+                        doi=doi or pmid or pmcid,  # 级联回退
+                        link=pmcid or pmid or doi  # 优先使用 pmcid 作为链接
+                    )
+                    
+                    if should_exclude_paper(paper, exclude_keywords):
+                        continue
+                    if not is_recent_date(paper.date, days=self.window_days, today=self.today()):
+                        continue
+                    
+                    item_id = self.get_item_id(paper)
+                    if item_id and item_id not in sent_ids:
+                        papers.append(paper)
+            
+            degraded_reason = self._fetch_cursor_pages(query, process)
             
             logger.info(f"Europe PMC 共抓取 {len(papers)} 条论文")
-            return SourceResult(source_name=self.name, papers=papers)
+            return SourceResult(source_name=self.name, papers=papers,
+                                is_degraded=degraded_reason is not None, degraded_reason=degraded_reason)
         except Exception as e:
             logger.error(f"Europe PMC 抓取失败: {e}", exc_info=True)
             return SourceResult(source_name=self.name, papers=[], error=str(e))
-
-
-
+    
+    def _fetch_cursor_pages(self, query: str, process: Callable[[List[dict]], None]) -> Optional[str]:
+        """
+        按 cursorMark 深度分页获取全部结果
+        
+        首页同时给出总命中数，不再单独请求总数。下一页的游标只能从上一页得到，
+        因此各页依次请求，但每页到达后先发起下一页的请求，再在下载期间过滤本页。
+        
+        Returns:
+            降级原因（后续页面失败时），全部成功时为 None；首页失败时抛出异常
+        """
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="europepmc-page")
+        cursor = '*'
+        future = executor.submit(self._get_page, query, cursor)
+        page_num = 1
+        total_hits = None
+        fetched = 0
+        try:
+            while future is not None:
+                try:
+                    data = future.result(timeout=self.time_left())
+                except concurrent.futures.TimeoutError:
+                    self.truncate(f"分页在第{page_num}页截断（已获取 {fetched}/{total_hits} 篇）")
+                    return None
+                except Exception as e:
+                    if total_hits is None:
+                        raise
+                    logger.error(f"EuropePMC 第{page_num}页抓取失败: {e}")
+                    return f"第{page_num}页抓取失败，已获取 {fetched}/{total_hits} 篇: {e}"
+                
+                if total_hits is None:
+                    total_hits = data.get('hitCount', 0)
+                    logger.info(f"EuropePMC 查询返回: 总命中 {total_hits} 篇")
+                results = data.get('resultList', {}).get('result', [])
+                fetched += len(results)
+                logger.debug(f"EuropePMC 已获取 {fetched}/{total_hits} 篇论文")
+                
+                # 先发起下一页请求，再处理本页
+                future = None
+                next_cursor = data.get('nextCursorMark')
+                if results and next_cursor and next_cursor != cursor and fetched < total_hits:
+                    if self.deadline_exceeded():
+                        self.truncate(f"分页在第{page_num + 1}页截断（已获取 {fetched}/{total_hits} 篇）")
+                    else:
+                        cursor = next_cursor
+                        page_num += 1
+                        future = executor.submit(self._get_page, query, cursor)
+                process(results)
+            
+            logger.info(f"EuropePMC 共获取 {fetched} 篇论文（{page_num} 页）")
+            return None
+        finally:
+            # 截断或失败时不等待进行中的请求
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def estimate_hits(self, exclude_keywords: List[str]) -> Tuple[str, int]:
+        """
+        抓取前估计命中数（只请求 1 条 ID 列表，读取 hitCount）
+        
+        Returns:
+            (检索式, 命中数)
+        """
+        yesterday = (self.today() - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+        query = compile_europepmc_query(yesterday, yesterday, exclude_keywords)
+        data = self._get_json(f"{SEARCH_URL}?query={query}&format=json&resultType=idlist&pageSize=1")
+        return query, int(data.get('hitCount', 0))
+    
+    def _get_page(self, query: str, cursor: str) -> dict:
+        """
+        请求一页结果，只保留用到的字段
+        
+        搜索接口不支持按字段投影：resultType=core 才包含摘要，其余字段（作者、MeSH、
+        全文链接等）在解析后立即丢弃，不随结果保留。
+        """
+        url = (f"{SEARCH_URL}?query={query}&format=json&resultType=core"
+               f"&pageSize={self.page_size}&cursorMark={quote(cursor, safe='')}")
+        data = self._get_json(url)
+        result_list = data.get('resultList', {})
+        result_list['result'] = [
+            {field: r[field] for field in RESULT_FIELDS if field in r}
+            for r in result_list.get('result', [])
+        ]
+        return data
+    
+    def _get_json(self, url: str) -> dict:
+        """请求并解析 JSON（原始响应经过归档/回放入口）"""
+        def download() -> bytes:
+            # 明确禁用代理，使用共享连接池
+            response = get_http_client().get(url, timeout=30, proxies={'http': None, 'https': None})
+            response.raise_for_status()
+            return response.content
+        
+        return json.loads(self._fetch_raw(url, download))
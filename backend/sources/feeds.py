@@ -0,0 +1,158 @@
+"""
+多 feed 并发抓取
+
+RSS 类数据源的各个 feed 相互独立：在总并发上限内同时下载和解析，同一域名的 feed
+不超过单域名并发上限（避免对同一出版商并发过多），整个数据源有统一的截止时间，
+慢的出版商不再拖慢其余 feed。每个 feed 记录耗时和响应大小，便于发现变慢或失效的 feed。
+"""
+import concurrent.futures
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+from backend.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def feed_domain(url: str) -> str:
+    """feed 所属的域名（取主机名最后两段，science.sciencemag.org 与 www.sciencemag.org 视为同一域名）"""
+    host = (urlsplit(url).hostname or '').lower()
+    return '.'.join(host.split('.')[-2:])
+
+
+def source_time_left(source) -> Callable[[], Optional[float]]:
+    """
+    数据源整体的剩余时间：从现在起 FEED_SOURCE_TIMEOUT 秒与抓取阶段截止时间中较早者
+
+    Args:
+        source: 数据源实例（读取其 deadline）
+    """
+    timeout = Config.FEED_SOURCE_TIMEOUT
+    source_deadline = time.monotonic() + timeout if timeout > 0 else None
+
+    def time_left() -> Optional[float]:
+        deadlines = [d for d in (source_deadline, source.deadline) if d is not None]
+        return max(min(deadlines) - time.monotonic(), 0.0) if deadlines else None
+    return time_left
+
+
+def timeout_reason(source, timed_out: List[str], total: int) -> Optional[str]:
+    """
+    截止时间到达时仍未完成的 feed 的降级原因（全部完成时为 None）
+
+    抓取阶段预算用尽时同时记录截断，数据源整体时限到达时只标记降级。
+    """
+    if not timed_out:
+        return None
+    detail = f"{len(timed_out)}/{total} 个 feed 未完成"
+    if source.deadline_exceeded():
+        source.truncate(detail)
+    reason = f"{detail}（超过 {Config.FEED_SOURCE_TIMEOUT} 秒整体时限或抓取预算）"
+    logger.warning(f"{source.name} {reason}: {', '.join(timed_out[:5])}")
+    return reason
+
+
+def parse_feed_list(value: str) -> List[str]:
+    """解析逗号或换行分隔的 feed 列表配置（忽略空项）"""
+    return [url.strip() for url in value.replace('\n', ',').split(',') if url.strip()]
+
+
+@dataclass
+class FeedOutcome:
+    """单个 feed 的抓取结果"""
+    url: str
+    parsed: Any = None
+    error: Optional[BaseException] = None
+    latency: Optional[float] = None  # 下载+解析耗时（秒），未完成时为 None
+    size: int = 0  # 响应正文字节数
+    timed_out: bool = False  # 截止时间到达时仍未完成
+
+    def stat(self) -> Dict[str, Any]:
+        """用于日志和诊断输出的统计"""
+        if self.timed_out:
+            status = 'timeout'
+        elif self.error is not None:
+            status = type(self.error).__name__
+        else:
+            status = 'ok'
+        return {
+            'url': self.url,
+            'status': status,
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'size': self.size,
+        }
+
+
+def fetch_feeds(urls: List[str], download: Callable[[str], bytes], parse: Callable[[bytes], Any],
+                concurrency: int, per_domain: int,
+                time_left: Callable[[], Optional[float]]) -> Iterator[FeedOutcome]:
+    """
+    并发下载并解析多个 feed，按完成顺序产出结果
+
+    调度在调用方线程中进行：某个域名达到并发上限时，其余 feed 先行，不占用工作线程等待。
+    截止时间到达后，未完成的 feed 以 timed_out=True 产出，且不等待进行中的请求。
+
+    Args:
+        urls: feed 地址列表
+        download: 下载正文（在工作线程中调用，失败时抛出异常）
+        parse: 解析正文（在工作线程中调用）
+        concurrency: 总并发上限
+        per_domain: 单域名并发上限
+        time_left: 返回距截止时间的剩余秒数（None 表示不限制）
+    """
+    concurrency, per_domain = max(concurrency, 1), max(per_domain, 1)
+    queue = deque(urls)
+    in_flight: Dict[str, int] = {}
+
+    def run(url: str) -> FeedOutcome:
+        start = time.monotonic()
+        body = download(url)
+        parsed = parse(body)
+        return FeedOutcome(url, parsed=parsed, latency=time.monotonic() - start, size=len(body))
+
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="feed"
+    )
+    pending: Dict[concurrent.futures.Future, tuple] = {}
+
+    def submit_ready():
+        # 按队列顺序提交未达到域名上限的 feed
+        for _ in range(len(queue)):
+            if len(pending) >= concurrency:
+                return
+            url = queue.popleft()
+            domain = feed_domain(url)
+            if in_flight.get(domain, 0) >= per_domain:
+                queue.append(url)
+                continue
+            in_flight[domain] = in_flight.get(domain, 0) + 1
+            pending[executor.submit(run, url)] = (url, domain, time.monotonic())
+
+    try:
+        submit_ready()
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending, timeout=time_left(), return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for future in done:
+                url, domain, started = pending.pop(future)
+                in_flight[domain] -= 1
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    outcome = FeedOutcome(url, error=e, latency=time.monotonic() - started)
+                yield outcome
+            submit_ready()
+
+        # 截止时间到达：进行中和尚未开始的 feed 均视为超时
+        for url, _, _ in pending.values():
+            yield FeedOutcome(url, timed_out=True)
+        for url in queue:
+            yield FeedOutcome(url, timed_out=True)
+    finally:
+        executor.shutdown(wait=not pending, cancel_futures=True)
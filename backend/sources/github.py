@@ -1,22 +1,81 @@
 """GitHub 工具数据源"""
+import asyncio
 import datetime
-import requests
+import json
 import logging
-import time
-from typing import Set, List
+from typing import Dict, List, Set
 from backend.models import Paper, SourceResult
 from backend.sources.base import BaseSource
 from backend.core.config import Config
 from backend.core.filtering import should_exclude_paper, is_recent_date
+from backend.utils.conditional import aconditional_get
+from backend.utils.rate_limit import get_adaptive_limiter, RateLimited
+from backend.utils.http import get_http_client
+from backend.utils.retry import RetryableHTTPError, check_retryable
+from backend.storage.github_cache import GitHubRepoCache
+from backend.storage.quota import get_quota_ledger
 
 logger = logging.getLogger(__name__)
 
+GRAPHQL_URL = "https://api.github.com/graphql"
+# 每个查询返回的仓库数（与 REST 模式的 per_page 一致）
+RESULTS_PER_QUERY = 5
+# nodes 查询一次最多 100 个 id
+MAX_NODES_PER_QUERY = 100
+# 只请求过滤和展示用到的字段
+REPO_FIELDS = "id name description url updatedAt repositoryTopics(first: 20) { nodes { topic { name } } }"
+
+
+def graphql_search_query(queries: List[str]) -> str:
+    """
+    把多个检索词合并为一个 GraphQL 查询：每个检索词一个别名 search 字段（q0, q1, ...），
+    搜索结果只取 node id 和 updatedAt，完整字段按需通过 nodes 查询获取
+    """
+    fields = [
+        f"  q{i}: search(query: {json.dumps(query.replace('+', ' ') + ' sort:updated-desc')}, "
+        f"type: REPOSITORY, first: {RESULTS_PER_QUERY}) {{ nodes {{ ... on Repository {{ id updatedAt }} }} }}"
+        for i, query in enumerate(queries)
+    ]
+    return "query {\n" + "\n".join(fields) + "\n  rateLimit { cost remaining resetAt }\n}"
+
+
+def graphql_nodes_query(node_ids: List[str]) -> str:
+    """按 node id 批量获取仓库字段的 GraphQL 查询"""
+    return f"query {{ nodes(ids: {json.dumps(node_ids)}) {{ ... on Repository {{ {REPO_FIELDS} }} }} }}"
+
+
+def repository_item(node: dict) -> dict:
+    """GraphQL 仓库节点 -> 与 REST 搜索结果相同结构的 item"""
+    return {
+        'node_id': node['id'],
+        'name': node.get('name', ''),
+        'description': node.get('description') or '',
+        'html_url': node.get('url', ''),
+        'updated_at': node.get('updatedAt', ''),
+        'topics': [
+            topic['topic']['name']
+            for topic in ((node.get('repositoryTopics') or {}).get('nodes') or [])
+            if topic and topic.get('topic')
+        ],
+    }
+
 
 class GitHubSource(BaseSource):
     """GitHub 工具数据源"""
     
-    def __init__(self, window_days: int = None):
+    # 仓库随时更新，缓存时间较短
+    cache_ttl = 1 * 3600
+    query_attrs = ('queries',)
+    # 限流等待上限（秒），超过则放弃剩余查询
+    max_rate_limit_wait = 65
+    # 仓库元数据缓存中超过此天数未出现在搜索结果中的仓库将被清理
+    repo_cache_days = 30
+    
+    def __init__(self, window_days: int = None, use_graphql: bool = None, graphql_batch_size: int = None):
         super().__init__("GitHub", window_days or Config.DEFAULT_WINDOW_DAYS)
+        self.use_graphql = Config.GITHUB_USE_GRAPHQL if use_graphql is None else use_graphql
+        self.graphql_batch_size = max(graphql_batch_size or Config.GITHUB_GRAPHQL_BATCH_SIZE, 1)
+        self.repo_cache = GitHubRepoCache()
         # 扩展查询词，使用更通用的词
         self.queries = [
             # 固氮相关
@@ -41,133 +100,285 @@ class GitHubSource(BaseSource):
             "structural+biology+tool",
         ]
     
-    def fetch(self, sent_ids: Set[str], exclude_keywords: List[str]) -> SourceResult:
-        papers = []
-        all_keywords = Config.get_all_keywords()
-        target_categories = [c.lower() for c in Config.TARGET_CATEGORIES]
-
-        # 构建请求头（支持Token认证以提高限流额度）
+    def _request_headers(self) -> dict:
+        """构建请求头（支持Token认证以提高限流额度）"""
         headers = {'Accept': 'application/vnd.github.v3+json'}
         if Config.GITHUB_TOKEN:
             headers['Authorization'] = f'token {Config.GITHUB_TOKEN}'
             logger.info("GitHub API 使用Token认证（限流额度: 30次/分钟）")
         else:
             logger.warning("GitHub API 未配置Token，使用匿名访问（限流额度: 10次/分钟），建议设置 GITHUB_TOKEN 环境变量")
-
-        # 限流统计
-        rate_limit_errors = 0
-        max_rate_limit_errors = 3  # 如果连续3次限流，停止查询
+        return headers
+    
+    @staticmethod
+    def _search_url(query: str) -> str:
+        # 增加每个查询的结果数：3 -> 5
+        return f"https://api.github.com/search/repositories?q={query}&sort=updated&order=desc&per_page=5"
+    
+    @staticmethod
+    def _is_rate_limited(response) -> bool:
+        """403/429 且响应说明为限流（GitHub 的主/次级限流均返回 403）"""
+        return response.status_code in (403, 429) and 'rate limit' in response.text.lower()
+    
+    def _check_response(self, url: str, response, limiter, credential):
+        """
+        把响应头中的额度反馈给限流器，并按状态抛出异常供重试策略分类
+        
+        限流（GitHub 的主/次级限流均返回 403）按可重试处理，等待时间由限流器
+        在下一次 acquire 时根据 Retry-After / X-RateLimit-Reset 决定。
+        """
+        rate_limited = self._is_rate_limited(response)
+        limiter.update(url, response, credential, throttled=rate_limited)
+        if rate_limited:
+            raise RetryableHTTPError(429, retry_after=0, url=url)
+        check_retryable(response, url)
+        # httpx 的 raise_for_status 会把 304 当作重定向抛出
+        if response.status_code != 304:
+            response.raise_for_status()
+    
+    def _collect_items(self, items: list, sent_ids: Set[str], exclude_keywords: List[str]) -> List[Paper]:
+        """处理返回的items，返回通过过滤的仓库"""
+        papers = []
+        all_keywords = Config.get_all_keywords()
+        target_categories = [c.lower() for c in Config.TARGET_CATEGORIES]
+        
+        for item in items:
+            title = item.get('name', '')
+            description = item.get('description', '') or ''
+            text_lower = (title + " " + description).lower()
+            
+            # 放宽过滤：关键词匹配 OR 分类匹配
+            has_keyword = any(kw in text_lower for kw in all_keywords)
+            has_category = any(cat in text_lower for cat in target_categories)
+            
+            # 还可以检查 topics
+            topics = item.get('topics', []) or []
+            topics_lower = ' '.join(topics).lower()
+            has_topic = any(kw in topics_lower for kw in all_keywords)
+            
+            if has_keyword or has_category or has_topic:
+                paper = Paper(
+                    title=f"GitHub工具: {title}",
+                    abstract=description,
+                    date=self._extract_date(item),
+                    source='GitHub',
+                    doi='',
+                    link=item.get('html_url', '')
+                )
+                
+                if should_exclude_paper(paper, exclude_keywords):
+                    continue
+                if not is_recent_date(paper.date, days=self.window_days):
+                    continue
+                
+                item_id = self.get_item_id(paper)
+                if item_id and item_id not in sent_ids:
+                    papers.append(paper)
+        return papers
+    
+    def graphql_enabled(self) -> bool:
+        """是否使用 GraphQL 模式（GraphQL API 不支持匿名访问，需要配置 GITHUB_TOKEN）"""
+        return self.use_graphql and bool(Config.GITHUB_TOKEN)
+    
+    def _graphql(self, query: str) -> dict:
+        """
+        发送一个 GraphQL 查询，返回 data
+        
+        GraphQL 按查询复杂度计算额度（每小时 5000 点，与 REST 搜索的每分钟 30 次分开计算），
+        因此在配额账本中使用单独的 github_graphql 桶，也不把响应头中的额度反馈给 REST 搜索共用的限流器，
+        只在被限流时通知限流器等待。
+        """
+        credential = Config.GITHUB_TOKEN
+        limiter = get_adaptive_limiter()
+        get_quota_ledger().acquire('github_graphql', credential, max_wait=self.max_rate_limit_wait)
+        limiter.acquire(GRAPHQL_URL, credential, max_wait=self.max_rate_limit_wait)
+        response = get_http_client().post(
+            GRAPHQL_URL,
+            json={'query': query},
+            headers={'Authorization': f'bearer {credential}'},
+            timeout=self.request_timeout(30),
+            proxies={'http': None, 'https': None}
+        )
+        if self._is_rate_limited(response):
+            limiter.update(GRAPHQL_URL, response, credential, throttled=True)
+            raise RetryableHTTPError(429, retry_after=0, url=GRAPHQL_URL)
+        check_retryable(response, GRAPHQL_URL)
+        response.raise_for_status()
+        
+        payload = response.json()
+        errors = payload.get('errors') or []
+        if any(error.get('type') == 'RATE_LIMITED' for error in errors):
+            raise RetryableHTTPError(429, url=GRAPHQL_URL)
+        if errors and not payload.get('data'):
+            raise RuntimeError(f"GitHub GraphQL 错误: {errors[0].get('message', errors[0])}")
+        for error in errors:
+            logger.debug(f"GitHub GraphQL 部分错误: {error.get('message', error)}")
+        
+        data = payload.get('data') or {}
+        rate = data.get('rateLimit')
+        if rate:
+            logger.debug(f"GitHub GraphQL 消耗 {rate.get('cost')} 点，剩余 {rate.get('remaining')} 点")
+        return data
+    
+    def _resolve_batch(self, queries: List[str]) -> bytes:
+        """
+        解析一批检索词：一次合并搜索，再按 node id 补全缓存中没有或已更新的仓库
+        
+        仓库的 updatedAt 与缓存一致时直接复用缓存的元数据（GraphQL 的 POST 请求没有 ETag，
+        以 updatedAt 作为校验值）。
+        
+        Returns:
+            {检索词: [REST 结构的 item]} 的 JSON 正文（作为本批的原始响应归档）
+        """
+        data = self._graphql(graphql_search_query(queries))
+        hits: Dict[str, List[dict]] = {}
+        updated: Dict[str, str] = {}
+        for i, query in enumerate(queries):
+            nodes = [node for node in ((data.get(f'q{i}') or {}).get('nodes') or []) if node and node.get('id')]
+            hits[query] = nodes
+            updated.update((node['id'], node.get('updatedAt', '')) for node in nodes)
+        
+        cached = self.repo_cache.get_fresh(updated) if self.read_incremental_state else {}
+        missing = [node_id for node_id in updated if node_id not in cached]
+        fetched = {}
+        for start in range(0, len(missing), MAX_NODES_PER_QUERY):
+            chunk = missing[start:start + MAX_NODES_PER_QUERY]
+            nodes = self._graphql(graphql_nodes_query(chunk)).get('nodes') or []
+            fetched.update((node['id'], repository_item(node)) for node in nodes if node and node.get('id'))
+        if fetched and self.write_incremental_state:
+            self.repo_cache.put_many(fetched.values())
+        logger.debug(f"GitHub GraphQL: {len(updated)} 个仓库，缓存命中 {len(cached)}，新获取 {len(fetched)}")
+        
+        repos = {**cached, **fetched}
+        return json.dumps({
+            query: [repos[node['id']] for node in nodes if node['id'] in repos]
+            for query, nodes in hits.items()
+        }, ensure_ascii=False).encode('utf-8')
+    
+    def _fetch_graphql(self, sent_ids: Set[str], exclude_keywords: List[str]) -> SourceResult:
+        """GraphQL 模式：每 graphql_batch_size 个检索词合并为一次搜索请求"""
+        papers = []
+        batches = [
+            self.queries[start:start + self.graphql_batch_size]
+            for start in range(0, len(self.queries), self.graphql_batch_size)
+        ]
+        failed = 0
+        for batch_idx, batch in enumerate(batches):
+            request_key = f"{GRAPHQL_URL}?queries={','.join(batch)}"
+            try:
+                body = self._fetch_raw(request_key, lambda: self._resolve_batch(batch))
+            except RateLimited as e:
+                logger.warning(f"GitHub GraphQL 限流，需等待 {e.wait:.0f} 秒，跳过剩余 {len(batches) - batch_idx} 批查询")
+                failed += len(batches) - batch_idx
+                break
+            except Exception as e:
+                logger.warning(f"GitHub GraphQL 查询失败（{len(batch)} 个检索词）: {e}")
+                failed += 1
+                continue
+            for items in json.loads(body).values():
+                papers.extend(self._collect_items(items, sent_ids, exclude_keywords))
+        
+        if self.write_incremental_state and not self.replay:
+            try:
+                self.repo_cache.prune(self.repo_cache_days)
+            except Exception as e:
+                logger.debug(f"GitHub 仓库缓存清理失败: {e}")
+        
+        logger.info(f"GitHub 共抓取 {len(papers)} 条仓库（GraphQL，{len(batches)} 批）")
+        if failed == len(batches):
+            return SourceResult(source_name=self.name, papers=[], error="GitHub GraphQL 查询全部失败")
+        if failed:
+            return SourceResult(source_name=self.name, papers=papers, is_degraded=True,
+                                degraded_reason=f"{failed}/{len(batches)} 批 GraphQL 查询失败")
+        return SourceResult(source_name=self.name, papers=papers)
+    
+    def fetch(self, sent_ids: Set[str], exclude_keywords: List[str]) -> SourceResult:
+        if self.graphql_enabled():
+            return self._fetch_graphql(sent_ids, exclude_keywords)
+        
+        papers = []
+        headers = self._request_headers()
+        # 自适应限流：按响应头中的剩余额度调度请求，额度充足时不再固定间隔
+        limiter = get_adaptive_limiter()
+        credential = Config.GITHUB_TOKEN or None
 
         for query_idx, query in enumerate(self.queries):
-            # 在请求之间添加延迟，避免触发限流
-            if query_idx > 0:
-                time.sleep(2 if not Config.GITHUB_TOKEN else 1)  # 无Token时增加间隔
-
-            # 如果限流错误过多，跳过剩余查询
-            if rate_limit_errors >= max_rate_limit_errors:
-                logger.warning(f"GitHub API 限流错误过多（{rate_limit_errors}次），跳过剩余 {len(self.queries) - query_idx} 个查询")
+            url = self._search_url(query)
+            
+            def request():
+                get_quota_ledger().acquire('github', credential, max_wait=self.max_rate_limit_wait)
+                limiter.acquire(url, credential, max_wait=self.max_rate_limit_wait)
+                # 条件请求：304 不计入限流额度，直接复用上次保存的结果
+                result = self._conditional_get(
+                    url,
+                    keep_body=True,
+                    timeout=15,
+                    proxies={'http': None, 'https': None},
+                    headers=headers
+                )
+                self._check_response(url, result.response, limiter, credential)
+                return result
+            
+            try:
+                result = self._retry_call(request)
+            except RateLimited as e:
+                # 额度耗尽且重置时间过远，剩余查询不再重试
+                logger.warning(f"GitHub API 限流，需等待 {e.wait:.0f} 秒，跳过剩余 {len(self.queries) - query_idx} 个查询")
                 break
-
-            max_retries = 3
-            retry_delay = 5  # 初始重试延迟（秒）
-
-            for attempt in range(max_retries):
-                try:
-                    # 增加每个查询的结果数：3 -> 5
-                    url = f"https://api.github.com/search/repositories?q={query}&sort=updated&order=desc&per_page=5"
-                    response = requests.get(
-                        url,
-                        timeout=15,
-                        proxies={'http': None, 'https': None},
-                        headers=headers
-                    )
-                    
-                    # 检查限流错误
-                    if response.status_code == 403:
-                        error_msg = str(response.text)
-                        if 'rate limit' in error_msg.lower():
-                            rate_limit_errors += 1
-                            # 尝试从响应头获取限流重置时间
-                            reset_time = response.headers.get('X-RateLimit-Reset', '')
-                            if reset_time:
-                                try:
-                                    import calendar
-                                    reset_ts = int(reset_time)
-                                    now_ts = int(calendar.timegm(datetime.datetime.utcnow().timetuple()))
-                                    wait_from_header = max(reset_ts - now_ts + 1, 1)
-                                    wait_time = min(wait_from_header, 65)  # 最多等65秒
-                                except (ValueError, TypeError):
-                                    wait_time = retry_delay * (2 ** attempt)
-                            else:
-                                # 指数退避：5秒、10秒、20秒
-                                wait_time = retry_delay * (2 ** attempt)
-                            if attempt < max_retries - 1:
-                                logger.warning(f"GitHub API 限流，等待 {wait_time} 秒后重试（第 {attempt + 1}/{max_retries} 次）...")
-                                time.sleep(wait_time)
-                                continue
-                            else:
-                                logger.warning(f"GitHub 查询 '{query}' 达到最大重试次数，跳过")
-                                break
-                    
-                    response.raise_for_status()
-                    items = response.json().get('items', [])
-                    
-                    # 成功获取数据，重置限流错误计数
-                    rate_limit_errors = 0
-                    
-                    # 处理返回的items
-                    for item in items:
-                        title = item.get('name', '')
-                        description = item.get('description', '') or ''
-                        text_lower = (title + " " + description).lower()
-                        
-                        # 放宽过滤：关键词匹配 OR 分类匹配
-                        has_keyword = any(kw in text_lower for kw in all_keywords)
-                        has_category = any(cat in text_lower for cat in target_categories)
-                        
-                        # 还可以检查 topics
-                        topics = item.get('topics', []) or []
-                        topics_lower = ' '.join(topics).lower()
-                        has_topic = any(kw in topics_lower for kw in all_keywords)
-                        
-                        if has_keyword or has_category or has_topic:
-                            paper = Paper(
-                                title=f"GitHub工具: {title}",
-                                abstract=description,
-                                date=self._extract_date(item),
-                                source='GitHub',
-                                doi='',
-                                link=item.get('html_url', '')
-                            )
-                            
-                            if should_exclude_paper(paper, exclude_keywords):
-                                continue
-                            if not is_recent_date(paper.date, days=self.window_days):
-                                continue
-                            
-                            item_id = self.get_item_id(paper)
-                            if item_id and item_id not in sent_ids:
-                                papers.append(paper)
-                    
-                    # 成功处理，跳出重试循环
-                    break
-                    
-                except requests.exceptions.HTTPError as e:
-                    if e.response and e.response.status_code == 403:
-                        # 403错误已在上面处理
-                        continue
-                    else:
-                        logger.warning(f"GitHub 查询 '{query}' HTTP错误: {e}")
-                        if attempt < max_retries - 1:
-                            time.sleep(retry_delay * (2 ** attempt))
-                            continue
-                        break
-                except Exception as e:
-                    logger.warning(f"GitHub 查询 '{query}' 失败（第 {attempt + 1}/{max_retries} 次）: {e}")
-                    if attempt < max_retries - 1:
-                        time.sleep(retry_delay * (2 ** attempt))
-                        continue
-                    break
+            except Exception as e:
+                logger.warning(f"GitHub 查询 '{query}' 失败: {e}")
+                continue
+            
+            if result.not_modified:
+                logger.debug(f"GitHub 查询 '{query}' 未变化（304），复用上次结果")
+            items = json.loads(result.body).get('items', [])
+            papers.extend(self._collect_items(items, sent_ids, exclude_keywords))
+        
+        logger.info(f"GitHub 共抓取 {len(papers)} 条仓库")
+        return SourceResult(source_name=self.name, papers=papers)
+    
+    async def afetch(self, sent_ids: Set[str], exclude_keywords: List[str], client=None) -> SourceResult:
+        """
+        异步抓取：各查询并发执行
+        
+        请求时机由自适应限流器统一调度（与同步抓取共享学习到的额度），
+        等待响应的时间互相重叠。GraphQL 模式下所有检索词合并为少数几个请求，直接使用同步抓取。
+        """
+        if client is None or self.graphql_enabled():
+            # GraphQL 模式只有一两次请求，走同步路径
+            return await super().afetch(sent_ids, exclude_keywords)
+        
+        headers = self._request_headers()
+        limiter = get_adaptive_limiter()
+        credential = Config.GITHUB_TOKEN or None
+        
+        async def run_query(query: str) -> List[Paper]:
+            url = self._search_url(query)
+            
+            async def request():
+                await get_quota_ledger().aacquire('github', credential, max_wait=self.max_rate_limit_wait)
+                await limiter.aacquire(url, credential, max_wait=self.max_rate_limit_wait)
+                result = await aconditional_get(
+                    client, url, keep_body=True, timeout=15, headers=headers,
+                    send_validators=self.read_incremental_state,
+                    save_validators=self.write_incremental_state
+                )
+                self._check_response(url, result.response, limiter, credential)
+                return result
+            
+            try:
+                result = await self._aretry_call(request)
+            except RateLimited as e:
+                logger.warning(f"GitHub API 限流，需等待 {e.wait:.0f} 秒，跳过查询 '{query}'")
+                return []
+            except Exception as e:
+                logger.warning(f"GitHub 查询 '{query}' 失败: {e}")
+                return []
+            items = json.loads(result.body).get('items', [])
+            return self._collect_items(items, sent_ids, exclude_keywords)
+        
+        results = await asyncio.gather(*(run_query(q) for q in self.queries))
+        papers = [paper for query_papers in results for paper in query_papers]
         
         logger.info(f"GitHub 共抓取 {len(papers)} 条仓库")
         return SourceResult(source_name=self.name, papers=papers)
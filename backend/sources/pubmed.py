@@ -2,13 +2,18 @@
 PubMed 数据源
 """
 import os
+import io
 import datetime
 import logging
-from typing import Set, List
+import concurrent.futures
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from xml.etree import ElementTree
 from backend.models import Paper, SourceResult
 from backend.sources.base import BaseSource
 from backend.core.config import Config
 from backend.core.filtering import should_exclude_paper, is_recent_date
+from backend.core.query_compiler import compile_pubmed_query
+from backend.storage.quota import get_quota_ledger
 
 logger = logging.getLogger(__name__)
 
@@ -28,10 +33,33 @@ except ImportError:
 class PubMedSource(BaseSource):
     """PubMed 数据源"""
     
-    def __init__(self, window_days: int = None):
+    # 每日索引更新
+    cache_ttl = 6 * 3600
+    
+    # 两阶段模式的标题预筛会改变结果，参与缓存键
+    query_attrs = ('two_phase',)
+    
+    def __init__(self, window_days: int = None, efetch_batch_size: int = None, efetch_concurrency: int = None,
+                 two_phase: bool = None, summary_batch_size: int = None):
+        """
+        Args:
+            window_days: 抓取窗口天数
+            efetch_batch_size: 每次 efetch 获取的记录数（默认 PUBMED_EFETCH_BATCH_SIZE）
+            efetch_concurrency: 同时进行的 esummary/efetch 请求数（默认 PUBMED_EFETCH_CONCURRENCY）
+            two_phase: 先按 esummary 标题预筛，只为候选论文获取摘要（默认 PUBMED_TWO_PHASE）
+            summary_batch_size: 每次 esummary 获取的记录数（默认 PUBMED_ESUMMARY_BATCH_SIZE）
+        """
         super().__init__("PubMed", window_days or Config.DEFAULT_WINDOW_DAYS)
+        self.efetch_batch_size = max(efetch_batch_size or Config.PUBMED_EFETCH_BATCH_SIZE, 1)
+        self.efetch_concurrency = max(efetch_concurrency or Config.PUBMED_EFETCH_CONCURRENCY, 1)
+        self.two_phase = two_phase if two_phase is not None else Config.PUBMED_TWO_PHASE
+        self.summary_batch_size = max(summary_batch_size or Config.PUBMED_ESUMMARY_BATCH_SIZE, 1)
         if HAS_BIOPYTHON:
             Entrez.email = Config.PUBMED_EMAIL
+            if Config.NCBI_API_KEY:
+                Entrez.api_key = Config.NCBI_API_KEY
+            # 重试由 retry_policy 统一处理（Entrez 内置重试会再乘上重试次数且固定等待15秒）
+            Entrez.max_tries = 1
             # 确保代理被禁用
             os.environ.pop('http_proxy', None)
             os.environ.pop('https_proxy', None)
@@ -52,19 +80,14 @@ class PubMedSource(BaseSource):
         
         try:
             # 只检索前一天的论文（不包括今天）
-            yesterday = (datetime.date.today() - datetime.timedelta(days=1)).strftime("%Y/%m/%d")
+            yesterday = (self.today() - datetime.timedelta(days=1)).strftime("%Y/%m/%d")
             start_date = yesterday
             
-            # 构建查询（优化：支持更灵活的匹配，如"GPCR-like"、"natural biological nitrogen fixation"）
-            q_nitro = '("Nitrogen Fixation"[Mesh] OR "Nitrogenase"[Mesh] OR "biological nitrogen fixation" OR "natural biological nitrogen fixation" OR rhizobia OR "root nodule" OR symbiosis OR diazotroph OR "nif genes" OR "nitrogen fixing")'
-            q_signal = '("Signal Transduction"[Mesh] OR "Receptors, Cell Surface"[Mesh] OR "extracellular signal perception" OR "signal perception" OR "receptor kinase" OR "GPCR" OR "GPCR-like" OR "G-protein coupled receptor" OR "ligand binding" OR "hormone perception" OR "hormone signaling" OR "two-component system")'
-            q_enzyme = '("Enzymes/chemistry"[Mesh] OR "Catalytic Domain"[Mesh] OR "enzyme mechanism" OR "cryo-EM" OR "cryo-electron microscopy" OR "crystal structure" OR "active site" OR "catalytic mechanism" OR "enzyme structure" OR "enzyme structure determination")'
-            
-            combined_query = f"({q_nitro} OR {q_signal} OR {q_enzyme}) AND (\"{start_date}\"[Date - Publication] : \"{yesterday}\"[Date - Publication])"
+            # 检索式由 RESEARCH_TOPICS 和排除词编译（排除词以 NOT 子句在服务端过滤）
+            combined_query = compile_pubmed_query(start_date, yesterday, exclude_keywords)
             
-            # 搜索 - 先获取总数
-            handle = Entrez.esearch(db="pubmed", term=combined_query, retmax=0, retmode="xml")
-            record = Entrez.read(handle)
+            # 搜索：结果保存在 NCBI History 服务器（WebEnv/query_key），不再逐页取回 ID
+            record = self._entrez_read("esearch", term=combined_query, retmax=0, usehistory="y")
             total_count = int(record.get("Count", 0))
             
             logger.info(f"PubMed 查询返回: 总命中 {total_count} 篇")
@@ -72,60 +95,24 @@ class PubMedSource(BaseSource):
             if total_count == 0:
                 return SourceResult(source_name=self.name, papers=[])
             
-            # 分页获取所有ID（每批100个）
-            all_id_list = []
-            batch_size = 100
-            for start in range(0, total_count, batch_size):
-                handle = Entrez.esearch(db="pubmed", term=combined_query, retstart=start, retmax=batch_size, retmode="xml")
-                record = Entrez.read(handle)
-                batch_ids = record.get("IdList", [])
-                all_id_list.extend(batch_ids)
-                logger.debug(f"PubMed 已获取 {len(all_id_list)}/{total_count} 篇论文ID")
-            
-            logger.info(f"PubMed 共获取 {len(all_id_list)} 篇论文ID，开始获取详细信息")
-            
-            # 分批获取详细信息（每批100个，避免单次请求过大）
-            all_records = []
-            for i in range(0, len(all_id_list), batch_size):
-                batch_ids = all_id_list[i:i+batch_size]
-                handle = Entrez.efetch(db="pubmed", id=",".join(batch_ids), rettype="abstract", retmode="xml")
-                batch_records = Entrez.read(handle)
-                all_records.extend(batch_records.get('PubmedArticle', []))
-                logger.debug(f"PubMed 已获取 {len(all_records)}/{len(all_id_list)} 篇论文详细信息")
-            
             papers = []
-            for article in all_records:
-                stat["total"] += 1
-                try:
-                    medline_cit = article['MedlineCitation']
-                    article_data = medline_cit['Article']
-                    title = article_data.get('ArticleTitle', '无标题')
-                    
-                    # --- 核心改进：提取摘要文本 ---
-                    abstract_parts = []
-                    abstract_data = article_data.get('Abstract', {}).get('AbstractText', [])
-                    for part in abstract_data:
-                        part_text = str(part).strip()
-                        if part_text:
-                            abstract_parts.append(part_text)
-                    abstract = " ".join(abstract_parts)
-                    
-                    # 提取日期与 DOI
-                    final_date = self._extract_date(article, yesterday)
-                    doi = self._extract_doi(article)
-                    
+            
+            def process(body: bytes) -> List[Paper]:
+                """流式解析一批 efetch 响应并即时过滤，只保留通过过滤的论文"""
+                kept = []
+                for fields in iter_pubmed_articles(io.BytesIO(body)):
+                    if not self.two_phase:
+                        # 两阶段模式下已在标题预筛时计数
+                        stat["total"] += 1
                     # 提取 PMID 并生成链接
-                    pmid = str(medline_cit.get('PMID', ''))
-                    link = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/" if pmid else ""
-                    
-                    # 构建 Paper 对象用于过滤
+                    pmid = fields['pmid']
                     paper = Paper(
-                        title=title,
-                        abstract=abstract,
-                        date=final_date,
+                        title=fields['title'] or '无标题',
+                        abstract=fields['abstract'],
+                        date=fields['date'] or yesterday,
                         source='PubMed',
-                        doi=doi,
-                        link=link
+                        doi=fields['doi'],
+                        link=f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/" if pmid else ""
                     )
                     
                     # --- 改进：多重过滤逻辑 ---
@@ -135,7 +122,7 @@ class PubMedSource(BaseSource):
                         continue
                     
                     # 2. 日期验证
-                    if not is_recent_date(paper.date, days=self.window_days):
+                    if not is_recent_date(paper.date, days=self.window_days, today=self.today()):
                         stat["date_filtered"] += 1
                         continue
                     
@@ -145,59 +132,259 @@ class PubMedSource(BaseSource):
                         stat["duplicate"] += 1
                         continue
                     
-                    papers.append(paper)
+                    kept.append(paper)
                     stat["final"] += 1
-                    
-                except (KeyError, TypeError, IndexError) as e:
-                    logger.warning(f"解析 PubMed 单条记录失败: {e}")
-                    continue
+                return kept
+            
+            webenv, query_key = record["WebEnv"], record["QueryKey"]
+            if self.two_phase:
+                # 两阶段：先用 esummary 的标题做排除词预筛和去重，只为候选论文下载摘要
+                candidates, summary_reason = self._fetch_batches(
+                    "esummary", self._history_batches(webenv, query_key, total_count, self.summary_batch_size),
+                    lambda body: self._prefilter_summaries(body, sent_ids, exclude_keywords, stat), "标题"
+                )
+                logger.info(f"PubMed 标题预筛: {total_count} 篇中 {len(candidates)} 篇需要获取摘要")
+                id_batches = [
+                    {'id': ",".join(candidates[i:i + self.efetch_batch_size]), 'rettype': "abstract"}
+                    for i in range(0, len(candidates), self.efetch_batch_size)
+                ]
+                papers, fetch_reason = self._fetch_batches("efetch", id_batches, process, "详细信息")
+                degraded_reason = "; ".join(r for r in (summary_reason, fetch_reason) if r) or None
+            else:
+                papers, degraded_reason = self._fetch_batches(
+                    "efetch",
+                    [dict(params, rettype="abstract")
+                     for params in self._history_batches(webenv, query_key, total_count, self.efetch_batch_size)],
+                    process, "详细信息"
+                )
             
             # 4. 输出诊断日志
             logger.info(f"PubMed 数据漏斗: {stat}")
-            return SourceResult(source_name=self.name, papers=papers)
+            return SourceResult(source_name=self.name, papers=papers,
+                                is_degraded=degraded_reason is not None, degraded_reason=degraded_reason)
         except Exception as e:
             logger.error(f"PubMed 抓取失败: {e}", exc_info=True)
             return SourceResult(source_name=self.name, papers=[], error=str(e))
     
-    def _extract_date(self, article, default_date: str) -> str:
-        """提取日期（增强版：支持格式化和异常处理）"""
-        try:
-            medline = article['MedlineCitation']
-            if 'DateCompleted' in medline:
-                date_completed = medline['DateCompleted']
-                year = date_completed.get('Year', '')
-                month = date_completed.get('Month', '01')
-                day = date_completed.get('Day', '01')
-                if year:
-                    # 使用 zfill 确保月份和日期为两位数
-                    return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-        except (KeyError, TypeError, AttributeError):
-            pass
+    @staticmethod
+    def _history_batches(webenv: str, query_key: str, total_count: int, batch_size: int) -> List[Dict[str, Any]]:
+        """按 retstart/retmax 引用 History 服务器检索结果的各批请求参数"""
+        return [
+            {'webenv': webenv, 'query_key': query_key, 'retstart': start, 'retmax': batch_size}
+            for start in range(0, total_count, batch_size)
+        ]
+    
+    def _prefilter_summaries(self, body: bytes, sent_ids: Set[str], exclude_keywords: List[str],
+                             stat: Dict[str, int]) -> List[str]:
+        """
+        按 esummary 的标题和 DOI 预筛一批检索结果，返回需要获取摘要的 PMID
         
-        try:
-            pub_date_list = article['MedlineCitation']['Article']['ArticleDate']
-            if pub_date_list:  # 检查是否为空列表
-                pub_date_obj = pub_date_list[0]
-                year = pub_date_obj.get('Year', '')
-                month = pub_date_obj.get('Month', '01')
-                day = pub_date_obj.get('Day', '01')
-                if year:
-                    return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-        except (KeyError, IndexError, TypeError, AttributeError):
-            pass
-        
-        return default_date
+        只做不依赖摘要即可判定的过滤：标题命中排除词（且标题本身不满足豁免条件）、
+        已推送过的论文；日期验证仍在获取详细信息后按 DateCompleted/ArticleDate 进行。
+        """
+        candidates = []
+        for summary in iter_pubmed_summaries(io.BytesIO(body)):
+            stat["total"] += 1
+            pmid = summary['pmid']
+            paper = Paper(
+                title=summary['title'] or '无标题',
+                abstract="",
+                date="",
+                source='PubMed',
+                doi=summary['doi'],
+                link=f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/" if pmid else ""
+            )
+            if should_exclude_paper(paper, exclude_keywords):
+                stat["excluded"] += 1
+                continue
+            if self.get_item_id(paper) in sent_ids:
+                stat["duplicate"] += 1
+                continue
+            candidates.append(pmid)
+        return candidates
     
-    def _extract_doi(self, article) -> str:
-        """提取DOI"""
+    def _fetch_batches(self, endpoint: str, batch_params: List[Dict[str, Any]],
+                       process: Callable[[bytes], list], label: str) -> Tuple[list, Optional[str]]:
+        """
+        分批请求 Entrez 接口，各批在并发上限内同时请求
+        
+        请求速率由配额账本限制在 NCBI 允许的范围内（无 API Key 3 次/秒，有 API Key 10 次/秒），
+        并发只用于重叠各批的响应等待时间。每批原始响应到达即交给 process 流式解析和过滤，
+        不保留解析后的完整记录，内存占用与命中总数无关。
+        
+        Args:
+            endpoint: "esummary" 或 "efetch"
+            batch_params: 各批的请求参数
+            process: 处理一批原始响应，返回保留的结果
+            label: 日志中的批次内容说明
+        
+        Returns:
+            (按批次顺序拼接的结果, 降级原因；全部成功时为 None)
+        """
+        if not batch_params:
+            return [], None
+        logger.info(f"PubMed 分 {len(batch_params)} 批获取{label}（并发上限 {self.efetch_concurrency}）")
+        
+        batches = {}
+        failed = []
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.efetch_concurrency, thread_name_prefix=f"pubmed-{endpoint}"
+        )
+        pending = {
+            executor.submit(self._entrez_raw, endpoint, **params): index
+            for index, params in enumerate(batch_params)
+        }
         try:
-            article_ids = article['PubmedData']['ArticleIdList']
-            for aid in article_ids:
-                if aid.attributes.get('IdType') == 'doi':
-                    return str(aid)
-        except (KeyError, TypeError):
-            pass
-        return ''
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending, timeout=self.time_left(), return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                if not done:
+                    # 抓取阶段时间预算用尽：放弃未完成的批次
+                    self.truncate(f"{label}获取剩余 {len(pending)}/{len(batch_params)} 批未完成")
+                    break
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        batches[index] = process(future.result())
+                    except Exception as e:
+                        logger.error(f"PubMed 第{index + 1}批{label}获取失败: {e}")
+                        failed.append(index + 1)
+                        continue
+                    logger.debug(f"PubMed 已处理 {len(batches)}/{len(batch_params)} 批{label}")
+        finally:
+            # 预算用尽时不等待进行中的请求
+            executor.shutdown(wait=not pending, cancel_futures=True)
+        
+        results = [item for index in sorted(batches) for item in batches[index]]
+        if failed:
+            return results, f"{len(failed)}/{len(batch_params)} 批{label}获取失败（第 {', '.join(map(str, sorted(failed)[:5]))} 批）"
+        return results, None
+    
+    def _entrez_raw(self, endpoint: str, **params) -> bytes:
+        """
+        调用 Entrez 接口，返回原始 XML（经过归档/回放入口）
+        
+        Args:
+            endpoint: "esearch" 或 "efetch"
+            **params: Entrez 查询参数
+        """
+        request_key = f"{endpoint}?" + "&".join(f"{k}={params[k]}" for k in sorted(params))
+        
+        def download() -> bytes:
+            # NCBI 限额按 API Key（或 IP）计算，与同一主机上的其他进程共享
+            get_quota_ledger().acquire('ncbi', Config.NCBI_API_KEY or None)
+            handle = getattr(Entrez, endpoint)(db="pubmed", retmode="xml", **params)
+            try:
+                data = handle.read()
+                return data.encode('utf-8') if isinstance(data, str) else data
+            finally:
+                handle.close()
+        
+        return self._fetch_raw(request_key, download, content_type='application/xml')
+    
+    def estimate_hits(self, exclude_keywords: List[str]) -> Tuple[str, int]:
+        """
+        抓取前估计命中数（esearch 只返回总数）
+        
+        Returns:
+            (检索式, 命中数)
+        """
+        yesterday = (self.today() - datetime.timedelta(days=1)).strftime("%Y/%m/%d")
+        query = compile_pubmed_query(yesterday, yesterday, exclude_keywords)
+        record = self._entrez_read("esearch", term=query, retmax=0, rettype="count")
+        return query, int(record.get("Count", 0))
+    
+    def _entrez_read(self, endpoint: str, **params):
+        """调用 Entrez 接口并用 Entrez.read 解析 XML（用于 esearch 等小响应）"""
+        return Entrez.read(io.BytesIO(self._entrez_raw(endpoint, **params)))
+
 
+def _element_text(elem) -> str:
+    """元素的全部文本（包括 <i>、<sup> 等内联标记中的文本）"""
+    return "".join(elem.itertext()).strip() if elem is not None else ""
 
 
+def _format_date(elem) -> str:
+    """把 <Year>/<Month>/<Day> 格式化为 YYYY-MM-DD（没有年份时返回空字符串）"""
+    if elem is None:
+        return ""
+    year = elem.findtext('Year', '').strip()
+    if not year:
+        return ""
+    month = elem.findtext('Month', '01').strip() or '01'
+    day = elem.findtext('Day', '01').strip() or '01'
+    return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+
+
+def iter_pubmed_summaries(stream: IO[bytes]) -> Iterator[Dict[str, str]]:
+    """
+    增量解析 esummary 返回的 eSummaryResult（DocSum 格式），逐篇产出 PMID、标题和 DOI
+    """
+    context = ElementTree.iterparse(stream, events=('start', 'end'))
+    root = None
+    for event, elem in context:
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        if elem.tag != 'DocSum':
+            continue
+        
+        items = {item.get('Name'): item for item in elem.iter('Item')}
+        yield {
+            'pmid': elem.findtext('Id', '').strip(),
+            'title': _element_text(items.get('Title')),
+            'doi': (items['DOI'].text or "").strip() if 'DOI' in items else "",
+        }
+        
+        elem.clear()
+        if root is not None:
+            root.clear()
+
+
+def iter_pubmed_articles(stream: IO[bytes]) -> Iterator[Dict[str, str]]:
+    """
+    增量解析 efetch 返回的 PubmedArticleSet，逐篇产出所需字段
+    
+    每篇文章解析完即释放对应的 XML 元素，内存占用只与单篇文章大小有关。
+    
+    Yields:
+        {'pmid', 'title', 'abstract', 'date', 'doi'}；date 优先取 DateCompleted，
+        其次取第一个 ArticleDate，都没有时为空字符串
+    """
+    context = ElementTree.iterparse(stream, events=('start', 'end'))
+    root = None
+    for event, elem in context:
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        if elem.tag != 'PubmedArticle':
+            continue
+        
+        citation = elem.find('MedlineCitation')
+        article = citation.find('Article') if citation is not None else None
+        if citation is None or article is None:
+            logger.warning("解析 PubMed 单条记录失败: 缺少 MedlineCitation/Article")
+        else:
+            abstract_parts = [
+                _element_text(part) for part in article.iterfind('Abstract/AbstractText')
+            ]
+            doi = ""
+            for aid in elem.iterfind('PubmedData/ArticleIdList/ArticleId'):
+                if aid.get('IdType') == 'doi':
+                    doi = (aid.text or "").strip()
+                    break
+            yield {
+                'pmid': citation.findtext('PMID', '').strip(),
+                'title': _element_text(article.find('ArticleTitle')),
+                'abstract': " ".join(part for part in abstract_parts if part),
+                'date': _format_date(citation.find('DateCompleted')) or _format_date(article.find('ArticleDate')),
+                'doi': doi,
+            }
+        
+        # 释放已处理的文章
+        elem.clear()
+        if root is not None:
+            root.clear()
@@ -1,37 +1,46 @@
 """RSS 数据源"""
 import datetime
-import requests
 import logging
-from typing import Set, List
+from typing import Any, Dict, List, Set
 from backend.models import Paper, SourceResult
 from backend.sources.base import BaseSource
+from backend.sources.feed_parser import parse_feed
+from backend.sources.feeds import fetch_feeds, parse_feed_list, source_time_left, timeout_reason
 from backend.core.config import Config
 from backend.core.filtering import should_exclude_paper, is_recent_date
+from backend.utils.retry import check_retryable
 
 logger = logging.getLogger(__name__)
 
-try:
-    import feedparser
-    HAS_FEEDPARSER = True
-except ImportError:
-    HAS_FEEDPARSER = False
+# 扩展 RSS 源列表
+DEFAULT_FEEDS = [
+    "https://www.nature.com/nplants.rss",      # Nature Plants
+    "https://www.nature.com/nature.rss",       # Nature Main
+    "https://www.nature.com/nchembio.rss",     # Nature Chemical Biology
+    "https://www.nature.com/nsmb.rss",         # Nature Structural & Molecular Biology
+    "https://science.sciencemag.org/rss/express.xml",  # Science First Release
+    "https://www.cell.com/cell/rss",           # Cell
+    "https://www.cell.com/molecular-cell/rss", # Molecular Cell
+]
 
 
 class RSSSource(BaseSource):
     """RSS 顶级期刊数据源"""
     
-    def __init__(self, window_days: int = None):
+    # 期刊 RSS 一天内多次更新，缓存时间较短
+    cache_ttl = 1 * 3600
+    query_attrs = ('feeds',)
+    
+    def __init__(self, window_days: int = None, feeds: List[str] = None):
+        """
+        Args:
+            window_days: 抓取窗口天数
+            feeds: RSS 源列表（默认 RSS_FEEDS 配置，未配置时使用 DEFAULT_FEEDS）
+        """
         super().__init__("RSS_TopJournal", window_days or Config.DEFAULT_WINDOW_DAYS)
-        # 扩展 RSS 源列表
-        self.feeds = [
-            "https://www.nature.com/nplants.rss",      # Nature Plants
-            "https://www.nature.com/nature.rss",       # Nature Main
-            "https://www.nature.com/nchembio.rss",     # Nature Chemical Biology
-            "https://www.nature.com/nsmb.rss",         # Nature Structural & Molecular Biology
-            "https://science.sciencemag.org/rss/express.xml",  # Science First Release
-            "https://www.cell.com/cell/rss",           # Cell
-            "https://www.cell.com/molecular-cell/rss", # Molecular Cell
-        ]
+        self.feeds = list(feeds or parse_feed_list(Config.RSS_FEEDS) or DEFAULT_FEEDS)
+        # 最近一次抓取各 feed 的耗时和大小
+        self.feed_stats: List[Dict[str, Any]] = []
     
     def _extract_doi_from_entry(self, entry) -> str:
         """
@@ -80,10 +89,61 @@ class RSSSource(BaseSource):
         
         return ''
     
+    def _fetch_feed(self, url: str) -> bytes:
+        """
+        下载 feed 正文（原始响应经过归档/回放入口）
+        
+        条件请求返回 304 时使用上次保存的正文：当天或未来日期的条目在之后的运行才进入窗口，
+        已接受但未推送的条目在重跑时仍需返回，因此未更新的 feed 也要重新过滤
+        （已见条目索引使重新过滤的开销很小），正文照常归档供回放使用。
+        """
+        def download() -> bytes:
+            result = self._conditional_get(url, keep_body=True,
+                                           timeout=self.request_timeout(Config.FEED_TIMEOUT),
+                                           proxies={'http': None, 'https': None})
+            if result.not_modified:
+                logger.debug(f"feed {url} 自上次抓取后未更新（304），使用保存的正文")
+            # 限流/服务端错误按重试策略重试，其他状态照常交给 feedparser
+            check_retryable(result.response, url)
+            return result.body
+        
+        return self._fetch_raw(url, download, content_type='application/rss+xml')
+    
     def fetch(self, sent_ids: Set[str], exclude_keywords: List[str]) -> SourceResult:
-        if not HAS_FEEDPARSER:
-            return SourceResult(source_name=self.name, papers=[], error="feedparser 未安装")
+        papers = []
+        
+        # 已见条目索引（回放时不使用，保证结果可复现）
+        entry_index = self._entry_index()
+        query_hash = self.query_hash(exclude_keywords)
+        
+        self.feed_stats = []
+        timed_out = []
+        for outcome in fetch_feeds(self.feeds, self._fetch_feed, parse_feed,
+                                   Config.FEED_CONCURRENCY, Config.FEED_PER_DOMAIN_LIMIT,
+                                   source_time_left(self)):
+            url = outcome.url
+            self.feed_stats.append(outcome.stat())
+            if outcome.timed_out:
+                timed_out.append(url)
+                continue
+            if outcome.error is not None:
+                logger.warning(f"RSS 源 {url} 抓取失败（{outcome.latency:.2f}秒）: {outcome.error}")
+                continue
+            logger.info(f"RSS 源 {url} 完成: {outcome.latency:.2f}秒, {outcome.size / 1024:.1f}KB")
+            try:
+                papers.extend(self._process_feed(url, outcome.parsed, sent_ids, exclude_keywords,
+                                                 entry_index, query_hash))
+            except Exception as e:
+                logger.warning(f"RSS 源 {url} 处理失败: {e}")
         
+        degraded_reason = timeout_reason(self, timed_out, len(self.feeds))
+        logger.info(f"RSS 共抓取 {len(papers)} 条论文")
+        return SourceResult(source_name=self.name, papers=papers,
+                            is_degraded=degraded_reason is not None, degraded_reason=degraded_reason)
+    
+    def _process_feed(self, url: str, feed, sent_ids: Set[str], exclude_keywords: List[str],
+                      entry_index, query_hash: str) -> List[Paper]:
+        """过滤一个已解析 feed 的条目并更新已见条目索引"""
         papers = []
         all_keywords = Config.get_all_keywords()
         target_categories = [c.lower() for c in Config.TARGET_CATEGORIES]
@@ -92,76 +152,103 @@ class RSSSource(BaseSource):
         broad_keywords = [kw.lower() for kw in Config.BROAD_KEYWORDS]
         top_tier_domains = Config.TOP_TIER_DOMAINS
         
-        for url in self.feeds:
-            try:
-                # 判断当前源是否为顶级期刊
-                is_top_tier = any(domain in url for domain in top_tier_domains)
+        # 判断当前源是否为顶级期刊
+        is_top_tier = any(domain in url for domain in top_tier_domains)
+        
+        if is_top_tier:
+            # 提取期刊域名用于日志
+            matched_domain = next((domain for domain in top_tier_domains if domain in url), "unknown")
+            logger.info(f"[顶刊源识别] URL={url}, 期刊域名={matched_domain}")
+        
+        feed_key = f"{url}#{query_hash}"
+        seen = entry_index.seen(feed_key) if entry_index and self.read_incremental_state else set()
+        # 只因日期落在窗口外被拒绝（dated）或已接受但尚未推送（accepted）的条目不记入已见索引：
+        # 之后的运行（包括更大 --window-days 的补抓、本次运行失败后的重跑、结果缓存过期后的重新抓取）仍需处理它们
+        present, dated, accepted = set(), set(), set()
+        skipped = 0
+        
+        # 移除数量限制，处理所有条目以确保不遗漏
+        for entry in feed.entries:
+            guid = entry.get('id') or entry.get('link')
+            if guid:
+                present.add(guid)
+                if guid in seen:
+                    skipped += 1
+                    continue
+            
+            title_lower = entry.title.lower()
+            summary_lower = entry.get('summary', '').lower()
+            text_to_search = title_lower + " " + summary_lower
+            
+            # 差异化过滤策略
+            matched_keyword = None
+            if is_top_tier:
+                # 顶刊：宽松过滤，只需包含领域大词即可
+                for bk in broad_keywords:
+                    if bk in text_to_search:
+                        matched_keyword = bk
+                        is_relevant = True
+                        logger.debug(f"[顶刊白名单] 通过领域大词: 关键词='{matched_keyword}', 标题='{entry.title[:50]}...'")
+                        break
+                else:
+                    is_relevant = False
+            else:
+                # 普通源：严格过滤，必须命中精确关键词或目标分类
+                has_keyword = any(k in text_to_search for k in all_keywords)
+                has_category = any(cat in text_to_search for cat in target_categories)
+                is_relevant = has_keyword or has_category
+            
+            if is_relevant:
+                # 提取 DOI
+                doi = self._extract_doi_from_entry(entry)
                 
-                if is_top_tier:
-                    # 提取期刊域名用于日志
-                    matched_domain = next((domain for domain in top_tier_domains if domain in url), "unknown")
-                    logger.info(f"[顶刊源识别] URL={url}, 期刊域名={matched_domain}")
+                paper = Paper(
+                    title=entry.title,
+                    abstract=entry.get('summary', ''),
+                    date=entry.get('published', '') or entry.get('updated', ''),
+                    source='RSS_TopJournal',
+                    doi=doi,
+                    link=entry.link
+                )
                 
-                rss_response = requests.get(url, timeout=30, proxies={'http': None, 'https': None})
-                feed = feedparser.parse(rss_response.content)
+                # 排除词检查
+                if should_exclude_paper(paper, exclude_keywords):
+                    # 记录排除词拦截日志
+                    text_for_check = (paper.title + " " + paper.abstract).lower()
+                    matched_exclude = next((ex for ex in exclude_keywords if ex in text_for_check), "unknown")
+                    logger.debug(f"[排除词拦截] 命中词='{matched_exclude}', 来源={paper.source}, 标题='{paper.title[:50]}...'")
+                    continue
                 
-                # 移除数量限制，处理所有条目以确保不遗漏
-                for entry in feed.entries:
-                    title_lower = entry.title.lower()
-                    summary_lower = entry.get('summary', '').lower()
-                    text_to_search = title_lower + " " + summary_lower
-                    
-                    # 差异化过滤策略
-                    matched_keyword = None
-                    if is_top_tier:
-                        # 顶刊：宽松过滤，只需包含领域大词即可
-                        for bk in broad_keywords:
-                            if bk in text_to_search:
-                                matched_keyword = bk
-                                is_relevant = True
-                                logger.debug(f"[顶刊白名单] 通过领域大词: 关键词='{matched_keyword}', 标题='{entry.title[:50]}...'")
-                                break
-                        else:
-                            is_relevant = False
-                    else:
-                        # 普通源：严格过滤，必须命中精确关键词或目标分类
-                        has_keyword = any(k in text_to_search for k in all_keywords)
-                        has_category = any(cat in text_to_search for cat in target_categories)
-                        is_relevant = has_keyword or has_category
-                    
-                    if is_relevant:
-                        # 提取 DOI
-                        doi = self._extract_doi_from_entry(entry)
-                        
-                        paper = Paper(
-                            title=entry.title,
-                            abstract=entry.get('summary', ''),
-                            date=entry.get('published', '') or entry.get('updated', ''),
-                            source='RSS_TopJournal',
-                            doi=doi,
-                            link=entry.link
-                        )
-                        
-                        # 排除词检查
-                        if should_exclude_paper(paper, exclude_keywords):
-                            # 记录排除词拦截日志
-                            text_for_check = (paper.title + " " + paper.abstract).lower()
-                            matched_exclude = next((ex for ex in exclude_keywords if ex in text_for_check), "unknown")
-                            logger.debug(f"[排除词拦截] 命中词='{matched_exclude}', 来源={paper.source}, 标题='{paper.title[:50]}...'")
-                            continue
-                        
-                        # 日期验证（传递 is_top_tier 参数启用容错机制）
-                        if not is_recent_date(paper.date, days=self.window_days, is_top_tier=is_top_tier):
-                            continue
-                        
-                        item_id = self.get_item_id(paper)
-                        if item_id and item_id not in sent_ids:
-                            papers.append(paper)
-            except Exception as e:
-                logger.warning(f"RSS 源 {url} 抓取失败: {e}")
+                # 日期验证（传递 is_top_tier 参数启用容错机制）
+                if not is_recent_date(paper.date, days=self.window_days, is_top_tier=is_top_tier,
+                                      today=self.today()):
+                    # 是否在窗口内取决于本次的窗口天数和参考日期，不记入已见索引
+                    if guid:
+                        dated.add(guid)
+                    continue
+                
+                item_id = self.get_item_id(paper)
+                if item_id and item_id not in sent_ids:
+                    papers.append(paper)
+                    if guid:
+                        accepted.add(guid)
         
-        logger.info(f"RSS 共抓取 {len(papers)} 条论文")
-        return SourceResult(source_name=self.name, papers=papers)
+        if skipped:
+            logger.info(f"RSS 源 {url} 跳过 {skipped} 条已处理条目")
+        if entry_index and self.write_incremental_state:
+            entry_index.update(feed_key, present - dated - accepted, present)
+        return papers
+    
+    def _entry_index(self):
+        """已见条目索引（未启用、回放模式或数据库不可用时返回 None）"""
+        if not Config.ENABLE_FEED_ENTRY_INDEX or self.replay:
+            return None
+        try:
+            from backend.storage.feed_index import FeedEntryIndex
+            return FeedEntryIndex()
+        except Exception as e:
+            logger.warning(f"已见条目索引不可用: {e}")
+            return None
 
 
 
@@ -3,35 +3,66 @@ import datetime
 import requests
 import logging
 import time
-from typing import Set, List
+from typing import Any, Dict, List, Set
 from backend.models import Paper, SourceResult
 from backend.sources.base import BaseSource
+from backend.sources.feed_parser import parse_feed
+from backend.sources.feeds import fetch_feeds, parse_feed_list, source_time_left, timeout_reason
 from backend.core.config import Config
 from backend.core.filtering import should_exclude_paper, is_recent_date
 
 logger = logging.getLogger(__name__)
 
-try:
-    import feedparser
-    HAS_FEEDPARSER = True
-except ImportError:
-    HAS_FEEDPARSER = False
+DEFAULT_NEWS_URLS = [
+    "https://www.eurekalert.org/rss/agriculture.xml",
+    "https://www.eurekalert.org/rss/biology.xml"
+]
 
 
 class ScienceNewsSource(BaseSource):
     """EurekAlert 科学新闻数据源"""
     
-    def __init__(self, window_days: int = None):
+    # 新闻稿一天内多次发布，缓存时间较短
+    cache_ttl = 1 * 3600
+    query_attrs = ('news_urls',)
+    
+    def __init__(self, window_days: int = None, news_urls: List[str] = None):
+        """
+        Args:
+            window_days: 抓取窗口天数
+            news_urls: RSS 源列表（默认 SCIENCENEWS_FEEDS 配置，未配置时使用 DEFAULT_NEWS_URLS）
+        """
         super().__init__("ScienceNews", window_days or Config.DEFAULT_WINDOW_DAYS)
-        self.news_urls = [
-            "https://www.eurekalert.org/rss/agriculture.xml",
-            "https://www.eurekalert.org/rss/biology.xml"
-        ]
+        self.news_urls = list(news_urls or parse_feed_list(Config.SCIENCENEWS_FEEDS) or DEFAULT_NEWS_URLS)
+        # User-Agent伪装,避免被识别为爬虫
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        }
+        # 最近一次抓取各 feed 的耗时和大小
+        self.feed_stats: List[Dict[str, Any]] = []
     
-    def fetch(self, sent_ids: Set[str], exclude_keywords: List[str]) -> SourceResult:
-        if not HAS_FEEDPARSER:
-            return SourceResult(source_name=self.name, papers=[], error="feedparser 未安装")
+    def _fetch_feed(self, url: str) -> bytes:
+        """
+        下载 feed 正文（原始响应经过归档/回放入口）
         
+        304 时返回上次保存的正文，按本次运行的日期重新过滤（新闻稿前一天还不在窗口内）。
+        """
+        def download() -> bytes:
+            result = self._conditional_get(
+                url,
+                keep_body=True,
+                headers=self.headers,
+                timeout=self.request_timeout(Config.FEED_TIMEOUT),
+                proxies={'http': None, 'https': None}
+            )
+            if result.not_modified:
+                logger.debug(f"feed {url} 自上次抓取后未更新（304），使用保存的正文")
+            result.response.raise_for_status()  # 检查HTTP状态码
+            return result.body
+        
+        return self._fetch_raw(url, download, content_type='application/rss+xml')
+    
+    def fetch(self, sent_ids: Set[str], exclude_keywords: List[str]) -> SourceResult:
         papers = []
         all_keywords = Config.get_all_keywords()
         
@@ -39,69 +70,70 @@ class ScienceNewsSource(BaseSource):
         failed_urls = []
         successful_urls = 0
         
-        # User-Agent伪装,避免被识别为爬虫
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        }
-        
-        # 逐个RSS源独立处理,一个失败不影响其他
-        for url in self.news_urls:
-            try:
-                rss_response = requests.get(
-                    url, 
-                    headers=headers,
-                    timeout=30, 
-                    proxies={'http': None, 'https': None}
-                )
-                rss_response.raise_for_status()  # 检查HTTP状态码
-                
-                feed = feedparser.parse(rss_response.content)
-                
-                # 检查feed是否有效
-                if not hasattr(feed, 'entries') or not feed.entries:
-                    logger.warning(f"[ScienceNews] RSS源 {url} 返回空数据")
-                    failed_urls.append(url)
-                    continue
-                
-                for entry in feed.entries[:3]:
-                    try:
-                        title_lower = entry.title.lower()
-                        summary_lower = entry.get('summary', '').lower()
-                        
-                        if any(k in title_lower or k in summary_lower for k in all_keywords):
-                            paper = Paper(
-                                title=entry.title,
-                                abstract=entry.get('summary', ''),
-                                date=entry.get('published', '') or entry.get('updated', ''),
-                                source='ScienceNews',
-                                doi='',
-                                link=entry.link
-                            )
-                            
-                            if should_exclude_paper(paper, exclude_keywords):
-                                continue
-                            if not is_recent_date(paper.date, days=self.window_days):
-                                continue
-                            
-                            item_id = self.get_item_id(paper)
-                            if item_id and item_id not in sent_ids:
-                                papers.append(paper)
-                    except Exception as e:
-                        logger.debug(f"[ScienceNews] 处理单条新闻失败: {e}")
-                        continue
-                
-                successful_urls += 1
-                logger.info(f"[ScienceNews] RSS源 {url} 成功")
-                
-            except requests.exceptions.Timeout:
+        # 各RSS源并发抓取,一个失败或过慢不影响其他
+        self.feed_stats = []
+        timed_out = []
+        for outcome in fetch_feeds(self.news_urls, self._fetch_feed, parse_feed,
+                                   Config.FEED_CONCURRENCY, Config.FEED_PER_DOMAIN_LIMIT,
+                                   source_time_left(self)):
+            url = outcome.url
+            self.feed_stats.append(outcome.stat())
+            if outcome.timed_out:
+                timed_out.append(url)
+                failed_urls.append(url)
+                continue
+            error = outcome.error
+            if isinstance(error, requests.exceptions.Timeout):
                 logger.warning(f"[ScienceNews] RSS源 {url} 超时")
                 failed_urls.append(url)
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"[ScienceNews] RSS源 {url} 请求失败: {e}")
+                continue
+            if isinstance(error, requests.exceptions.RequestException):
+                logger.warning(f"[ScienceNews] RSS源 {url} 请求失败: {error}")
                 failed_urls.append(url)
-            except Exception as e:
-                logger.warning(f"[ScienceNews] RSS源 {url} 处理异常: {e}")
+                continue
+            if error is not None:
+                logger.warning(f"[ScienceNews] RSS源 {url} 处理异常: {error}")
                 failed_urls.append(url)
+                continue
+            
+            feed = outcome.parsed
+            # 检查feed是否有效
+            if not hasattr(feed, 'entries') or not feed.entries:
+                logger.warning(f"[ScienceNews] RSS源 {url} 返回空数据")
+                failed_urls.append(url)
+                continue
+            
+            for entry in feed.entries[:3]:
+                try:
+                    title_lower = entry.title.lower()
+                    summary_lower = entry.get('summary', '').lower()
+                    
+                    if any(k in title_lower or k in summary_lower for k in all_keywords):
+                        paper = Paper(
+                            title=entry.title,
+                            abstract=entry.get('summary', ''),
+                            date=entry.get('published', '') or entry.get('updated', ''),
+                            source='ScienceNews',
+                            doi='',
+                            link=entry.link
+                        )
+                        
+                        if should_exclude_paper(paper, exclude_keywords):
+                            continue
+                        if not is_recent_date(paper.date, days=self.window_days, today=self.today()):
+                            continue
+                        
+                        item_id = self.get_item_id(paper)
+                        if item_id and item_id not in sent_ids:
+                            papers.append(paper)
+                except Exception as e:
+                    logger.debug(f"[ScienceNews] 处理单条新闻失败: {e}")
+                    continue
+            
+            successful_urls += 1
+            logger.info(f"[ScienceNews] RSS源 {url} 成功（{outcome.latency:.2f}秒, {outcome.size / 1024:.1f}KB）")
+        
+        timeout_reason(self, timed_out, len(self.news_urls))
         
         # 计算延迟
         latency = time.time() - start_time
@@ -1,6 +1,5 @@
-"""Semantic Scholar 数据源(支持指数退避重试和API Key)"""
+"""Semantic Scholar 数据源(支持抖动退避重试和API Key)"""
 import datetime
-import requests
 import logging
 import time
 from typing import Set, List
@@ -8,6 +7,9 @@ from backend.models import Paper, SourceResult
 from backend.sources.base import BaseSource
 from backend.core.config import Config
 from backend.core.filtering import should_exclude_paper, is_recent_date
+from backend.utils.http import get_http_client
+from backend.utils.rate_limit import get_adaptive_limiter, RateLimited
+from backend.utils.retry import check_retryable
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,10 @@ logger = logging.getLogger(__name__)
 class SemanticScholarSource(BaseSource):
     """Semantic Scholar 数据源"""
     
+    # 更新较慢
+    cache_ttl = 24 * 3600
+    query_attrs = ('queries',)
+    
     def __init__(self, window_days: int = None):
         # 默认使用 30 天窗口，因为 Semantic Scholar 更新较慢
         super().__init__("SemanticScholar", window_days or 30)
@@ -52,92 +58,80 @@ class SemanticScholarSource(BaseSource):
         else:
             logger.warning("[Semantic Scholar] 未配置API Key,使用公共API(可能遭遇限流)")
         
+        # 自适应限流：429 / Retry-After 后自动降速，按 API Key 分别计算
+        limiter = get_adaptive_limiter()
+        credential = Config.SEMANTIC_SCHOLAR_API_KEY or None
+        
         for query in self.queries:
-            max_retries = 3
-            success = False
+            url = f"https://api.semanticscholar.org/graph/v1/paper/search?query={query}&limit=10&sort=year&order=desc&fields=title,abstract,citationCount,influentialCitationCount,year,publicationDate,externalIds"
             
-            for attempt in range(max_retries):
-                try:
-                    url = f"https://api.semanticscholar.org/graph/v1/paper/search?query={query}&limit=10&sort=year&order=desc&fields=title,abstract,citationCount,influentialCitationCount,year,publicationDate,externalIds"
-                    
-                    response = requests.get(
-                        url, 
-                        headers=headers,
-                        timeout=15, 
-                        proxies={'http': None, 'https': None}
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json().get('data', [])
-                        
-                        for d in data:
-                            title = d.get('title', '') or '无标题'
-                            abstract = d.get('abstract', '') or ''
-                            
-                            text_lower = (title + " " + abstract).lower()
-                            
-                            # 放宽过滤：关键词匹配 OR 分类匹配
-                            has_keyword = any(kw in text_lower for kw in all_keywords)
-                            has_category = any(cat in text_lower for cat in target_categories)
-                            
-                            if not (has_keyword or has_category):
-                                continue
-                            
-                            # 提取日期
-                            pub_date = d.get('publicationDate', '')
-                            if pub_date:
-                                date_str = pub_date[:10]
-                            else:
-                                year = d.get('year', today.year)
-                                date_str = f"{year}-01-01"
-                            
-                            paper = Paper(
-                                title=title,
-                                abstract=abstract,
-                                date=date_str,
-                                source='SemanticScholar',
-                                doi=d.get('externalIds', {}).get('DOI', '') if isinstance(d.get('externalIds'), dict) else '',
-                                link='',
-                                citation_count=d.get('citationCount', 0) or 0,
-                                influential_count=d.get('influentialCitationCount', 0) or 0
-                            )
-                            
-                            if should_exclude_paper(paper, exclude_keywords):
-                                continue
-                            if not is_recent_date(date_str, days=self.window_days):
-                                continue
-                            
-                            item_id = self.get_item_id(paper)
-                            if item_id and item_id not in sent_ids:
-                                papers.append(paper)
-                        
-                        successful_queries += 1
-                        success = True
-                        break  # 成功则跳出重试循环
-                    
-                    elif response.status_code == 429:
-                        # API频率限制
-                        wait_time = 2 ** attempt  # 指数退避: 1, 2, 4秒
-                        logger.warning(
-                            f"[Semantic Scholar] 429限流,查询'{query}' 第{attempt+1}次重试,等待{wait_time}秒"
-                        )
-                        time.sleep(wait_time)
-                    else:
-                        logger.warning(
-                            f"[Semantic Scholar] 查询'{query}'返回{response.status_code},第{attempt+1}次重试"
-                        )
-                        time.sleep(2 ** attempt)
-                
-                except Exception as e:
-                    wait_time = 2 ** attempt
-                    logger.warning(
-                        f"[Semantic Scholar] 查询'{query}'异常: {e}, 第{attempt+1}/{max_retries}次重试"
-                    )
-                    if attempt < max_retries - 1:
-                        time.sleep(wait_time)
+            def request() -> list:
+                limiter.acquire(url, credential, max_wait=60)
+                response = get_http_client().get(
+                    url, 
+                    headers=headers,
+                    timeout=15, 
+                    proxies={'http': None, 'https': None}
+                )
+                limiter.update(url, response, credential)
+                # 429 的等待时间由限流器在下一次 acquire 时决定（已按 Retry-After 降速）
+                check_retryable(response, url, retry_after=0 if response.status_code == 429 else None)
+                response.raise_for_status()
+                return response.json().get('data', [])
             
-            if not success:
+            try:
+                data = self._retry_call(request)
+            except RateLimited as e:
+                logger.warning(f"[Semantic Scholar] 限流等待过长({e.wait:.0f}秒),跳过查询'{query}'")
+                failed_queries.append(query)
+                continue
+            except Exception as e:
+                logger.warning(f"[Semantic Scholar] 查询'{query}'失败: {e}")
                 failed_queries.append(query)
+                continue
+            
+            for d in data:
+                title = d.get('title', '') or '无标题'
+                abstract = d.get('abstract', '') or ''
+                
+                text_lower = (title + " " + abstract).lower()
+                
+                # 放宽过滤：关键词匹配 OR 分类匹配
+                has_keyword = any(kw in text_lower for kw in all_keywords)
+                has_category = any(cat in text_lower for cat in target_categories)
+                
+                if not (has_keyword or has_category):
+                    continue
+                
+                # 提取日期
+                pub_date = d.get('publicationDate', '')
+                if pub_date:
+                    date_str = pub_date[:10]
+                else:
+                    year = d.get('year', today.year)
+                    date_str = f"{year}-01-01"
+                
+                paper = Paper(
+                    title=title,
+                    abstract=abstract,
+                    date=date_str,
+                    source='SemanticScholar',
+                    doi=d.get('externalIds', {}).get('DOI', '') if isinstance(d.get('externalIds'), dict) else '',
+                    link='',
+                    citation_count=d.get('citationCount', 0) or 0,
+                    influential_count=d.get('influentialCitationCount', 0) or 0
+                )
+                
+                if should_exclude_paper(paper, exclude_keywords):
+                    continue
+                if not is_recent_date(date_str, days=self.window_days):
+                    continue
+                
+                item_id = self.get_item_id(paper)
+                if item_id and item_id not in sent_ids:
+                    papers.append(paper)
+            
+            successful_queries += 1
         
         # 计算延迟
         latency = time.time() - start_time
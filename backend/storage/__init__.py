@@ -3,8 +3,9 @@
 """
 from .db import get_db, init_db
 from .repo import PaperRepository
+from .export import export_parquet
 
-__all__ = ['get_db', 'init_db', 'PaperRepository']
+__all__ = ['get_db', 'init_db', 'PaperRepository', 'export_parquet']
 
 
 
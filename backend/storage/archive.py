@@ -0,0 +1,184 @@
+"""
+原始响应归档：按内容寻址保存数据源的原始响应（bioRxiv JSON、Entrez XML、EuropePMC JSON、RSS 正文）
+
+- 正文按 SHA256 内容寻址，zstd 压缩后保存在 <archive_dir>/objects/<前2位>/<摘要>.<编码>，
+  相同内容只保存一份（同一 feed 多次抓取、相邻运行共享的页面不会重复占用磁盘）
+- 索引保存在主数据库 payload_index 表中，按 数据源 / 时间窗口 / run_id 检索
+- replay 命令通过索引按请求键取回原始响应，在零网络的情况下重跑过滤、评分、排序
+"""
+import hashlib
+import os
+import zlib
+import logging
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+from backend.core.config import Config
+from backend.storage.db import get_db
+
+logger = logging.getLogger(__name__)
+
+# 尝试导入可选库
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+
+class PayloadNotArchived(KeyError):
+    """回放时找不到对应请求的归档响应"""
+
+
+class PayloadArchive:
+    """内容寻址的原始响应归档"""
+
+    def __init__(self, archive_dir: str = None, level: int = None):
+        self.archive_dir = Path(archive_dir or Config.PAYLOAD_ARCHIVE_DIR)
+        self.objects_dir = self.archive_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.level = level if level is not None else Config.PAYLOAD_ARCHIVE_LEVEL
+        # 未安装 zstandard 时退化为 zlib，编码记录在索引中，读取时按记录解码
+        self.codec = 'zst' if HAS_ZSTD else 'zlib'
+        if not HAS_ZSTD:
+            logger.warning("zstandard 未安装，原始响应归档将使用 zlib 压缩。建议安装: pip install zstandard")
+
+    def _object_path(self, digest: str, codec: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.{codec}"
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.codec == 'zst':
+            return zstandard.ZstdCompressor(level=self.level).compress(body)
+        return zlib.compress(body, min(self.level, 9))
+
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        if codec == 'zst':
+            if not HAS_ZSTD:
+                raise RuntimeError("归档使用 zstd 压缩，但 zstandard 未安装")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def _write_object(self, body: bytes) -> tuple:
+        """写入内容寻址对象，返回 (摘要, 压缩后大小)"""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest, self.codec)
+        if path.exists():
+            return digest, path.stat().st_size
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        compressed = self._compress(body)
+        # 先写临时文件再原子替换，并发写同一对象时结果一致
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        return digest, len(compressed)
+
+    def put(
+        self,
+        run_id: str,
+        source: str,
+        request_key: str,
+        body: bytes,
+        window_start: str = None,
+        window_end: str = None,
+        content_type: str = None
+    ) -> str:
+        """
+        归档一次请求的原始响应
+
+        Args:
+            run_id: 运行ID
+            source: 数据源名称
+            request_key: 请求键（URL 或 Entrez 参数串），回放时按此键取回
+            body: 原始响应正文
+            window_start: 抓取窗口起始日期（YYYY-MM-DD）
+            window_end: 抓取窗口结束日期（YYYY-MM-DD）
+            content_type: 内容类型（如 application/json、application/xml）
+
+        Returns:
+            内容摘要
+        """
+        digest, stored_size = self._write_object(body)
+        with get_db() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO payload_index
+                (run_id, source, request_key, digest, codec, content_type,
+                 raw_size, stored_size, window_start, window_end)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                run_id, source, request_key, digest, self.codec, content_type,
+                len(body), stored_size, window_start, window_end
+            ))
+        logger.debug(f"[归档] {source} {request_key[:80]} -> {digest[:12]} ({len(body)}B -> {stored_size}B)")
+        return digest
+
+    def get(self, run_id: str, source: str, request_key: str) -> bytes:
+        """
+        取回某次运行中某个请求的原始响应
+
+        Raises:
+            PayloadNotArchived: 索引中没有该请求
+        """
+        with get_db() as conn:
+            row = conn.execute("""
+                SELECT digest, codec FROM payload_index
+                WHERE run_id = ? AND source = ? AND request_key = ?
+            """, (run_id, source, request_key)).fetchone()
+        if not row:
+            raise PayloadNotArchived(f"{source} 在运行 {run_id[:8]} 中没有归档请求: {request_key[:120]}")
+
+        with open(self._object_path(row['digest'], row['codec']), 'rb') as f:
+            return self._decompress(f.read(), row['codec'])
+
+    def link_run(self, source: str, from_run_id: str, to_run_id: str) -> int:
+        """
+        将一次运行中某数据源的归档索引复制到另一次运行（内容寻址，不复制正文）
+
+        Returns:
+            复制的索引条数
+        """
+        with get_db() as conn:
+            cursor = conn.execute("""
+                INSERT OR IGNORE INTO payload_index
+                (run_id, source, request_key, digest, codec, content_type,
+                 raw_size, stored_size, window_start, window_end)
+                SELECT ?, source, request_key, digest, codec, content_type,
+                       raw_size, stored_size, window_start, window_end
+                FROM payload_index
+                WHERE run_id = ? AND source = ?
+            """, (to_run_id, from_run_id, source))
+            return cursor.rowcount
+
+    def list_run_sources(self, run_id: str) -> List[Dict[str, Any]]:
+        """列出某次运行归档过的数据源及其时间窗口"""
+        with get_db() as conn:
+            rows = conn.execute("""
+                SELECT source, MIN(window_start) AS window_start, MAX(window_end) AS window_end,
+                       COUNT(*) AS payloads, SUM(raw_size) AS raw_size, SUM(stored_size) AS stored_size
+                FROM payload_index
+                WHERE run_id = ?
+                GROUP BY source
+                ORDER BY source
+            """, (run_id,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest_run_id(self) -> Optional[str]:
+        """最近一次有归档记录的运行ID"""
+        with get_db() as conn:
+            row = conn.execute("""
+                SELECT run_id FROM payload_index ORDER BY id DESC LIMIT 1
+            """).fetchone()
+        return row['run_id'] if row else None
+
+
+# 全局归档实例
+_global_archive: Optional[PayloadArchive] = None
+
+
+def get_payload_archive() -> PayloadArchive:
+    """获取或创建全局原始响应归档实例"""
+    global _global_archive
+    if _global_archive is None:
+        _global_archive = PayloadArchive()
+    return _global_archive
@@ -0,0 +1,129 @@
+"""
+bioRxiv 本地按日镜像
+
+bioRxiv details 接口按发布日期返回记录，某一天的记录在几天后就不再变化。
+镜像按天保存 details 记录，抓取时只同步尚未镜像的日期，以及最近几天
+（尾随窗口，用于补上延迟加入的记录），其余日期直接从本地读取：
+首次同步后，30 天的补抓只需要下载 1 天的数据。
+
+- biorxiv_days：每天的同步状态（同步时的参考日期、记录数）
+- biorxiv_records：每天的原始记录（JSON），按 (day, doi, version) 去重
+
+某一天在其后 trailing_days 天以内同步的，视为可能不完整，下次抓取时重新同步；
+此后同步的视为最终版本。
+"""
+import datetime
+import json
+import logging
+from typing import Any, Dict, List, Optional
+from backend.core.config import Config
+from backend.storage.db import get_db
+
+logger = logging.getLogger(__name__)
+
+
+class BioRxivMirror:
+    """bioRxiv details 记录的按日本地镜像"""
+
+    def __init__(self, trailing_days: int = None, retention_days: int = None):
+        """
+        Args:
+            trailing_days: 尾随窗口天数（距离同步日期不超过此天数的日期下次重新同步）
+            retention_days: 镜像保留天数（更早的日期被清理，0 表示不清理）
+        """
+        self.trailing_days = trailing_days if trailing_days is not None else Config.BIORXIV_MIRROR_TRAILING_DAYS
+        self.retention_days = retention_days if retention_days is not None else Config.BIORXIV_MIRROR_RETENTION_DAYS
+
+    def days_to_sync(self, start: datetime.date, end: datetime.date, force: bool = False) -> List[datetime.date]:
+        """
+        窗口内需要从网络同步的日期：未镜像的日期，以及同步时仍在尾随窗口内的日期
+
+        Args:
+            start: 窗口起始日期（含）
+            end: 窗口结束日期（含）
+            force: 重新同步窗口内的全部日期
+        """
+        with get_db() as conn:
+            rows = conn.execute(
+                "SELECT day, synced_on FROM biorxiv_days WHERE day BETWEEN ? AND ?",
+                (start.isoformat(), end.isoformat())
+            ).fetchall()
+        synced = {row['day']: datetime.date.fromisoformat(row['synced_on']) for row in rows}
+
+        days = []
+        day = start
+        while day <= end:
+            synced_on = synced.get(day.isoformat())
+            if force or synced_on is None or synced_on <= day + datetime.timedelta(days=self.trailing_days):
+                days.append(day)
+            day += datetime.timedelta(days=1)
+        return days
+
+    def store_day(self, day: datetime.date, records: List[Dict[str, Any]], synced_on: datetime.date):
+        """
+        替换某一天的镜像记录（只应传入完整抓取的一天）
+
+        Args:
+            day: 发布日期
+            records: 该日期的全部 details 记录
+            synced_on: 同步时的参考日期（决定该日期是否仍在尾随窗口内）
+        """
+        key = day.isoformat()
+        with get_db() as conn:
+            conn.execute("DELETE FROM biorxiv_records WHERE day = ?", (key,))
+            conn.executemany("""
+                INSERT OR REPLACE INTO biorxiv_records (day, doi, version, record) VALUES (?, ?, ?, ?)
+            """, [
+                (key, r.get('doi', ''), str(r.get('version', '')), json.dumps(r, ensure_ascii=False))
+                for r in records
+            ])
+            conn.execute("""
+                INSERT INTO biorxiv_days (day, record_count, synced_on, synced_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(day) DO UPDATE SET
+                    record_count = excluded.record_count,
+                    synced_on = excluded.synced_on,
+                    synced_at = excluded.synced_at
+            """, (key, len(records), synced_on.isoformat()))
+
+    def has_day(self, day: datetime.date) -> bool:
+        """某一天是否已有镜像"""
+        with get_db() as conn:
+            row = conn.execute("SELECT 1 FROM biorxiv_days WHERE day = ?", (day.isoformat(),)).fetchone()
+        return row is not None
+
+    def day_records(self, day: datetime.date) -> List[Dict[str, Any]]:
+        """某一天镜像的全部记录"""
+        with get_db() as conn:
+            rows = conn.execute(
+                "SELECT record FROM biorxiv_records WHERE day = ? ORDER BY doi, version", (day.isoformat(),)
+            ).fetchall()
+        return [json.loads(row['record']) for row in rows]
+
+    def prune(self, today: datetime.date) -> int:
+        """清理超过保留天数的日期，返回清理的天数"""
+        if self.retention_days <= 0:
+            return 0
+        cutoff = (today - datetime.timedelta(days=self.retention_days)).isoformat()
+        with get_db() as conn:
+            conn.execute("DELETE FROM biorxiv_records WHERE day < ?", (cutoff,))
+            removed = conn.execute("DELETE FROM biorxiv_days WHERE day < ?", (cutoff,)).rowcount
+        if removed:
+            logger.info(f"[bioRxiv镜像] 清理 {removed} 天超过保留期（{self.retention_days}天）的记录")
+        return removed
+
+    def status(self) -> Dict[str, Optional[Any]]:
+        """镜像概况：天数、记录数、覆盖的日期范围"""
+        with get_db() as conn:
+            row = conn.execute("""
+                SELECT COUNT(*) AS days, COALESCE(SUM(record_count), 0) AS records,
+                       MIN(day) AS first_day, MAX(day) AS last_day
+                FROM biorxiv_days
+            """).fetchone()
+        return dict(row)
+
+    def clear(self):
+        """清空镜像"""
+        with get_db() as conn:
+            conn.execute("DELETE FROM biorxiv_records")
+            conn.execute("DELETE FROM biorxiv_days")
@@ -91,6 +91,14 @@ def init_db():
             )
         """)
         
+        # 检查并添加运行时间预算字段（目标完成时间、用尽预算的阶段）
+        for column in ('deadline_at', 'budget_exhausted'):
+            try:
+                cursor.execute(f"SELECT {column} FROM runs LIMIT 1")
+            except sqlite3.OperationalError:
+                logger.info(f"添加{column}字段到runs表")
+                cursor.execute(f"ALTER TABLE runs ADD COLUMN {column} TEXT")
+        
         # scores表：评分记录（可解释性）
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS scores (
@@ -131,6 +139,113 @@ def init_db():
             )
         """)
         
+        # payload_index表：原始响应归档索引（正文按内容寻址保存在归档目录中）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS payload_index (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                request_key TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                codec TEXT NOT NULL,
+                content_type TEXT,
+                raw_size INTEGER DEFAULT 0,
+                stored_size INTEGER DEFAULT 0,
+                window_start TEXT,
+                window_end TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (run_id, source, request_key)
+            )
+        """)
+        
+        # feed_entries表：已见 feed 条目索引（按 feed 记录 GUID/链接，跳过已处理条目）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS feed_entries (
+                feed_key TEXT NOT NULL,
+                guid TEXT NOT NULL,
+                first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (feed_key, guid)
+            )
+        """)
+        
+        # biorxiv_days / biorxiv_records表：bioRxiv 按日本地镜像（同步状态与原始 details 记录）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS biorxiv_days (
+                day TEXT PRIMARY KEY,
+                record_count INTEGER DEFAULT 0,
+                synced_on TEXT NOT NULL,
+                synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS biorxiv_records (
+                day TEXT NOT NULL,
+                doi TEXT NOT NULL,
+                version TEXT NOT NULL DEFAULT '',
+                record TEXT NOT NULL,
+                PRIMARY KEY (day, doi, version)
+            )
+        """)
+        
+        # github_repos表：GitHub 仓库元数据缓存（按 GraphQL node id，updated_at 未变时复用）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS github_repos (
+                node_id TEXT PRIMARY KEY,
+                updated_at TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # quota_buckets表：跨进程配额账本（按 API + 凭据哈希分桶的令牌桶状态）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS quota_buckets (
+                api TEXT NOT NULL,
+                credential TEXT NOT NULL,
+                capacity REAL NOT NULL,
+                refill_rate REAL NOT NULL,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                granted REAL DEFAULT 0,
+                denied INTEGER DEFAULT 0,
+                wait_seconds REAL DEFAULT 0,
+                last_pid INTEGER,
+                PRIMARY KEY (api, credential)
+            )
+        """)
+        
+        # quota_usage表：每分钟发放的令牌数（当前消耗视图）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS quota_usage (
+                api TEXT NOT NULL,
+                credential TEXT NOT NULL,
+                minute INTEGER NOT NULL,
+                granted REAL DEFAULT 0,
+                PRIMARY KEY (api, credential, minute)
+            )
+        """)
+        
+        # source_health表：数据源健康状态与熔断（跨运行持久化）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS source_health (
+                source TEXT PRIMARY KEY,
+                state TEXT NOT NULL DEFAULT 'closed',
+                consecutive_failures INTEGER DEFAULT 0,
+                open_count INTEGER DEFAULT 0,
+                total_runs INTEGER DEFAULT 0,
+                successes INTEGER DEFAULT 0,
+                failures INTEGER DEFAULT 0,
+                avg_latency REAL,
+                last_latency REAL,
+                last_error TEXT,
+                last_error_at REAL,
+                last_success_at REAL,
+                open_until REAL DEFAULT 0,
+                updated_at REAL
+            )
+        """)
+        
         # users表：用户信息
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -153,6 +268,7 @@ def init_db():
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_pushes_run_id ON pushes(run_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_pushes_status ON pushes(status)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_payload_source_window ON payload_index(source, window_start, window_end)")
         
         conn.commit()
         logger.info(f"数据库初始化完成: {db_path}")
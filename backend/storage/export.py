@@ -0,0 +1,244 @@
+"""
+分析导出：将 papers / scores / runs / pushes 增量导出为分区 Parquet 文件
+
+导出目录结构（Hive 风格分区，便于 DuckDB / Spark / pandas 直接读取）：
+
+    <output_dir>/
+        _watermarks.json
+        papers/date=2025-12-30/source=bioRxiv/part-<导出时间>-<起始id>-<结束id>.parquet
+        scores/date=.../source=.../part-...parquet
+        pushes/date=.../source=.../part-...parquet
+        runs/date=.../part-...parquet
+
+每张表按自增 id 记录水位线，每次导出只追加水位线之后的新行，
+分析查询在导出文件上离线进行，不再占用线上数据库的写入路径。
+"""
+import json
+import os
+import re
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+from backend.core.config import Config
+from backend.storage.db import get_db
+
+logger = logging.getLogger(__name__)
+
+# 尝试导入可选库
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+WATERMARK_FILE = "_watermarks.json"
+
+# 每张表的导出定义：查询语句、列类型、分区字段
+# 查询语句必须按 id 升序返回 id > ? 的行
+EXPORT_TABLES: Dict[str, Dict[str, Any]] = {
+    'papers': {
+        'query': """
+            SELECT id, item_id, title, abstract, date, source, doi, link,
+                   citation_count, influential_count, title_fingerprint, created_at
+            FROM papers
+            WHERE id > ?
+            ORDER BY id
+        """,
+        'columns': [
+            ('id', 'int64'), ('item_id', 'string'), ('title', 'string'), ('abstract', 'string'),
+            ('date', 'string'), ('source', 'string'), ('doi', 'string'), ('link', 'string'),
+            ('citation_count', 'int64'), ('influential_count', 'int64'),
+            ('title_fingerprint', 'string'), ('created_at', 'string'),
+        ],
+        'date_column': 'created_at',
+        'partition_by_source': True,
+    },
+    'scores': {
+        'query': """
+            SELECT s.id, s.run_id, s.paper_id, s.score, s.reasons_json, s.created_at, p.source
+            FROM scores s
+            LEFT JOIN papers p ON s.paper_id = p.id
+            WHERE s.id > ?
+            ORDER BY s.id
+        """,
+        'columns': [
+            ('id', 'int64'), ('run_id', 'string'), ('paper_id', 'int64'), ('score', 'float64'),
+            ('reasons_json', 'string'), ('created_at', 'string'), ('source', 'string'),
+        ],
+        'date_column': 'created_at',
+        'partition_by_source': True,
+    },
+    'pushes': {
+        'query': """
+            SELECT ps.id, ps.run_id, ps.paper_id, ps.channel, ps.status, ps.error,
+                   ps.pushed_at, ps.created_at, p.source
+            FROM pushes ps
+            LEFT JOIN papers p ON ps.paper_id = p.id
+            WHERE ps.id > ?
+            ORDER BY ps.id
+        """,
+        'columns': [
+            ('id', 'int64'), ('run_id', 'string'), ('paper_id', 'int64'), ('channel', 'string'),
+            ('status', 'string'), ('error', 'string'), ('pushed_at', 'string'),
+            ('created_at', 'string'), ('source', 'string'),
+        ],
+        'date_column': 'created_at',
+        'partition_by_source': True,
+    },
+    'runs': {
+        'query': """
+            SELECT id, run_id, window_days, start_time, end_time, total_papers,
+                   unseen_papers, top_k, status, error, deadline_at, budget_exhausted, created_at
+            FROM runs
+            WHERE id > ?
+            ORDER BY id
+        """,
+        'columns': [
+            ('id', 'int64'), ('run_id', 'string'), ('window_days', 'int64'),
+            ('start_time', 'string'), ('end_time', 'string'), ('total_papers', 'int64'),
+            ('unseen_papers', 'int64'), ('top_k', 'int64'), ('status', 'string'),
+            ('error', 'string'), ('deadline_at', 'string'), ('budget_exhausted', 'string'),
+            ('created_at', 'string'),
+        ],
+        'date_column': 'start_time',
+        'partition_by_source': False,
+    },
+}
+
+
+def _load_watermarks(output_dir: Path) -> Dict[str, int]:
+    """读取水位线（每张表已导出的最大 id）"""
+    path = output_dir / WATERMARK_FILE
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {table: int(value) for table, value in data.get('tables', {}).items()}
+    except (OSError, ValueError, TypeError) as e:
+        logger.warning(f"读取导出水位线失败，将从头导出: {e}")
+        return {}
+
+
+def _save_watermarks(output_dir: Path, watermarks: Dict[str, int]):
+    """原子写入水位线（先写临时文件再替换，避免导出中断导致水位线损坏）"""
+    path = output_dir / WATERMARK_FILE
+    tmp_path = output_dir / f"{WATERMARK_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'updated_at': datetime.now().isoformat(),
+            'tables': watermarks,
+        }, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _partition_value(value: Optional[str]) -> str:
+    """将分区值转换为安全的目录名"""
+    if not value:
+        return "unknown"
+    return re.sub(r'[^0-9A-Za-z_.\-]', '_', str(value))
+
+
+def _partition_date(value: Optional[str]) -> str:
+    """从时间戳字段提取分区日期（YYYY-MM-DD）"""
+    if value and len(value) >= 10:
+        return _partition_value(value[:10])
+    return "unknown"
+
+
+def _export_table(conn, table: str, spec: Dict[str, Any], output_dir: Path,
+                  watermark: int, batch_tag: str) -> Dict[str, Any]:
+    """导出单张表中水位线之后的新行，返回导出统计"""
+    cursor = conn.cursor()
+    cursor.execute(spec['query'], (watermark,))
+    rows = [dict(row) for row in cursor.fetchall()]
+
+    if table == 'runs':
+        # 运行记录在结束前仍会被更新：遇到第一条仍在运行的记录即停止，
+        # 避免把未完成的状态写入只追加的导出文件。进程被强制结束（SIGKILL、重启、OOM）的运行
+        # 永远停留在 running，开始时间超过 EXPORT_STALE_RUN_HOURS 的按最终状态导出，不再阻塞后续运行
+        stale_before = (datetime.now() - timedelta(hours=Config.EXPORT_STALE_RUN_HOURS)).isoformat()
+        for idx, row in enumerate(rows):
+            if row.get('status') == 'running' and (row.get('start_time') or '') > stale_before:
+                rows = rows[:idx]
+                break
+
+    if not rows:
+        return {'rows': 0, 'files': 0, 'watermark': watermark}
+
+    # 按分区分组
+    partitions: Dict[tuple, List[Dict[str, Any]]] = {}
+    for row in rows:
+        key = (_partition_date(row.get(spec['date_column'])),)
+        if spec['partition_by_source']:
+            key += (_partition_value(row.get('source')),)
+        partitions.setdefault(key, []).append(row)
+
+    schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in spec['columns']])
+    column_names = [name for name, _ in spec['columns']]
+
+    files = 0
+    for key, partition_rows in partitions.items():
+        partition_dir = output_dir / table / f"date={key[0]}"
+        if spec['partition_by_source']:
+            partition_dir = partition_dir / f"source={key[1]}"
+        partition_dir.mkdir(parents=True, exist_ok=True)
+
+        arrays = {name: [row.get(name) for row in partition_rows] for name in column_names}
+        arrow_table = pa.Table.from_pydict(arrays, schema=schema)
+
+        first_id = partition_rows[0]['id']
+        last_id = partition_rows[-1]['id']
+        file_path = partition_dir / f"part-{batch_tag}-{first_id}-{last_id}.parquet"
+        tmp_path = file_path.with_suffix('.parquet.tmp')
+        pq.write_table(arrow_table, str(tmp_path), compression='zstd')
+        os.replace(tmp_path, file_path)
+        files += 1
+
+    return {'rows': len(rows), 'files': files, 'watermark': rows[-1]['id']}
+
+
+def export_parquet(output_dir: str, tables: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    增量导出数据库表为分区 Parquet 文件
+
+    Args:
+        output_dir: 导出目录（水位线文件保存在该目录下）
+        tables: 要导出的表（默认 papers、scores、runs、pushes 全部导出）
+
+    Returns:
+        每张表的导出统计 {table: {'rows': 行数, 'files': 文件数, 'watermark': 新水位线}}
+    """
+    if not HAS_PYARROW:
+        raise RuntimeError("pyarrow 未安装，无法导出 Parquet，请执行: pip install pyarrow")
+
+    tables = tables or list(EXPORT_TABLES.keys())
+    unknown = [t for t in tables if t not in EXPORT_TABLES]
+    if unknown:
+        raise ValueError(f"不支持导出的表: {', '.join(unknown)}")
+
+    out_path = Path(output_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    watermarks = _load_watermarks(out_path)
+    batch_tag = datetime.now().strftime("%Y%m%dT%H%M%S")
+    stats = {}
+
+    with get_db() as conn:
+        for table in tables:
+            table_stats = _export_table(
+                conn, table, EXPORT_TABLES[table], out_path,
+                watermarks.get(table, 0), batch_tag
+            )
+            stats[table] = table_stats
+            watermarks[table] = table_stats['watermark']
+            logger.info(
+                f"[导出] {table}: 新增 {table_stats['rows']} 行，"
+                f"写入 {table_stats['files']} 个文件，水位线 id={table_stats['watermark']}"
+            )
+            # 每张表导出完成后立即推进水位线，中途失败时已导出的表不会重复导出
+            _save_watermarks(out_path, watermarks)
+
+    return stats
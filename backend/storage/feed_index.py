@@ -0,0 +1,64 @@
+"""
+已见 feed 条目索引：记录每个 feed 中已处理过的条目 GUID（或链接）
+
+RSS 每天返回的条目大多与前一天相同。抓取时先按索引跳过已处理的条目，
+不再对其做关键词过滤、DOI 提取、日期检查和去重；条目滚出 feed 后从索引中删除。
+"""
+import logging
+from typing import Iterable, Set
+from backend.storage.db import get_db
+
+logger = logging.getLogger(__name__)
+
+
+class FeedEntryIndex:
+    """按 feed 记录已处理条目的持久化索引"""
+
+    def seen(self, feed_key: str) -> Set[str]:
+        """某个 feed 已处理过的条目 GUID 集合"""
+        with get_db() as conn:
+            rows = conn.execute(
+                "SELECT guid FROM feed_entries WHERE feed_key = ?", (feed_key,)
+            ).fetchall()
+        return {row['guid'] for row in rows}
+
+    def update(self, feed_key: str, processed: Iterable[str], present: Iterable[str]) -> int:
+        """
+        更新某个 feed 的索引
+
+        Args:
+            feed_key: feed 标识（URL + 查询配置哈希）
+            processed: 本次处理完毕、之后可以跳过的条目
+            present: 本次 feed 中出现的全部条目（不在其中的已滚出 feed，予以删除）
+
+        Returns:
+            删除的条目数
+        """
+        present = set(present)
+        with get_db() as conn:
+            conn.executemany("""
+                INSERT INTO feed_entries (feed_key, guid) VALUES (?, ?)
+                ON CONFLICT(feed_key, guid) DO UPDATE SET last_seen = CURRENT_TIMESTAMP
+            """, [(feed_key, guid) for guid in set(processed)])
+
+            existing = {
+                row['guid'] for row in conn.execute(
+                    "SELECT guid FROM feed_entries WHERE feed_key = ?", (feed_key,)
+                ).fetchall()
+            }
+            stale = existing - present
+            conn.executemany(
+                "DELETE FROM feed_entries WHERE feed_key = ? AND guid = ?",
+                [(feed_key, guid) for guid in stale]
+            )
+        if stale:
+            logger.debug(f"[Feed索引] {feed_key[:60]} 清理 {len(stale)} 条已滚出 feed 的条目")
+        return len(stale)
+
+    def clear(self, feed_key: str = None):
+        """清空某个 feed（或全部 feed）的索引"""
+        with get_db() as conn:
+            if feed_key:
+                conn.execute("DELETE FROM feed_entries WHERE feed_key = ?", (feed_key,))
+            else:
+                conn.execute("DELETE FROM feed_entries")
@@ -0,0 +1,68 @@
+"""
+GitHub 仓库元数据缓存：按 GraphQL node id 保存仓库的名称、描述、链接和 topics
+
+GraphQL 搜索只返回各仓库的 node id 和 updatedAt；updatedAt 与缓存一致的仓库直接复用
+缓存的元数据，只有新出现或有更新的仓库才通过 nodes 查询获取完整字段。
+"""
+import json
+import logging
+from typing import Any, Dict, Iterable, List
+from backend.storage.db import get_db
+
+logger = logging.getLogger(__name__)
+
+
+class GitHubRepoCache:
+    """按 node id 持久化的仓库元数据缓存"""
+
+    def get_fresh(self, repos: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """
+        取出 updatedAt 与缓存一致的仓库元数据
+
+        Args:
+            repos: node id -> 搜索结果中的 updatedAt
+
+        Returns:
+            node id -> 元数据（只包含仍然有效的缓存）
+        """
+        if not repos:
+            return {}
+        ids = list(repos)
+        with get_db() as conn:
+            rows = conn.execute(
+                f"SELECT node_id, updated_at, metadata FROM github_repos WHERE node_id IN ({','.join('?' * len(ids))})",
+                ids
+            ).fetchall()
+        return {
+            row['node_id']: json.loads(row['metadata'])
+            for row in rows if row['updated_at'] == repos[row['node_id']]
+        }
+
+    def put_many(self, items: Iterable[Dict[str, Any]]):
+        """保存仓库元数据（按 node_id 覆盖）"""
+        rows = [(item['node_id'], item.get('updated_at', ''), json.dumps(item, ensure_ascii=False)) for item in items]
+        if not rows:
+            return
+        with get_db() as conn:
+            conn.executemany("""
+                INSERT INTO github_repos (node_id, updated_at, metadata) VALUES (?, ?, ?)
+                ON CONFLICT(node_id) DO UPDATE SET
+                    updated_at = excluded.updated_at,
+                    metadata = excluded.metadata,
+                    fetched_at = CURRENT_TIMESTAMP
+            """, rows)
+
+    def prune(self, max_age_days: int) -> int:
+        """删除超过 max_age_days 天未刷新的仓库，返回删除条数"""
+        with get_db() as conn:
+            removed = conn.execute(
+                "DELETE FROM github_repos WHERE fetched_at < datetime('now', ?)", (f"-{max_age_days} days",)
+            ).rowcount
+        if removed:
+            logger.debug(f"[GitHub缓存] 清理 {removed} 个长期未出现在搜索结果中的仓库")
+        return removed
+
+    def clear(self):
+        """清空缓存"""
+        with get_db() as conn:
+            conn.execute("DELETE FROM github_repos")
@@ -0,0 +1,219 @@
+"""
+跨进程配额账本：同一主机上所有进程共享的令牌桶限流
+
+API 服务（/api/run、/api/test-sources）、APScheduler 定时任务和 cron / run_daily.bat
+启动的命令行可能同时运行，各自进程内的 RateLimiter 互不可见，合计请求量会超过
+DeepSeek、GitHub、NCBI 的限额。账本把令牌桶状态保存在主数据库的 quota_buckets 表中，
+按 API + 凭据（仅保存哈希）分桶，每次取令牌都在 BEGIN IMMEDIATE 事务中完成，
+多个进程的读-改-写因此串行化。
+
+令牌不足时先预支（令牌数变为负数）再在事务外等待，后来的调用方看到欠账会相应
+等待更久，不会在同一时刻一起醒来。每分钟的发放量记录在 quota_usage 表中，
+供 usage()、/api/metrics/quota 和 quota 命令查看当前消耗。
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from backend.core.config import Config
+from backend.storage.db import get_db
+from backend.utils.rate_limit import RateLimited
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QuotaSpec:
+    """一个 API 的限额：period 秒内 calls 次；未提供凭据时使用 anonymous_calls"""
+    calls: float
+    period: float
+    anonymous_calls: Optional[float] = None
+
+    def limits(self, has_credential: bool) -> tuple:
+        """(桶容量, 每秒补充令牌数)"""
+        calls = self.calls if has_credential or self.anonymous_calls is None else self.anonymous_calls
+        return calls, calls / self.period
+
+
+def default_quotas() -> Dict[str, QuotaSpec]:
+    """
+    默认限额（NCBI: 有 API Key 10 次/秒，否则 3 次/秒；GitHub 搜索: Token 30 次/分钟，匿名 10 次/分钟；
+    GitHub GraphQL: 每小时 5000 点，每个请求按最低 1 点计）
+    """
+    return {
+        'deepseek': QuotaSpec(Config.DEEPSEEK_RPM, 60),
+        'github': QuotaSpec(30, 60, anonymous_calls=10),
+        'github_graphql': QuotaSpec(5000, 3600),
+        'ncbi': QuotaSpec(10, 1, anonymous_calls=3),
+    }
+
+
+class QuotaLedger:
+    """基于 SQLite 的跨进程令牌桶账本"""
+
+    # 消耗记录保留时长（秒）
+    usage_retention = 24 * 3600
+
+    def __init__(self, quotas: Optional[Dict[str, QuotaSpec]] = None, enabled: bool = None):
+        self.quotas = dict(quotas) if quotas is not None else default_quotas()
+        self.enabled = Config.ENABLE_QUOTA_LEDGER if enabled is None else enabled
+        self._last_prune = 0.0
+
+    @staticmethod
+    def _credential_id(credential: Optional[str]) -> str:
+        """凭据只保存哈希前缀，账本和接口中不出现明文"""
+        if not credential:
+            return 'anonymous'
+        return hashlib.sha256(credential.encode()).hexdigest()[:12]
+
+    def _reserve(self, api: str, credential: Optional[str], cost: float, max_wait: Optional[float]) -> float:
+        """在事务中取令牌（不足时预支），返回需要等待的秒数"""
+        spec = self.quotas.get(api)
+        if spec is None:
+            raise KeyError(f"未配置限额的 API: {api}")
+        capacity, refill_rate = spec.limits(bool(credential))
+        credential_id = self._credential_id(credential)
+        now = time.time()
+
+        with get_db() as conn:
+            # 立即获取写锁：其他进程的取令牌事务在此排队（busy_timeout 内）
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("""
+                SELECT tokens, updated_at FROM quota_buckets WHERE api = ? AND credential = ?
+            """, (api, credential_id)).fetchone()
+
+            if row is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, row['tokens'] + (now - row['updated_at']) * refill_rate)
+
+            wait = max(cost - tokens, 0.0) / refill_rate
+            denied = max_wait is not None and wait > max_wait
+            if denied:
+                # 不预支令牌，只记录拒绝次数（异常在事务提交后抛出）
+                conn.execute("""
+                    UPDATE quota_buckets SET denied = denied + 1 WHERE api = ? AND credential = ?
+                """, (api, credential_id))
+            else:
+                self._grant(conn, api, credential_id, capacity, refill_rate, tokens - cost, now, cost, wait)
+
+        if denied:
+            raise RateLimited(f"{api}#{credential_id}", wait)
+        if wait > 0:
+            logger.debug(f"[配额] {api} 令牌不足，等待 {wait:.2f} 秒")
+        return wait
+
+    def _grant(self, conn, api: str, credential_id: str, capacity: float, refill_rate: float,
+               tokens: float, now: float, cost: float, wait: float):
+        """记录一次发放：更新桶状态和每分钟消耗"""
+        conn.execute("""
+            INSERT INTO quota_buckets
+            (api, credential, capacity, refill_rate, tokens, updated_at, granted, wait_seconds, last_pid)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(api, credential) DO UPDATE SET
+                capacity = excluded.capacity,
+                refill_rate = excluded.refill_rate,
+                tokens = excluded.tokens,
+                updated_at = excluded.updated_at,
+                granted = granted + excluded.granted,
+                wait_seconds = wait_seconds + excluded.wait_seconds,
+                last_pid = excluded.last_pid
+        """, (api, credential_id, capacity, refill_rate, tokens, now, cost, wait, os.getpid()))
+
+        minute = int(now // 60) * 60
+        conn.execute("""
+            INSERT INTO quota_usage (api, credential, minute, granted) VALUES (?, ?, ?, ?)
+            ON CONFLICT(api, credential, minute) DO UPDATE SET granted = granted + excluded.granted
+        """, (api, credential_id, minute, cost))
+
+        if now - self._last_prune > 3600:
+            conn.execute("DELETE FROM quota_usage WHERE minute < ?", (now - self.usage_retention,))
+            self._last_prune = now
+
+    def _try_reserve(self, api: str, credential: Optional[str], cost: float, max_wait: Optional[float]) -> float:
+        if not self.enabled:
+            return 0.0
+        try:
+            return self._reserve(api, credential, cost, max_wait)
+        except sqlite3.Error as e:
+            # 账本不可用时不阻塞业务请求，退化为仅进程内限流
+            logger.warning(f"[配额] 账本不可用，跳过 {api} 的跨进程限流: {e}")
+            return 0.0
+
+    def acquire(self, api: str, credential: Optional[str] = None, cost: float = 1,
+                max_wait: Optional[float] = None) -> float:
+        """
+        取令牌，不足时阻塞等待
+
+        Args:
+            api: API 名称（deepseek / github / ncbi）
+            credential: 请求使用的 API Key / Token
+            cost: 消耗的令牌数
+            max_wait: 需要等待超过此秒数时抛出 RateLimited（不预支令牌）
+
+        Returns:
+            等待的秒数
+        """
+        wait = self._try_reserve(api, credential, cost, max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, api: str, credential: Optional[str] = None, cost: float = 1,
+                       max_wait: Optional[float] = None) -> float:
+        """异步取令牌（账本事务在线程中执行）"""
+        wait = await asyncio.to_thread(self._try_reserve, api, credential, cost, max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def usage(self, window_minutes: int = 60) -> List[Dict[str, Any]]:
+        """
+        当前消耗视图：每个桶的剩余令牌、累计发放/拒绝次数、累计等待时长和最近一段时间的发放量
+        """
+        now = time.time()
+        since = now - window_minutes * 60
+        with get_db() as conn:
+            buckets = conn.execute("""
+                SELECT b.api, b.credential, b.capacity, b.refill_rate, b.tokens, b.updated_at,
+                       b.granted, b.denied, b.wait_seconds, b.last_pid,
+                       COALESCE((SELECT SUM(u.granted) FROM quota_usage u
+                                 WHERE u.api = b.api AND u.credential = b.credential
+                                 AND u.minute >= ?), 0) AS recent_granted
+                FROM quota_buckets b
+                ORDER BY b.api, b.credential
+            """, (since,)).fetchall()
+
+        result = []
+        for row in buckets:
+            item = dict(row)
+            item['tokens'] = round(min(item['capacity'], item['tokens'] + (now - item['updated_at']) * item['refill_rate']), 2)
+            item['wait_seconds'] = round(item['wait_seconds'], 2)
+            item['window_minutes'] = window_minutes
+            result.append(item)
+        return result
+
+    def reset(self, api: str = None):
+        """清空某个 API（或全部）的桶状态和消耗记录"""
+        with get_db() as conn:
+            for table in ('quota_buckets', 'quota_usage'):
+                if api:
+                    conn.execute(f"DELETE FROM {table} WHERE api = ?", (api,))
+                else:
+                    conn.execute(f"DELETE FROM {table}")
+
+
+# 全局账本实例
+_global_ledger: Optional[QuotaLedger] = None
+
+
+def get_quota_ledger() -> QuotaLedger:
+    """获取或创建全局配额账本"""
+    global _global_ledger
+    if _global_ledger is None:
+        _global_ledger = QuotaLedger()
+    return _global_ledger
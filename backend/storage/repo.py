@@ -82,9 +82,11 @@ class PaperRepository:
         unseen_papers: int = None,
         top_k: int = None,
         status: str = None,
-        error: str = None
+        error: str = None,
+        deadline_at: str = None,
+        budget_exhausted: str = None
     ):
-        """更新运行记录"""
+        """更新运行记录（budget_exhausted：用尽时间预算的阶段及截断说明）"""
         updates = []
         params = []
         
@@ -103,6 +105,12 @@ class PaperRepository:
         if error:
             updates.append("error = ?")
             params.append(error)
+        if deadline_at:
+            updates.append("deadline_at = ?")
+            params.append(deadline_at)
+        if budget_exhausted:
+            updates.append("budget_exhausted = ?")
+            params.append(budget_exhausted)
         
         if status == 'completed' or status == 'failed':
             updates.append("end_time = ?")
@@ -0,0 +1,190 @@
+"""
+数据源健康状态与熔断
+
+按数据源持久化每次抓取的结果（成功率、延迟、最近错误），并据此实现熔断：
+- closed：正常抓取
+- open：连续失败达到阈值后熔断，冷却期内直接跳过该数据源（返回降级的空结果）
+- half_open：冷却期结束后放行一次探测，探测时数据源缩短重试；成功则恢复，失败则
+  以加倍的冷却期重新熔断
+
+状态保存在主数据库 source_health 表中，跨运行、跨进程共享，失效的数据源
+（如已停用的 ScienceNews feed、限流的 Semantic Scholar）不再在每次运行中耗费完整的
+重试和退避时间。
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from backend.core.config import Config
+from backend.storage.db import get_db
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# 延迟的指数滑动平均系数
+LATENCY_EWMA_ALPHA = 0.3
+
+
+@dataclass
+class CircuitDecision:
+    """抓取前的熔断判定"""
+    state: str
+    allowed: bool
+    probe: bool = False
+    reason: Optional[str] = None
+
+
+class SourceHealthRegistry:
+    """持久化的数据源健康状态登记表（含熔断判定）"""
+
+    def __init__(self, failure_threshold: int = None, cooldown: float = None, max_cooldown: float = None):
+        """
+        Args:
+            failure_threshold: 连续失败多少次后熔断
+            cooldown: 首次熔断的冷却时间（秒），之后每次重新熔断加倍
+            max_cooldown: 冷却时间上限（秒）
+        """
+        self.failure_threshold = failure_threshold or Config.CIRCUIT_FAILURE_THRESHOLD
+        self.cooldown = cooldown if cooldown is not None else Config.CIRCUIT_COOLDOWN_HOURS * 3600
+        self.max_cooldown = max_cooldown if max_cooldown is not None else Config.CIRCUIT_MAX_COOLDOWN_HOURS * 3600
+
+    def _load(self, conn, source: str) -> Optional[Dict[str, Any]]:
+        row = conn.execute("SELECT * FROM source_health WHERE source = ?", (source,)).fetchone()
+        return dict(row) if row else None
+
+    def before_fetch(self, source: str) -> CircuitDecision:
+        """
+        抓取前判定：closed 放行；open 且在冷却期内跳过；冷却期结束转为 half_open 放行一次探测
+        """
+        now = time.time()
+        with get_db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            health = self._load(conn, source)
+            if health is None or health['state'] == CLOSED:
+                return CircuitDecision(CLOSED, True)
+
+            if health['state'] == OPEN and now < health['open_until']:
+                remaining = (health['open_until'] - now) / 3600
+                return CircuitDecision(
+                    OPEN, False,
+                    reason=f"熔断中（连续失败 {health['consecutive_failures']} 次，{remaining:.1f} 小时后重试）: "
+                           f"{health['last_error'] or '未知错误'}"
+                )
+
+            if health['state'] == HALF_OPEN and now < health['open_until']:
+                # 其他进程正在探测
+                return CircuitDecision(HALF_OPEN, False, reason="熔断探测进行中")
+
+            # 冷却期结束：本次作为探测，探测期间其他进程跳过（探测超时后可再次探测）
+            conn.execute("""
+                UPDATE source_health SET state = ?, open_until = ?, updated_at = ? WHERE source = ?
+            """, (HALF_OPEN, now + Config.CIRCUIT_PROBE_TIMEOUT, now, source))
+        logger.info(f"[熔断] {source} 冷却期结束，本次运行进行探测（缩短重试）")
+        return CircuitDecision(HALF_OPEN, True, probe=True)
+
+    def record(self, source: str, success: bool, latency: Optional[float] = None, error: Optional[str] = None):
+        """
+        记录一次抓取结果并更新熔断状态
+
+        Args:
+            source: 数据源名称
+            success: 是否成功
+            latency: 耗时（秒）
+            error: 失败原因
+        """
+        now = time.time()
+        with get_db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            health = self._load(conn, source) or {
+                'state': CLOSED, 'consecutive_failures': 0, 'open_count': 0,
+                'avg_latency': None, 'last_error': None, 'last_error_at': None,
+                'last_success_at': None, 'open_until': 0.0,
+            }
+
+            if latency is not None:
+                avg = health['avg_latency']
+                health['avg_latency'] = latency if avg is None else avg + LATENCY_EWMA_ALPHA * (latency - avg)
+
+            if success:
+                if health['state'] != CLOSED:
+                    logger.info(f"[熔断] {source} 恢复正常")
+                health.update(state=CLOSED, consecutive_failures=0, open_count=0,
+                              last_success_at=now, open_until=0.0)
+            else:
+                health['consecutive_failures'] += 1
+                health.update(last_error=(error or '未知错误')[:500], last_error_at=now)
+                if health['state'] == HALF_OPEN or health['consecutive_failures'] >= self.failure_threshold:
+                    health['open_count'] += 1
+                    cooldown = min(self.cooldown * 2 ** (health['open_count'] - 1), self.max_cooldown)
+                    health.update(state=OPEN, open_until=now + cooldown)
+                    logger.warning(
+                        f"[熔断] {source} 连续失败 {health['consecutive_failures']} 次，"
+                        f"熔断 {cooldown / 3600:.1f} 小时: {health['last_error']}"
+                    )
+
+            conn.execute("""
+                INSERT INTO source_health
+                (source, state, consecutive_failures, open_count, total_runs, successes, failures,
+                 avg_latency, last_latency, last_error, last_error_at, last_success_at, open_until, updated_at)
+                VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(source) DO UPDATE SET
+                    state = excluded.state,
+                    consecutive_failures = excluded.consecutive_failures,
+                    open_count = excluded.open_count,
+                    total_runs = total_runs + 1,
+                    successes = successes + excluded.successes,
+                    failures = failures + excluded.failures,
+                    avg_latency = excluded.avg_latency,
+                    last_latency = COALESCE(excluded.last_latency, last_latency),
+                    last_error = excluded.last_error,
+                    last_error_at = excluded.last_error_at,
+                    last_success_at = excluded.last_success_at,
+                    open_until = excluded.open_until,
+                    updated_at = excluded.updated_at
+            """, (
+                source, health['state'], health['consecutive_failures'], health['open_count'],
+                int(success), int(not success), health['avg_latency'], latency,
+                health['last_error'], health['last_error_at'], health['last_success_at'],
+                health['open_until'], now
+            ))
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """所有数据源的健康状态（成功率、平均延迟、最近错误、熔断剩余时间）"""
+        now = time.time()
+        with get_db() as conn:
+            rows = conn.execute("SELECT * FROM source_health ORDER BY source").fetchall()
+
+        result = []
+        for row in rows:
+            item = dict(row)
+            item['success_rate'] = round(item['successes'] / item['total_runs'], 4) if item['total_runs'] else None
+            item['open_for'] = round(max(item['open_until'] - now, 0.0)) if item['state'] != CLOSED else 0
+            for key in ('avg_latency', 'last_latency'):
+                if item[key] is not None:
+                    item[key] = round(item[key], 3)
+            result.append(item)
+        return result
+
+    def reset(self, source: str = None):
+        """手动恢复某个数据源（或全部数据源）的熔断状态，保留统计"""
+        with get_db() as conn:
+            sql = "UPDATE source_health SET state = ?, consecutive_failures = 0, open_count = 0, open_until = 0"
+            if source:
+                conn.execute(sql + " WHERE source = ?", (CLOSED, source))
+            else:
+                conn.execute(sql, (CLOSED,))
+
+
+# 全局登记表实例
+_global_registry: Optional[SourceHealthRegistry] = None
+
+
+def get_source_health() -> SourceHealthRegistry:
+    """获取或创建全局数据源健康登记表"""
+    global _global_registry
+    if _global_registry is None:
+        _global_registry = SourceHealthRegistry()
+    return _global_registry
@@ -1,20 +1,50 @@
 """Utility modules"""
-from .http import HTTPClient, get_http_client, close_http_client
-from .retry import retry_with_backoff, retry_on_rate_limit
-from .cache import FileCache, get_file_cache, cached, memory_cache
-from .rate_limit import RateLimiter, rate_limit
+from .http import HTTPClient, HTTPMetrics, get_http_client, get_http_metrics, close_http_client
+from .async_http import AsyncHTTPClient, HAS_HTTPX
+from .retry import (
+    retry_with_backoff, retry_on_rate_limit, RetryPolicy, RetryBudget, RetryableHTTPError,
+    classify, check_retryable, get_retry_budget, get_retry_metrics
+)
+from .cache import (
+    FileCache, SQLiteCache, TieredCache,
+    get_file_cache, get_cache, get_tiered_cache, cached, memory_cache
+)
+from .rate_limit import RateLimiter, rate_limit, AdaptiveRateLimiter, RateLimited, get_adaptive_limiter
+from .conditional import ValidatorStore, conditional_get, aconditional_get, get_validator_store
 
 __all__ = [
     'HTTPClient',
+    'HTTPMetrics',
     'get_http_client',
+    'get_http_metrics',
+    'AsyncHTTPClient',
+    'HAS_HTTPX',
     'close_http_client',
     'retry_with_backoff',
     'retry_on_rate_limit',
+    'RetryPolicy',
+    'RetryBudget',
+    'RetryableHTTPError',
+    'classify',
+    'check_retryable',
+    'get_retry_budget',
+    'get_retry_metrics',
     'FileCache',
+    'SQLiteCache',
+    'TieredCache',
     'get_file_cache',
+    'get_cache',
+    'get_tiered_cache',
     'cached',
     'memory_cache',
     'RateLimiter',
     'rate_limit',
+    'AdaptiveRateLimiter',
+    'RateLimited',
+    'get_adaptive_limiter',
+    'ValidatorStore',
+    'conditional_get',
+    'aconditional_get',
+    'get_validator_store',
 ]
 
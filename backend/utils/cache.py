@@ -2,19 +2,31 @@
 Caching utilities for reducing redundant API calls and computations
 """
 import pickle
+import sqlite3
+import threading
 import time
 import logging
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 from functools import lru_cache, wraps
-from typing import Any, Callable, Optional, Dict
+from typing import Any, Callable, Optional, Dict, Iterable, List
 import hashlib
 import json
 
 logger = logging.getLogger(__name__)
 
+# Sentinel distinguishing a miss from a cached None
+_MISSING = object()
+
 
 class FileCache:
-    """File-based cache for storing data between runs"""
+    """
+    File-based cache for storing data between runs
+
+    Deprecated: writes one pickle file per key and never bounds disk usage.
+    Use SQLiteCache (the default store of the `cached` decorator) instead.
+    """
     
     def __init__(self, cache_dir: str = "data/cache", default_ttl: int = 86400):
         """
@@ -105,8 +117,474 @@ class FileCache:
         logger.info("Cleared all cache entries")
 
 
-# Global file cache instance
+class SQLiteCache:
+    """
+    Single-file cache store backed by SQLite
+
+    Entries live in one database file with an index on expiry and last access,
+    so expired entries are purged in bulk and the store is kept under
+    ``max_bytes`` by evicting the least recently used entries. Every write runs
+    in its own transaction, which makes it safe to share the file between
+    threads and processes.
+    """
+
+    # After eviction the store is trimmed to this fraction of max_bytes,
+    # so a full cache does not evict on every single write
+    EVICTION_LOW_WATER = 0.9
+
+    def __init__(
+        self,
+        db_path: str = "data/cache/cache.db",
+        default_ttl: int = 86400,
+        max_bytes: int = 256 * 1024 * 1024
+    ):
+        """
+        Initialize SQLite cache
+
+        Args:
+            db_path: Path of the cache database file
+            default_ttl: Default time-to-live in seconds (default: 24 hours)
+            max_bytes: Upper bound of the total size of stored values (0 = unbounded)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._lock = threading.RLock()
+        # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                last_access REAL NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries(expires_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_access ON cache_entries(last_access)")
+
+    @contextmanager
+    def _transaction(self):
+        """Run a write transaction under the instance lock"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _expires_at(ttl: Optional[int], now: float) -> Optional[float]:
+        return now + ttl if ttl and ttl > 0 else None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Get value from cache
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+
+        Returns:
+            Cached value, or default if not found or expired
+        """
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get several values in one query
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Mapping of key -> value for the keys that were found and not expired
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+
+        now = time.time()
+        results: Dict[str, Any] = {}
+        broken = []
+        with self._transaction() as conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(f"""
+                    SELECT key, value FROM cache_entries
+                    WHERE key IN ({placeholders})
+                      AND (expires_at IS NULL OR expires_at > ?)
+                """, (*chunk, now)).fetchall()
+                for key, blob in rows:
+                    try:
+                        results[key] = pickle.loads(blob)
+                    except Exception as e:
+                        logger.warning(f"Failed to read cache for key {key}: {e}")
+                        broken.append(key)
+
+            hits = list(results)
+            if hits:
+                # Touch entries for LRU eviction
+                conn.executemany(
+                    "UPDATE cache_entries SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in hits]
+                )
+            if broken:
+                conn.executemany("DELETE FROM cache_entries WHERE key = ?", [(key,) for key in broken])
+
+        logger.debug(f"Cache lookup: {len(results)}/{len(keys)} hits")
+        return results
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """
+        Set value in cache
+
+        Args:
+            key: Cache key
+            value: Value to cache (must be picklable)
+            ttl: Time-to-live in seconds (None = use default, 0 = never expires)
+        """
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None):
+        """
+        Set several values in one transaction
+
+        Args:
+            items: Mapping of key -> value
+            ttl: Time-to-live in seconds (None = use default, 0 = never expires)
+        """
+        if not items:
+            return
+
+        ttl = ttl if ttl is not None else self.default_ttl
+        now = time.time()
+        expires_at = self._expires_at(ttl, now)
+
+        rows = []
+        for key, value in items.items():
+            try:
+                blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                logger.warning(f"Failed to write cache for key {key}: {e}")
+                continue
+            rows.append((key, sqlite3.Binary(blob), len(blob), expires_at, now, now))
+
+        if not rows:
+            return
+
+        try:
+            with self._transaction() as conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO cache_entries
+                    (key, value, size, expires_at, last_access, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, rows)
+                self._evict(conn, now)
+            logger.debug(f"Cached {len(rows)} value(s) (TTL: {ttl}s)")
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to write cache entries: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> int:
+        """Purge expired entries and evict LRU entries above max_bytes"""
+        removed = conn.execute(
+            "DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        ).rowcount
+        self.evictions += removed
+
+        if not self.max_bytes:
+            return removed
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return removed
+
+        to_free = total - int(self.max_bytes * self.EVICTION_LOW_WATER)
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM cache_entries ORDER BY last_access"):
+            victims.append((key,))
+            to_free -= size
+            if to_free <= 0:
+                break
+        conn.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+        self.evictions += len(victims)
+        logger.debug(f"Evicted {len(victims)} least recently used cache entries")
+        return removed + len(victims)
+
+    def delete(self, key: str):
+        """Delete a cache entry"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        logger.debug(f"Deleted cache for key: {key}")
+
+    def purge_expired(self) -> int:
+        """Remove expired entries (and LRU entries above max_bytes), returns the number removed"""
+        with self._transaction() as conn:
+            return self._evict(conn, time.time())
+
+    def clear(self):
+        """Clear all cache entries"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cache_entries")
+        logger.info("Cleared all cache entries")
+
+    def total_bytes(self) -> int:
+        """Total size of stored values in bytes"""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class _Negative:
+    """Marker wrapping a cached negative result (e.g. None or an empty response)"""
+
+    def __init__(self, value: Any = None):
+        self.value = value
+
+
+class TieredCache:
+    """
+    Two-tier cache: in-process LRU in front of a persistent store
+
+    Reads check the memory tier first and promote store hits into it.
+    get_or_compute() adds per-key single-flight locking, so concurrent misses
+    on the same key (e.g. an API-triggered test run and the scheduled run)
+    compute the value once and share it. Negative results are cached with a
+    separate, usually shorter TTL.
+    """
+
+    def __init__(
+        self,
+        store: Optional[Any] = None,
+        memory_size: int = 1024,
+        memory_ttl: int = 300,
+        negative_ttl: int = 300
+    ):
+        """
+        Initialize tiered cache
+
+        Args:
+            store: Persistent store with get_many/set_many/delete/clear (default: global SQLite store)
+            memory_size: Maximum number of entries in the memory tier
+            memory_ttl: Upper bound of the time an entry stays in the memory tier
+            negative_ttl: Default time-to-live of negative results
+        """
+        self.store = store if store is not None else get_cache()
+        self.memory_size = memory_size
+        self.memory_ttl = memory_ttl
+        self.negative_ttl = negative_ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> [lock, number of waiters]
+        self._key_locks: Dict[str, list] = {}
+        self._counters = {
+            'memory_hits': 0,
+            'store_hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'computes': 0,
+            'coalesced': 0,
+            'memory_evictions': 0,
+        }
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    # ---- memory tier ----
+
+    def _memory_get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._memory[key]
+                self._counters['memory_evictions'] += 1
+                return _MISSING
+            self._memory.move_to_end(key)
+            return value
+
+    def _memory_set(self, key: str, value: Any, ttl: Optional[int]):
+        memory_ttl = min(ttl, self.memory_ttl) if ttl and ttl > 0 else self.memory_ttl
+        with self._lock:
+            self._memory[key] = (value, time.time() + memory_ttl)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+                self._counters['memory_evictions'] += 1
+
+    # ---- lookups ----
+
+    def _lookup_many(self, keys: List[str], count: bool = True) -> Dict[str, Any]:
+        """Raw lookup across both tiers (negative entries are returned wrapped)"""
+        found: Dict[str, Any] = {}
+        remaining = []
+        for key in keys:
+            value = self._memory_get(key)
+            if value is _MISSING:
+                remaining.append(key)
+            else:
+                found[key] = value
+        memory_hits = len(found)
+
+        store_hits = 0
+        if remaining:
+            from_store = self.store.get_many(remaining)
+            for key, value in from_store.items():
+                self._memory_set(key, value, None)
+            found.update(from_store)
+            store_hits = len(from_store)
+
+        if count:
+            negatives = sum(1 for value in found.values() if isinstance(value, _Negative))
+            with self._lock:
+                self._counters['memory_hits'] += memory_hits
+                self._counters['store_hits'] += store_hits
+                self._counters['misses'] += len(remaining) - store_hits
+                self._counters['negative_hits'] += negatives
+        return found
+
+    @staticmethod
+    def _unwrap(value: Any) -> Any:
+        return value.value if isinstance(value, _Negative) else value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get value from the memory tier, falling back to the persistent store"""
+        found = self._lookup_many([key])
+        return self._unwrap(found[key]) if key in found else default
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values; store lookups for memory misses are batched"""
+        keys = list(dict.fromkeys(keys))
+        return {key: self._unwrap(value) for key, value in self._lookup_many(keys).items()}
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """Set value in both tiers"""
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[str, Any], ttl: Optional[int] = None):
+        """Set several values in both tiers (one store transaction)"""
+        for key, value in items.items():
+            self._memory_set(key, value, ttl)
+        self.store.set_many(items, ttl)
+
+    def set_negative(self, key: str, value: Any = None, ttl: Optional[int] = None):
+        """Cache a negative result (returned by get() as value) with the negative TTL"""
+        self.set(key, _Negative(value), ttl if ttl is not None else self.negative_ttl)
+
+    def delete(self, key: str):
+        """Delete a cache entry from both tiers"""
+        with self._lock:
+            self._memory.pop(key, None)
+        self.store.delete(key)
+
+    def clear(self):
+        """Clear both tiers"""
+        with self._lock:
+            self._memory.clear()
+        self.store.clear()
+
+    # ---- single-flight ----
+
+    @contextmanager
+    def _key_lock(self, key: str):
+        """Per-key lock, shared by all threads waiting on the same key"""
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._key_locks.pop(key, None)
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[int] = None,
+        negative_ttl: Optional[int] = None,
+        is_negative: Optional[Callable[[Any], bool]] = None,
+        cache_negative: bool = True
+    ) -> Any:
+        """
+        Get a value, computing and caching it on a miss
+
+        Concurrent callers missing on the same key wait for the first one
+        instead of computing the value again.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument function producing the value
+            ttl: Time-to-live of positive results (None = store default)
+            negative_ttl: Time-to-live of negative results (None = instance default)
+            is_negative: Predicate marking a result as negative (default: result is None)
+            cache_negative: If False, negative results are returned but not cached
+
+        Returns:
+            Cached or freshly computed value
+        """
+        found = self._lookup_many([key])
+        if key in found:
+            return self._unwrap(found[key])
+
+        with self._key_lock(key):
+            # Another caller may have filled the key while we were waiting
+            found = self._lookup_many([key], count=False)
+            if key in found:
+                self._count('coalesced')
+                return self._unwrap(found[key])
+
+            self._count('computes')
+            result = compute()
+            negative = is_negative(result) if is_negative else result is None
+            if negative:
+                if cache_negative:
+                    self.set_negative(key, result, negative_ttl)
+            else:
+                self.set(key, result, ttl)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters of both tiers"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['memory_entries'] = len(self._memory)
+            stats['inflight_keys'] = len(self._key_locks)
+        lookups = stats['memory_hits'] + stats['store_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['memory_hits'] + stats['store_hits']) / lookups, 4) if lookups else 0.0
+        stats['store_evictions'] = getattr(self.store, 'evictions', 0)
+        return stats
+
+
+# Global cache instances
 _global_cache: Optional[FileCache] = None
+_global_store: Optional[SQLiteCache] = None
+_global_tiered: Optional[TieredCache] = None
 
 
 def get_file_cache() -> FileCache:
@@ -117,13 +595,37 @@ def get_file_cache() -> FileCache:
     return _global_cache
 
 
-def cached(ttl: int = 86400, cache_key_func: Optional[Callable] = None):
+def get_cache() -> SQLiteCache:
+    """Get or create the global SQLite cache store"""
+    global _global_store
+    if _global_store is None:
+        _global_store = SQLiteCache()
+    return _global_store
+
+
+def get_tiered_cache() -> TieredCache:
+    """Get or create the global two-tier cache (memory LRU over the global SQLite store)"""
+    global _global_tiered
+    if _global_tiered is None:
+        _global_tiered = TieredCache(get_cache())
+    return _global_tiered
+
+
+def cached(
+    ttl: int = 86400,
+    cache_key_func: Optional[Callable] = None,
+    cache: Optional[Any] = None,
+    negative_ttl: Optional[int] = None
+):
     """
-    Decorator for caching function results to file
+    Decorator for caching function results
     
     Args:
         ttl: Time-to-live in seconds
         cache_key_func: Optional function to generate cache key from args/kwargs
+        cache: Cache with get/set (default: the global two-tier cache)
+        negative_ttl: Cache None results for this many seconds (TieredCache only;
+            None = do not cache None results)
     
     Example:
         @cached(ttl=3600)
@@ -144,16 +646,26 @@ def cached(ttl: int = 86400, cache_key_func: Optional[Callable] = None):
                 key_parts.extend(f"{k}={v}" for k, v in sorted(kwargs.items()))
                 cache_key = ":".join(key_parts)
             
+            store = cache if cache is not None else get_tiered_cache()
+            if isinstance(store, TieredCache):
+                # Single-flight: concurrent misses on the same key compute once
+                return store.get_or_compute(
+                    cache_key,
+                    lambda: func(*args, **kwargs),
+                    ttl=ttl,
+                    negative_ttl=negative_ttl,
+                    cache_negative=bool(negative_ttl)
+                )
+
             # Try to get from cache
-            cache = get_file_cache()
-            cached_value = cache.get(cache_key)
+            cached_value = store.get(cache_key)
             
             if cached_value is not None:
                 return cached_value
             
             # Compute and cache
             result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl)
+            store.set(cache_key, result, ttl)
             
             return result
         
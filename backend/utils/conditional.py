@@ -0,0 +1,215 @@
+"""
+Conditional GET (ETag / Last-Modified) support
+
+Validators are persisted per URL in the shared cache store, optionally with
+the body. Requests carry If-None-Match / If-Modified-Since, and a 304 saves
+the download: with keep_body the stored copy is returned, so feeds re-filter
+the same entries against the current window and APIs such as GitHub search
+reuse their last result (conditional requests do not count against the rate
+limit there).
+
+The header helpers are transport-independent so the same store can back
+both requests-based and async clients.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ConditionalResponse:
+    """Result of a conditional GET"""
+    url: str
+    status_code: int
+    not_modified: bool
+    body: Optional[bytes]
+    response: Optional[Any] = None  # requests.Response or httpx.Response
+
+
+class ValidatorStore:
+    """Persisted ETag / Last-Modified validators (and optionally bodies) per URL"""
+
+    def __init__(self, store: Optional[Any] = None, namespace: str = "http_validators"):
+        """
+        Initialize validator store
+
+        Args:
+            store: Cache store with get/set/delete (default: the global SQLite cache store)
+            namespace: Key prefix inside the store
+        """
+        if store is None:
+            from backend.utils.cache import get_cache
+            store = get_cache()
+        self.store = store
+        self.namespace = namespace
+
+    def _key(self, url: str) -> str:
+        return f"{self.namespace}:{url}"
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        """Stored entry {'etag', 'last_modified', 'body'} for a URL, if any"""
+        try:
+            return self.store.get(self._key(url))
+        except Exception as e:
+            logger.warning(f"Failed to load validators for {url}: {e}")
+            return None
+
+    def request_headers(self, url: str, require_body: bool = False) -> Dict[str, str]:
+        """
+        Conditional request headers for a URL
+
+        Args:
+            url: Request URL
+            require_body: Only send validators if a stored body is available to reuse on 304
+        """
+        entry = self.load(url)
+        if not entry or (require_body and entry.get('body') is None):
+            return {}
+        return build_conditional_headers(entry)
+
+    def save(self, url: str, response_headers: Mapping[str, str], body: Optional[bytes] = None):
+        """Record validators from a 200 response (no-op if the response has none)"""
+        entry = extract_validators(response_headers)
+        if not entry:
+            return
+        entry['body'] = body
+        try:
+            # ttl=0: validators never expire, the store's LRU bound still applies
+            self.store.set(self._key(url), entry, ttl=0)
+        except Exception as e:
+            logger.warning(f"Failed to save validators for {url}: {e}")
+
+    def forget(self, url: str):
+        """Drop stored validators for a URL"""
+        self.store.delete(self._key(url))
+
+
+def build_conditional_headers(entry: Mapping[str, Any]) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since headers from a stored validator entry"""
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def extract_validators(response_headers: Mapping[str, str]) -> Dict[str, Any]:
+    """ETag / Last-Modified from response headers (case-insensitive mapping expected)"""
+    validators = {}
+    etag = response_headers.get('ETag')
+    last_modified = response_headers.get('Last-Modified')
+    if etag:
+        validators['etag'] = etag
+    if last_modified:
+        validators['last_modified'] = last_modified
+    return validators
+
+
+# Global validator store
+_global_store: Optional[ValidatorStore] = None
+
+
+def get_validator_store() -> ValidatorStore:
+    """Get or create the global validator store"""
+    global _global_store
+    if _global_store is None:
+        _global_store = ValidatorStore()
+    return _global_store
+
+
+def conditional_get(
+    url: str,
+    session: Optional[Any] = None,
+    store: Optional[ValidatorStore] = None,
+    keep_body: bool = False,
+    send_validators: bool = True,
+    save_validators: bool = True,
+    **kwargs
+) -> ConditionalResponse:
+    """
+    GET with persisted ETag / Last-Modified validators
+
+    Status codes other than 304 are returned as-is (no raise_for_status), so
+    callers keep their own error handling (e.g. GitHub rate-limit 403s).
+
+    Args:
+        url: Request URL
+        session: requests.Session or HTTPClient (default: the shared HTTP client)
+        store: Validator store (default: global store)
+        keep_body: Store the body with the validators and return it on 304
+        send_validators: Send stored validators (False forces a full download)
+        save_validators: Record validators from a 200 response
+        **kwargs: Passed to session.get (headers, timeout, proxies, ...)
+
+    Returns:
+        ConditionalResponse; on 304 body is the stored copy (keep_body) or None
+    """
+    store = store or get_validator_store()
+    if session is None:
+        from backend.utils.http import get_http_client
+        session = get_http_client()
+    headers = dict(kwargs.pop('headers', None) or {})
+    if send_validators:
+        headers.update(store.request_headers(url, require_body=keep_body))
+
+    response = session.get(url, headers=headers, **kwargs)
+
+    if response.status_code == 304:
+        body = None
+        if keep_body:
+            entry = store.load(url) or {}
+            body = entry.get('body')
+            if body is None:
+                # Stored copy was evicted between lookup and response: fetch unconditionally
+                logger.debug(f"Stored body missing for {url}, refetching")
+                return conditional_get(url, session, store, keep_body, False, save_validators,
+                                       headers={k: v for k, v in headers.items()
+                                                if k not in ('If-None-Match', 'If-Modified-Since')},
+                                       **kwargs)
+        logger.debug(f"Not modified: {url}")
+        return ConditionalResponse(url, 304, True, body, response)
+
+    if response.status_code == 200 and save_validators:
+        store.save(url, response.headers, response.content if keep_body else None)
+
+    return ConditionalResponse(url, response.status_code, False, response.content, response)
+
+
+async def aconditional_get(
+    client: Any,
+    url: str,
+    store: Optional[ValidatorStore] = None,
+    keep_body: bool = False,
+    send_validators: bool = True,
+    save_validators: bool = True,
+    **kwargs
+) -> ConditionalResponse:
+    """
+    Async variant of conditional_get for AsyncHTTPClient
+
+    Same semantics as conditional_get; ConditionalResponse.response is the
+    httpx response.
+    """
+    store = store or get_validator_store()
+    headers = dict(kwargs.pop('headers', None) or {})
+    conditional_headers = store.request_headers(url, require_body=keep_body) if send_validators else {}
+
+    response = await client.get(url, headers={**headers, **conditional_headers}, **kwargs)
+
+    if response.status_code == 304:
+        body = (store.load(url) or {}).get('body') if keep_body else None
+        if keep_body and body is None:
+            logger.debug(f"Stored body missing for {url}, refetching")
+            return await aconditional_get(client, url, store, keep_body, False, save_validators,
+                                          headers=headers, **kwargs)
+        return ConditionalResponse(url, 304, True, body, response)
+
+    if response.status_code == 200 and save_validators:
+        store.save(url, response.headers, response.content if keep_body else None)
+
+    return ConditionalResponse(url, response.status_code, False, response.content, response)
@@ -1,92 +1,258 @@
 """
 HTTP Client with connection pooling and retry logic
+
+A single shared client (get_http_client) is used for all outbound HTTP from
+sources and push channels, so connections are kept alive per host across
+requests, sources and runs. Per-host metrics (requests, connection reuse,
+bytes, latency histogram) are collected on every request.
 """
+import bisect
+import threading
+import time
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from typing import Optional
+from urllib.parse import urlsplit
+from typing import Any, Dict, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Latency histogram bucket upper bounds in seconds (last bucket is +Inf)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class HostMetrics:
+    """Request counters, connection reuse and latency histogram of one host"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.new_connections = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.total_latency = 0.0
+        self.status_codes: Dict[int, int] = {}
+        self.protocols: Dict[str, int] = {}
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, latency: float, status_code: Optional[int], bytes_sent: int, bytes_received: int,
+                new_connections: int = 0, protocol: Optional[str] = None):
+        self.requests += 1
+        self.new_connections += new_connections
+        if protocol:
+            self.protocols[protocol] = self.protocols.get(protocol, 0) + 1
+        self.total_latency += latency
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        self.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        if status_code is None:
+            self.errors += 1
+        else:
+            self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        reused = max(self.requests - self.new_connections, 0)
+        labels = [f"le_{bound}" for bound in LATENCY_BUCKETS] + ["le_inf"]
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'new_connections': self.new_connections,
+            'reuse_ratio': round(reused / self.requests, 4) if self.requests else 0.0,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'avg_latency': round(self.total_latency / self.requests, 4) if self.requests else 0.0,
+            'status_codes': dict(self.status_codes),
+            'protocols': dict(self.protocols),
+            'latency_histogram': dict(zip(labels, self.latency_buckets)),
+        }
+
+
+class HTTPMetrics:
+    """Thread-safe per-host metrics registry, shared by the sync and async clients"""
+
+    def __init__(self):
+        self._hosts: Dict[str, HostMetrics] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, url: str, latency: float, status_code: Optional[int], bytes_sent: int = 0,
+                bytes_received: int = 0, new_connections: int = 0, protocol: Optional[str] = None):
+        """Record one request against the URL's host"""
+        host = urlsplit(url).netloc or url
+        with self._lock:
+            self._hosts.setdefault(host, HostMetrics()).observe(
+                latency, status_code, bytes_sent, bytes_received, new_connections, protocol
+            )
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host metrics: requests, connection reuse ratio, bytes, latency histogram"""
+        with self._lock:
+            return {host: m.to_dict() for host, m in sorted(self._hosts.items())}
+
+    def reset(self):
+        with self._lock:
+            self._hosts.clear()
+
+
+# Global metrics registry (used by the shared sync client and async clients)
+_global_metrics = HTTPMetrics()
+
+
+def get_http_metrics() -> HTTPMetrics:
+    """Get the global per-host HTTP metrics registry"""
+    return _global_metrics
+
 
 class HTTPClient:
     """HTTP client with connection pooling and automatic retries"""
-    
+
     def __init__(
         self,
-        pool_connections: int = 10,
+        pool_connections: int = 20,
         pool_maxsize: int = 20,
         max_retries: int = 3,
         backoff_factor: float = 0.3,
-        timeout: tuple = (5, 30)
+        timeout: tuple = (5, 30),
+        metrics: Optional[HTTPMetrics] = None
     ):
         """
         Initialize HTTP client
-        
+
         Args:
-            pool_connections: Number of connection pools to cache
-            pool_maxsize: Maximum number of connections to save in the pool
-            max_retries: Maximum number of retries
+            pool_connections: Number of per-host connection pools to cache
+            pool_maxsize: Maximum number of keep-alive connections per host
+            max_retries: Maximum number of connection retries
             backoff_factor: Backoff factor between retries
             timeout: (connect_timeout, read_timeout) in seconds
+            metrics: Metrics registry to record into (default: a private registry)
         """
         self.session = requests.Session()
         self.timeout = timeout
-        
-        # Configure retry strategy
+
+        # Transport-level retries only cover failed connection attempts of
+        # idempotent methods, so a push (POST) is never sent twice. Status and
+        # read retries are left to RetryPolicy (backend.utils.retry), which
+        # honours Retry-After and the per-run retry budget; retrying here too
+        # would multiply attempts.
         retry_strategy = Retry(
             total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=0,
             backoff_factor=backoff_factor,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS", "POST"]
+            allowed_methods=["HEAD", "GET", "OPTIONS"],
+            raise_on_status=False
         )
-        
+
         # Configure adapter with connection pooling
-        adapter = HTTPAdapter(
+        self.adapter = HTTPAdapter(
             pool_connections=pool_connections,
             pool_maxsize=pool_maxsize,
             max_retries=retry_strategy
         )
-        
-        self.session.mount('http://', adapter)
-        self.session.mount('https://', adapter)
-        
+
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        self._metrics = metrics if metrics is not None else HTTPMetrics()
+        # id(pool) -> num_connections already attributed to the host
+        self._pool_connections: Dict[int, int] = {}
+        self._pool_lock = threading.Lock()
+
         logger.info(
             f"HTTP client initialized: pool_connections={pool_connections}, "
             f"pool_maxsize={pool_maxsize}, max_retries={max_retries}"
         )
-    
+
+    def _new_connections(self, response: Optional[requests.Response]) -> int:
+        """Connections opened by the response's pool since the last call"""
+        # urllib3 keeps the originating pool on the raw response; its num_connections
+        # counter only grows when a new TCP(+TLS) connection is opened
+        pool = getattr(getattr(response, 'raw', None), '_pool', None)
+        if pool is None:
+            return 0
+        with self._pool_lock:
+            current = getattr(pool, 'num_connections', 0)
+            previous = self._pool_connections.get(id(pool), 0)
+            self._pool_connections[id(pool)] = current
+        return max(current - previous, 0)
+
+    @staticmethod
+    def _bytes_received(response: requests.Response, stream: bool) -> int:
+        """Body size; streamed bodies are not read here, so fall back to Content-Length"""
+        if not stream:
+            return len(response.content)
+        try:
+            return int(response.headers.get('Content-Length', 0))
+        except (TypeError, ValueError):
+            return 0
+
+    def _record(self, url: str, latency: float, response: Optional[requests.Response], bytes_sent: int,
+                stream: bool = False):
+        if response is None:
+            self._metrics.observe(url, latency, None, bytes_sent)
+            return
+        version = getattr(response.raw, 'version', None)
+        self._metrics.observe(
+            url, latency, response.status_code, bytes_sent, self._bytes_received(response, stream),
+            new_connections=self._new_connections(response),
+            protocol={10: 'HTTP/1.0', 11: 'HTTP/1.1', 20: 'HTTP/2'}.get(version)
+        )
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Request with configured timeout and retries, recorded in per-host metrics"""
+        timeout = kwargs.pop('timeout', self.timeout)
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+            return response
+        finally:
+            bytes_sent = 0
+            if response is not None and response.request.body is not None:
+                body = response.request.body
+                bytes_sent = len(body) if isinstance(body, (bytes, str)) else 0
+            self._record(url, time.perf_counter() - start, response, bytes_sent, stream=bool(kwargs.get('stream')))
+
     def get(self, url: str, **kwargs) -> requests.Response:
         """GET request with configured timeout and retries"""
-        timeout = kwargs.pop('timeout', self.timeout)
-        return self.session.get(url, timeout=timeout, **kwargs)
-    
+        return self.request('GET', url, **kwargs)
+
     def post(self, url: str, **kwargs) -> requests.Response:
-        """POST request with configured timeout and retries"""
-        timeout = kwargs.pop('timeout', self.timeout)
-        return self.session.post(url, timeout=timeout, **kwargs)
-    
+        """POST request with configured timeout (no transport-level retries)"""
+        return self.request('POST', url, **kwargs)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host metrics: requests, connection reuse ratio, bytes, latency histogram"""
+        return self._metrics.snapshot()
+
+    def reset_metrics(self):
+        """Reset per-host metrics"""
+        self._metrics.reset()
+
     def close(self):
         """Close the session"""
         self.session.close()
-    
+
     def __enter__(self):
         return self
-    
+
     def __exit__(self, *args):
         self.close()
 
 
 # Global HTTP client instance (singleton pattern)
 _global_client: Optional[HTTPClient] = None
+_global_client_lock = threading.Lock()
 
 
 def get_http_client() -> HTTPClient:
     """Get or create the global HTTP client instance"""
     global _global_client
     if _global_client is None:
-        _global_client = HTTPClient()
+        with _global_client_lock:
+            if _global_client is None:
+                _global_client = HTTPClient(metrics=get_http_metrics())
     return _global_client
 
 
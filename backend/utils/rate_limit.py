@@ -1,10 +1,14 @@
 """
 Rate limiting utilities to prevent API throttling
 """
+import asyncio
+import hashlib
 import time
 import threading
+from email.utils import parsedate_to_datetime
 from functools import wraps
-from typing import Callable
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
 import logging
 
 logger = logging.getLogger(__name__)
@@ -94,3 +98,251 @@ def rate_limit(calls: int, period: float):
     """
     limiter = RateLimiter(calls, period)
     return limiter
+
+
+class RateLimited(Exception):
+    """Raised by AdaptiveRateLimiter.acquire when the required wait exceeds max_wait"""
+
+    def __init__(self, key: str, wait: float):
+        super().__init__(f"Rate limited on {key}: next slot in {wait:.1f}s")
+        self.key = key
+        self.wait = wait
+
+
+class _LimitState:
+    """Learned limits of one (host, credential) pair"""
+
+    def __init__(self, rate: float):
+        self.rate = rate                # pacing rate (req/s) when the server reports no quota
+        self.ceiling = rate             # additive increase never exceeds the configured rate
+        self.next_allowed = 0.0         # monotonic time of the next free slot
+        self.blocked_until = 0.0        # monotonic time until which the server asked us to wait
+        self.remaining: Optional[int] = None  # requests left in the current server window
+        self.reset_at = 0.0             # monotonic time the server window resets
+        self.throttled = 0              # 429 / rate-limit responses seen
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            'rate': round(self.rate, 4),
+            'remaining': self.remaining,
+            'reset_in': round(max(self.reset_at - now, 0.0), 1) if self.remaining is not None else None,
+            'blocked_for': round(max(self.blocked_until - now, 0.0), 1),
+            'throttled': self.throttled,
+        }
+
+
+class AdaptiveRateLimiter:
+    """
+    Rate limiter that learns the allowed rate from server feedback
+
+    Limits are tracked per host and per credential (the credential is only
+    kept as a short hash). While the server reports plenty of quota through
+    X-RateLimit-Remaining / X-RateLimit-Reset (or the RateLimit-* draft
+    headers), requests go out without pacing; once quota runs low the
+    remaining requests are spread evenly until the window resets, and at zero
+    callers wait for the reset. Retry-After and 429 responses block the key
+    and halve the pacing rate used for servers that send no quota headers;
+    successful responses raise it again additively.
+
+    Slots are reserved under a lock, so concurrent threads and coroutines
+    sharing one limiter never oversubscribe a key.
+    """
+
+    def __init__(self, default_rate: float = 1.0, host_rates: Optional[Dict[str, float]] = None,
+                 min_rate: float = 0.02, low_watermark: int = 5):
+        """
+        Initialize adaptive rate limiter
+
+        Args:
+            default_rate: Initial pacing rate (req/s) for hosts without quota headers
+            host_rates: Per-host initial rates (e.g. {'api.github.com': 0.5})
+            min_rate: Lower bound of the pacing rate after repeated throttling
+            low_watermark: Remaining quota below which requests are spread until reset
+        """
+        self.default_rate = default_rate
+        self.host_rates = dict(host_rates or {})
+        self.min_rate = min_rate
+        self.low_watermark = low_watermark
+        self._states: Dict[str, _LimitState] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(url: str, credential: Optional[str]) -> str:
+        host = urlsplit(url).netloc or url
+        if not credential:
+            return host
+        return f"{host}#{hashlib.sha256(credential.encode()).hexdigest()[:12]}"
+
+    def _state(self, key: str) -> _LimitState:
+        state = self._states.get(key)
+        if state is None:
+            host = key.split('#', 1)[0]
+            state = _LimitState(self.host_rates.get(host, self.default_rate))
+            self._states[key] = state
+        return state
+
+    def _reserve(self, url: str, credential: Optional[str], max_wait: Optional[float]) -> float:
+        """Reserve the next slot for a key and return how long to wait for it"""
+        key = self._key(url, credential)
+        with self.lock:
+            now = time.monotonic()
+            state = self._state(key)
+            start = max(now, state.next_allowed, state.blocked_until)
+
+            if state.remaining is not None and state.reset_at <= start:
+                # Server window has rolled over; quota is unknown until the next response
+                state.remaining = None
+
+            if state.remaining is None:
+                interval = 1.0 / state.rate
+            elif state.remaining <= 0:
+                start = max(start, state.reset_at)
+                state.remaining = None
+                interval = 1.0 / state.rate
+            elif state.remaining <= self.low_watermark:
+                interval = (state.reset_at - start) / state.remaining
+            else:
+                interval = 0.0
+
+            wait = start - now
+            if max_wait is not None and wait > max_wait:
+                raise RateLimited(key, wait)
+
+            state.next_allowed = start + interval
+            if state.remaining is not None:
+                state.remaining -= 1
+
+        if wait > 0:
+            logger.debug(f"Adaptive rate limit on {key}, waiting {wait:.2f}s")
+        return wait
+
+    def acquire(self, url: str, credential: Optional[str] = None, max_wait: Optional[float] = None) -> float:
+        """
+        Block until a request to url may be sent
+
+        Args:
+            url: Request URL (or bare host)
+            credential: API key / token the request is sent with
+            max_wait: Raise RateLimited instead of waiting longer than this
+
+        Returns:
+            Seconds waited
+        """
+        wait = self._reserve(url, credential, max_wait)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def aacquire(self, url: str, credential: Optional[str] = None, max_wait: Optional[float] = None) -> float:
+        """Async variant of acquire"""
+        wait = self._reserve(url, credential, max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def update(self, url: str, response: Any, credential: Optional[str] = None,
+               throttled: Optional[bool] = None):
+        """
+        Learn limits from a response (requests or httpx)
+
+        Args:
+            url: Request URL
+            response: Response with status_code and headers
+            credential: Credential the request was sent with
+            throttled: Force treating the response as a rate-limit rejection
+                (e.g. GitHub's 403 "rate limit exceeded"); default: status 429
+        """
+        headers = response.headers
+        status_code = response.status_code
+        if throttled is None:
+            throttled = status_code == 429
+
+        wall_now = time.time()
+        remaining = _parse_int(headers.get('X-RateLimit-Remaining') or headers.get('RateLimit-Remaining'))
+        reset = _parse_reset(headers.get('X-RateLimit-Reset') or headers.get('RateLimit-Reset'), wall_now)
+        retry_after = parse_retry_after(headers.get('Retry-After'), wall_now)
+
+        key = self._key(url, credential)
+        with self.lock:
+            now = time.monotonic()
+            state = self._state(key)
+
+            if remaining is not None and reset is not None:
+                reset_at = now + reset
+                if state.remaining is None or abs(reset_at - state.reset_at) > 1.0:
+                    state.remaining = remaining
+                else:
+                    # Responses arrive out of order: keep the lower of server and local counts
+                    state.remaining = min(state.remaining, remaining)
+                state.reset_at = reset_at
+                if state.remaining > self.low_watermark:
+                    # Quota is plentiful: drop pacing reserved before the server reported it
+                    state.next_allowed = min(state.next_allowed, now)
+
+            if retry_after is not None:
+                state.blocked_until = max(state.blocked_until, now + retry_after)
+
+            if throttled:
+                state.throttled += 1
+                state.rate = max(state.rate / 2, self.min_rate)
+                if retry_after is None and not (state.remaining == 0 and state.reset_at > now):
+                    state.blocked_until = max(state.blocked_until, now + 1.0 / state.rate)
+                logger.info(f"Throttled by {key}: pacing rate now {state.rate:.3f} req/s")
+            elif 200 <= status_code < 400 and state.rate < state.ceiling:
+                state.rate = min(state.rate + 0.1 * state.ceiling, state.ceiling)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Learned limits per host/credential key"""
+        with self.lock:
+            now = time.monotonic()
+            return {key: state.to_dict(now) for key, state in sorted(self._states.items())}
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_reset(value: Optional[str], now: float) -> Optional[float]:
+    """Seconds until a rate-limit window resets (epoch timestamp or delta seconds)"""
+    reset = _parse_int(value)
+    if reset is None:
+        return None
+    # GitHub sends an epoch timestamp, the RateLimit-* draft sends delta seconds
+    if reset > 10 ** 9:
+        return max(reset - now, 0.0)
+    return float(max(reset, 0))
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date)"""
+    if not value:
+        return None
+    now = time.time() if now is None else now
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - now, 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+# Global adaptive limiter shared by all sources (sync and async)
+_global_adaptive_limiter: Optional[AdaptiveRateLimiter] = None
+_global_adaptive_lock = threading.Lock()
+
+
+def get_adaptive_limiter() -> AdaptiveRateLimiter:
+    """Get or create the global adaptive rate limiter"""
+    global _global_adaptive_limiter
+    if _global_adaptive_limiter is None:
+        with _global_adaptive_lock:
+            if _global_adaptive_limiter is None:
+                _global_adaptive_limiter = AdaptiveRateLimiter(
+                    host_rates={'api.github.com': 0.5, 'api.semanticscholar.org': 1.0}
+                )
+    return _global_adaptive_limiter
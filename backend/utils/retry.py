@@ -1,13 +1,373 @@
 """
-Retry decorator with exponential backoff
+Central retry policy engine
+
+All source requests and LLM calls retry through RetryPolicy, which
+
+- classifies failures (transient network errors and 408/425/429/5xx are
+  retried; 4xx, auth errors and programming errors are not),
+- waits with decorrelated jitter (delay = uniform(base, previous * growth),
+  capped), so concurrent callers do not retry in lockstep,
+- honours Retry-After when the server sends one,
+- stops retrying when the wait would pass the caller's deadline, and
+- draws every retry from a per-run RetryBudget, so retries cannot multiply
+  latency across sources and stages.
+
+Attempts, retries and denials are counted per key in RetryMetrics.
 """
-import time
+import asyncio
+import http.client
 import logging
+import random
+import threading
+import time
+import urllib.error
+from collections import defaultdict
+from dataclasses import dataclass
 from functools import wraps
-from typing import Callable, Any, Optional, Tuple, Type
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+import requests
+
+from backend.utils.rate_limit import RateLimited, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+# Try to import optional libraries
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+try:
+    import openai
+    HAS_OPENAI = True
+except ImportError:
+    HAS_OPENAI = False
+
+# Failure kinds
+RETRY = 'retry'        # transient: retry with backoff
+THROTTLE = 'throttle'  # rate limited: retry after Retry-After (or backoff)
+AUTH = 'auth'          # credential rejected: do not retry, callers may switch credentials
+FATAL = 'fatal'        # not retryable
+
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+AUTH_STATUSES = frozenset({401, 403})
+
+_TRANSIENT_ERRORS: Tuple[Type[BaseException], ...] = (
+    TimeoutError,
+    ConnectionError,
+    urllib.error.URLError,
+    http.client.IncompleteRead,
+    requests.exceptions.Timeout,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+)
+if HAS_HTTPX:
+    _TRANSIENT_ERRORS += (httpx.TransportError,)
+if HAS_OPENAI:
+    # APITimeoutError is a subclass of APIConnectionError
+    _TRANSIENT_ERRORS += (openai.APIConnectionError,)
+
+
+class RetryableHTTPError(Exception):
+    """Raised for a response whose status is worth retrying (see check_retryable)"""
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None, url: str = ""):
+        super().__init__(f"HTTP {status_code}" + (f" for {url}" if url else ""))
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.url = url
+
+
+def check_retryable(response: Any, url: str = "", retry_after: Optional[float] = None):
+    """
+    Raise RetryableHTTPError if the response status is retryable
+
+    For callers that handle other error statuses themselves (e.g. feeds parsed
+    regardless of status); 2xx/3xx/other 4xx responses pass through.
+
+    Args:
+        response: requests or httpx response
+        url: Request URL (for messages)
+        retry_after: Explicit wait, overriding the Retry-After header
+    """
+    if response.status_code in RETRYABLE_STATUSES:
+        if retry_after is None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        raise RetryableHTTPError(response.status_code, retry_after, url)
+
+
+@dataclass(frozen=True)
+class Classification:
+    """How a failure should be handled"""
+    kind: str
+    status: Optional[int] = None
+    retry_after: Optional[float] = None
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in (RETRY, THROTTLE)
+
+
+def _status_and_headers(exc: BaseException) -> Tuple[Optional[int], Any]:
+    """HTTP status and response headers carried by an exception, if any"""
+    if isinstance(exc, urllib.error.HTTPError):
+        return exc.code, exc.headers
+    status = getattr(exc, 'status_code', None)  # openai.APIStatusError
+    response = getattr(exc, 'response', None)   # requests / httpx / openai
+    headers = getattr(response, 'headers', None)
+    if status is None and response is not None:
+        status = getattr(response, 'status_code', None)
+    return (status if isinstance(status, int) else None), headers
+
+
+def classify(exc: BaseException) -> Classification:
+    """Classify a failure by exception type and HTTP status"""
+    if isinstance(exc, RetryableHTTPError):
+        return Classification(THROTTLE if exc.status_code == 429 else RETRY, exc.status_code, exc.retry_after)
+    if isinstance(exc, RateLimited):
+        # The limiter already decided the wait is too long
+        return Classification(FATAL)
+
+    status, headers = _status_and_headers(exc)
+    if status is not None:
+        retry_after = parse_retry_after(headers.get('Retry-After')) if headers is not None else None
+        if status == 429:
+            return Classification(THROTTLE, status, retry_after)
+        if status in RETRYABLE_STATUSES:
+            return Classification(RETRY, status, retry_after)
+        if status in AUTH_STATUSES:
+            return Classification(AUTH, status)
+        return Classification(FATAL, status)
+
+    if isinstance(exc, _TRANSIENT_ERRORS):
+        return Classification(RETRY)
+    return Classification(FATAL)
+
+
+class RetryBudget:
+    """Retries allowed per run, shared by all sources and LLM calls"""
+
+    def __init__(self, max_retries: Optional[int] = None):
+        """
+        Args:
+            max_retries: Retries allowed until the next reset (None: unlimited)
+        """
+        self._lock = threading.Lock()
+        self.reset(max_retries)
+
+    def reset(self, max_retries: Optional[int] = None):
+        """Start a new run with a fresh allowance"""
+        with self._lock:
+            self.max_retries = max_retries
+            self.spent = 0
+            self.denied = 0
+
+    def try_spend(self) -> bool:
+        """Take one retry from the budget; False when exhausted"""
+        with self._lock:
+            if self.max_retries is not None and self.spent >= self.max_retries:
+                self.denied += 1
+                return False
+            self.spent += 1
+            return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            remaining = None if self.max_retries is None else max(self.max_retries - self.spent, 0)
+            return {'limit': self.max_retries, 'spent': self.spent, 'remaining': remaining, 'denied': self.denied}
+
+
+class RetryMetrics:
+    """Per-key retry counters (a key is a source name or an API such as 'deepseek')"""
+
+    FIELDS = ('calls', 'successes', 'failures', 'retries', 'throttled', 'retry_after_honoured',
+              'gave_up', 'budget_denied', 'deadline_denied', 'sleep_seconds')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(self.FIELDS, 0))
+
+    def incr(self, key: str, field: str, amount: float = 1):
+        with self._lock:
+            self._counters[key][field] += amount
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            result = {}
+            for key, counters in self._counters.items():
+                item = dict(counters)
+                item['sleep_seconds'] = round(item['sleep_seconds'], 2)
+                result[key] = item
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+# Global budget and metrics shared by all policies
+_global_budget = RetryBudget()
+_global_metrics = RetryMetrics()
+
+
+def get_retry_budget() -> RetryBudget:
+    """Get the global per-run retry budget"""
+    return _global_budget
+
+
+def get_retry_metrics() -> RetryMetrics:
+    """Get the global retry metrics registry"""
+    return _global_metrics
+
+
+class RetryPolicy:
+    """Retry with failure classification, decorrelated jitter and Retry-After"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        growth: float = 3.0,
+        max_retry_after: Optional[float] = 300.0,
+        classifier: Callable[[BaseException], Classification] = classify,
+        budget: Optional[RetryBudget] = None,
+        metrics: Optional[RetryMetrics] = None
+    ):
+        """
+        Initialize retry policy
+
+        Args:
+            max_attempts: Default number of attempts (including the first)
+            base_delay: Minimum delay between attempts in seconds
+            max_delay: Maximum backoff delay in seconds
+            growth: Upper bound of each delay as a multiple of the previous one
+            max_retry_after: Give up instead of waiting longer than this for Retry-After (None: no cap)
+            classifier: Maps an exception to a Classification
+            budget: Retry budget (default: the global per-run budget)
+            metrics: Metrics registry (default: the global registry)
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.growth = growth
+        self.max_retry_after = max_retry_after
+        self.classifier = classifier
+        self._budget = budget
+        self._metrics = metrics
+
+    @property
+    def budget(self) -> RetryBudget:
+        return self._budget if self._budget is not None else _global_budget
+
+    @property
+    def metrics(self) -> RetryMetrics:
+        return self._metrics if self._metrics is not None else _global_metrics
+
+    def backoff(self, previous: Optional[float] = None) -> float:
+        """Next delay with decorrelated jitter"""
+        previous = max(previous or self.base_delay, self.base_delay)
+        return min(self.max_delay, random.uniform(self.base_delay, previous * self.growth))
+
+    def next_delay(self, exc: BaseException, attempt: int, max_attempts: int,
+                   previous: Optional[float], deadline: Optional[float], key: str) -> Optional[float]:
+        """
+        Delay before the next attempt, or None to give up (re-raise exc)
+
+        Args:
+            exc: Failure of the attempt
+            attempt: Attempt number that failed (1-based)
+            max_attempts: Attempts allowed for this call
+            previous: Previous delay (None on the first retry)
+            deadline: time.monotonic() deadline of the caller
+            key: Metrics key
+        """
+        classification = self.classifier(exc)
+        if classification.kind == THROTTLE:
+            self.metrics.incr(key, 'throttled')
+        if not classification.retryable:
+            return None
+        if attempt >= max_attempts:
+            self.metrics.incr(key, 'gave_up')
+            return None
+
+        if classification.retry_after is not None:
+            delay = classification.retry_after
+            if self.max_retry_after is not None and delay > self.max_retry_after:
+                logger.warning(f"{key}: Retry-After {delay:.0f}s exceeds {self.max_retry_after:.0f}s, giving up")
+                self.metrics.incr(key, 'gave_up')
+                return None
+            self.metrics.incr(key, 'retry_after_honoured')
+        else:
+            delay = self.backoff(previous)
+
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            logger.warning(f"{key}: retrying in {delay:.1f}s would pass the deadline, giving up")
+            self.metrics.incr(key, 'deadline_denied')
+            return None
+        if not self.budget.try_spend():
+            logger.warning(f"{key}: retry budget exhausted, giving up")
+            self.metrics.incr(key, 'budget_denied')
+            return None
+
+        self.metrics.incr(key, 'retries')
+        self.metrics.incr(key, 'sleep_seconds', delay)
+        logger.warning(f"{key} failed (attempt {attempt}/{max_attempts}), retrying in {delay:.1f}s: "
+                       f"{type(exc).__name__}: {str(exc)[:200]}")
+        return delay
+
+    def call(self, func: Callable[[], Any], key: str = 'default', max_attempts: Optional[int] = None,
+             deadline: Optional[float] = None) -> Any:
+        """
+        Call func, retrying retryable failures; the last failure is re-raised
+
+        Args:
+            func: Zero-argument callable
+            key: Metrics key (source name, API name)
+            max_attempts: Override the policy's attempts for this call
+            deadline: time.monotonic() deadline; no retry waits past it
+        """
+        max_attempts = max(max_attempts or self.max_attempts, 1)
+        self.metrics.incr(key, 'calls')
+        delay = None
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = func()
+            except Exception as e:
+                delay = self.next_delay(e, attempt, max_attempts, delay, deadline, key)
+                if delay is None:
+                    self.metrics.incr(key, 'failures')
+                    raise
+                time.sleep(delay)
+                continue
+            self.metrics.incr(key, 'successes')
+            return result
+
+    async def acall(self, func: Callable[[], Awaitable[Any]], key: str = 'default',
+                    max_attempts: Optional[int] = None, deadline: Optional[float] = None) -> Any:
+        """Async variant of call for a zero-argument coroutine function"""
+        max_attempts = max(max_attempts or self.max_attempts, 1)
+        self.metrics.incr(key, 'calls')
+        delay = None
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = await func()
+            except Exception as e:
+                delay = self.next_delay(e, attempt, max_attempts, delay, deadline, key)
+                if delay is None:
+                    self.metrics.incr(key, 'failures')
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.metrics.incr(key, 'successes')
+            return result
+
 
 def retry_with_backoff(
     max_retries: int = 3,
@@ -17,53 +377,37 @@ def retry_with_backoff(
     exceptions: Tuple[Type[Exception], ...] = (Exception,)
 ):
     """
-    Decorator that retries a function with exponential backoff
-    
+    Decorator that retries a function through a RetryPolicy
+
+    Failures are classified by classify(); when specific exception types are
+    given, those are retried as well.
+
     Args:
         max_retries: Maximum number of retry attempts
-        initial_delay: Initial delay between retries in seconds
+        initial_delay: Minimum delay between retries in seconds
         max_delay: Maximum delay between retries in seconds
-        backoff_factor: Multiplier for delay on each retry
-        exceptions: Tuple of exception types to catch and retry
-    
+        backoff_factor: Upper bound of each delay as a multiple of the previous one
+        exceptions: Exception types that are always retried (default: classify only)
+
     Example:
         @retry_with_backoff(max_retries=3, initial_delay=1.0)
         def fetch_data():
             # Your code here
             pass
     """
+    def classifier(exc: BaseException) -> Classification:
+        classification = classify(exc)
+        if not classification.retryable and exceptions != (Exception,) and isinstance(exc, exceptions):
+            return Classification(RETRY, classification.status)
+        return classification
+
+    policy = RetryPolicy(max_attempts=max_retries + 1, base_delay=initial_delay, max_delay=max_delay,
+                         growth=backoff_factor, classifier=classifier)
+
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            delay = initial_delay
-            last_exception = None
-            
-            for attempt in range(max_retries + 1):
-                try:
-                    return func(*args, **kwargs)
-                except exceptions as e:
-                    last_exception = e
-                    
-                    if attempt == max_retries:
-                        logger.error(
-                            f"{func.__name__} failed after {max_retries} retries: {e}"
-                        )
-                        raise
-                    
-                    # Calculate next delay with exponential backoff
-                    current_delay = min(delay, max_delay)
-                    logger.warning(
-                        f"{func.__name__} failed (attempt {attempt + 1}/{max_retries}), "
-                        f"retrying in {current_delay:.1f}s: {e}"
-                    )
-                    
-                    time.sleep(current_delay)
-                    delay *= backoff_factor
-            
-            # This should never be reached, but just in case
-            if last_exception:
-                raise last_exception
-        
+            return policy.call(lambda: func(*args, **kwargs), key=func.__name__)
         return wrapper
     return decorator
 
@@ -75,7 +419,9 @@ def retry_on_rate_limit(
 ):
     """
     Specialized retry decorator for rate limit errors (HTTP 429)
-    
+
+    Retry-After is honoured when the error carries a response.
+
     Args:
         max_retries: Maximum number of retry attempts
         initial_delay: Initial delay between retries in seconds (longer for rate limits)
@@ -85,6 +431,5 @@ def retry_on_rate_limit(
         max_retries=max_retries,
         initial_delay=initial_delay,
         max_delay=max_delay,
-        backoff_factor=2.0,
-        exceptions=(Exception,)  # Catch all exceptions and check status code in wrapper
+        backoff_factor=2.0
     )
@@ -0,0 +1,101 @@
+"""
+feed 解析基准：在录制的 feed 正文上对比轻量解析器与 feedparser 的耗时和字段一致性
+
+正文来源（二选一）：
+- 原始响应归档：RSS_TopJournal / ScienceNews 在某次运行中归档的 feed（默认最近一次运行）
+- 命令行给出的 feed 文件
+
+用法：
+    python scripts/bench_feed_parser.py                       # 最近一次运行的归档
+    python scripts/bench_feed_parser.py --run-id <run_id>
+    python scripts/bench_feed_parser.py feeds/*.xml --repeat 50
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import feedparser
+
+from backend.sources.feed_parser import parse_feed_fast
+
+FEED_SOURCES = ('RSS_TopJournal', 'ScienceNews')
+FIELDS = ('id', 'title', 'summary', 'link', 'published', 'updated')
+
+
+def load_archived(run_id: str = None) -> List[Tuple[str, bytes]]:
+    """从原始响应归档读取某次运行的 feed 正文"""
+    from backend.storage.archive import get_payload_archive
+    from backend.storage.db import get_db, init_db
+
+    init_db()
+    archive = get_payload_archive()
+    run_id = run_id or archive.latest_run_id()
+    if not run_id:
+        return []
+    with get_db() as conn:
+        rows = conn.execute(
+            f"SELECT source, request_key FROM payload_index WHERE run_id = ? AND source IN ({','.join('?' * len(FEED_SOURCES))})",
+            (run_id, *FEED_SOURCES)
+        ).fetchall()
+    print(f"运行 {run_id[:8]}: {len(rows)} 个归档 feed")
+    return [(row['request_key'], archive.get(run_id, row['source'], row['request_key'])) for row in rows]
+
+
+def time_parser(parse, body: bytes, repeat: int) -> float:
+    """多次解析的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse(body)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def compare(body: bytes) -> int:
+    """两种解析结果中字段不一致的条目数"""
+    fast = parse_feed_fast(body)
+    reference = feedparser.parse(body)
+    return sum(
+        1 for a, b in zip(fast.entries, reference.entries)
+        if any(a.get(field) != b.get(field) for field in FIELDS)
+    ) + abs(len(fast.entries) - len(reference.entries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="feed 解析基准")
+    parser.add_argument('files', nargs='*', help="feed 文件（不指定时读取原始响应归档）")
+    parser.add_argument('--run-id', help="读取归档的运行ID（默认最近一次）")
+    parser.add_argument('--repeat', type=int, default=20, help="每个 feed 的解析次数")
+    args = parser.parse_args()
+
+    if args.files:
+        bodies = [(name, Path(name).read_bytes()) for name in args.files]
+    else:
+        bodies = load_archived(args.run_id)
+    if not bodies:
+        print("没有可用的 feed 正文：请指定 feed 文件，或先设置 ENABLE_PAYLOAD_ARCHIVE=True 执行 run")
+        return
+
+    print(f"{'feed':60s} {'大小':>8s} {'条目':>5s} {'feedparser':>11s} {'轻量解析':>9s} {'加速':>6s} {'差异':>4s}")
+    total_reference = total_fast = 0.0
+    for name, body in bodies:
+        if parse_feed_fast(body) is None:
+            print(f"{name[-60:]:60s} {len(body) / 1024:7.1f}K  轻量解析不适用，运行时退回 feedparser")
+            continue
+        reference_ms = time_parser(feedparser.parse, body, args.repeat)
+        fast_ms = time_parser(parse_feed_fast, body, args.repeat)
+        total_reference += reference_ms
+        total_fast += fast_ms
+        entries = len(parse_feed_fast(body).entries)
+        print(f"{name[-60:]:60s} {len(body) / 1024:7.1f}K {entries:5d} {reference_ms:9.2f}ms "
+              f"{fast_ms:7.2f}ms {reference_ms / max(fast_ms, 1e-6):5.1f}x {compare(body):4d}")
+
+    if total_fast:
+        print(f"合计: feedparser {total_reference:.1f}ms, 轻量解析 {total_fast:.1f}ms, "
+              f"加速 {total_reference / total_fast:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
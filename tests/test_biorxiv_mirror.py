@@ -0,0 +1,119 @@
+"""
+bioRxiv 本地按日镜像测试用例
+"""
+import datetime
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from backend.core.config import Config
+from backend.storage import init_db
+from backend.storage.biorxiv_mirror import BioRxivMirror
+from backend.sources.biorxiv import BioRxivSource, PAGE_SIZE
+
+
+class FakeDailyAPI:
+    """按日期返回记录的 bioRxiv details 接口（每天 per_day 条，按 PAGE_SIZE 分页）"""
+
+    def __init__(self, per_day=3, fail_days=(), fail_pages=()):
+        self.per_day = dict()
+        self.default = per_day
+        self.fail_days = set(fail_days)
+        self.fail_pages = set(fail_pages)
+        self.requested_days = []
+
+    def get(self, url, **kwargs):
+        parts = url.rstrip('/').split('/')
+        day, cursor = parts[-2], int(parts[-1])
+        self.requested_days.append(day)
+        response = Mock(headers={})
+        if day in self.fail_days or (day, cursor) in self.fail_pages:
+            response.raise_for_status.side_effect = Exception("503 Service Unavailable")
+            return response
+        count = self.per_day.get(day, self.default)
+        records = [
+            {'title': f"Nitrogenase {day} {i}", 'abstract': "nitrogen fixation", 'category': 'biochemistry',
+             'date': day, 'doi': f"10.1101/{day}.{i}", 'version': '1'}
+            for i in range(cursor, min(cursor + PAGE_SIZE, count))
+        ]
+        body = {'messages': [{'status': 'ok', 'total': count}], 'collection': records}
+        response.status_code = 200
+        response.content = json.dumps(body).encode()
+        response.raise_for_status.return_value = None
+        return response
+
+
+class TestBioRxivMirror(unittest.TestCase):
+    """按日同步与尾随窗口"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.patches = [
+            patch.object(Config, 'DB_PATH', str(self.tmp_dir / "test.db")),
+            patch.object(Config, 'ENABLE_CIRCUIT_BREAKER', False),
+        ]
+        for p in self.patches:
+            p.start()
+        init_db()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _fetch(self, api, reference_date, window_days, **kwargs):
+        source = BioRxivSource(window_days=window_days, enable_diagnostic=False, use_mirror=True, **kwargs)
+        source.reference_date = reference_date
+        with patch('backend.sources.biorxiv.get_http_client', return_value=api):
+            return source.fetch(set(), [])
+
+    def test_only_missing_and_trailing_days_are_synced(self):
+        """测试再次抓取时只同步新日期和尾随窗口内的日期，其余日期从镜像读取"""
+        first = FakeDailyAPI()
+        result = self._fetch(first, datetime.date(2025, 12, 31), window_days=5)
+        # 日期过滤只保留前一天的论文
+        self.assertEqual(len(result.papers), 3)
+        self.assertEqual(sorted(set(first.requested_days)),
+                         ['2025-12-26', '2025-12-27', '2025-12-28', '2025-12-29', '2025-12-30'])
+
+        # 次日：12-29、12-30 仍在尾随窗口内（2天）需重新同步，并补上延迟加入的记录
+        second = FakeDailyAPI()
+        second.per_day['2025-12-30'] = 4
+        result = self._fetch(second, datetime.date(2026, 1, 1), window_days=6)
+        self.assertEqual(sorted(set(second.requested_days)), ['2025-12-29', '2025-12-30', '2025-12-31'])
+        self.assertEqual(len(result.papers), 3)
+        self.assertFalse(result.is_degraded)
+        self.assertEqual(BioRxivMirror().status()['records'], 6 * 3 + 1)
+
+    def test_failed_day_is_not_mirrored(self):
+        """测试同步失败的日期不写入镜像，下次重新同步"""
+        result = self._fetch(FakeDailyAPI(fail_days={'2025-12-29'}), datetime.date(2025, 12, 31), window_days=3)
+        self.assertTrue(result.is_degraded)
+        self.assertEqual(len(result.papers), 3)
+
+        mirror = BioRxivMirror()
+        self.assertFalse(mirror.has_day(datetime.date(2025, 12, 29)))
+        self.assertIn(datetime.date(2025, 12, 29),
+                      mirror.days_to_sync(datetime.date(2025, 12, 28), datetime.date(2025, 12, 30)))
+
+
+    def test_sequential_mid_pagination_failure_is_not_mirrored(self):
+        """测试逐页抓取在首页之后失败时，该日期只使用已抓到的记录，不作为完整日期写入镜像"""
+        api = FakeDailyAPI(fail_pages={('2025-12-30', PAGE_SIZE)})
+        api.per_day['2025-12-30'] = PAGE_SIZE + 5
+        with patch('backend.sources.biorxiv.time.sleep'):
+            result = self._fetch(api, datetime.date(2025, 12, 31), window_days=2, concurrent_pages=False)
+        self.assertTrue(result.is_degraded)
+        self.assertIn('2025-12-30', result.degraded_reason)
+        self.assertEqual(len(result.papers), PAGE_SIZE)
+
+        mirror = BioRxivMirror()
+        self.assertTrue(mirror.has_day(datetime.date(2025, 12, 29)))
+        self.assertFalse(mirror.has_day(datetime.date(2025, 12, 30)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+bioRxiv 并发分页测试用例
+"""
+import datetime
+import json
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from backend.core.config import Config
+from backend.sources.biorxiv import BioRxivSource, PAGE_SIZE
+
+TOTAL = 450
+REFERENCE_DATE = datetime.date(2025, 12, 31)
+
+
+class FakeBioRxivAPI:
+    """按游标返回分页数据的 bioRxiv 接口，记录并发请求数"""
+
+    def __init__(self, latency=0.05, fail_cursors=()):
+        self.latency = latency
+        self.fail_cursors = set(fail_cursors)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.cursors = []
+        self.lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        cursor = int(url.rsplit('/', 1)[-1])
+        with self.lock:
+            self.cursors.append(cursor)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # 不用 time.sleep：测试中会替换掉页间延迟
+            threading.Event().wait(self.latency)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+        if cursor in self.fail_cursors:
+            response = Mock(status_code=404, headers={})
+            response.raise_for_status.side_effect = Exception("404 Not Found")
+            return response
+        records = [
+            {'title': f"Paper {i}", 'abstract': "nitrogenase structure", 'category': 'biochemistry',
+             'date': "2025-12-30", 'doi': f"10.1101/{i}"}
+            for i in range(cursor, min(cursor + PAGE_SIZE, TOTAL))
+        ]
+        body = {'messages': [{'status': 'ok', 'cursor': cursor, 'count': len(records), 'total': str(TOTAL)}],
+                'collection': records}
+        response = Mock(status_code=200, headers={}, content=json.dumps(body).encode())
+        response.raise_for_status.return_value = None
+        return response
+
+
+class TestBioRxivConcurrentPages(unittest.TestCase):
+    """按首页总数并发抓取其余页"""
+
+    def setUp(self):
+        patcher = patch.object(Config, 'ENABLE_CIRCUIT_BREAKER', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _fetch(self, api, **kwargs):
+        source = BioRxivSource(window_days=1, enable_diagnostic=False, use_mirror=False, **kwargs)
+        source.reference_date = REFERENCE_DATE
+        with patch('backend.sources.biorxiv.get_http_client', return_value=api), \
+                patch('backend.sources.biorxiv.time.sleep'):
+            return source.fetch(set(), [])
+
+    def test_concurrent_pages_match_sequential(self):
+        """测试并发分页与顺序分页得到相同的论文，且并发不超过上限"""
+        concurrent_api = FakeBioRxivAPI()
+        result = self._fetch(concurrent_api, concurrent_pages=True, page_concurrency=2)
+        sequential = self._fetch(FakeBioRxivAPI(), concurrent_pages=False)
+
+        self.assertFalse(result.is_degraded)
+        self.assertEqual(len(result.papers), TOTAL)
+        self.assertEqual({p.doi for p in result.papers}, {p.doi for p in sequential.papers})
+        self.assertEqual(sorted(concurrent_api.cursors), [0, 100, 200, 300, 400])
+        self.assertEqual(concurrent_api.max_in_flight, 2)
+
+    def test_failed_page_degrades_result(self):
+        """测试单页失败时保留其余页的结果并标记为降级"""
+        result = self._fetch(FakeBioRxivAPI(fail_cursors={200}), concurrent_pages=True, page_concurrency=4)
+        self.assertTrue(result.is_degraded)
+        self.assertIn("第 3 页", result.degraded_reason)
+        self.assertEqual(len(result.papers), TOTAL - PAGE_SIZE)
+
+    def test_deadline_truncates_pending_pages(self):
+        """测试时间预算用尽时放弃未完成的页面"""
+        source = BioRxivSource(window_days=1, enable_diagnostic=False, concurrent_pages=True, page_concurrency=1,
+                               use_mirror=False)
+        source.reference_date = REFERENCE_DATE
+        source.deadline = time.monotonic() + 0.3
+        with patch('backend.sources.biorxiv.get_http_client', return_value=FakeBioRxivAPI(latency=0.2)):
+            result = source.fetch(set(), [])
+        self.assertTrue(source.truncated)
+        self.assertLess(len(result.papers), TOTAL)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+缓存存储测试用例
+"""
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from backend.utils.cache import SQLiteCache, TieredCache, cached
+
+
+class TestSQLiteCache(unittest.TestCase):
+    """单文件 SQLite 缓存测试"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.cache = SQLiteCache(str(self.tmp_dir / "cache.db"), default_ttl=60, max_bytes=0)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_bulk_get_and_set(self):
+        """测试批量读写"""
+        self.cache.set_many({"a": 1, "b": {"x": [1, 2]}})
+        self.assertEqual(self.cache.get_many(["a", "b", "c"]), {"a": 1, "b": {"x": [1, 2]}})
+        self.assertEqual(self.cache.get("c", "miss"), "miss")
+
+    def test_ttl_expiry(self):
+        """测试过期条目不会被返回"""
+        self.cache.set("k", "v", ttl=1)
+        self.cache._conn.execute("UPDATE cache_entries SET expires_at = ?", (time.time() - 1,))
+        self.assertIsNone(self.cache.get("k"))
+        self.assertEqual(self.cache.purge_expired(), 1)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction_respects_max_bytes(self):
+        """测试超过容量上限时淘汰最久未访问的条目"""
+        self.cache.max_bytes = 3000
+        self.cache.set("old", b"x" * 1000)
+        self.cache.set("mid", b"x" * 1000)
+        self.cache._conn.execute("UPDATE cache_entries SET last_access = last_access - 10 WHERE key = 'old'")
+        self.cache.set("new", b"x" * 1000)
+
+        self.assertIsNone(self.cache.get("old"))
+        self.assertIsNotNone(self.cache.get("new"))
+        self.assertLessEqual(self.cache.total_bytes(), 3000)
+
+    def test_cached_decorator_uses_store(self):
+        """测试 cached 装饰器使用指定的缓存存储"""
+        calls = []
+
+        @cached(ttl=60, cache=self.cache)
+        def compute(x):
+            calls.append(x)
+            return x * 2
+
+        self.assertEqual(compute(2), 4)
+        self.assertEqual(compute(2), 4)
+        self.assertEqual(calls, [2])
+
+
+class TestTieredCache(unittest.TestCase):
+    """两级缓存与单飞锁测试"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.store = SQLiteCache(str(self.tmp_dir / "cache.db"), default_ttl=60, max_bytes=0)
+        self.cache = TieredCache(self.store, memory_size=2)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_store_hits_are_promoted_to_memory(self):
+        """测试持久层命中后提升到内存层"""
+        self.store.set("k", "v")
+        self.assertEqual(self.cache.get("k"), "v")
+        self.assertEqual(self.cache.get("k"), "v")
+        stats = self.cache.stats()
+        self.assertEqual((stats['store_hits'], stats['memory_hits']), (1, 1))
+
+    def test_memory_lru_eviction(self):
+        """测试内存层超过容量后按 LRU 淘汰"""
+        for key in ("a", "b", "c"):
+            self.cache.set(key, key)
+        self.assertEqual(self.cache.stats()['memory_evictions'], 1)
+        self.assertEqual(self.cache.stats()['memory_entries'], 2)
+
+    def test_concurrent_misses_compute_once(self):
+        """测试并发未命中同一个键时只计算一次"""
+        calls = []
+        started = threading.Barrier(4)
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return "value"
+
+        results = []
+
+        def worker():
+            started.wait()
+            results.append(self.cache.get_or_compute("shared", compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["value"] * 4)
+        self.assertEqual(self.cache.stats()['coalesced'], 3)
+
+    def test_negative_results_are_cached(self):
+        """测试负结果按负缓存 TTL 缓存"""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return []
+
+        for _ in range(2):
+            result = self.cache.get_or_compute("empty", compute, is_negative=lambda r: not r)
+        self.assertEqual(result, [])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.stats()['negative_hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
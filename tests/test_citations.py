@@ -0,0 +1,132 @@
+"""
+Semantic Scholar 批量引用数补全测试用例
+"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from backend.core.config import Config
+from backend.models import Paper
+from backend.sources.citations import apply_archived_citations, enrich_citations, normalize_doi
+from backend.storage import init_db
+from backend.storage.archive import PayloadArchive, PayloadNotArchived
+from backend.utils.cache import SQLiteCache, TieredCache
+
+
+class FakeBatchAPI:
+    """/paper/batch 接口：以 10.1/unknown 开头的 DOI 未收录，其余按序号返回引用数"""
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.batches = []
+
+    def post(self, url, **kwargs):
+        ids = kwargs['json']['ids']
+        self.batches.append(ids)
+        response = Mock(status_code=self.status_code, headers={})
+        if self.status_code != 200:
+            response.raise_for_status.side_effect = Exception(f"HTTP {self.status_code}")
+            return response
+        response.raise_for_status.return_value = None
+        response.json.return_value = [
+            None if paper_id.startswith("DOI:10.1/unknown") else
+            {'paperId': paper_id, 'citationCount': int(paper_id.rsplit('.', 1)[-1]) + 1, 'influentialCitationCount': 1}
+            for paper_id in ids
+        ]
+        return response
+
+
+def make_papers(count, prefix="10.1/paper"):
+    return [Paper(title=f"Paper {i}", abstract="", date="2024-01-01", source="PubMed",
+                  doi=f"{prefix}.{i}", link="") for i in range(count)]
+
+
+class TestEnrichCitations(unittest.TestCase):
+    """分批请求、按 DOI 缓存与失败降级"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.cache = TieredCache(SQLiteCache(str(self.tmp_dir / "cache.db"), max_bytes=0))
+        self.api = FakeBatchAPI()
+        self.patches = [
+            patch.object(Config, 'CITATION_BATCH_SIZE', 500),
+            patch('backend.sources.citations.get_http_client', return_value=self.api),
+            patch('backend.sources.citations.get_adaptive_limiter', return_value=Mock()),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+        self.cache.store.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_batches_and_cache(self):
+        """测试 1200 个 DOI 分 3 批请求，重复 DOI 只请求一次，再次补全时全部命中缓存"""
+        papers = make_papers(1200)
+        duplicate = Paper(title="Same paper from RSS", abstract="", date="2024-01-01", source="RSS",
+                          doi="https://doi.org/10.1/PAPER.7", link="")
+        stats = enrich_citations(papers + [duplicate], cache=self.cache)
+
+        self.assertEqual([len(batch) for batch in self.api.batches], [500, 500, 200])
+        self.assertEqual(stats['dois'], 1200)
+        self.assertEqual(stats['enriched'], 1201)
+        self.assertEqual(papers[7].citation_count, 8)
+        self.assertEqual(duplicate.citation_count, 8)
+        self.assertEqual(duplicate.influential_count, 1)
+
+        self.api.batches.clear()
+        again = make_papers(1200)
+        stats = enrich_citations(again, cache=self.cache)
+        self.assertEqual(self.api.batches, [])
+        self.assertEqual(stats['cached'], 1200)
+        self.assertEqual(again[0].citation_count, 1)
+
+    def test_unknown_and_existing_counts(self):
+        """测试未收录的 DOI 保持 0 且被缓存，已有引用数和无 DOI 的论文不请求"""
+        unknown = make_papers(2, prefix="10.1/unknown")
+        existing = make_papers(1)[0]
+        existing.citation_count = 42
+        no_doi = Paper(title="No DOI", abstract="", date="2024-01-01", source="GitHub", doi="", link="")
+        enrich_citations(unknown + [existing, no_doi], cache=self.cache)
+
+        self.assertEqual(self.api.batches, [["DOI:10.1/unknown.0", "DOI:10.1/unknown.1"]])
+        self.assertEqual(unknown[0].citation_count, 0)
+        self.assertEqual(existing.citation_count, 42)
+
+        self.api.batches.clear()
+        enrich_citations(make_papers(2, prefix="10.1/unknown"), cache=self.cache)
+        self.assertEqual(self.api.batches, [])
+
+    def test_failure_keeps_papers_unchanged(self):
+        """测试批量请求失败时论文不变，不抛出异常"""
+        self.api.status_code = 400
+        papers = make_papers(3)
+        stats = enrich_citations(papers, cache=self.cache)
+        self.assertEqual(stats['requests'], 0)
+        self.assertTrue(all(p.citation_count == 0 for p in papers))
+        self.assertEqual(normalize_doi(" DOI:10.1038/ABC "), "10.1038/abc")
+
+
+    def test_archived_counts_replay_without_network(self):
+        """测试本次使用的引用数（含缓存命中）按运行归档，回放时不请求即可得到相同引用数"""
+        with patch.object(Config, 'DB_PATH', str(self.tmp_dir / "test.db")):
+            init_db()
+            archive = PayloadArchive(str(self.tmp_dir / "archive"))
+            enrich_citations(make_papers(2), cache=self.cache)
+            enrich_citations(make_papers(3), cache=self.cache, archive=archive, run_id="run-1")
+
+            self.api.batches.clear()
+            replayed = make_papers(3)
+            self.assertEqual(apply_archived_citations(replayed, archive, "run-1"), 3)
+            self.assertEqual(self.api.batches, [])
+            self.assertEqual([p.citation_count for p in replayed], [1, 2, 3])
+            with self.assertRaises(PayloadNotArchived):
+                apply_archived_citations(make_papers(1), archive, "run-2")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+条件请求（ETag/Last-Modified）测试用例
+"""
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from requests.structures import CaseInsensitiveDict
+
+from backend.utils.cache import SQLiteCache
+from backend.utils.conditional import ValidatorStore, conditional_get
+
+
+class FakeSession:
+    """按 If-None-Match 返回 200 或 304 的假会话"""
+
+    def __init__(self, etag='"v1"', body=b"<rss>v1</rss>"):
+        self.etag = etag
+        self.body = body
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get('If-None-Match') == self.etag:
+            return SimpleNamespace(status_code=304, headers=CaseInsensitiveDict(), content=b"")
+        return SimpleNamespace(
+            status_code=200,
+            headers=CaseInsensitiveDict({'ETag': self.etag, 'Last-Modified': 'Mon, 29 Dec 2025 08:00:00 GMT'}),
+            content=self.body
+        )
+
+
+class TestConditionalGet(unittest.TestCase):
+    """校验值持久化与 304 处理"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.cache = SQLiteCache(str(self.tmp_dir / "cache.db"))
+        self.store = ValidatorStore(self.cache)
+        self.session = FakeSession()
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_second_request_is_conditional(self):
+        """测试第二次请求携带校验值并得到 304，正文为空（跳过解析）"""
+        first = conditional_get("https://feed", self.session, self.store)
+        second = conditional_get("https://feed", self.session, self.store)
+
+        self.assertFalse(first.not_modified)
+        self.assertEqual(first.body, b"<rss>v1</rss>")
+        self.assertTrue(second.not_modified)
+        self.assertIsNone(second.body)
+        self.assertEqual(self.session.requests[1]['If-None-Match'], '"v1"')
+        self.assertIn('If-Modified-Since', self.session.requests[1])
+
+    def test_keep_body_returns_stored_copy(self):
+        """测试 keep_body 时 304 返回上次保存的正文（GitHub 搜索结果复用）"""
+        conditional_get("https://api", self.session, self.store, keep_body=True)
+        result = conditional_get("https://api", self.session, self.store, keep_body=True)
+        self.assertTrue(result.not_modified)
+        self.assertEqual(result.body, b"<rss>v1</rss>")
+
+    def test_send_validators_false_forces_full_download(self):
+        """测试 --refresh / 测试模式下不发送校验值"""
+        conditional_get("https://feed", self.session, self.store)
+        result = conditional_get("https://feed", self.session, self.store, send_validators=False)
+        self.assertFalse(result.not_modified)
+        self.assertNotIn('If-None-Match', self.session.requests[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
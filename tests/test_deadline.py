@@ -0,0 +1,109 @@
+"""
+运行时间预算测试用例
+"""
+import datetime
+import time
+import unittest
+from unittest.mock import patch
+
+from backend.cli import fetch_papers, FETCH_BUDGET_ERROR
+from backend.core.config import Config
+from backend.core.deadline import RunDeadline, StageBudget
+from backend.models import Paper, SourceResult
+from backend.sources.base import BaseSource
+
+
+class PagedSource(BaseSource):
+    """每页耗时固定、在预算用尽时截断分页的测试数据源"""
+
+    cache_ttl = 0
+
+    def __init__(self, name, page_seconds, pages=10, check_deadline=True):
+        super().__init__(name, window_days=1)
+        self.page_seconds = page_seconds
+        self.pages = pages
+        self.check_deadline = check_deadline
+
+    def fetch(self, sent_ids, exclude_keywords):
+        papers = []
+        for page in range(self.pages):
+            if self.check_deadline and page > 0 and self.deadline_exceeded():
+                self.truncate(f"分页在第{page + 1}页截断")
+                break
+            time.sleep(self.page_seconds)
+            papers.append(Paper(title=f"{self.name} {page}", abstract="", date="2025-12-30",
+                                source=self.name, doi=f"10.1/{self.name}{page}"))
+        return SourceResult(source_name=self.name, papers=papers)
+
+
+class TestRunDeadline(unittest.TestCase):
+    """阶段预算切分与截断"""
+
+    def setUp(self):
+        self.patches = [
+            patch.object(Config, 'ENABLE_CIRCUIT_BREAKER', False),
+            patch.object(Config, 'ENABLE_ASYNC_FETCH', False),
+            patch.object(Config, 'FETCH_BUDGET_GRACE_SECONDS', 0.2),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_stage_shares_roll_unused_time_forward(self):
+        """测试阶段按权重切分剩余时间，前一阶段节省的时间留给后续阶段"""
+        plan = RunDeadline(100, {'fetch': 0.4, 'quick_check': 0.1, 'report': 0.5})
+        fetch = plan.stage('fetch')
+        self.assertAlmostEqual(fetch.seconds, 40, delta=0.5)
+        # 抓取立即完成：剩余约 100 秒由快速筛选和报告按 1:5 分配
+        self.assertAlmostEqual(plan.stage('quick_check').seconds, 100 / 6, delta=0.5)
+
+    def test_deadline_from_target_time(self):
+        """测试按目标完成时间创建，过近的时间退回到总时间预算，都未设置时不限制"""
+        now = datetime.datetime(2025, 12, 30, 8, 30)
+        plan = RunDeadline.from_config("10:00", 120, now=now)
+        self.assertEqual(plan.total_seconds, 90 * 60)
+        self.assertEqual(RunDeadline.from_config("08:40", 60, now=now).total_seconds, 3600)
+        self.assertIsNone(RunDeadline.from_config("08:40", 0, now=now))
+        self.assertIsNone(RunDeadline.from_config("", 0, now=now))
+
+    def test_deadline_rolls_over_midnight(self):
+        """测试目标完成时间早于启动时间时按次日计算（23:30 启动、目标 06:00）"""
+        now = datetime.datetime(2025, 12, 30, 23, 30)
+        plan = RunDeadline.from_config("06:00", 0, now=now)
+        self.assertEqual(plan.total_seconds, 6.5 * 3600)
+        self.assertEqual(plan.deadline_at, datetime.datetime(2025, 12, 31, 6, 0))
+
+    def test_fetch_truncates_and_abandons_overrunning_sources(self):
+        """测试抓取阶段：遵守截止时间的数据源截断分页，不遵守的超过宽限期后被放弃"""
+        plan = RunDeadline(1.0, {'fetch': 0.3, 'quick_check': 0.0, 'report': 0.7})
+        budget = plan.stage('fetch')
+        sources = [
+            PagedSource("Fast", 0.01, pages=3),
+            PagedSource("Paged", 0.1),
+            PagedSource("Stuck", 1.0, pages=3, check_deadline=False),
+        ]
+
+        start = time.monotonic()
+        results = {r.source_name: r for r in fetch_papers(sources, set(), [], budget=budget)}
+
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(len(results['Fast'].papers), 3)
+        self.assertFalse(results['Fast'].is_degraded)
+        self.assertTrue(results['Paged'].is_degraded)
+        self.assertLess(len(results['Paged'].papers), 10)
+        self.assertEqual(results['Stuck'].error, FETCH_BUDGET_ERROR)
+        self.assertIn('fetch', plan.exhausted_stages())
+        self.assertIn("Stuck", plan.summary())
+
+    def test_expired_budget_allows_no_wait(self):
+        """测试已用尽的预算不允许任何重试等待"""
+        budget = StageBudget('report', 0)
+        self.assertTrue(budget.expired())
+        self.assertFalse(budget.allows_wait(0.1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Europe PMC cursorMark 分页测试用例
+"""
+import datetime
+import json
+import unittest
+from unittest.mock import Mock, patch
+from urllib.parse import parse_qs, urlsplit
+
+from backend.core.config import Config
+from backend.sources.europepmc import EuropePMCSource, RESULT_FIELDS
+
+TOTAL = 2500
+REFERENCE_DATE = datetime.date(2025, 12, 31)
+
+
+class FakeEuropePMCAPI:
+    """按 cursorMark 返回分页结果的搜索接口（游标含需要转义的字符）"""
+
+    def __init__(self, fail_page=None):
+        self.fail_page = fail_page
+        self.requests = []
+
+    @staticmethod
+    def _cursor(offset):
+        return f"AoE/{offset}+=" if offset else "*"
+
+    def get(self, url, **kwargs):
+        params = {k: v[0] for k, v in parse_qs(urlsplit(url).query).items()}
+        self.requests.append(params)
+        page_size = int(params['pageSize'])
+        offset = 0
+        while self._cursor(offset) != params['cursorMark']:
+            offset += page_size
+        if self.fail_page is not None and offset // page_size + 1 == self.fail_page:
+            response = Mock(status_code=500, headers={})
+            response.raise_for_status.side_effect = Exception("500 Server Error")
+            return response
+
+        results = [
+            {'id': str(i), 'title': f"Nitrogenase structure {i}", 'abstractText': "cryo-EM of nitrogenase",
+             'doi': f"10.1000/{i}", 'pmid': str(i), 'firstPublicationDate': "2025-12-30",
+             'authorList': {'author': [{'fullName': "A B"}] * 20}, 'meshHeadingList': {}}
+            for i in range(offset, min(offset + page_size, TOTAL))
+        ]
+        body = {'hitCount': TOTAL, 'nextCursorMark': self._cursor(offset + page_size),
+                'resultList': {'result': results}}
+        response = Mock(status_code=200, headers={}, content=json.dumps(body).encode())
+        response.raise_for_status.return_value = None
+        return response
+
+
+class TestEuropePMCCursorPaging(unittest.TestCase):
+    """cursorMark 深度分页与字段投影"""
+
+    def setUp(self):
+        patcher = patch.object(Config, 'ENABLE_CIRCUIT_BREAKER', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _fetch(self, api, page_size=1000):
+        source = EuropePMCSource(window_days=1, page_size=page_size)
+        source.reference_date = REFERENCE_DATE
+        with patch('backend.sources.europepmc.get_http_client', return_value=api):
+            return source.fetch(set(), [])
+
+    def test_cursor_pages_without_count_request(self):
+        """测试首页即给出总数，按游标依次请求各页，获取全部结果"""
+        api = FakeEuropePMCAPI()
+        result = self._fetch(api)
+
+        self.assertEqual([r['cursorMark'] for r in api.requests], ["*", "AoE/1000+=", "AoE/2000+="])
+        self.assertTrue(all(r['pageSize'] == "1000" and r['resultType'] == "core" for r in api.requests))
+        self.assertFalse(result.is_degraded)
+        self.assertEqual(len(result.papers), TOTAL)
+        self.assertEqual(result.papers[0].abstract, "cryo-EM of nitrogenase")
+
+    def test_page_size_capped(self):
+        """测试每页结果数不超过接口上限"""
+        source = EuropePMCSource(window_days=1, page_size=5000)
+        self.assertEqual(source.page_size, 1000)
+
+    def test_projects_result_fields(self):
+        """测试每页结果只保留用到的字段"""
+        source = EuropePMCSource(window_days=1, page_size=1000)
+        with patch('backend.sources.europepmc.get_http_client', return_value=FakeEuropePMCAPI()):
+            data = source._get_page("q", "*")
+        self.assertTrue(set(data['resultList']['result'][0]) <= set(RESULT_FIELDS))
+
+    def test_later_page_failure_marks_degraded(self):
+        """测试后续页面失败时保留已获取的论文并标记降级"""
+        with patch('backend.sources.base.BaseSource.max_attempts', return_value=1):
+            result = self._fetch(FakeEuropePMCAPI(fail_page=3))
+        self.assertTrue(result.is_degraded)
+        self.assertIsNone(result.error)
+        self.assertEqual(len(result.papers), 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
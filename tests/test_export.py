@@ -0,0 +1,111 @@
+"""
+Parquet 分析导出测试用例
+"""
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from backend.core.config import Config
+from backend.models import Paper, ScoredPaper, ScoreReason
+from backend.storage import get_db, init_db, PaperRepository
+from backend.storage.export import export_parquet, HAS_PYARROW
+
+if HAS_PYARROW:
+    import pyarrow.parquet as pq
+
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow 未安装")
+class TestParquetExport(unittest.TestCase):
+    """增量导出测试"""
+
+    def setUp(self):
+        """使用临时数据库和临时导出目录"""
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.export_dir = self.tmp_dir / "exports"
+        self.db_patch = patch.object(Config, 'DB_PATH', str(self.tmp_dir / "test.db"))
+        self.db_patch.start()
+        init_db()
+        self.repo = PaperRepository()
+
+    def tearDown(self):
+        self.db_patch.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _add_run(self, titles, source="bioRxiv", status='completed'):
+        """创建一次运行并保存评分"""
+        run_id = self.repo.create_run(1)
+        scored = [
+            ScoredPaper(
+                paper=Paper(title=t, abstract="abstract", date="2025-12-30", source=source, doi=f"10.1/{t}"),
+                score=60.0,
+                reasons=[ScoreReason("keyword_match", 60.0, "测试")]
+            )
+            for t in titles
+        ]
+        self.repo.save_scores(run_id, scored)
+        self.repo.update_run(run_id, status=status)
+        return run_id
+
+    def _read_rows(self, table):
+        """读取某张表导出的全部行"""
+        files = sorted((self.export_dir / table).rglob("*.parquet"))
+        rows = []
+        for f in files:
+            rows.extend(pq.read_table(f).to_pylist())
+        return rows
+
+    def test_export_partitions_by_date_and_source(self):
+        """测试按日期和数据源分区"""
+        self._add_run(["a", "b"], source="bioRxiv")
+        self._add_run(["c"], source="PubMed")
+
+        stats = export_parquet(str(self.export_dir))
+
+        self.assertEqual(stats['papers']['rows'], 3)
+        self.assertEqual(stats['scores']['rows'], 3)
+        self.assertEqual(stats['runs']['rows'], 2)
+        source_dirs = {p.name for p in (self.export_dir / "papers").glob("date=*/source=*")}
+        self.assertEqual(source_dirs, {"source=bioRxiv", "source=PubMed"})
+
+    def test_export_is_incremental(self):
+        """测试水位线：第二次导出只追加新行"""
+        self._add_run(["a"])
+        export_parquet(str(self.export_dir))
+
+        stats = export_parquet(str(self.export_dir))
+        self.assertEqual(stats['papers']['rows'], 0)
+
+        self._add_run(["b"])
+        stats = export_parquet(str(self.export_dir))
+        self.assertEqual(stats['papers']['rows'], 1)
+        self.assertEqual(sorted(r['title'] for r in self._read_rows('papers')), ["a", "b"])
+
+    def test_running_runs_are_deferred(self):
+        """测试仍在运行的记录不会被导出，结束后再导出"""
+        run_id = self._add_run(["a"], status='running')
+        stats = export_parquet(str(self.export_dir))
+        self.assertEqual(stats['runs']['rows'], 0)
+
+        self.repo.update_run(run_id, status='completed')
+        stats = export_parquet(str(self.export_dir))
+        self.assertEqual(stats['runs']['rows'], 1)
+        self.assertEqual(self._read_rows('runs')[0]['status'], 'completed')
+
+    def test_stale_running_run_does_not_block_export(self):
+        """测试进程被强制结束、长期停留在 running 的运行按最终状态导出，之后的运行照常导出"""
+        killed = self._add_run(["a"], status='running')
+        with get_db() as conn:
+            conn.execute("UPDATE runs SET start_time = ? WHERE run_id = ?",
+                         ((datetime.now() - timedelta(hours=48)).isoformat(), killed))
+        self._add_run(["b"])
+
+        stats = export_parquet(str(self.export_dir))
+        self.assertEqual(stats['runs']['rows'], 2)
+        self.assertEqual([r['status'] for r in self._read_rows('runs')], ['running', 'completed'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+多 feed 并发抓取测试用例
+"""
+import threading
+import time
+import unittest
+from collections import defaultdict
+
+from backend.sources.feeds import feed_domain, fetch_feeds, parse_feed_list
+
+
+class FakeFeedServer:
+    """按 URL 返回正文的 feed 服务，记录各域名的并发请求数"""
+
+    def __init__(self, latency=0.05, slow=(), failing=()):
+        self.latency = latency
+        self.slow = set(slow)
+        self.failing = set(failing)
+        self.lock = threading.Lock()
+        self.in_flight = defaultdict(int)
+        self.max_in_flight = defaultdict(int)
+        self.total = 0
+        self.max_total = 0
+
+    def download(self, url):
+        domain = feed_domain(url)
+        with self.lock:
+            self.in_flight[domain] += 1
+            self.total += 1
+            self.max_in_flight[domain] = max(self.max_in_flight[domain], self.in_flight[domain])
+            self.max_total = max(self.max_total, self.total)
+        try:
+            threading.Event().wait(1.5 if url in self.slow else self.latency)
+        finally:
+            with self.lock:
+                self.in_flight[domain] -= 1
+                self.total -= 1
+        if url in self.failing:
+            raise ConnectionError("feed unavailable")
+        return f"<rss>{url}</rss>".encode()
+
+
+NATURE = [f"https://www.nature.com/feed{i}.rss" for i in range(6)]
+CELL = [f"https://www.cell.com/feed{i}/rss" for i in range(3)]
+
+
+class TestFetchFeeds(unittest.TestCase):
+    """并发上限、单域名上限与整体截止时间"""
+
+    def test_concurrency_and_domain_limits(self):
+        """测试同一域名不超过单域名上限，总并发不超过总上限，全部 feed 完成"""
+        server = FakeFeedServer()
+        outcomes = list(fetch_feeds(NATURE + CELL, server.download, bytes.decode,
+                                    concurrency=3, per_domain=2, time_left=lambda: None))
+
+        self.assertEqual({o.url for o in outcomes}, set(NATURE + CELL))
+        self.assertTrue(all(o.error is None and not o.timed_out for o in outcomes))
+        self.assertLessEqual(server.max_in_flight['nature.com'], 2)
+        self.assertLessEqual(server.max_total, 3)
+        # 同一域名的 feed 排队时，其他域名的 feed 并行进行
+        self.assertEqual(server.max_total, 3)
+        outcome = next(o for o in outcomes if o.url == CELL[0])
+        self.assertEqual(outcome.parsed, f"<rss>{CELL[0]}</rss>")
+        self.assertEqual(outcome.size, len(outcome.parsed))
+        self.assertGreater(outcome.latency, 0)
+
+    def test_failure_does_not_stop_others(self):
+        """测试单个 feed 失败只影响自身"""
+        server = FakeFeedServer(failing={CELL[1]})
+        outcomes = {o.url: o for o in fetch_feeds(CELL, server.download, bytes.decode,
+                                                  concurrency=4, per_domain=4, time_left=lambda: None)}
+        self.assertIsInstance(outcomes[CELL[1]].error, ConnectionError)
+        self.assertEqual(outcomes[CELL[1]].stat()['status'], 'ConnectionError')
+        self.assertIsNone(outcomes[CELL[0]].error)
+
+    def test_deadline_marks_unfinished_feeds(self):
+        """测试截止时间到达后不等待慢 feed，未完成的 feed 标记为超时"""
+        server = FakeFeedServer(slow={NATURE[0]})
+        deadline = time.monotonic() + 0.5
+        start = time.monotonic()
+        outcomes = {o.url: o for o in fetch_feeds(
+            NATURE[:1] + CELL, server.download, bytes.decode, concurrency=4, per_domain=2,
+            time_left=lambda: max(deadline - time.monotonic(), 0.0)
+        )}
+
+        self.assertLess(time.monotonic() - start, 1.2)
+        self.assertTrue(outcomes[NATURE[0]].timed_out)
+        self.assertEqual(outcomes[NATURE[0]].stat()['status'], 'timeout')
+        self.assertTrue(all(not outcomes[url].timed_out for url in CELL))
+
+    def test_parse_feed_list(self):
+        """测试逗号/换行分隔的 feed 列表配置"""
+        self.assertEqual(parse_feed_list(" a.rss, ,b.rss\nc.rss "), ["a.rss", "b.rss", "c.rss"])
+        self.assertEqual(parse_feed_list(""), [])
+        self.assertEqual(feed_domain("https://science.sciencemag.org/rss/express.xml"), "sciencemag.org")
+
+
+if __name__ == '__main__':
+    unittest.main()
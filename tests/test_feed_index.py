@@ -0,0 +1,139 @@
+"""
+已见 feed 条目索引测试用例
+"""
+import datetime
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from backend.core.config import Config
+from backend.storage import init_db
+from backend.storage.feed_index import FeedEntryIndex
+from backend.sources.rss import RSSSource
+from backend.utils.cache import SQLiteCache
+from backend.utils.conditional import ValidatorStore
+from tests.test_conditional_get import FakeSession
+
+FEED = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Test</title>
+<item><guid>a</guid><title>Nitrogenase structure revealed</title><link>https://example.org/a</link>
+<description>nitrogen fixation</description><pubDate>Mon, 29 Dec 2025 08:00:00 GMT</pubDate></item>
+<item><guid>b</guid><title>Nitrogenase cofactor assembly</title><link>https://example.org/b</link>
+<description>nitrogen fixation</description><pubDate>Tue, 30 Dec 2025 08:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+
+class TestFeedEntryIndex(unittest.TestCase):
+    """索引读写与清理"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.db_patch = patch.object(Config, 'DB_PATH', str(self.tmp_dir / "test.db"))
+        self.db_patch.start()
+        init_db()
+        self.index = FeedEntryIndex()
+
+    def tearDown(self):
+        self.db_patch.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_entries_out_of_feed_are_pruned(self):
+        """测试滚出 feed 的条目从索引中删除"""
+        self.index.update("feed", ["a", "b"], ["a", "b"])
+        self.assertEqual(self.index.seen("feed"), {"a", "b"})
+
+        removed = self.index.update("feed", ["c"], ["b", "c"])
+        self.assertEqual(removed, 1)
+        self.assertEqual(self.index.seen("feed"), {"b", "c"})
+
+    def test_rss_skips_seen_entries_but_keeps_dated(self):
+        """测试 RSS 跳过已处理条目，只因日期被拒绝和已接受未推送的条目保留到下次运行"""
+        source = RSSSource(window_days=1)
+        source.feeds = ["https://example.org/feed"]
+        source.reference_date = datetime.date(2025, 12, 30)
+
+        with patch.object(RSSSource, '_fetch_feed', return_value=FEED.encode()):
+            first = source.fetch(set(), [])
+            feed_key = f"https://example.org/feed#{source.query_hash([])}"
+            self.assertEqual([p.title for p in first.papers], ["Nitrogenase structure revealed"])
+            # a 已接受但尚未推送，b 尚未进入窗口，均不记入索引
+            self.assertEqual(self.index.seen(feed_key), set())
+
+            # 第二天：a 已滚出窗口（只因日期被拒绝，仍不记入索引），b 进入窗口
+            source.reference_date = datetime.date(2025, 12, 31)
+            second = source.fetch(set(), [])
+            self.assertEqual([p.title for p in second.papers], ["Nitrogenase cofactor assembly"])
+            self.assertEqual(self.index.seen(feed_key), set())
+
+            # 第二天重跑：已推送的 b 记入索引，之后跳过
+            third = source.fetch({source.get_item_id(second.papers[0])}, [])
+        self.assertEqual(third.papers, [])
+        self.assertEqual(self.index.seen(feed_key), {"b"})
+
+    def test_rss_backfill_after_entries_left_window(self):
+        """测试之前因超出窗口被拒绝的条目，在补抓错过的日期时仍能被接受"""
+        source = RSSSource(window_days=1)
+        source.feeds = ["https://example.org/feed"]
+        source.reference_date = datetime.date(2026, 1, 1)
+
+        with patch.object(RSSSource, '_fetch_feed', return_value=FEED.encode()):
+            self.assertEqual(source.fetch(set(), []).papers, [])
+            backfill = RSSSource(window_days=1)
+            backfill.feeds = source.feeds
+            backfill.reference_date = datetime.date(2025, 12, 31)
+            result = backfill.fetch(set(), [])
+
+        self.assertEqual([p.title for p in result.papers], ["Nitrogenase cofactor assembly"])
+
+    def test_rss_same_day_rerun_keeps_unpushed_papers(self):
+        """测试同一天重跑（上次运行在抓取后失败、未推送）仍能得到上次接受的论文"""
+        source = RSSSource(window_days=1)
+        source.feeds = ["https://example.org/feed"]
+        source.reference_date = datetime.date(2025, 12, 30)
+
+        with patch.object(RSSSource, '_fetch_feed', return_value=FEED.encode()):
+            first = source.fetch(set(), [])
+            rerun = RSSSource(window_days=1)
+            rerun.feeds = source.feeds
+            rerun.reference_date = source.reference_date
+            second = rerun.fetch(set(), [])
+
+        self.assertEqual(len(first.papers), 1)
+        self.assertEqual([p.title for p in second.papers], [p.title for p in first.papers])
+
+    def test_rss_without_feedparser(self):
+        """测试未安装 feedparser 时，轻量解析器能解析的 feed 照常抓取"""
+        source = RSSSource(window_days=1)
+        source.feeds = ["https://example.org/feed"]
+        source.reference_date = datetime.date(2025, 12, 30)
+
+        with patch('backend.sources.feed_parser.HAS_FEEDPARSER', False), \
+                patch.object(Config, 'FAST_FEED_PARSER', True), \
+                patch.object(RSSSource, '_fetch_feed', return_value=FEED.encode()):
+            result = source.fetch(set(), [])
+        self.assertIsNone(result.error)
+        self.assertEqual([p.title for p in result.papers], ["Nitrogenase structure revealed"])
+
+    def test_rss_refilters_unchanged_feed(self):
+        """测试 feed 返回 304 时重新过滤保存的正文：前一天尚未进入窗口的条目第二天被接受"""
+        cache = SQLiteCache(str(self.tmp_dir / "cache.db"))
+        session = FakeSession(body=FEED.encode())
+        source = RSSSource(window_days=1)
+        source.feeds = ["https://example.org/feed"]
+        source.reference_date = datetime.date(2025, 12, 30)
+
+        with patch('backend.utils.conditional.get_validator_store', return_value=ValidatorStore(cache)), \
+                patch('backend.utils.http.get_http_client', return_value=session):
+            source.fetch(set(), [])
+            source.reference_date = datetime.date(2025, 12, 31)
+            second = source.fetch(set(), [])
+        cache.close()
+
+        self.assertIn('If-None-Match', session.requests[-1])
+        self.assertEqual([p.title for p in second.papers], ["Nitrogenase cofactor assembly"])
+
+
+if __name__ == '__main__':
+    unittest.main()
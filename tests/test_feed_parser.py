@@ -0,0 +1,99 @@
+"""
+轻量 RSS/Atom 解析测试用例
+"""
+import unittest
+from unittest.mock import patch
+
+from backend.core.config import Config
+from backend.sources.feed_parser import HAS_FEEDPARSER, ParsedFeed, parse_feed, parse_feed_fast
+
+# Science（RSS 2.0）：CDATA 中的 HTML 摘要、非永久链接 guid；第二条只有 guid、dc:date 和 content:encoded
+RSS20 = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel><title>Science</title><link>https://science.org</link>
+<item><title> Nitrogenase &amp; the  <![CDATA[FeMo]]> cofactor </title>
+<link>https://www.science.org/doi/10.1126/science.abc123</link>
+<description><![CDATA[<p>Structure of <i>nitrogenase</i> at 2 &Aring;.</p>]]></description>
+<guid isPermaLink="false">10.1126/science.abc123</guid>
+<pubDate>Tue, 30 Dec 2025 08:00:00 GMT</pubDate></item>
+<item><title>Only guid</title><guid>https://example.org/a/1</guid><dc:date>2025-12-30</dc:date>
+<content:encoded><![CDATA[<b>Full</b> text]]></content:encoded></item>
+</channel></rss>"""
+
+# Nature（RSS 1.0 / RDF）：rdf:about 作为 ID，摘要在 content:encoded 中
+RSS10 = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:prism="http://prismstandard.org/namespaces/basic/2.0/" xmlns:content="http://purl.org/rss/1.0/modules/content/">
+<channel rdf:about="http://feeds.nature.com/nplants/rss/current"><title>Nature Plants</title><link>https://www.nature.com/nplants</link></channel>
+<item rdf:about="https://www.nature.com/articles/s41477-025-01234-5">
+<title><![CDATA[Root nodule signalling]]></title>
+<link>https://www.nature.com/articles/s41477-025-01234-5</link>
+<content:encoded><![CDATA[<p>Nature Plants, Published online: 30 December 2025; <a href="https://www.nature.com/articles/s41477-025-01234-5">doi:10.1038/s41477-025-01234-5</a></p>Receptor kinase perception.]]></content:encoded>
+<dc:title><![CDATA[Root nodule signalling]]></dc:title>
+<dc:identifier>doi:10.1038/s41477-025-01234-5</dc:identifier>
+<dc:date>2025-12-30</dc:date>
+<prism:doi>10.1038/s41477-025-01234-5</prism:doi>
+</item></rdf:RDF>"""
+
+# Atom：转义的 HTML 标题/摘要，rel="alternate" 的链接
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Cell</title>
+<entry><id>tag:cell.com,2025:1</id><title type="html">Enzyme &lt;i&gt;mechanism&lt;/i&gt;</title>
+<link rel="related" href="https://x.org/rel"/><link href="https://www.cell.com/cell/fulltext/S0092-8674(25)00001-1"/>
+<summary type="html">&lt;p&gt;Cryo-EM of an enzyme.&lt;/p&gt;</summary>
+<published>2025-12-30T00:00:00Z</published><updated>2025-12-31T00:00:00Z</updated></entry>
+</feed>"""
+
+FIELDS = ('id', 'title', 'summary', 'link', 'published', 'updated')
+
+
+@unittest.skipUnless(HAS_FEEDPARSER, "feedparser 未安装")
+class TestFastFeedParser(unittest.TestCase):
+    """轻量解析与 feedparser 的字段一致性及回退"""
+
+    def assert_same_as_feedparser(self, body, version):
+        import feedparser
+        expected = feedparser.parse(body)
+        parsed = parse_feed_fast(body)
+
+        self.assertIsNotNone(parsed)
+        self.assertEqual(parsed.version, version)
+        self.assertEqual(len(parsed.entries), len(expected.entries))
+        for fast_entry, entry in zip(parsed.entries, expected.entries):
+            for field in FIELDS:
+                self.assertEqual(fast_entry.get(field), entry.get(field), field)
+
+    def test_rss20(self):
+        """测试 RSS 2.0 字段与 feedparser 一致"""
+        self.assert_same_as_feedparser(RSS20, 'rss20')
+
+    def test_rss10(self):
+        """测试 RSS 1.0（Nature）字段与 feedparser 一致"""
+        self.assert_same_as_feedparser(RSS10, 'rss10')
+
+    def test_atom(self):
+        """测试 Atom 字段与 feedparser 一致"""
+        self.assert_same_as_feedparser(ATOM, 'atom10')
+
+    def test_attribute_access(self):
+        """测试条目支持属性访问，缺少的字段抛出 AttributeError"""
+        entry = parse_feed_fast(RSS20).entries[1]
+        self.assertEqual(entry.title, "Only guid")
+        self.assertFalse(hasattr(entry, 'doi'))
+
+    def test_falls_back_to_feedparser(self):
+        """测试非格式良好的 XML（未声明的 HTML 实体）退回 feedparser"""
+        body = b"<rss version='2.0'><channel><item><title>A&nbsp;B</title><link>https://x.org/1</link></item></channel></rss>"
+        self.assertIsNone(parse_feed_fast(body))
+        parsed = parse_feed(body)
+        self.assertEqual(parsed.entries[0].link, "https://x.org/1")
+
+    def test_disabled(self):
+        """测试关闭 FAST_FEED_PARSER 时使用 feedparser"""
+        with patch.object(Config, 'FAST_FEED_PARSER', False):
+            parsed = parse_feed(RSS20)
+        self.assertNotIsInstance(parsed, ParsedFeed)
+        self.assertEqual(len(parsed.entries), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
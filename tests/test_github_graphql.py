@@ -0,0 +1,110 @@
+"""
+GitHub GraphQL 批量检索与仓库元数据缓存测试用例
+"""
+import datetime
+import json
+import re
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from backend.core.config import Config
+from backend.storage import init_db
+from backend.sources.github import GitHubSource, graphql_search_query
+
+YESTERDAY = (datetime.date.today() - datetime.timedelta(days=1)).strftime('%Y-%m-%dT08:00:00Z')
+
+
+class FakeGraphQL:
+    """GraphQL 接口：每个别名 search 返回两个仓库，nodes 查询按 id 返回完整字段"""
+
+    def __init__(self, updated_at=YESTERDAY):
+        self.updated_at = updated_at
+        self.queries = []
+
+    def post(self, url, **kwargs):
+        query = kwargs['json']['query']
+        self.queries.append(query)
+        if 'nodes(ids:' in query:
+            ids = json.loads(re.search(r'ids: (\[.*?\])', query).group(1))
+            data = {'nodes': [{
+                'id': node_id, 'name': f"nitrogenase-{node_id}", 'description': "nitrogen fixation tool",
+                'url': f"https://github.com/lab/{node_id}", 'updatedAt': self.updated_at,
+                'repositoryTopics': {'nodes': [{'topic': {'name': 'bioinformatics'}}]},
+            } for node_id in ids]}
+        else:
+            aliases = re.findall(r'(q\d+): search', query)
+            data = {alias: {'nodes': [{'id': f"R_{alias}_{i}", 'updatedAt': self.updated_at} for i in range(2)]}
+                    for alias in aliases}
+            data['rateLimit'] = {'cost': 1, 'remaining': 4999, 'resetAt': ''}
+        response = Mock(status_code=200, text='', headers={})
+        response.json.return_value = {'data': data}
+        response.raise_for_status.return_value = None
+        return response
+
+
+class TestGitHubGraphQL(unittest.TestCase):
+    """合并搜索、按 node id 缓存与 REST 回退"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.server = FakeGraphQL()
+        self.ledger = Mock()
+        self.patches = [
+            patch.object(Config, 'DB_PATH', str(self.tmp_dir / "test.db")),
+            patch.object(Config, 'GITHUB_TOKEN', "test-token"),
+            patch('backend.sources.github.get_http_client', return_value=self.server),
+            patch('backend.sources.github.get_adaptive_limiter', return_value=Mock()),
+            patch('backend.sources.github.get_quota_ledger', return_value=self.ledger),
+        ]
+        for p in self.patches:
+            p.start()
+        init_db()
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_batched_search_and_node_cache(self):
+        """测试 15 个检索词合并为一次搜索+一次 nodes 查询，再次抓取时未更新的仓库直接复用缓存"""
+        source = GitHubSource(use_graphql=True, graphql_batch_size=15)
+        result = source.fetch(set(), [])
+
+        self.assertTrue(result.success())
+        self.assertEqual(len(self.server.queries), 2)
+        self.assertEqual(len(result.papers), 2 * len(source.queries))
+        self.assertTrue(result.papers[0].title.startswith("GitHub工具: nitrogenase-"))
+        self.assertTrue(result.papers[0].link.startswith("https://github.com/lab/"))
+        # GraphQL 点数单独计算，不占用 REST 搜索的配额
+        self.assertEqual({c.args[0] for c in self.ledger.acquire.call_args_list}, {'github_graphql'})
+
+        # 第二次抓取：搜索结果的 updatedAt 未变，不再请求 nodes
+        self.server.queries.clear()
+        second = GitHubSource(use_graphql=True).fetch(set(), [])
+        self.assertEqual(len(self.server.queries), 1)
+        self.assertEqual(len(second.papers), len(result.papers))
+
+        # 仓库有更新：重新获取
+        self.server.queries.clear()
+        self.server.updated_at = YESTERDAY.replace('08:00', '09:00')
+        GitHubSource(use_graphql=True).fetch(set(), [])
+        self.assertEqual(len(self.server.queries), 2)
+
+    def test_batch_size_and_rest_fallback(self):
+        """测试按批大小拆分请求；未配置 Token 时使用 REST 模式"""
+        source = GitHubSource(use_graphql=True, graphql_batch_size=4)
+        source.fetch(set(), [])
+        searches = [q for q in self.server.queries if 'search(' in q]
+        self.assertEqual(len(searches), 4)
+        self.assertIn('"nitrogen fixation sort:updated-desc"', graphql_search_query(["nitrogen+fixation"]))
+
+        with patch.object(Config, 'GITHUB_TOKEN', ""):
+            self.assertFalse(source.graphql_enabled())
+        self.assertFalse(GitHubSource(use_graphql=False).graphql_enabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
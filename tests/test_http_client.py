@@ -0,0 +1,102 @@
+"""
+共享 HTTP 客户端测试用例
+"""
+import asyncio
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.utils.http import HTTPClient, HTTPMetrics
+from backend.utils.async_http import AsyncHTTPClient, HAS_HTTPX
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            with _Handler.lock:
+                _Handler.in_flight += 1
+                _Handler.max_in_flight = max(_Handler.max_in_flight, _Handler.in_flight)
+            time.sleep(0.05)
+            with _Handler.lock:
+                _Handler.in_flight -= 1
+        body = b"x" * 100
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHTTPClientMetrics(unittest.TestCase):
+    """按主机统计的连接复用与延迟"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_keep_alive_connections_are_reused(self):
+        """测试同一主机的连续请求复用连接并记录字节数和延迟分布"""
+        client = HTTPClient()
+        for _ in range(5):
+            client.get(self.url).raise_for_status()
+
+        host = self.url.split("/")[2]
+        metrics = client.metrics()[host]
+        client.close()
+
+        self.assertEqual(metrics['requests'], 5)
+        self.assertEqual(metrics['new_connections'], 1)
+        self.assertEqual(metrics['reuse_ratio'], 0.8)
+        self.assertEqual(metrics['bytes_received'], 500)
+        self.assertEqual(sum(metrics['latency_histogram'].values()), 5)
+
+    def test_streamed_body_is_not_read_for_metrics(self):
+        """测试 stream=True 的请求不为统计字节数读取正文，按 Content-Length 记录"""
+        client = HTTPClient()
+        response = client.get(self.url, stream=True)
+        self.assertFalse(response._content_consumed)
+        self.assertEqual(response.raw.read(), b"x" * 100)
+
+        metrics = client.metrics()[self.url.split("/")[2]]
+        client.close()
+        self.assertEqual(metrics['bytes_received'], 100)
+
+    @unittest.skipUnless(HAS_HTTPX, "httpx 未安装")
+    def test_async_client_respects_per_host_limit(self):
+        """测试异步客户端并发请求不超过单主机上限，并记录到同一指标表"""
+        metrics = HTTPMetrics()
+
+        async def run():
+            async with AsyncHTTPClient(per_host_limit=2, metrics=metrics) as client:
+                responses = await asyncio.gather(*(client.get(f"{self.url}slow/{i}") for i in range(6)))
+            return [r.status_code for r in responses]
+
+        _Handler.max_in_flight = 0
+        self.assertEqual(asyncio.run(run()), [200] * 6)
+        self.assertLessEqual(_Handler.max_in_flight, 2)
+
+        host = self.url.split("/")[2]
+        snapshot = metrics.snapshot()[host]
+        self.assertEqual(snapshot['requests'], 6)
+        self.assertEqual(snapshot['new_connections'], 2)
+        self.assertEqual(snapshot['protocols'], {'HTTP/1.1': 6})
+
+
+if __name__ == '__main__':
+    unittest.main()
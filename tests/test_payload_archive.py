@@ -0,0 +1,66 @@
+"""
+原始响应归档与回放测试用例
+"""
+import datetime
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from backend.core.config import Config
+from backend.storage import init_db
+from backend.storage.archive import PayloadArchive, PayloadNotArchived
+from backend.sources.rss import RSSSource
+
+
+class TestPayloadArchive(unittest.TestCase):
+    """内容寻址归档测试"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.db_patch = patch.object(Config, 'DB_PATH', str(self.tmp_dir / "test.db"))
+        self.db_patch.start()
+        init_db()
+        self.archive = PayloadArchive(str(self.tmp_dir / "archive"))
+
+    def tearDown(self):
+        self.db_patch.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_put_and_get_roundtrip(self):
+        """测试归档后按请求键取回原文"""
+        body = b'{"collection": []}' * 100
+        self.archive.put("run-1", "bioRxiv", "https://example.org/0", body, "2025-12-29", "2025-12-29")
+        self.assertEqual(self.archive.get("run-1", "bioRxiv", "https://example.org/0"), body)
+
+    def test_identical_bodies_are_stored_once(self):
+        """测试相同内容只保存一份正文"""
+        body = b"<rss>same</rss>"
+        self.archive.put("run-1", "RSS_TopJournal", "feed-a", body)
+        self.archive.put("run-2", "RSS_TopJournal", "feed-a", body)
+        objects = list((self.tmp_dir / "archive" / "objects").rglob("*.*"))
+        self.assertEqual(len(objects), 1)
+
+    def test_missing_payload_raises(self):
+        """测试回放缺失的请求时抛出 PayloadNotArchived"""
+        with self.assertRaises(PayloadNotArchived):
+            self.archive.get("run-1", "bioRxiv", "missing")
+
+    def test_source_replay_skips_network(self):
+        """测试回放模式下数据源只读取归档，不调用网络"""
+        source = RSSSource(window_days=1)
+        source.attach_archive(self.archive, "run-1", reference_date=datetime.date(2025, 12, 30))
+        source._fetch_raw("feed-a", lambda: b"<rss>archived</rss>")
+
+        network = Mock()
+        source.attach_archive(self.archive, "run-1", replay=True)
+        self.assertEqual(source._fetch_raw("feed-a", network), b"<rss>archived</rss>")
+        network.assert_not_called()
+
+        sources = self.archive.list_run_sources("run-1")
+        self.assertEqual(sources[0]['window_start'], "2025-12-29")
+
+
+if __name__ == '__main__':
+    unittest.main()
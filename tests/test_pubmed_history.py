@@ -0,0 +1,197 @@
+"""
+PubMed History 服务器分批获取与流式解析测试用例
+"""
+import datetime
+import io
+import threading
+import unittest
+from unittest.mock import patch
+
+from backend.core.config import Config
+from backend.sources.pubmed import PubMedSource, HAS_BIOPYTHON, iter_pubmed_articles
+
+TOTAL = 1230
+REFERENCE_DATE = datetime.date(2025, 12, 31)
+
+
+class FakeEntrez:
+    """
+    模拟 esearch（usehistory，_entrez_read）与 esummary/efetch（retstart/retmax 或 id 列表，_entrez_raw），
+    记录调用与并发数；PMID 为 3 的倍数的论文标题命中排除词 review
+    """
+
+    def __init__(self, latency=0.05, fail_starts=()):
+        self.latency = latency
+        self.fail_starts = set(fail_starts)
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, endpoint, **params):
+        with self.lock:
+            self.calls.append((endpoint, params))
+        if endpoint == "esearch":
+            return {"Count": str(TOTAL), "IdList": [], "WebEnv": "MCID_test", "QueryKey": "1"}
+
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            threading.Event().wait(self.latency)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+        if "id" in params:
+            indexes = [int(pmid) - 40000000 for pmid in params["id"].split(",")]
+        else:
+            start = params["retstart"]
+            if start in self.fail_starts:
+                raise ConnectionError(f"{endpoint} failed")
+            indexes = range(start, min(start + params["retmax"], TOTAL))
+        if endpoint == "esummary":
+            summaries = "".join(self._summary(i) for i in indexes)
+            return f"<?xml version='1.0'?><eSummaryResult>{summaries}</eSummaryResult>".encode()
+        articles = "".join(self._article(i) for i in indexes)
+        return f"<?xml version='1.0'?><PubmedArticleSet>{articles}</PubmedArticleSet>".encode()
+
+    @staticmethod
+    def _title(i):
+        return f"Tomato fruit review {i}" if i % 3 == 0 else f"Nitrogenase structure {i}"
+
+    @classmethod
+    def _summary(cls, i):
+        return (
+            f"<DocSum><Id>{40000000 + i}</Id>"
+            f"<Item Name=\"Title\" Type=\"String\">{cls._title(i)}</Item>"
+            f"<Item Name=\"DOI\" Type=\"String\">10.1000/{i}</Item></DocSum>"
+        )
+
+    @classmethod
+    def _article(cls, i):
+        return (
+            f"<PubmedArticle><MedlineCitation><PMID>{40000000 + i}</PMID>"
+            "<DateCompleted><Year>2025</Year><Month>12</Month><Day>30</Day></DateCompleted>"
+            f"<Article><ArticleTitle>{cls._title(i)}</ArticleTitle>"
+            "<Abstract><AbstractText>cryo-EM structure of nitrogenase</AbstractText></Abstract>"
+            "</Article></MedlineCitation><PubmedData><ArticleIdList>"
+            f"<ArticleId IdType=\"doi\">10.1000/{i}</ArticleId></ArticleIdList></PubmedData></PubmedArticle>"
+        )
+
+
+@unittest.skipUnless(HAS_BIOPYTHON, "biopython 未安装")
+class TestPubMedHistoryFetch(unittest.TestCase):
+    """通过 WebEnv/query_key 分批并发获取详细信息"""
+
+    def setUp(self):
+        patcher = patch.object(Config, 'ENABLE_CIRCUIT_BREAKER', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _fetch(self, entrez, sent_ids=(), exclude_keywords=(), **kwargs):
+        kwargs.setdefault('two_phase', False)
+        source = PubMedSource(window_days=1, **kwargs)
+        source.reference_date = REFERENCE_DATE
+        with patch.object(source, '_entrez_read', side_effect=entrez), \
+                patch.object(source, '_entrez_raw', side_effect=entrez):
+            return source.fetch(set(sent_ids), list(exclude_keywords))
+
+    def test_single_esearch_and_batched_efetch(self):
+        """测试只调用一次 esearch，efetch 按 retstart 分批引用 History 服务器结果，顺序与检索一致"""
+        entrez = FakeEntrez()
+        result = self._fetch(entrez, efetch_batch_size=500, efetch_concurrency=3)
+
+        esearch = [params for endpoint, params in entrez.calls if endpoint == "esearch"]
+        efetch = [params for endpoint, params in entrez.calls if endpoint == "efetch"]
+        self.assertEqual(len(esearch), 1)
+        self.assertEqual(esearch[0]["usehistory"], "y")
+        self.assertEqual(sorted(p["retstart"] for p in efetch), [0, 500, 1000])
+        self.assertTrue(all(p["webenv"] == "MCID_test" and p["query_key"] == "1" for p in efetch))
+
+        self.assertFalse(result.is_degraded)
+        self.assertEqual(len(result.papers), TOTAL)
+        self.assertEqual(result.papers[0].link, "https://pubmed.ncbi.nlm.nih.gov/40000000/")
+        self.assertEqual(result.papers[-1].link, f"https://pubmed.ncbi.nlm.nih.gov/{40000000 + TOTAL - 1}/")
+
+    def test_concurrency_limit(self):
+        """测试 efetch 并发不超过上限"""
+        entrez = FakeEntrez()
+        self._fetch(entrez, efetch_batch_size=100, efetch_concurrency=2)
+        self.assertGreater(entrez.max_in_flight, 1)
+        self.assertLessEqual(entrez.max_in_flight, 2)
+
+    def test_failed_batch_marks_degraded(self):
+        """测试某一批失败时保留其余批次的论文并标记降级"""
+        result = self._fetch(FakeEntrez(fail_starts={500}), efetch_batch_size=500, efetch_concurrency=3)
+        self.assertTrue(result.is_degraded)
+        self.assertIn("1/3 批", result.degraded_reason)
+        self.assertEqual(len(result.papers), TOTAL - 500)
+
+    def test_two_phase_fetches_abstracts_only_for_candidates(self):
+        """测试两阶段模式按标题预筛后只为候选论文获取摘要，结果与单阶段一致"""
+        sent_ids = {"DOI:10.1000/1", "DOI:10.1000/2"}
+        single = self._fetch(FakeEntrez(), sent_ids, ["review"], efetch_batch_size=500)
+        entrez = FakeEntrez()
+        result = self._fetch(entrez, sent_ids, ["review"], two_phase=True,
+                             summary_batch_size=1000, efetch_batch_size=300)
+
+        summary_calls = [params for endpoint, params in entrez.calls if endpoint == "esummary"]
+        fetched_ids = [pmid for endpoint, params in entrez.calls if endpoint == "efetch"
+                       for pmid in params["id"].split(",")]
+        expected = [str(40000000 + i) for i in range(TOTAL) if i % 3 != 0 and i not in (1, 2)]
+        self.assertEqual(len(summary_calls), 2)
+        self.assertEqual(sorted(fetched_ids), sorted(expected))
+
+        self.assertFalse(result.is_degraded)
+        self.assertEqual([p.doi for p in result.papers], [p.doi for p in single.papers])
+        self.assertEqual(len(result.papers), len(expected))
+
+
+class TestIterPubMedArticles(unittest.TestCase):
+    """efetch XML 的增量解析"""
+
+    def test_extracts_fields(self):
+        """测试提取标题（含内联标记）、分段摘要、日期回退和 DOI"""
+        xml = b"""<?xml version="1.0"?>
+<!DOCTYPE PubmedArticleSet PUBLIC "-//NLM//DTD PubMedArticle, 1st January 2025//EN" "https://dtd.nlm.nih.gov/ncbi/pubmed/out/pubmed_250101.dtd">
+<PubmedArticleSet>
+  <PubmedArticle>
+    <MedlineCitation><PMID Version="1">123</PMID>
+      <Article>
+        <ArticleTitle>Structure of <i>nif</i> nitrogenase</ArticleTitle>
+        <Abstract>
+          <AbstractText Label="BACKGROUND">Nitrogen fixation.</AbstractText>
+          <AbstractText Label="RESULTS">A 2.1 &#197; map.</AbstractText>
+        </Abstract>
+        <ArticleDate DateType="Electronic"><Year>2025</Year><Month>3</Month><Day>7</Day></ArticleDate>
+      </Article>
+    </MedlineCitation>
+    <PubmedData><ArticleIdList>
+      <ArticleId IdType="pubmed">123</ArticleId>
+      <ArticleId IdType="doi">10.1000/xyz</ArticleId>
+    </ArticleIdList></PubmedData>
+  </PubmedArticle>
+  <PubmedArticle>
+    <MedlineCitation><PMID Version="1">456</PMID>
+      <DateCompleted><Year>2025</Year><Month>04</Month><Day>01</Day></DateCompleted>
+      <Article><ArticleTitle>No abstract</ArticleTitle></Article>
+    </MedlineCitation>
+  </PubmedArticle>
+</PubmedArticleSet>"""
+        articles = list(iter_pubmed_articles(io.BytesIO(xml)))
+
+        self.assertEqual(len(articles), 2)
+        self.assertEqual(articles[0], {
+            'pmid': '123',
+            'title': 'Structure of nif nitrogenase',
+            'abstract': 'Nitrogen fixation. A 2.1 \u00c5 map.',
+            'date': '2025-03-07',
+            'doi': '10.1000/xyz',
+        })
+        self.assertEqual(articles[1]['date'], '2025-04-01')
+        self.assertEqual(articles[1]['abstract'], '')
+        self.assertEqual(articles[1]['doi'], '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+服务端检索式编译测试用例
+"""
+import unittest
+from unittest.mock import patch
+
+from backend.core.config import Config
+from backend.core.filtering import should_exclude_paper
+from backend.models import Paper
+from backend.core.query_compiler import compile_europepmc_query, compile_pubmed_query, unique_terms
+
+TOPICS = {
+    "Nitrogen_Fixation": ["nitrogenase", "Nitrogenase", "root nodule"],
+    "Custom": ["ROS burst", ""],
+}
+
+
+class TestQueryCompiler(unittest.TestCase):
+    """主题词、字段限定与 NOT 子句"""
+
+    def test_pubmed_query(self):
+        """测试 PubMed 检索式：MeSH + [tiab] 主题词、日期范围、排除词不含结构关键词时才排除"""
+        with patch.object(Config, 'QUERY_EXCLUDE_PUSHDOWN', True):
+            query = compile_pubmed_query("2024/05/01", "2024/05/01", ["mouse", "patient"],
+                                         topics=TOPICS, structure_keywords=["cryo-em"])
+        self.assertEqual(
+            query,
+            '(("Nitrogen Fixation"[Mesh] OR "Nitrogenase"[Mesh] OR "nitrogenase"[tiab] OR "root nodule"[tiab]) '
+            'OR ("ROS burst"[tiab])) '
+            'AND ("2024/05/01"[Date - Publication] : "2024/05/01"[Date - Publication]) '
+            'NOT (("mouse"[tiab] OR "patient"[tiab]) NOT ("cryo-em*"[tiab]))'
+        )
+
+    def test_europepmc_query(self):
+        """测试 Europe PMC 检索式使用 TITLE_ABS 分组写法"""
+        with patch.object(Config, 'QUERY_EXCLUDE_PUSHDOWN', True):
+            query = compile_europepmc_query("2024-05-01", "2024-05-01", ["mouse"],
+                                            topics=TOPICS, structure_keywords=[])
+        self.assertEqual(
+            query,
+            'FIRST_PDATE:[2024-05-01 TO 2024-05-01] AND '
+            '(TITLE_ABS:("nitrogenase" OR "root nodule") OR TITLE_ABS:("ROS burst")) '
+            'NOT TITLE_ABS:("mouse")'
+        )
+
+    def test_exemption_terms_are_truncated(self):
+        """测试本地按子串豁免的复数等写法（"crystal structures"）不会在服务端被排除"""
+        paper = Paper(title="Crystal structures of nitrogenase from rats", abstract="", date="2024-05-01",
+                      source="PubMed")
+        self.assertFalse(should_exclude_paper(paper, ["rats"]))
+
+        with patch.object(Config, 'QUERY_EXCLUDE_PUSHDOWN', True):
+            pubmed = compile_pubmed_query("2024/05/01", "2024/05/01", ["rats"], topics=TOPICS,
+                                          structure_keywords=["crystal structure", "cryo-em"])
+            europepmc = compile_europepmc_query("2024-05-01", "2024-05-01", ["rats"], topics=TOPICS,
+                                                structure_keywords=["crystal structure", "nlr"])
+            # PubMed 截词至少 4 个字符："nlr" 展开为原词和 "nlr?*"；更短的词无法表达，不下推排除词
+            short = compile_pubmed_query("2024/05/01", "2024/05/01", ["rats"], topics=TOPICS,
+                                         structure_keywords=["crystal structure", "nlr"])
+            too_short = compile_pubmed_query("2024/05/01", "2024/05/01", ["rats"], topics=TOPICS,
+                                             structure_keywords=["crystal structure", "em"])
+        self.assertTrue(pubmed.endswith('NOT (("rats"[tiab]) NOT ("crystal structure*"[tiab] OR "cryo-em*"[tiab]))'))
+        self.assertTrue(europepmc.endswith('NOT (TITLE_ABS:("rats") NOT TITLE_ABS:((crystal AND structure*) OR nlr*))'))
+        self.assertIn('NOT ("crystal structure*"[tiab] OR "nlr"[tiab] OR "nlra*"[tiab] OR "nlrb*"[tiab]', short)
+        self.assertIn('"nlrp*"[tiab]', short)
+        self.assertTrue(short.endswith('"nlr9*"[tiab]))'))
+        self.assertNotIn(" NOT ", too_short)
+
+    def test_pushdown_disabled_and_config_topics(self):
+        """测试关闭排除词下推时没有 NOT 子句；默认使用 Config 中的全部主题词"""
+        with patch.object(Config, 'QUERY_EXCLUDE_PUSHDOWN', False):
+            query = compile_pubmed_query("2024/05/01", "2024/05/01", Config.EXCLUDE_KEYWORDS)
+        self.assertNotIn(" NOT ", query)
+        for keyword in ("biological nitrogen fixation", "FLS2", "metalloenzyme"):
+            self.assertIn(f'"{keyword}"[tiab]', query)
+        self.assertEqual(unique_terms([' PRR ', 'prr', 'say "hi"']), ['PRR', 'say hi'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+跨进程配额账本测试用例
+"""
+import multiprocessing
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from backend.core.config import Config
+from backend.storage import init_db
+from backend.storage.quota import QuotaLedger, QuotaSpec
+from backend.utils.rate_limit import RateLimited
+
+
+def _take_tokens(db_path, count, queue):
+    """子进程：从共享账本中取 count 个令牌，返回不需要等待的次数"""
+    with patch.object(Config, 'DB_PATH', db_path):
+        ledger = QuotaLedger({'ncbi': QuotaSpec(10, 1)}, enabled=True)
+        queue.put(sum(1 for _ in range(count) if ledger._reserve('ncbi', 'key', 1, None) == 0))
+
+
+class TestQuotaLedger(unittest.TestCase):
+    """令牌桶限额在进程间共享"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.db_path = str(self.tmp_dir / "test.db")
+        self.db_patch = patch.object(Config, 'DB_PATH', self.db_path)
+        self.db_patch.start()
+        init_db()
+        self.ledger = QuotaLedger({'github': QuotaSpec(30, 60, anonymous_calls=10)}, enabled=True)
+
+    def tearDown(self):
+        self.db_patch.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_bucket_capacity_depends_on_credential(self):
+        """测试匿名与带 Token 的桶分别计算，额度用完后超过 max_wait 直接拒绝"""
+        for _ in range(10):
+            self.assertEqual(self.ledger.acquire('github', None, max_wait=0), 0)
+        with self.assertRaises(RateLimited):
+            self.ledger.acquire('github', None, max_wait=1)
+        self.assertEqual(self.ledger.acquire('github', 'token', max_wait=0), 0)
+
+        usage = {item['credential']: item for item in self.ledger.usage()}
+        self.assertEqual(usage['anonymous']['granted'], 10)
+        self.assertEqual(usage['anonymous']['denied'], 1)
+        self.assertEqual(usage['anonymous']['recent_granted'], 10)
+        self.assertNotIn('token', usage)
+
+    def test_exhausted_bucket_waits_for_refill(self):
+        """测试令牌不足时预支并等待补充"""
+        ledger = QuotaLedger({'ncbi': QuotaSpec(3, 1)}, enabled=True)
+        for _ in range(3):
+            ledger.acquire('ncbi')
+        start = time.monotonic()
+        waited = ledger.acquire('ncbi')
+        self.assertAlmostEqual(waited, 1 / 3, delta=0.05)
+        self.assertGreaterEqual(time.monotonic() - start, waited - 0.01)
+
+    def test_processes_share_one_bucket(self):
+        """测试多个进程合计取到的即时令牌不超过桶容量"""
+        ctx = multiprocessing.get_context('spawn')
+        queue = ctx.Queue()
+        workers = [ctx.Process(target=_take_tokens, args=(self.db_path, 8, queue)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=60)
+        immediate = queue.get(timeout=5) + queue.get(timeout=5)
+        # 两个进程共取 16 次，容量 10（子进程启动期间可能补充少量令牌）
+        self.assertLess(immediate, 16)
+        self.assertGreaterEqual(immediate, 10)
+
+    def test_disabled_ledger_never_waits(self):
+        """测试关闭账本时不限流"""
+        ledger = QuotaLedger({'ncbi': QuotaSpec(1, 60)}, enabled=False)
+        self.assertEqual(sum(ledger.acquire('ncbi') for _ in range(5)), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
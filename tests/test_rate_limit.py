@@ -0,0 +1,84 @@
+"""
+自适应限流器测试用例
+"""
+import asyncio
+import time
+import unittest
+from types import SimpleNamespace
+
+from backend.utils.rate_limit import AdaptiveRateLimiter, RateLimited, parse_retry_after
+
+URL = "https://api.github.com/search/repositories?q=nitrogen"
+
+
+def _response(status_code=200, **headers):
+    """只含状态码和响应头的假响应"""
+    return SimpleNamespace(status_code=status_code, headers=headers)
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+    """根据服务端反馈调整请求节奏"""
+
+    def test_plentiful_quota_is_not_paced(self):
+        """测试剩余额度充足时连续请求无需等待"""
+        limiter = AdaptiveRateLimiter(default_rate=0.1)
+        limiter.acquire(URL)
+        reset = str(int(time.time()) + 60)
+        limiter.update(URL, _response(**{'X-RateLimit-Remaining': '29', 'X-RateLimit-Reset': reset}))
+
+        waited = sum(limiter.acquire(URL) for _ in range(10))
+        self.assertEqual(waited, 0)
+        self.assertEqual(limiter.snapshot()['api.github.com']['remaining'], 19)
+
+    def test_exhausted_quota_waits_for_reset(self):
+        """测试额度耗尽时等待重置，超过 max_wait 则直接放弃"""
+        limiter = AdaptiveRateLimiter()
+        reset = str(int(time.time()) + 120)
+        limiter.update(URL, _response(403, **{'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': reset}),
+                       throttled=True)
+
+        with self.assertRaises(RateLimited) as ctx:
+            limiter.acquire(URL, max_wait=65)
+        self.assertGreater(ctx.exception.wait, 100)
+
+    def test_retry_after_blocks_and_halves_rate(self):
+        """测试 429 + Retry-After 阻塞该主机并降低速率"""
+        limiter = AdaptiveRateLimiter(default_rate=2.0)
+        limiter.update(URL, _response(429, **{'Retry-After': '30'}))
+
+        state = limiter.snapshot()['api.github.com']
+        self.assertEqual(state['rate'], 1.0)
+        self.assertGreater(state['blocked_for'], 25)
+        with self.assertRaises(RateLimited):
+            limiter.acquire(URL, max_wait=1)
+
+    def test_limits_are_per_credential(self):
+        """测试不同凭据的额度互不影响"""
+        limiter = AdaptiveRateLimiter()
+        limiter.update(URL, _response(429, **{'Retry-After': '30'}), credential="token-a")
+
+        self.assertEqual(limiter.acquire(URL, credential="token-b", max_wait=0), 0)
+        with self.assertRaises(RateLimited):
+            limiter.acquire(URL, credential="token-a", max_wait=0)
+        self.assertNotIn("token-a", "".join(limiter.snapshot()))
+
+    def test_async_acquire_spreads_requests(self):
+        """测试异步调用方按速率错开请求"""
+        limiter = AdaptiveRateLimiter(default_rate=20.0)
+
+        async def run():
+            return await asyncio.gather(*(limiter.aacquire(URL) for _ in range(3)))
+
+        waits = sorted(asyncio.run(run()))
+        self.assertEqual(waits[0], 0)
+        self.assertAlmostEqual(waits[2], 0.1, delta=0.02)
+
+    def test_parse_retry_after(self):
+        """测试 Retry-After 的秒数和 HTTP 日期两种格式"""
+        self.assertEqual(parse_retry_after("5"), 5.0)
+        self.assertAlmostEqual(parse_retry_after("Thu, 01 Jan 1970 00:01:40 GMT", now=40.0), 60.0)
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+if __name__ == '__main__':
+    unittest.main()
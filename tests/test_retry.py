@@ -0,0 +1,133 @@
+"""
+重试策略引擎测试用例
+"""
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+
+from backend.models import SourceResult
+from backend.sources.base import BaseSource
+from backend.utils.retry import (
+    AUTH, FATAL, RETRY, THROTTLE, RetryBudget, RetryMetrics, RetryPolicy, classify, check_retryable
+)
+
+
+def _http_error(status, **headers):
+    response = Mock(status_code=status, headers=headers)
+    return requests.exceptions.HTTPError(f"HTTP {status}", response=response)
+
+
+class FlakySource(BaseSource):
+    """前几次请求连接失败的测试数据源"""
+
+    def __init__(self, failures):
+        super().__init__("Flaky")
+        self.failures = failures
+        self.calls = 0
+
+    def download(self) -> bytes:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise requests.exceptions.ConnectionError("Connection aborted")
+        return b"ok"
+
+    def fetch(self, sent_ids, exclude_keywords):
+        return SourceResult(source_name=self.name, papers=[])
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """重试分类、抖动退避、Retry-After 与重试预算"""
+
+    def setUp(self):
+        self.sleeps = []
+        patcher = patch('backend.utils.retry.time.sleep', side_effect=self.sleeps.append)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.budget = RetryBudget()
+        self.metrics = RetryMetrics()
+
+    def _policy(self, **kwargs):
+        return RetryPolicy(budget=self.budget, metrics=self.metrics, **kwargs)
+
+    def test_classification(self):
+        """测试按异常类型和状态码分类"""
+        self.assertEqual(classify(requests.exceptions.Timeout()).kind, RETRY)
+        self.assertEqual(classify(_http_error(503)).kind, RETRY)
+        self.assertEqual(classify(_http_error(404)).kind, FATAL)
+        self.assertEqual(classify(_http_error(401)).kind, AUTH)
+        self.assertEqual(classify(ValueError("bad json")).kind, FATAL)
+        throttled = classify(_http_error(429, **{'Retry-After': '7'}))
+        self.assertEqual((throttled.kind, throttled.retry_after), (THROTTLE, 7.0))
+
+    def test_decorrelated_jitter_bounds(self):
+        """测试退避延迟在 [base, previous * growth] 内且不超过上限"""
+        policy = self._policy(base_delay=1.0, max_delay=10.0)
+        delay = None
+        for _ in range(50):
+            next_delay = policy.backoff(delay)
+            self.assertGreaterEqual(next_delay, 1.0)
+            self.assertLessEqual(next_delay, min(10.0, max(delay or 1.0, 1.0) * 3))
+            delay = next_delay
+
+    def test_retry_after_is_honoured(self):
+        """测试 429 按 Retry-After 等待后重试成功"""
+        func = Mock(side_effect=[_http_error(429, **{'Retry-After': '4'}), "done"])
+        self.assertEqual(self._policy().call(func, key='api'), "done")
+        self.assertEqual(self.sleeps, [4.0])
+        stats = self.metrics.snapshot()['api']
+        self.assertEqual((stats['retries'], stats['throttled'], stats['retry_after_honoured']), (1, 1, 1))
+
+    def test_fatal_error_is_not_retried(self):
+        """测试不可重试的错误直接抛出"""
+        func = Mock(side_effect=_http_error(404))
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self._policy().call(func, key='api')
+        self.assertEqual(func.call_count, 1)
+        self.assertEqual(self.sleeps, [])
+
+    def test_budget_caps_retries_across_calls(self):
+        """测试重试预算在多次调用之间共享，用尽后不再重试"""
+        self.budget.reset(2)
+        policy = self._policy(max_attempts=5)
+        func = Mock(side_effect=requests.exceptions.ConnectionError())
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                policy.call(func, key='api')
+        # 第一次调用用掉 2 次重试，第二次调用不再重试
+        self.assertEqual(func.call_count, 4)
+        self.assertEqual(self.budget.snapshot()['denied'], 2)
+        self.assertEqual(self.metrics.snapshot()['api']['budget_denied'], 2)
+
+    def test_deadline_stops_retries(self):
+        """测试重试等待会越过截止时间时放弃"""
+        func = Mock(side_effect=_http_error(503, **{'Retry-After': '30'}))
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self._policy().call(func, key='api', deadline=time.monotonic() + 5)
+        self.assertEqual(func.call_count, 1)
+        self.assertEqual(self.metrics.snapshot()['api']['deadline_denied'], 1)
+
+    def test_check_retryable(self):
+        """测试按响应状态抛出可重试错误"""
+        check_retryable(Mock(status_code=404, headers={}))
+        with self.assertRaises(Exception) as ctx:
+            check_retryable(Mock(status_code=502, headers={'Retry-After': '2'}), "https://x")
+        self.assertEqual(classify(ctx.exception).retry_after, 2.0)
+
+    def test_source_requests_retry_through_policy(self):
+        """测试数据源原始请求经重试策略重试；熔断探测时只尝试一次"""
+        source = FlakySource(failures=2)
+        with patch.object(BaseSource, 'retry_policy', self._policy(max_attempts=3)):
+            self.assertEqual(source._fetch_raw("https://x", source.download), b"ok")
+            self.assertEqual(source.calls, 3)
+
+            probe = FlakySource(failures=1)
+            probe.probe_mode = True
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                probe._fetch_raw("https://x", probe.download)
+            self.assertEqual(probe.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+数据源结果缓存测试用例
+"""
+import asyncio
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from backend.core.config import Config
+from backend.models import Paper, SourceResult
+from backend.sources.base import BaseSource
+from backend.utils.cache import SQLiteCache, TieredCache
+
+
+class FakeSource(BaseSource):
+    """记录抓取次数的测试数据源"""
+
+    cache_ttl = 600
+    query_attrs = ('queries',)
+
+    def __init__(self):
+        super().__init__("Fake", window_days=1)
+        self.queries = ["nitrogenase"]
+        self.calls = 0
+
+    def fetch(self, sent_ids, exclude_keywords):
+        self.calls += 1
+        papers = [
+            Paper(title=f"paper {i}", abstract="", date="2025-12-30", source=self.name, doi=f"10.1/{i}")
+            for i in range(3)
+        ]
+        return SourceResult(source_name=self.name, papers=papers)
+
+
+class FakeAsyncSource(FakeSource):
+    """带原生异步抓取的测试数据源"""
+
+    async def afetch(self, sent_ids, exclude_keywords, client=None):
+        await asyncio.sleep(0)
+        return self.fetch(sent_ids, exclude_keywords)
+
+
+class TestSourceResultCache(unittest.TestCase):
+    """按窗口和查询配置缓存抓取结果"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.store = SQLiteCache(str(self.tmp_dir / "cache.db"))
+        self.cache = TieredCache(self.store)
+        self.source = FakeSource()
+        # 结果缓存测试不涉及熔断（熔断见 test_source_health）
+        self.breaker_patch = patch.object(Config, 'ENABLE_CIRCUIT_BREAKER', False)
+        self.breaker_patch.start()
+
+    def tearDown(self):
+        self.breaker_patch.stop()
+        self.store.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_second_fetch_hits_cache_and_applies_sent_ids(self):
+        """测试 test-sources 后的 run 复用缓存，并按本次 sent_ids 去重"""
+        first = self.source.fetch_cached(set(), [], cache=self.cache)
+        sent_ids = {self.source.get_item_id(first.papers[0])}
+
+        second = self.source.fetch_cached(sent_ids, [], cache=self.cache)
+
+        self.assertEqual(self.source.calls, 1)
+        self.assertEqual(len(first.papers), 3)
+        self.assertEqual(len(second.papers), 2)
+
+    def test_refresh_bypasses_cache(self):
+        """测试 --refresh 强制重新抓取"""
+        self.source.fetch_cached(set(), [], cache=self.cache)
+        self.source.fetch_cached(set(), [], refresh=True, cache=self.cache)
+        self.assertEqual(self.source.calls, 2)
+
+    def test_query_config_change_invalidates(self):
+        """测试查询配置或排除词变化时不复用旧结果"""
+        key = self.source.cache_key([])
+        self.source.queries = ["rhizobium"]
+        self.assertNotEqual(self.source.cache_key([]), key)
+        self.assertNotEqual(self.source.cache_key(["review"]), self.source.cache_key([]))
+
+    def test_failed_results_are_not_cached(self):
+        """测试失败的抓取结果不写入缓存"""
+        self.source.fetch = lambda sent_ids, exclude: SourceResult("Fake", [], error="timeout")
+        self.source.fetch_cached(set(), [], cache=self.cache)
+        self.assertIsNone(self.cache.get(self.source.cache_key([])))
+
+    def test_async_fetch_shares_cache_with_sync_fetch(self):
+        """测试原生异步抓取写入的结果可被同步调用复用"""
+        source = FakeAsyncSource()
+        self.assertTrue(source.has_async_fetch())
+        first = asyncio.run(source.afetch_cached(set(), [], cache=self.cache))
+        second = source.fetch_cached(set(), [], cache=self.cache)
+
+        self.assertEqual(source.calls, 1)
+        self.assertEqual(len(first.papers), 3)
+        self.assertEqual(len(second.papers), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
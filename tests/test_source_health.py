@@ -0,0 +1,147 @@
+"""
+数据源健康状态与熔断测试用例
+"""
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from backend.core.config import Config
+from backend.models import Paper, SourceResult
+from backend.sources.base import BaseSource
+from backend.storage import init_db
+from backend.storage.source_health import SourceHealthRegistry, CLOSED, OPEN, HALF_OPEN
+
+
+class FlakySource(BaseSource):
+    """按预设结果依次返回的测试数据源"""
+
+    cache_ttl = 0
+
+    def __init__(self, outcomes):
+        super().__init__("Flaky", window_days=1)
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.probe_calls = 0
+
+    def fetch(self, sent_ids, exclude_keywords):
+        self.calls += 1
+        self.probe_calls += int(self.probe_mode)
+        outcome = self.outcomes.pop(0)
+        if outcome is None:
+            # 时间预算在拿到任何论文前用尽
+            self.truncate("分页在第1页截断")
+            return SourceResult(source_name=self.name, papers=[])
+        if outcome:
+            paper = Paper(title="paper", abstract="", date="2025-12-30", source=self.name, doi="10.1/x")
+            return SourceResult(source_name=self.name, papers=[paper])
+        return SourceResult(source_name=self.name, papers=[], error="timeout")
+
+
+class TestSourceHealth(unittest.TestCase):
+    """熔断状态转换与健康统计"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.db_patch = patch.object(Config, 'DB_PATH', str(self.tmp_dir / "test.db"))
+        self.db_patch.start()
+        init_db()
+        self.registry = SourceHealthRegistry(failure_threshold=3, cooldown=3600, max_cooldown=4 * 3600)
+        self.registry_patch = patch('backend.storage.source_health._global_registry', self.registry)
+        self.registry_patch.start()
+
+    def tearDown(self):
+        self.registry_patch.stop()
+        self.db_patch.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _state(self, source="Flaky"):
+        return {item['source']: item for item in self.registry.snapshot()}[source]
+
+    def _expire_cooldown(self):
+        """把冷却期结束时间拨到过去"""
+        from backend.storage.db import get_db
+        with get_db() as conn:
+            conn.execute("UPDATE source_health SET open_until = ?", (time.time() - 1,))
+
+    def test_consecutive_failures_open_circuit_and_skip(self):
+        """测试连续失败后熔断，冷却期内跳过数据源并返回降级结果"""
+        source = FlakySource([False, False, False])
+        for _ in range(3):
+            result = source.fetch_cached(set(), [])
+            self.assertTrue(result.is_degraded)
+            self.assertIsNotNone(result.latency)
+
+        skipped = source.fetch_cached(set(), [])
+
+        self.assertEqual(source.calls, 3)
+        self.assertTrue(skipped.is_degraded)
+        self.assertIn("熔断中", skipped.degraded_reason)
+        state = self._state()
+        self.assertEqual(state['state'], OPEN)
+        self.assertEqual(state['failures'], 3)
+        self.assertEqual(state['last_error'], "timeout")
+
+    def test_deadline_truncation_is_not_a_failure(self):
+        """测试只因时间预算截断的空结果不计为失败，不会触发熔断"""
+        source = FlakySource([False, False, None, None, None])
+        for _ in range(5):
+            result = source.fetch_cached(set(), [])
+            self.assertTrue(result.is_degraded)
+
+        self.assertEqual(source.calls, 5)
+        state = self._state()
+        self.assertEqual(state['state'], CLOSED)
+        self.assertEqual(state['failures'], 2)
+
+    def test_probe_after_cooldown(self):
+        """测试冷却期结束后以探测模式抓取一次：成功恢复，失败则冷却期加倍"""
+        source = FlakySource([False, False, False, False, True])
+        for _ in range(3):
+            source.fetch_cached(set(), [])
+        first_open = self._state()['open_for']
+
+        self._expire_cooldown()
+        source.fetch_cached(set(), [])
+        self.assertEqual(source.probe_calls, 1)
+        self.assertEqual(self._state()['state'], OPEN)
+        self.assertGreater(self._state()['open_for'], first_open * 1.5)
+
+        self._expire_cooldown()
+        result = source.fetch_cached(set(), [])
+        self.assertEqual(len(result.papers), 1)
+        self.assertFalse(source.probe_mode)
+        state = self._state()
+        self.assertEqual(state['state'], CLOSED)
+        self.assertEqual(state['consecutive_failures'], 0)
+        self.assertEqual(state['success_rate'], 0.2)
+
+    def test_concurrent_probe_is_exclusive(self):
+        """测试探测进行中时其他调用方跳过"""
+        for _ in range(3):
+            self.registry.record("Flaky", False, 1.0, "timeout")
+        self._expire_cooldown()
+
+        self.assertTrue(self.registry.before_fetch("Flaky").probe)
+        decision = self.registry.before_fetch("Flaky")
+        self.assertEqual(decision.state, HALF_OPEN)
+        self.assertFalse(decision.allowed)
+
+    def test_test_sources_ignores_open_circuit(self):
+        """测试 respect_circuit=False 时（test-sources）不受熔断限制"""
+        for _ in range(3):
+            self.registry.record("Flaky", False, 1.0, "timeout")
+        source = FlakySource([True])
+        source.respect_circuit = False
+
+        result = source.fetch_cached(set(), [])
+
+        self.assertEqual(source.calls, 1)
+        self.assertEqual(len(result.papers), 1)
+        self.assertEqual(self._state()['state'], CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()